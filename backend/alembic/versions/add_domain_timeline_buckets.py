@@ -0,0 +1,61 @@
+"""Add domain_timeline_buckets and their per-project watermarks
+
+Revision ID: add_domain_timeline_buckets
+Revises: add_search_suggestion_prefix_idx
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_domain_timeline_buckets'
+down_revision: Union[str, None] = 'add_search_suggestion_prefix_idx'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the periodic refresh task in app.services.domain_timeline_cubes;
+    # no backfill is needed here
+    op.create_table(
+        'domain_timeline_buckets',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('domain_id', sa.Integer(), sa.ForeignKey('domains.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('granularity', sa.String(10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('page_count', sa.Integer(), nullable=False),
+        sa.Column('successful_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('content_length_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('processing_time_sum', sa.Float(), nullable=False),
+        sa.Column('processing_time_count', sa.Integer(), nullable=False),
+        sa.Column('first_created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_created_at', sa.DateTime(), nullable=True),
+        sa.Column('url_sketch', sa.LargeBinary(), nullable=False),
+    )
+    op.create_index(
+        'uq_domain_timeline_buckets_domain_grain_start', 'domain_timeline_buckets',
+        ['domain_id', 'granularity', 'bucket_start'], unique=True
+    )
+    op.create_index(
+        'ix_domain_timeline_buckets_grain_start', 'domain_timeline_buckets', ['granularity', 'bucket_start']
+    )
+
+    op.create_table(
+        'domain_timeline_watermarks',
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('refreshed_through', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('domain_timeline_watermarks')
+    op.drop_index('ix_domain_timeline_buckets_grain_start', table_name='domain_timeline_buckets')
+    op.drop_index('uq_domain_timeline_buckets_domain_grain_start', table_name='domain_timeline_buckets')
+    op.drop_table('domain_timeline_buckets')
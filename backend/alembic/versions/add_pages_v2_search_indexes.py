@@ -0,0 +1,64 @@
+"""Add full-text and trigram search indexes for project page listing
+
+Revision ID: add_pages_v2_search_indexes
+Revises: 4d3a2c03ebf3
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_pages_v2_search_indexes'
+down_revision: Union[str, None] = '4d3a2c03ebf3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Generated tsvector over title + body. The 'simple' configuration keeps
+    # archived pages in any language searchable; the body is truncated to stay
+    # below the 1MB tsvector limit. Keep in sync with
+    # app.services.project_page_search.SEARCH_CONFIG.
+    op.execute("""
+        ALTER TABLE pages_v2
+        ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, coalesce(extracted_title, '')), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, left(coalesce(extracted_text, ''), 500000)), 'B')
+        ) STORED
+    """)
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_pages_v2_search_vector "
+        "ON pages_v2 USING gin (search_vector)"
+    )
+
+    # Substring (ILIKE '%term%') search on URL and title
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_pages_v2_url_trgm "
+        "ON pages_v2 USING gin (url gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_pages_v2_title_trgm "
+        "ON pages_v2 USING gin (title gin_trgm_ops)"
+    )
+
+    # Keyset pagination over a project's pages (ORDER BY id DESC)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_project_pages_project_id_id "
+        "ON project_pages (project_id, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_project_pages_project_id_id")
+    op.execute("DROP INDEX IF EXISTS ix_pages_v2_title_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_pages_v2_url_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_pages_v2_search_vector")
+    op.execute("ALTER TABLE pages_v2 DROP COLUMN IF EXISTS search_vector")
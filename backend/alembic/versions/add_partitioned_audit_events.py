@@ -0,0 +1,66 @@
+"""Add monthly-partitioned audit_events table for COPY-based audit persistence
+
+Revision ID: add_partitioned_audit_events
+Revises: add_pages_v2_search_indexes
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_partitioned_audit_events'
+down_revision: Union[str, None] = 'add_pages_v2_search_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Written by app.services.audit_pipeline.AuditCopyWriter, which creates
+    # the monthly partitions (audit_events_yYYYYmMM) on demand. Keep the
+    # column list in sync with AuditCopyWriter.COLUMNS.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS audit_events (
+            event_id varchar(64) NOT NULL,
+            "timestamp" timestamptz NOT NULL,
+            event_type varchar(64) NOT NULL,
+            severity varchar(16) NOT NULL,
+            outcome varchar(16) NOT NULL,
+            user_id varchar(64),
+            username varchar(255),
+            session_id varchar(255),
+            ip_address varchar(64),
+            user_agent text,
+            resource_type varchar(100),
+            resource_id varchar(255),
+            operation varchar(255),
+            description text,
+            component varchar(100),
+            environment varchar(32),
+            correlation_id varchar(255),
+            request_id varchar(255),
+            duration_ms double precision,
+            bytes_processed bigint,
+            records_affected bigint,
+            error_code varchar(100),
+            error_message text,
+            sensitive_data boolean NOT NULL DEFAULT false,
+            details jsonb NOT NULL DEFAULT '{}'::jsonb,
+            PRIMARY KEY (event_id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+
+    # Catches rows whose month partition could not be created
+    op.execute("CREATE TABLE IF NOT EXISTS audit_events_default PARTITION OF audit_events DEFAULT")
+
+    # Indexes on the parent are created on every partition
+    op.execute('CREATE INDEX IF NOT EXISTS ix_audit_events_timestamp ON audit_events USING brin ("timestamp")')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_audit_events_user_ts ON audit_events (user_id, "timestamp")')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_audit_events_type_ts ON audit_events (event_type, "timestamp")')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_audit_events_ip_ts ON audit_events (ip_address, "timestamp")')
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS audit_events CASCADE")
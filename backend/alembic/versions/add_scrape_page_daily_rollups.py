@@ -0,0 +1,58 @@
+"""Add scrape_page_daily_rollups and their per-project watermarks
+
+Revision ID: add_scrape_page_daily_rollups
+Revises: add_scrape_pages_keyset_idx
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_scrape_page_daily_rollups'
+down_revision: Union[str, None] = 'add_scrape_pages_keyset_idx'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by app.services.scrape_page_rollups on first read or by the
+    # periodic refresh task; no backfill is needed here
+    op.create_table(
+        'scrape_page_daily_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('domain_id', sa.Integer(), sa.ForeignKey('domains.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(30), nullable=False),
+        sa.Column('filter_category', sa.String(50), nullable=True),
+        sa.Column('filter_reason', sa.String(100), nullable=True),
+        sa.Column('priority_score', sa.Integer(), nullable=True),
+        sa.Column('confidence_bucket', sa.String(10), nullable=True),
+        sa.Column('is_manually_overridden', sa.Boolean(), nullable=False),
+        sa.Column('can_be_manually_processed', sa.Boolean(), nullable=False),
+        sa.Column('page_count', sa.Integer(), nullable=False),
+        sa.Column('processing_time_sum', sa.Float(), nullable=False),
+        sa.Column('processing_time_count', sa.Integer(), nullable=False),
+        sa.Column('content_length_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('content_length_count', sa.Integer(), nullable=False),
+    )
+    op.create_index('ix_scrape_page_daily_rollups_project_day', 'scrape_page_daily_rollups', ['project_id', 'day'])
+    op.create_index('ix_scrape_page_daily_rollups_domain_day', 'scrape_page_daily_rollups', ['domain_id', 'day'])
+
+    op.create_table(
+        'scrape_page_rollup_watermarks',
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('refreshed_through', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scrape_page_rollup_watermarks')
+    op.drop_index('ix_scrape_page_daily_rollups_domain_day', table_name='scrape_page_daily_rollups')
+    op.drop_index('ix_scrape_page_daily_rollups_project_day', table_name='scrape_page_daily_rollups')
+    op.drop_table('scrape_page_daily_rollups')
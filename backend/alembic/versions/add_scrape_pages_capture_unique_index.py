@@ -0,0 +1,59 @@
+"""Add unique (domain_id, md5(original_url), unix_timestamp) index on scrape_pages
+
+Revision ID: add_scrape_pages_capture_unique
+Revises: add_partitioned_audit_events
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_scrape_pages_capture_unique'
+down_revision: Union[str, None] = 'add_partitioned_audit_events'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Earlier ingestion deduplicated in Python, so concurrent runs could leave
+    # repeated captures. Keep one row per capture (preferring a completed one),
+    # move error logs onto it and drop the rest before adding the index.
+    op.execute("""
+        CREATE TEMP TABLE scrape_page_duplicates ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT
+                id,
+                first_value(id) OVER (
+                    PARTITION BY domain_id, md5(original_url), unix_timestamp
+                    ORDER BY (completed_at IS NULL), id
+                ) AS keep_id
+            FROM scrape_pages
+        ) ranked
+        WHERE id <> keep_id
+    """)
+    op.execute("""
+        UPDATE page_error_logs e
+        SET scrape_page_id = d.keep_id
+        FROM scrape_page_duplicates d
+        WHERE e.scrape_page_id = d.id
+    """)
+    op.execute("""
+        DELETE FROM scrape_pages s
+        USING scrape_page_duplicates d
+        WHERE s.id = d.id
+    """)
+
+    # Conflict target for ScrapePageBulkIngestor's INSERT ... ON CONFLICT DO NOTHING.
+    # Wayback URLs with long query strings exceed the btree tuple limit
+    # (~2.7 KB), so the index stores the URL's md5 rather than the URL itself.
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_scrape_pages_domain_url_timestamp
+        ON scrape_pages (domain_id, md5(original_url), unix_timestamp)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_scrape_pages_domain_url_timestamp")
@@ -0,0 +1,37 @@
+"""Add composite (domain_id, sort column, id) indexes for scrape page listings
+
+Revision ID: add_scrape_pages_keyset_idx
+Revises: add_scrape_pages_capture_unique
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_scrape_pages_keyset_idx'
+down_revision: Union[str, None] = 'add_scrape_pages_capture_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_scrape_pages_domain_created_id': '(domain_id, created_at, id)',
+    'ix_scrape_pages_domain_status_created_id': '(domain_id, status, created_at, id)',
+    'ix_scrape_pages_domain_updated_id': '(domain_id, updated_at, id)',
+    'ix_scrape_pages_domain_priority_id': '(domain_id, priority_score, id)',
+}
+
+
+def upgrade() -> None:
+    # scrape_pages is large and written to by running scrapes; build without locking writes
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON scrape_pages {columns}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,47 @@
+"""Prefix index and forward-decayed scores for search_suggestions
+
+Revision ID: add_search_suggestion_prefix_idx
+Revises: add_scrape_page_daily_rollups
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_search_suggestion_prefix_idx'
+down_revision: Union[str, None] = 'add_scrape_page_daily_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match DECAY_EPOCH in app.services.search_suggestions; the half-life is read
+# from the same setting the service uses
+DECAY_EPOCH = '2024-01-01 00:00:00'
+
+
+def upgrade() -> None:
+    half_life_seconds = settings.SEARCH_SUGGESTION_HALF_LIFE_DAYS * 86400
+    # Old scores were min(1, frequency / 10); rewrite them as forward-decayed
+    # frequencies anchored at the last use
+    op.execute(f"""
+        UPDATE search_suggestions
+        SET score = frequency * power(
+            2.0,
+            EXTRACT(EPOCH FROM (COALESCE(last_used, updated_at) - TIMESTAMP '{DECAY_EPOCH}')) / {half_life_seconds}
+        )
+    """)
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_suggestions_user_text_prefix "
+            "ON search_suggestions (user_id, suggestion_text text_pattern_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_search_suggestions_user_text_prefix")
+    op.execute("UPDATE search_suggestions SET score = LEAST(1.0, frequency * 0.1)")
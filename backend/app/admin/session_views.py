@@ -237,7 +237,8 @@ class SessionManagementView(BaseView):
         session_store = await get_session_store()
         
         try:
-            keys = await session_store.redis.keys("session:*")
+            redis_client = await session_store.get_redis()
+            keys = await redis_client.keys("session:*")
             total_sessions = len(keys)
             
             admin_sessions = 0
@@ -245,7 +246,7 @@ class SessionManagementView(BaseView):
             active_users = set()
             
             for key in keys:
-                session_data = await session_store.redis.get(key)
+                session_data = await redis_client.get(key)
                 if session_data:
                     try:
                         data = json.loads(session_data)
@@ -319,18 +320,19 @@ class SessionManagementView(BaseView):
     async def _get_filtered_sessions(self, session_store: SessionStore, user_filter: str, status_filter: str, role_filter: str) -> List[Dict[str, Any]]:
         """Get filtered sessions based on criteria"""
         try:
-            keys = await session_store.redis.keys("session:*")
+            redis_client = await session_store.get_redis()
+            keys = await redis_client.keys("session:*")
             sessions = []
             
             for key in keys:
-                session_data = await session_store.redis.get(key)
+                session_data = await redis_client.get(key)
                 if session_data:
                     try:
                         data = json.loads(session_data)
                         session_id = key.decode('utf-8').replace('session:', '')
                         
                         # Get session expiry
-                        ttl = await session_store.redis.ttl(key)
+                        ttl = await redis_client.ttl(key)
                         expires_in = max(0, ttl)
                         
                         session_info = {
@@ -574,7 +576,8 @@ class SessionManagementView(BaseView):
     async def _get_redis_stats(self, session_store: SessionStore) -> Dict[str, Any]:
         """Get Redis statistics"""
         try:
-            info = await session_store.redis.info()
+            redis_client = await session_store.get_redis()
+            info = await redis_client.info()
             
             return {
                 'connected_clients': info.get('connected_clients'),
@@ -27,53 +27,16 @@ import uuid
 import zipfile
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-# Import pandas with error handling for optional engines
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    pd = None
-    PANDAS_AVAILABLE = False
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
 
-# Optional dependencies - handle gracefully if not installed
-try:
-    import pyarrow as pa
-    import pyarrow.parquet as pq
-    PARQUET_AVAILABLE = True
-except ImportError:
-    pa = None
-    pq = None
-    PARQUET_AVAILABLE = False
-
-try:
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment
-    EXCEL_AVAILABLE = True
-except ImportError:
-    Workbook = None
-    Font = PatternFill = Alignment = None
-    EXCEL_AVAILABLE = False
-
-try:
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    PDF_AVAILABLE = True
-except ImportError:
-    colors = letter = A4 = getSampleStyleSheet = ParagraphStyle = inch = None
-    SimpleDocTemplate = Paragraph = Spacer = Table = TableStyle = None
-    PDF_AVAILABLE = False
-from sqlmodel import Session
 import redis.asyncio as aioredis
 
 from ....core.config import settings
+from ....core.lazy_imports import module_available
 from ....api import deps
 from ....models.user import User
 from ....services.analytics_service import (
@@ -87,6 +50,13 @@ from ....schemas.analytics import (
     BaseAnalyticsResponse, AnalyticsErrorResponse
 )
 
+# Optional export engines are imported by the export that needs them; only
+# their presence is checked when the router loads
+PANDAS_AVAILABLE = module_available("pandas")
+PARQUET_AVAILABLE = module_available("pyarrow")
+EXCEL_AVAILABLE = module_available("openpyxl")
+PDF_AVAILABLE = module_available("reportlab")
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -478,6 +448,7 @@ class AnalyticsExporter:
         
         if not PANDAS_AVAILABLE:
             raise ValueError("Parquet export requires pandas package to be installed")
+        import pandas as pd
         
         # Convert to pandas DataFrame based on data type
         if query_type == "domain_timeline":
@@ -519,6 +490,8 @@ class AnalyticsExporter:
         """Export data as Excel"""
         if not EXCEL_AVAILABLE:
             raise ValueError("Excel export requires openpyxl package to be installed")
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, PatternFill, Alignment
         
         workbook = Workbook()
         
@@ -639,6 +612,11 @@ class AnalyticsExporter:
         """Export data as PDF report"""
         if not PDF_AVAILABLE:
             raise ValueError("PDF export requires reportlab package to be installed")
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
         
         doc = SimpleDocTemplate(str(file_path), pagesize=A4)
         styles = getSampleStyleSheet()
@@ -4,7 +4,7 @@ DuckDB Analytics API endpoints for operational monitoring and analytics queries
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
 from ....services.duckdb_service import (
@@ -25,6 +25,7 @@ class AnalyticsQueryRequest(BaseModel):
     query: str = Field(..., description="SQL query to execute", min_length=1, max_length=10000)
     params: Optional[Dict[str, Any]] = Field(None, description="Query parameters")
     fetch_mode: str = Field("all", description="Fetch mode: 'all', 'one', 'many', or 'none'")
+    result_format: str = Field("json", description="'json' or 'arrow' (Arrow IPC stream, uses cached prepared statements)")
     timeout_seconds: Optional[int] = Field(30, description="Query timeout in seconds", ge=1, le=300)
 
 
@@ -38,7 +39,7 @@ class QueryResponse(BaseModel):
     """Response model for query results"""
     data: Any = Field(..., description="Query result data")
     execution_time: float = Field(..., description="Execution time in seconds")
-    memory_usage: float = Field(..., description="Memory usage in MB")
+    memory_usage: float = Field(..., description="Process memory in MB at the last periodic sample")
     row_count: Optional[int] = Field(None, description="Number of rows returned")
     columns: Optional[List[str]] = Field(None, description="Column names")
     query_hash: Optional[str] = Field(None, description="Query hash for caching")
@@ -146,8 +147,12 @@ async def execute_query(
     Execute a SQL query against the DuckDB analytics database.
     
     Supports parameterized queries and different fetch modes for optimal performance.
+    With ``result_format="arrow"`` the result is returned as an Arrow IPC stream.
     """
     try:
+        if request.result_format == "arrow":
+            return await _arrow_stream_response(service, request)
+        
         result = await service.execute_query(
             query=request.query,
             params=request.params,
@@ -181,6 +186,26 @@ async def execute_query(
         )
 
 
+async def _arrow_stream_response(service: DuckDBService, request: AnalyticsQueryRequest) -> Response:
+    """Serialize a columnar query result as an Arrow IPC stream"""
+    import pyarrow as pa
+    
+    result = await service.execute_prepared(request.query, request.params, result_format="arrow")
+    table = result.data
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        media_type="application/vnd.apache.arrow.stream",
+        headers={
+            "X-Execution-Time": f"{result.execution_time:.6f}",
+            "X-Row-Count": str(result.row_count),
+        }
+    )
+
+
 @router.post(
     "/batch",
     response_model=BatchQueryResponse,
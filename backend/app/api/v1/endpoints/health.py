@@ -7,6 +7,7 @@ from typing import Any
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.redis_pool import available_redis, connection_stats
 
 router = APIRouter()
 
@@ -44,4 +45,17 @@ async def health_db(db: AsyncSession = Depends(get_db)) -> dict[str, Any]:
 			"status": "unhealthy",
 			"database": "disconnected",
 			"error": str(e)
-		}
\ No newline at end of file
+		}
+
+
+@router.get("/redis")
+async def health_redis() -> dict[str, Any]:
+	"""
+	Redis health check with shared connection pool usage
+	"""
+	healthy = await available_redis() is not None
+	return {
+		"status": "healthy" if healthy else "unhealthy",
+		"redis": "connected" if healthy else "disconnected",
+		"pools": connection_stats()
+	}
@@ -315,15 +315,18 @@ async def record_search(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Record a search in user's history"""
+    """
+    Record a search in user's history
+    
+    The entry is written in a background batch, so no id is returned.
+    """
     try:
-        search_history = await library_service.record_search_history(
+        await library_service.record_search_history(
             db, current_user, query_text, filters, result_count,
             project_id, execution_time_ms=execution_time_ms
         )
         
         return {
-            "id": search_history.id,
             "message": "Search recorded in history"
         }
     except Exception as e:
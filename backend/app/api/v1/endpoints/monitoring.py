@@ -1,8 +1,10 @@
 """
 Monitoring and analytics endpoints
 """
-from typing import Any, Dict
-from fastapi import APIRouter, Depends, Query, HTTPException, status, Response
+import hmac
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, status, Response
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_approved_user, require_permission
@@ -10,6 +12,7 @@ from app.models.user import User
 from app.models.rbac import PermissionType
 from app.services.monitoring import MonitoringService
 from app.services.prometheus_metrics import PrometheusMetricsService
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -219,63 +222,45 @@ async def detailed_health_check(
 
 # Prometheus Metrics Endpoints
 
-@router.get("/prometheus/metrics")
-async def get_prometheus_metrics(
-    db: AsyncSession = Depends(get_db)
-):
+async def verify_prometheus_scrape(authorization: Optional[str] = Header(None)) -> None:
     """
-    Get Prometheus metrics for the entire system (no authentication required for Prometheus scraping)
+    Require the PROMETHEUS_SCRAPE_TOKEN bearer token when one is configured
+    
+    Prometheus cannot log in as a user, so the scrape endpoints take a shared
+    token instead; without a configured token they stay open for
+    deployments that only expose them on the internal network.
     """
-    try:
-        # Generate basic system metrics
-        from app.services.monitoring import MonitoringService
-        overview = await MonitoringService.get_system_overview(db)
-        
-        metrics_lines = [
-            "# HELP chrono_users_total Total number of users",
-            "# TYPE chrono_users_total gauge",
-            f"chrono_users_total {overview['totals']['users']}",
-            "",
-            "# HELP chrono_projects_total Total number of projects", 
-            "# TYPE chrono_projects_total gauge",
-            f"chrono_projects_total {overview['totals']['projects']}",
-            "",
-            "# HELP chrono_domains_total Total number of domains",
-            "# TYPE chrono_domains_total gauge", 
-            f"chrono_domains_total {overview['totals']['domains']}",
-            "",
-            "# HELP chrono_pages_total Total number of pages",
-            "# TYPE chrono_pages_total gauge",
-            f"chrono_pages_total {overview['totals']['pages']}",
-            "",
-            "# HELP chrono_active_users Total number of active users",
-            "# TYPE chrono_active_users gauge",
-            f"chrono_active_users {overview['active']['users']}",
-            "",
-            "# HELP chrono_active_projects Total number of active projects",
-            "# TYPE chrono_active_projects gauge",
-            f"chrono_active_projects {overview['active']['projects']}",
-            ""
-        ]
-        
-        metrics_content = "\n".join(metrics_lines)
-        return Response(content=metrics_content, media_type="text/plain")
-        
-    except Exception:
-        error_metrics = [
-            "# HELP chrono_metrics_error Metrics collection error",
-            "# TYPE chrono_metrics_error gauge",
-            "chrono_metrics_error 1"
-        ]
-        return Response(content="\n".join(error_metrics), media_type="text/plain")
+    token = settings.PROMETHEUS_SCRAPE_TOKEN
+    if not token:
+        return
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.encode(), token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics scrape token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/prometheus/metrics", dependencies=[Depends(verify_prometheus_scrape)])
+async def get_prometheus_metrics():
+    """
+    Get Prometheus metrics for the entire system (scrape token required when PROMETHEUS_SCRAPE_TOKEN is set)
+    
+    Serializes the current values only: DB-derived gauges are refreshed by the
+    background metrics collector, so a slow database cannot stall the scrape.
+    """
+    from app.services.prometheus_metrics_service import prometheus_metrics_service
+    metrics_content = await prometheus_metrics_service.generate_all_metrics()
+    return Response(content=metrics_content, media_type=CONTENT_TYPE_LATEST)
 
 
-@router.get("/shared-pages/prometheus")
+@router.get("/shared-pages/prometheus", dependencies=[Depends(verify_prometheus_scrape)])
 async def get_shared_pages_prometheus_metrics(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get Prometheus metrics for shared pages architecture (no authentication required for Prometheus scraping)
+    Get Prometheus metrics for shared pages architecture (scrape token required when PROMETHEUS_SCRAPE_TOKEN is set)
     """
     try:
         metrics_content = await PrometheusMetricsService.generate_shared_pages_metrics(db)
@@ -289,12 +274,12 @@ async def get_shared_pages_prometheus_metrics(
         return Response(content="\n".join(error_metrics), media_type="text/plain")
 
 
-@router.get("/health/prometheus")
+@router.get("/health/prometheus", dependencies=[Depends(verify_prometheus_scrape)])
 async def get_health_prometheus_metrics(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get Prometheus health metrics (no authentication required for Prometheus scraping)
+    Get Prometheus health metrics (scrape token required when PROMETHEUS_SCRAPE_TOKEN is set)
     """
     try:
         metrics_content = await PrometheusMetricsService.generate_health_metrics(db)
@@ -308,13 +293,13 @@ async def get_health_prometheus_metrics(
         return Response(content="\n".join(error_metrics), media_type="text/plain")
 
 
-@router.get("/business/prometheus")
+@router.get("/business/prometheus", dependencies=[Depends(verify_prometheus_scrape)])
 async def get_business_prometheus_metrics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get Prometheus business metrics (no authentication required for Prometheus scraping)
+    Get Prometheus business metrics (scrape token required when PROMETHEUS_SCRAPE_TOKEN is set)
     """
     try:
         metrics_content = await PrometheusMetricsService.generate_business_metrics(db, days)
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Resp
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_
 from datetime import datetime
 import logging
 
@@ -29,7 +29,11 @@ from app.models.project import (
 from app.models.scraping import ScrapePage, IncrementalRunType, IncrementalRunStatus
 from app.models.rbac import PermissionType
 from app.services.projects import ProjectService, DomainService, ScrapeSessionService
-from app.models.shared_pages import ProjectPage, PageV2
+from app.services.project_page_search import (
+    InvalidCursorError,
+    ProjectPageFilters,
+    ProjectPageSearchService,
+)
 from app.services.meilisearch_service import MeilisearchService
 from app.services.langextract_service import langextract_service
 from app.services.openrouter_service import openrouter_service
@@ -307,9 +311,11 @@ async def get_project_pages(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_approved_user),
+    response: Response,
     project_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from the X-Next-Cursor header"),
     search: Optional[str] = Query(None),
     starred_only: bool = Query(False, description="Filter to only starred pages"),
     # Accept comma-separated tags and review statuses for parity with general search
@@ -318,98 +324,35 @@ async def get_project_pages(
 ) -> List[Dict[str, Any]]:
     """
     Get pages for a project
+
+    Full page bodies are never returned; ``content_preview`` is a snippet
+    computed in the database. When more results exist, the cursor for the
+    next page is returned in the ``X-Next-Cursor`` response header.
     """
     # Parse CSV helpers
     def parse_csv_param(param: Optional[str]) -> List[str]:
-        return [item.strip() for item in param.split(",")] if param else []
-
-    # Query shared pages for this project through ProjectPage junction table
-    query = select(PageV2, ProjectPage).join(
-        ProjectPage, PageV2.id == ProjectPage.page_id
-    ).where(ProjectPage.project_id == project_id)
-    
-    # Apply filters
-    if starred_only:
-        query = query.where(ProjectPage.is_starred is True)
-    
-    if tags:
-        tag_list = parse_csv_param(tags)
-        # Filter by tags (assuming tags are stored as JSON array in ProjectPage)
-        for tag in tag_list:
-            query = query.where(ProjectPage.tags.contains([tag]))
-    
-    if review_status:
-        status_list = parse_csv_param(review_status)
-        query = query.where(ProjectPage.review_status.in_(status_list))
-    
-    if search:
-        # Simple text search on page content
-        search_term = f"%{search}%"
-        query = query.where(
-            or_(
-                PageV2.title.ilike(search_term),
-                PageV2.extracted_text.ilike(search_term),
-                PageV2.url.ilike(search_term)
-            )
+        return [item.strip() for item in param.split(",") if item.strip()] if param else []
+
+    filters = ProjectPageFilters(
+        search=search,
+        starred_only=starred_only,
+        tags=parse_csv_param(tags),
+        review_statuses=parse_csv_param(review_status),
+    )
+    try:
+        rows, next_cursor = await ProjectPageSearchService.list_pages(
+            db, project_id, filters, limit=limit, cursor=cursor, skip=skip
         )
-    
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
-    
-    # Execute query
-    result = await db.execute(query)
-    pages_data = result.all()
-    
-    # Format response
-    pages = []
-    for page, project_page in pages_data:
-        pages.append({
-            "id": str(page.id),
-            "url": page.url,
-            "title": page.title or page.extracted_title,
-            "extracted_text": page.extracted_text,
-            "timestamp": page.unix_timestamp,
-            "capture_date": page.capture_date.isoformat() if page.capture_date else None,
-            "is_starred": project_page.is_starred,
-            "tags": project_page.tags or [],
-            "review_status": project_page.review_status,
-            "notes": project_page.notes,
-            "quality_score": page.quality_score,
-            "word_count": page.word_count
-        })
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Helper to build a snippet around first matched query term
-    def build_match_snippet(text: Optional[str], query: Optional[str], max_length: int = 200) -> Optional[str]:
-        if not text:
-            return None
-        if not query:
-            return text[:max_length] + "..." if len(text) > max_length else text
-        lowered_text = text.lower()
-        terms = [t for t in query.split() if t]
-        first_index = -1
-        match_len = 0
-        for term in terms:
-            idx = lowered_text.find(term.lower())
-            if idx != -1 and (first_index == -1 or idx < first_index):
-                first_index = idx
-                match_len = len(term)
-        if first_index == -1:
-            return text[:max_length] + "..." if len(text) > max_length else text
-        context = max_length
-        start = max(0, first_index - context // 3)
-        end = min(len(text), first_index + match_len + (2 * context) // 3)
-        snippet = text[start:end].strip()
-        if start > 0:
-            snippet = "..." + snippet
-        if end < len(text):
-            snippet = snippet + "..."
-        return snippet
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
     # Pre-compute starred status for returned pages for current user
     try:
         from app.models.library import StarredItem, ItemType
-        from sqlmodel import select
-        page_ids = [p.id for p in pages]
+        page_ids = [row["page_id"] for row in rows]
         starred_set = set()
         if page_ids:
             starred_rows = await db.execute(
@@ -425,30 +368,32 @@ async def get_project_pages(
 
     # Convert to dict format for JSON response including snippet and metadata
     response_pages: List[Dict[str, Any]] = []
-    for page in pages:
-        snippet = build_match_snippet(page.extracted_text, search, 200)
+    for row in rows:
         response_pages.append({
-            "id": page.id,
-            "url": page.original_url,
-            "title": page.title or page.extracted_title,
-            "content_type": page.content_type,
-            "word_count": page.word_count,
-            "content_preview": snippet,
-            "capture_date": page.capture_date.isoformat() if getattr(page, 'capture_date', None) else None,
-            "scraped_at": page.scraped_at.isoformat() if getattr(page, 'scraped_at', None) else None,
-            "status_code": page.status_code,
-            "language": page.language,
-            "author": page.author,
-            "meta_description": page.meta_description,
-            "review_status": page.review_status,
-            "page_category": page.page_category,
-            "priority_level": page.priority_level,
-            "tags": page.tags or [],
-            "is_starred": page.id in starred_set,
-            "reviewed_at": page.reviewed_at.isoformat() if getattr(page, 'reviewed_at', None) else None,
-            "processed": page.processed,
-            "indexed": page.indexed,
-            "error_message": page.error_message
+            "id": str(row["page_id"]),
+            "url": row["url"],
+            "title": row["title"] or row["extracted_title"],
+            "content_type": row["content_type"],
+            "word_count": row["word_count"],
+            "content_preview": row.get("snippet"),
+            "timestamp": row["unix_timestamp"],
+            "capture_date": row["capture_date"].isoformat() if row["capture_date"] else None,
+            "status_code": row["status_code"],
+            "language": row["language"],
+            "author": row["author"],
+            "meta_description": row["meta_description"],
+            "quality_score": float(row["quality_score"]) if row["quality_score"] is not None else None,
+            "review_status": row["review_status"],
+            "page_category": row["page_category"],
+            "priority_level": row["priority_level"],
+            "tags": row["tags"] or [],
+            "notes": row["notes"],
+            "is_starred": row["is_starred"] or row["page_id"] in starred_set,
+            "reviewed_at": row["reviewed_at"].isoformat() if row["reviewed_at"] else None,
+            "processed": row["processed"],
+            "indexed": row["indexed"],
+            "error_message": row["error_message"],
+            "search_rank": row.get("rank"),
         })
 
     return response_pages
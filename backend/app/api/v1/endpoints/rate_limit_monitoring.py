@@ -15,6 +15,7 @@ from ....core.database import get_db
 from ....models.user import User
 from ....api.deps import get_current_active_user
 from ....core.rate_limiter import rate_limiter, RateLimitType
+from ....services.archive_governor import archive_governor
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -357,4 +358,39 @@ async def get_blocked_identifiers(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve blocked identifiers"
-        )
\ No newline at end of file
+        )
+
+@router.get("/archive-governor", response_model=Dict[str, Any])
+async def get_archive_governor_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Granted versus throttled archive.org requests per host and proxy
+    
+    Also reports the adaptive rate each scope currently runs at. Only
+    accessible by admin users.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    try:
+        scopes = await archive_governor.snapshot()
+    except Exception as e:
+        logger.error(f"Failed to get archive governor stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve archive governor statistics"
+        )
+    
+    return {
+        "enabled": archive_governor.enabled,
+        "scopes": scopes,
+        "totals": {
+            name: sum(scope[name] for scope in scopes)
+            for name in ("granted", "throttled", "ok", "errors")
+        },
+        "timestamp": datetime.utcnow()
+    }
@@ -22,7 +22,8 @@ from app.models.scrape_page_api import (
     SortOrder,
     BulkManualProcessingRequest,
     BulkOperationResult,
-    BulkOperationPreview
+    BulkOperationPreview,
+    BulkOperationProgress
 )
 from app.services.scrape_page_service import ScrapePageService
 
@@ -82,6 +83,10 @@ async def list_scrape_pages(
     can_be_manually_processed: Optional[bool] = Query(default=None, description="Filter by manual processing eligibility"),
     is_manually_overridden: Optional[bool] = Query(default=None, description="Filter by manual override status"),
     
+    # Keyset pagination and totals
+    cursor: Optional[str] = Query(default=None, max_length=512, description="next_cursor of the previous page; replaces page"),
+    exact_total: bool = Query(default=True, description="Count matches exactly instead of estimating large totals"),
+    
     # Dependencies
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_approved_user)
@@ -97,7 +102,9 @@ async def list_scrape_pages(
     - Text search across titles, URLs, and content
     - Manual processing status
     
-    Results are paginated and can be sorted by various fields.
+    Results are paginated and can be sorted by various fields. For deep
+    listings pass the returned next_cursor instead of a page number, and
+    exact_total=false to get a planner estimate for large totals.
     """
     
     try:
@@ -168,7 +175,9 @@ async def list_scrape_pages(
             completed_before=parsed_completed_before,
             search_query=search_query,
             can_be_manually_processed=can_be_manually_processed,
-            is_manually_overridden=is_manually_overridden
+            is_manually_overridden=is_manually_overridden,
+            cursor=cursor,
+            exact_total=exact_total
         )
         
         # Get scrape pages from service
@@ -544,7 +553,8 @@ async def execute_bulk_operation(
     **Safety Features:**
     - Maximum page limits to prevent performance issues
     - Dry-run mode to preview operations
-    - Batch processing for large operations
+    - Set-based updates in short id-range chunks
+    - Background job mode for very large selections; poll the progress endpoint
     - Progress tracking and WebSocket notifications
     - Transaction safety with rollback on errors
     
@@ -553,7 +563,8 @@ async def execute_bulk_operation(
     - `action`: The operation to perform
     - `max_pages`: Maximum number of pages to process (safety limit)
     - `dry_run`: Preview mode without making actual changes
-    - `batch_size`: Number of pages to process per batch
+    - `batch_size`: Number of pages changed per UPDATE chunk
+    - `run_async`: Run as a background job (automatic for very large selections)
     - `reason`: Optional reason for audit trails
     - `priority_override`: New priority score (for relevant actions)
     - `force_reprocess`: Whether to reprocess completed pages
@@ -595,4 +606,44 @@ async def execute_bulk_operation(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to execute bulk operation"
-        )
\ No newline at end of file
+        )
+
+
+@router.get(
+    "/{project_id}/scrape-pages/manual-processing/bulk/{operation_id}/progress",
+    response_model=BulkOperationProgress,
+    summary="Get bulk operation progress",
+    description="Latest per-chunk progress of a bulk operation, including background jobs"
+)
+async def get_bulk_operation_progress(
+    project_id: int,
+    operation_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_approved_user)
+) -> BulkOperationProgress:
+    """
+    Get the progress of a bulk operation.
+    
+    Progress is published after every chunk and kept for
+    SCRAPE_PAGE_BULK_PROGRESS_TTL_SECONDS after the operation finishes.
+    """
+    try:
+        progress = await ScrapePageService.get_bulk_operation_progress(
+            db=db,
+            project_id=project_id,
+            user_id=current_user.id,
+            operation_id=operation_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bulk operation not found or expired"
+        )
+    
+    return progress
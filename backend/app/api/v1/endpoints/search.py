@@ -1,14 +1,31 @@
 """
 Advanced search endpoints
 """
-from datetime import date
+from datetime import date, datetime
+from pathlib import Path
+import uuid
 from typing import Any, Dict, List, Optional
+from celery import states
+from celery.result import AsyncResult
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_approved_user
+from app.core.config import settings
 from app.models.user import User
 from app.services.advanced_search import AdvancedSearchService, SearchFilters
+from app.services.search_export import (
+    EXPORT_MEDIA_TYPES,
+    PARQUET_AVAILABLE,
+    InvalidExportCursorError,
+    SearchExportFilters,
+    SearchExportFormat,
+    SearchExportService,
+    parse_export_cursor,
+)
+from app.tasks.celery_app import celery_app
+from app.tasks.export_tasks import export_search_results_to_file
 
 router = APIRouter()
 
@@ -227,72 +244,174 @@ async def save_search(
         )
 
 
+def _parse_csv_param(param: Optional[str]) -> List[str]:
+    return [item.strip() for item in param.split(",") if item.strip()] if param else []
+
+
+def _parse_csv_int_param(param: Optional[str]) -> List[int]:
+    if not param:
+        return []
+    try:
+        return [int(item.strip()) for item in param.split(",") if item.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid integer values in parameter"
+        )
+
+
 @router.get("/export")
 async def export_search_results(
-    format: str = Query("json", pattern="^(json|csv|xlsx)$", description="Export format"),
+    format: str = Query("jsonl", pattern="^(jsonl|csv|parquet|xlsx)$", description="Export format"),
     q: Optional[str] = Query(None, description="Search query"),
     projects: Optional[str] = Query(None, description="Comma-separated project IDs"),
     domains: Optional[str] = Query(None, description="Comma-separated domain names"),
     date_from: Optional[date] = Query(None, description="Filter from date"),
     date_to: Optional[date] = Query(None, description="Filter to date"),
-    max_results: int = Query(1000, ge=1, le=10000, description="Maximum results to export"),
-    db: AsyncSession = Depends(get_db),
+    include_text: bool = Query(True, description="Include extracted page text"),
+    compress: bool = Query(False, description="Gzip the output on the fly (jsonl/csv)"),
+    cursor: Optional[str] = Query(None, description="Resume after this project_page_id or cursor token"),
     current_user: User = Depends(get_current_approved_user)
-) -> Dict[str, Any]:
+) -> StreamingResponse:
     """
-    Export search results in various formats
+    Stream search results as JSONL, CSV or Parquet
+
+    Rows are ordered by ``project_page_id``. To resume an interrupted export,
+    pass the last received ``project_page_id`` as ``cursor``; the CSV header
+    is not repeated on resumed exports.
     """
-    # Parse parameters
-    def parse_csv_param(param: Optional[str]) -> List[str]:
-        return [item.strip() for item in param.split(",")] if param else []
-    
-    def parse_csv_int_param(param: Optional[str]) -> List[int]:
-        if not param:
-            return []
-        try:
-            return [int(item.strip()) for item in param.split(",")]
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid integer values in parameter"
-            )
-    
-    # Create search filters for export
-    filters = SearchFilters(
+    if format == "xlsx":
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Export format 'xlsx' not yet implemented"
+        )
+    export_format = SearchExportFormat(format)
+    if export_format == SearchExportFormat.PARQUET and not PARQUET_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Export format 'parquet' requires pyarrow package to be installed"
+        )
+
+    try:
+        after = parse_export_cursor(cursor)
+    except InvalidExportCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    filters = SearchExportFilters(
         query=q,
-        projects=parse_csv_int_param(projects),
-        domains=parse_csv_param(domains),
+        projects=_parse_csv_int_param(projects),
+        domains=_parse_csv_param(domains),
         date_from=date_from,
         date_to=date_to,
-        per_page=max_results,
-        page=1
+        include_text=include_text,
     )
-    
-    try:
-        # Get search results
-        results = await AdvancedSearchService.search_pages(
-            db=db,
-            filters=filters,
-            user_id=current_user.id
-        )
-        
-        # For now, return JSON format
-        # TODO: Implement CSV and XLSX export
-        if format == "json":
-            return {
-                "format": format,
-                "total_exported": len(results["pages"]),
-                "data": results["pages"],
-                "exported_at": "2024-01-01T00:00:00Z"  # Would use actual timestamp
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_501_NOT_IMPLEMENTED,
-                detail=f"Export format '{format}' not yet implemented"
-            )
-            
-    except Exception as e:
+    compressed = compress and export_format != SearchExportFormat.PARQUET
+    filename = f"search_export_{datetime.utcnow():%Y%m%d_%H%M%S}" + SearchExportService.file_suffix(
+        export_format, compress
+    )
+    return StreamingResponse(
+        SearchExportService.stream_export_in_session(
+            current_user.id, filters, export_format, after=after, compress=compress
+        ),
+        media_type="application/gzip" if compressed else EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.post("/export/jobs")
+async def create_export_job(
+    format: str = Query("jsonl", pattern="^(jsonl|csv|parquet)$", description="Export format"),
+    q: Optional[str] = Query(None, description="Search query"),
+    projects: Optional[str] = Query(None, description="Comma-separated project IDs"),
+    domains: Optional[str] = Query(None, description="Comma-separated domain names"),
+    date_from: Optional[date] = Query(None, description="Filter from date"),
+    date_to: Optional[date] = Query(None, description="Filter to date"),
+    include_text: bool = Query(True, description="Include extracted page text"),
+    compress: bool = Query(False, description="Gzip the output file (jsonl/csv)"),
+    current_user: User = Depends(get_current_approved_user)
+) -> Dict[str, Any]:
+    """
+    Run a very large export as a background job that writes to local storage
+    """
+    if format == SearchExportFormat.PARQUET.value and not PARQUET_AVAILABLE:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Export failed: {str(e)}"
-        )
\ No newline at end of file
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Export format 'parquet' requires pyarrow package to be installed"
+        )
+    job_id = str(uuid.uuid4())
+    # Record the owner before a worker picks the job up, so it can be polled while queued
+    celery_app.backend.store_result(job_id, {"user_id": current_user.id}, states.PENDING)
+    task = export_search_results_to_file.apply_async(task_id=job_id, kwargs=dict(
+        user_id=current_user.id,
+        export_format=format,
+        query=q,
+        projects=_parse_csv_int_param(projects),
+        domains=_parse_csv_param(domains),
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None,
+        include_text=include_text,
+        compress=compress,
+    ))
+    return {"job_id": task.id, "status": "PENDING", "format": format}
+
+
+def _find_export_file(user_id: int, job_id: str) -> Optional[Path]:
+    # Files live under the requesting user's directory; the parent check also
+    # rejects job ids containing path separators.
+    user_dir = Path(settings.SEARCH_EXPORT_DIR) / str(user_id)
+    for fmt in SearchExportFormat:
+        for compress in (False, True):
+            path = SearchExportService.export_path(user_id, job_id, fmt, compress)
+            if path.parent == user_dir and path.exists():
+                return path
+    return None
+
+
+@router.get("/export/jobs/{job_id}")
+async def get_export_job(
+    job_id: str,
+    current_user: User = Depends(get_current_approved_user)
+) -> Dict[str, Any]:
+    """
+    Get background export job status
+    """
+    task_result = AsyncResult(job_id, app=celery_app)
+    info = task_result.info if isinstance(task_result.info, dict) else {}
+    # A failed job's info is its exception; the extended result still carries the task kwargs
+    owner_id = info.get("user_id", (task_result.kwargs or {}).get("user_id"))
+    if owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found")
+
+    file_path = _find_export_file(current_user.id, job_id)
+    response: Dict[str, Any] = {
+        "job_id": job_id,
+        "status": "SUCCESS" if file_path else task_result.status,
+        "rows": info.get("rows"),
+        "bytes": info.get("bytes"),
+        "download_ready": file_path is not None,
+    }
+    if task_result.failed():
+        response["error"] = str(task_result.result)
+    return response
+
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    current_user: User = Depends(get_current_approved_user)
+) -> FileResponse:
+    """
+    Download the output of a completed background export job
+    """
+    file_path = _find_export_file(current_user.id, job_id)
+    if not file_path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export file not found")
+
+    media_type = "application/gzip" if file_path.suffix == ".gz" else EXPORT_MEDIA_TYPES.get(
+        SearchExportFormat(file_path.suffix.lstrip(".")), "application/octet-stream"
+    )
+    return FileResponse(
+        path=str(file_path),
+        media_type=media_type,
+        filename=f"search_export_{job_id}{''.join(file_path.suffixes)}",
+    )
\ No newline at end of file
@@ -20,6 +20,10 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Chrono Scraper"
     VERSION: str = "2.0.0"
     API_V1_STR: str = "/api/v1"
+    # Endpoint modules not to mount, by module name (e.g. ["parquet_pipeline"] on nodes without analytics)
+    API_DISABLED_ROUTERS: List[str] = []
+    # Log how long each router and Celery task module takes to import at startup
+    STARTUP_IMPORT_PROFILE: bool = False
     
     # Security
     SECRET_KEY: str = secrets.token_urlsafe(32)
@@ -106,6 +110,12 @@ class Settings(BaseSettings):
     def REDIS_URL(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
 
+    # Shared async connection pools (app/core/redis_pool.py): one per event loop, URL and decoding
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT_SECONDS: float = 5.0  # wait for a free connection before failing
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds between availability pings
+
     # Celery
     CELERY_BROKER_URL: str = ""
     CELERY_RESULT_BACKEND: str = ""
@@ -122,6 +132,17 @@ class Settings(BaseSettings):
             return v
         return f"redis://{values.data.get('REDIS_HOST', 'redis')}:{values.data.get('REDIS_PORT', 6379)}/1"
 
+    # Worker bootstrap: resources loaded once in the parent and shared copy-on-write by children
+    CELERY_WORKER_PRELOAD_ENABLED: bool = True
+    CELERY_WORKER_PRELOAD: List[str] = ["spacy", "trafilatura", "embeddings"]
+    # Children are recycled once their private (unshared) memory exceeds this (KB)
+    CELERY_WORKER_MAX_MEMORY_PER_CHILD_KB: int = 350000
+    # Optional safety net on top of memory based recycling
+    CELERY_WORKER_MAX_TASKS_PER_CHILD: Optional[int] = None
+    # Comma-separated queues this worker consumes (same as its --queues); only the task
+    # modules and preloads those queues need are imported. Empty imports everything
+    CELERY_WORKER_QUEUES: str = ""
+
     # Meilisearch
     MEILISEARCH_HOST: str = "http://meilisearch:7700"
     MEILISEARCH_MASTER_KEY: str = "RuvEMt9LztgYqdfqRFmZbT52uysNrt73ps57RZ2PRd53kjWxe2qiv9kadk9EiV5k"
@@ -230,6 +251,9 @@ class Settings(BaseSettings):
     FIRECRAWL_V2_BATCH_ENABLED: bool = True
     # Keep v2 batch-only for pause/stop semantics
     FIRECRAWL_V2_BATCH_ONLY: bool = True
+    # Batches whose result pages are fetched concurrently, and the pooled connection cap
+    FIRECRAWL_V2_RESULT_CONCURRENCY: int = 4
+    FIRECRAWL_V2_MAX_CONNECTIONS: int = 10
     
     # OpenRouter Integration (alternative to OpenAI for local Firecrawl)
     FIRECRAWL_OPENROUTER_API_KEY: Optional[str] = None
@@ -333,10 +357,26 @@ class Settings(BaseSettings):
     ARCHIVE_ORG_MAX_RETRIES: int = 3
     SCRAPE_MAX_DURATION: int = 3600
     SCRAPE_STALE_THRESHOLD: int = 300
+    SCRAPE_PAGE_INGEST_CHUNK_SIZE: int = 50000  # Rows per COPY/INSERT transaction when creating ScrapePages
+    SCRAPE_SHARDING_ENABLED: bool = True  # Fan page extraction out over parallel shard tasks
+    SCRAPE_SHARD_SIZE: int = 500  # ScrapePages per shard task
+    SCRAPE_SHARD_CHECKPOINT_TTL_SECONDS: int = 2 * 24 * 3600
+    SCRAPE_PAGE_BULK_CHUNK_SIZE: int = 5000  # ScrapePages per UPDATE/DELETE statement in bulk operations
+    SCRAPE_PAGE_BULK_ASYNC_THRESHOLD: int = 20000  # Larger bulk selections run as a Celery job
+    SCRAPE_PAGE_BULK_PROGRESS_TTL_SECONDS: int = 24 * 3600
+    SCRAPE_PAGE_ROLLUP_MAX_STALENESS_SECONDS: int = 60  # Statistics endpoints refresh older rollups before reading
+    SCRAPE_PAGE_ROLLUP_OVERLAP_SECONDS: int = 300  # Re-scan window before the watermark for late commits
+    DIGEST_INDEX_ENABLED: bool = True  # Per-domain Bloom filter of scraped digests in Redis
+    DIGEST_INDEX_INITIAL_CAPACITY: int = 100000
+    DIGEST_INDEX_ERROR_RATE: float = 0.01
+    DIGEST_INDEX_TTL_SECONDS: int = 7 * 24 * 3600  # Rebuilt from the database after expiry
     
     # Wayback Machine settings
     WAYBACK_MACHINE_TIMEOUT: int = 180
     WAYBACK_MACHINE_MAX_RETRIES: int = 3
+    # Archive endpoints; overridden to point at mirrors or local stand-in servers
+    WAYBACK_MACHINE_BASE_URL: str = "https://web.archive.org"
+    COMMON_CRAWL_DATA_URL: str = "https://data.commoncrawl.org"
     
     # Archive Source Configuration
     # Comprehensive settings for multi-archive support and intelligent source selection
@@ -381,6 +421,25 @@ class Settings(BaseSettings):
     # Enable archive response compression to reduce bandwidth usage
     ARCHIVE_ENABLE_COMPRESSION: bool = True
     
+    # Cluster-wide archive.org request governor (Redis GCRA per host and proxy)
+    ARCHIVE_GOVERNOR_ENABLED: bool = True
+    # Admitted requests per minute per host and proxy at full rate
+    ARCHIVE_GOVERNOR_REQUESTS_PER_MINUTE: float = 15.0
+    # CDX queries (/cdx/ paths) are governed as their own scope, e.g. "web.archive.org/cdx"
+    ARCHIVE_GOVERNOR_CDX_REQUESTS_PER_MINUTE: float = 60.0
+    # Per-host (or per-CDX-scope) overrides, e.g. {"web.archive.org": 15, "web.archive.org/cdx": 60}
+    ARCHIVE_GOVERNOR_HOST_RATES: Dict[str, float] = {}
+    # Requests that may be sent back to back before pacing starts
+    ARCHIVE_GOVERNOR_BURST: int = 2
+    # Rate multiplier applied on 429/5xx/network errors, at most once per cooldown
+    ARCHIVE_GOVERNOR_DECREASE_FACTOR: float = 0.5
+    ARCHIVE_GOVERNOR_DECREASE_COOLDOWN_SECONDS: float = 30.0
+    # Rate fraction restored per successful response, and the floor it never drops below
+    ARCHIVE_GOVERNOR_INCREASE_STEP: float = 0.02
+    ARCHIVE_GOVERNOR_MIN_FACTOR: float = 0.1
+    # Pause for the whole scope after a 429 without Retry-After (seconds)
+    ARCHIVE_GOVERNOR_429_PAUSE_SECONDS: float = 60.0
+    
     # ==========================================
     # DuckDB Analytics Engine Configuration
     # ==========================================
@@ -439,7 +498,24 @@ class Settings(BaseSettings):
     ANALYTICS_RATE_LIMIT: int = 100  # requests per minute
     ANALYTICS_EXPORT_TTL_HOURS: int = 48
     ANALYTICS_EXPORT_MAX_SIZE: int = 100000000  # 100MB
+    ANALYTICS_TIMELINE_CUBES_ENABLED: bool = True  # Answer domain/project analytics from domain_timeline_buckets
+    DOMAIN_TIMELINE_REFRESH_INTERVAL_SECONDS: int = 120  # Beat interval for folding ScrapePage changes into them
+    DOMAIN_TIMELINE_OVERLAP_SECONDS: int = 300  # Re-scan window before the timeline watermark for late commits
     TEMP_DIR: str = "/tmp"
+
+    # Search Result Export Configuration
+    SEARCH_EXPORT_DIR: str = "/data/exports"  # Background export job output
+    SEARCH_EXPORT_BATCH_SIZE: int = 2000  # Rows fetched per server-side cursor batch
+    SEARCH_EXPORT_TTL_HOURS: int = 48
+    
+    # Search History and Suggestions
+    SEARCH_HISTORY_BATCH_SIZE: int = 200  # Search events written per batch
+    SEARCH_HISTORY_FLUSH_INTERVAL_SECONDS: float = 2.0  # Max delay before queued events are written
+    SEARCH_HISTORY_MAX_PENDING: int = 10_000  # Events beyond this are dropped, not awaited
+    SEARCH_SUGGESTION_HALF_LIFE_DAYS: float = 14.0  # A search counts half as much after this long
+    SEARCH_SUGGESTION_INDEX_TTL_SECONDS: int = 60  # Reload a user's prefix index from the DB after this
+    SEARCH_SUGGESTION_INDEX_MAX_PER_USER: int = 5_000  # Top suggestions kept in memory per user
+    SEARCH_SUGGESTION_INDEX_MAX_USERS: int = 10_000  # Least recently used users are evicted
     
     # Circuit Breaker Configuration for Analytics
     POSTGRESQL_CIRCUIT_BREAKER_THRESHOLD: int = 5
@@ -483,9 +559,23 @@ class Settings(BaseSettings):
     ENTITY_DEDUPLICATION_SIMILARITY_THRESHOLD: float = 0.85
     ENTITY_DEDUPLICATION_BATCH_SIZE: int = 100
     ENTITY_LINKING_CACHE_TIMEOUT: int = 86400  # 24 hours
+    WIKIDATA_API_URL: str = "https://www.wikidata.org/w/api.php"
+    WIKIDATA_BATCH_SIZE: int = 50  # Ids per wbgetentities request (the API maximum)
+    WIKIDATA_CACHE_PATH: str = "/data/cache/wikidata.sqlite3"  # Persistent lookup cache shared by processes on a host
+    WIKIDATA_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    WIKIDATA_NEGATIVE_CACHE_TTL_SECONDS: int = 24 * 3600  # Searches without hits and missing entities
     ENTITY_LINKING_SPACY_MODEL: str = "en_core_web_md"
     ENTITY_LINKING_AUTO_DOWNLOAD_MODELS: bool = False
     
+    # Page Diff Engine (investigation comparisons, change detection)
+    DIFF_ENGINE_WORKERS: int = 2  # Worker processes for large diffs; 0 runs them in a thread
+    DIFF_ENGINE_INLINE_MAX_BYTES: int = 65_536  # Smaller comparisons run inline
+    DIFF_ENGINE_BASE_BUDGET_SECONDS: float = 0.25
+    DIFF_ENGINE_BUDGET_SECONDS_PER_MB: float = 2.0  # Budget grows with input size...
+    DIFF_ENGINE_MAX_BUDGET_SECONDS: float = 10.0  # ...up to this cap, then the diff is coarsened
+    DIFF_ENGINE_CACHE_SIZE: int = 512  # Cached results keyed by (baseline digest, target digest)
+    DIFF_ENGINE_EXACT_SIMILARITY_MAX_CHARS: int = 2_000  # Shorter texts get an exact similarity ratio
+    
     # LLM Configuration for user evaluation
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-4o-mini"
@@ -528,6 +618,13 @@ class Settings(BaseSettings):
     ENABLE_TAMPER_PROOF_LOGGING: bool = True
     AUDIT_LOG_ENCRYPTION_KEY: Optional[str] = None
     ENABLE_AUDIT_LOG_SIGNING: bool = True
+    AUDIT_MIDDLEWARE_ENABLED: bool = False  # Per-request audit events via AuditMiddleware
+    AUDIT_MAX_BODY_SIZE: int = 10000  # Max request body bytes captured per audit event
+    AUDIT_RING_BUFFER_SIZE: int = 50000  # In-process audit events buffered before dropping
+    AUDIT_COPY_BATCH_SIZE: int = 5000  # Events per COPY into audit_events
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 5.0  # Max delay before buffered events are written
+    AUDIT_ANALYSIS_SAMPLE_RATE: float = 0.1  # Share of routine events fed to pattern analysis
+    AUDIT_DB_PERSISTENCE_ENABLED: bool = True  # COPY audit events into the partitioned table
     COMPLIANCE_FRAMEWORKS: List[str] = ["GDPR", "SOX", "HIPAA", "PCI-DSS"]
     
     # 2FA/MFA Configuration
@@ -562,6 +659,10 @@ class Settings(BaseSettings):
     PIPELINE_TIMEOUT_MINUTES: int = 60  # Maximum processing time per batch
     ENABLE_PIPELINE_MONITORING: bool = True
     PARQUET_PARTITIONING_ENABLED: bool = True  # Enable date-based partitioning
+    ANALYTICS_TARGET_FILE_SIZE_MB: int = 128  # Partition files roll over at this size
+    ANALYTICS_MAX_OPEN_PARTITION_FILES: int = 64  # Open partition files per writer
+    ANALYTICS_COMPACTION_MIN_AGE_MINUTES: int = 60  # Leave recently written partitions alone
+    ANALYTICS_COMPACTION_INTERVAL_MINUTES: int = 60
     
     # DuckDB Analytics Configuration
     DUCKDB_ENABLED: bool = True
@@ -665,6 +766,11 @@ class Settings(BaseSettings):
     BACKUP_RETENTION_DAYS: int = 30
     BACKUP_STORAGE_PATH: str = "/data/backups"
     BACKUP_COMPRESSION_ENABLED: bool = True
+    # Streaming backup pipeline (app/services/backup_streaming.py)
+    BACKUP_UPLOAD_PART_SIZE_MB: int = 64  # multipart upload part size, also the verification chunk
+    BACKUP_ZSTD_LEVEL: int = 3
+    BACKUP_ZSTD_THREADS: int = -1  # zstd compression workers; -1 = one per CPU
+    BACKUP_UPLOAD_ATTEMPTS: int = 3  # retries skip parts the backend already holds
     
     # Disaster Recovery
     ENABLE_DISASTER_RECOVERY: bool = True
@@ -805,6 +911,12 @@ class Settings(BaseSettings):
     HYBRID_ROUTER_PERFORMANCE_SNAPSHOT_INTERVAL: int = 300  # Performance snapshots every 5 minutes
     HYBRID_ROUTER_ENABLE_PROMETHEUS_METRICS: bool = True
     ENABLE_PROMETHEUS_METRICS: bool = True  # Global Prometheus enablement
+    PROMETHEUS_BACKGROUND_COLLECTION: bool = True  # Refresh DB/service-derived gauges off the scrape path
+    PROMETHEUS_SCRAPE_TOKEN: Optional[str] = None  # When set, /monitoring/*prometheus* require "Authorization: Bearer <token>"
+    PROMETHEUS_FAST_GROUP_INTERVAL_SECONDS: int = 15  # In-memory service stats (DuckDB, routing, system)
+    PROMETHEUS_DB_GROUP_INTERVAL_SECONDS: int = 60  # Count queries against PostgreSQL
+    PROMETHEUS_BUSINESS_GROUP_INTERVAL_SECONDS: int = 900  # 30-day business aggregates
+    PROMETHEUS_GROUP_TIMEOUT_SECONDS: int = 30  # A group slower than this keeps its last values
     HYBRID_ROUTER_PROMETHEUS_PORT: int = 9090
     HYBRID_ROUTER_METRICS_RETENTION_DAYS: int = 30
     
@@ -92,4 +92,16 @@ async def get_async_session() -> AsyncSession:
             await session.rollback()
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def copy_records(conn, table_name: str, columns, records) -> str:
+    """
+    Bulk-load rows with PostgreSQL ``COPY`` on an existing SQLAlchemy async connection
+
+    ``records`` is an iterable of tuples ordered like ``columns``. Runs inside
+    the connection's current transaction and returns the asyncpg status string.
+    """
+    raw = await conn.get_raw_connection()
+    return await raw.driver_connection.copy_records_to_table(
+        table_name, records=records, columns=list(columns)
+    )
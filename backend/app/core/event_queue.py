@@ -0,0 +1,98 @@
+"""
+Bounded, non-blocking queue for deferred request-side writes
+
+Middleware pushes audit and log writes here instead of awaiting them on the
+request path. A single consumer task drains the queue in the background;
+when the queue is full new events are dropped and counted rather than
+applying backpressure to requests.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EventJob = Callable[[], Awaitable[Any]]
+
+
+class BackgroundEventQueue:
+    """Fire-and-forget queue of coroutine factories"""
+
+    def __init__(self, maxsize: int = 10000, name: str = "events"):
+        self.maxsize = maxsize
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._loop = loop
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run(self._queue), name=f"{self.name}-writer")
+        return self._queue
+
+    def submit(self, job: EventJob) -> bool:
+        """Queue a job without waiting; returns False if it was dropped"""
+        try:
+            queue = self._ensure_worker()
+        except RuntimeError:
+            # No running loop (e.g. called from sync code)
+            self.dropped += 1
+            return False
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"{self.name} queue full; dropped {self.dropped} events so far")
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            job = await queue.get()
+            try:
+                await job()
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"{self.name} background job failed: {e}")
+            finally:
+                queue.task_done()
+
+    async def drain(self, timeout: float = 5.0) -> None:
+        """Wait for queued jobs to finish (used on shutdown and in tests)"""
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} queue drain timed out with {self._queue.qsize()} pending")
+
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        await self.drain(timeout)
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        self._worker = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+# Process-wide queue used by the request logging and audit middleware
+request_event_queue = BackgroundEventQueue(name="request-events")
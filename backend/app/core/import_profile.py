@@ -0,0 +1,174 @@
+"""
+Import-time profiling for API and worker startup
+
+``timed_import`` imports a module and records how long it took; the API
+router table and the Celery task modules are loaded through it, and with
+``STARTUP_IMPORT_PROFILE`` enabled the timings are logged at startup.
+Timings are cumulative (the module body plus everything it imported first),
+so the first module to pull in a heavy dependency carries its cost.
+
+For a per-module breakdown of a whole entry point run::
+
+    python -m app.core.import_profile app.main --top 25
+
+which imports the target in a fresh interpreter under ``-X importtime`` and
+lists the slowest first-party modules with the third-party packages each of
+them pulled in.
+"""
+import argparse
+import logging
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds each module loaded through timed_import took, in load order
+IMPORT_TIMINGS: Dict[str, float] = {}
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)\s*$")
+
+
+def timed_import(name: str) -> ModuleType:
+    """Import a module, recording the time of its first import"""
+    if name in sys.modules:
+        return sys.modules[name]
+    started = time.perf_counter()
+    # __import__ rather than importlib.import_module: only the former shows up in -X importtime
+    __import__(name)
+    IMPORT_TIMINGS[name] = time.perf_counter() - started
+    return sys.modules[name]
+
+
+def log_import_timings(label: str, names: Iterable[str], top: int = 15) -> None:
+    """Log the slowest of the given modules when startup profiling is enabled"""
+    if not settings.STARTUP_IMPORT_PROFILE:
+        return
+    timings = sorted(
+        ((IMPORT_TIMINGS[name], name) for name in names if name in IMPORT_TIMINGS), reverse=True
+    )
+    total = sum(seconds for seconds, _ in timings)
+    logger.info(
+        f"{label}: imported {len(timings)} modules in {total:.2f}s; slowest: "
+        + ", ".join(f"{name}={seconds * 1000:.0f}ms" for seconds, name in timings[:top])
+    )
+
+
+@dataclass
+class ImportRecord:
+    """One module from ``-X importtime`` output, with the modules it imported"""
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: List["ImportRecord"] = field(default_factory=list)
+
+    @property
+    def package(self) -> str:
+        return self.name.split(".", 1)[0]
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Rebuild the import tree from ``-X importtime`` stderr; returns the top-level imports"""
+    # Lines are printed when a module finishes, so children come before their parent
+    pending: Dict[int, List[ImportRecord]] = {}
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3)) // 2
+        record = ImportRecord(match.group(4), int(match.group(1)), int(match.group(2)))
+        record.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(record)
+    return pending.get(0, [])
+
+
+def profile_imports(target: str, python: str = sys.executable, cwd: Optional[str] = None) -> List[ImportRecord]:
+    """Import ``target`` in a fresh interpreter under ``-X importtime``"""
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {target}"],
+        cwd=cwd or str(Path(__file__).resolve().parents[2]),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n" + "\n".join(result.stderr.splitlines()[-20:]))
+    return parse_importtime(result.stderr)
+
+
+def first_party_costs(
+    roots: List[ImportRecord], package: str = "app"
+) -> List[Tuple[ImportRecord, Dict[str, int]]]:
+    """
+    Each first-party module with the third-party packages it was first to import
+
+    Third-party cost is attributed to the nearest first-party importer and
+    summed per top-level package (microseconds, cumulative).
+    """
+    results = []
+
+    def third_party(record: ImportRecord, into: Dict[str, int]) -> None:
+        for child in record.children:
+            if child.package == package:
+                continue
+            into[child.package] = into.get(child.package, 0) + child.cumulative_us
+            # Nested first-party modules imported by a dependency still get their own entry
+            visit_nested(child)
+
+    def visit_nested(record: ImportRecord) -> None:
+        for child in record.children:
+            if child.package == package:
+                visit(child)
+            else:
+                visit_nested(child)
+
+    def visit(record: ImportRecord) -> None:
+        dependencies: Dict[str, int] = {}
+        third_party(record, dependencies)
+        results.append((record, dependencies))
+        for child in record.children:
+            if child.package == package:
+                visit(child)
+
+    for root in roots:
+        if root.package == package:
+            visit(root)
+        else:
+            visit_nested(root)
+    return results
+
+
+def format_report(target: str, roots: List[ImportRecord], top: int = 25, package: str = "app") -> str:
+    total_us = sum(root.cumulative_us for root in roots)
+    costs = sorted(first_party_costs(roots, package), key=lambda item: item[0].cumulative_us, reverse=True)
+    lines = [
+        f"import {target}: {total_us / 1000:.0f} ms total",
+        f"{'cumulative':>11} {'self':>8}  module (third-party packages it imported first)",
+    ]
+    for record, dependencies in costs[:top]:
+        heavy = sorted(dependencies.items(), key=lambda item: item[1], reverse=True)[:4]
+        deps = ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in heavy if us >= 1000)
+        lines.append(
+            f"{record.cumulative_us / 1000:>9.0f}ms {record.self_us / 1000:>6.0f}ms  {record.name}"
+            + (f" ({deps})" if deps else "")
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report import time per module for an entry point")
+    parser.add_argument("target", nargs="?", default="app.main", help="module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="number of modules to list")
+    args = parser.parse_args(argv)
+    print(format_report(args.target, profile_imports(args.target), args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
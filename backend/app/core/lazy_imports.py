@@ -0,0 +1,55 @@
+"""
+Deferred imports for heavy optional dependencies
+
+spaCy, pandas, pyarrow, trafilatura, sentence-transformers and scikit-learn
+each take hundreds of milliseconds to import. Services reach them through
+small accessor functions built on ``optional_import`` so API processes and
+Celery workers only pay that cost when a code path actually uses them, not
+when a router or task module happens to import the service.
+"""
+import importlib
+import importlib.util
+import logging
+import sys
+import threading
+from types import ModuleType
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_modules: Dict[str, Optional[ModuleType]] = {}
+_lock = threading.Lock()
+
+
+def module_available(name: str) -> bool:
+    """Whether a top-level module is installed, checked without importing it"""
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Import a module on first use; None if it or one of its dependencies is missing"""
+    try:
+        return _modules[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _modules:
+            try:
+                _modules[name] = importlib.import_module(name)
+            except ImportError as e:
+                logger.debug(f"Optional dependency {name} unavailable: {e}")
+                _modules[name] = None
+    return _modules[name]
+
+
+def require_module(name: str, feature: str) -> ModuleType:
+    """Import a module on first use, raising a descriptive ImportError when it is missing"""
+    module = optional_import(name)
+    if module is None:
+        raise ImportError(f"{feature} requires the optional dependency '{name}'")
+    return module
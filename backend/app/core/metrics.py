@@ -0,0 +1,72 @@
+"""
+In-process Prometheus registry for hot-path metrics
+
+Counters and histograms that are updated on every request live here as
+``prometheus_client`` objects, so recording a sample is a lock-protected
+increment rather than a database query. When ``PROMETHEUS_MULTIPROC_DIR`` is
+set (Gunicorn workers, Celery prefork children) ``prometheus_client`` keeps
+the values in per-process mmap files and ``render_registry`` aggregates them
+across processes; otherwise the default registry of this process is used.
+"""
+import os
+from typing import Optional
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+HTTP_REQUESTS_TOTAL = Counter(
+    "chrono_http_requests_total",
+    "HTTP requests handled by the API",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "chrono_http_request_duration_seconds",
+    "HTTP request latency in seconds",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+METRICS_GROUP_REFRESH_SECONDS = Histogram(
+    "chrono_metrics_group_refresh_seconds",
+    "Time spent refreshing a background metrics group",
+    ["group", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir"))
+
+
+def exposition_registry() -> CollectorRegistry:
+    """The registry to serialize: aggregated across processes in multiprocess mode"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_registry(registry: Optional[CollectorRegistry] = None) -> str:
+    """Serialize the current values of the hot-path registry"""
+    return generate_latest(registry or exposition_registry()).decode("utf-8")
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a finished worker's live gauges from the multiprocess directory"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
+
+
+def observe_http_request(method: str, route: Optional[str], status_code: Optional[int], seconds: float) -> None:
+    route = route or UNMATCHED_ROUTE
+    HTTP_REQUESTS_TOTAL.labels(method, route, str(status_code or 500)).inc()
+    HTTP_REQUEST_DURATION_SECONDS.labels(method, route).observe(seconds)
+
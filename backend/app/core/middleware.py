@@ -1,128 +1,200 @@
 """
 Custom middleware for request handling
+
+All middleware here is pure ASGI: it wraps ``receive``/``send`` directly
+instead of going through ``BaseHTTPMiddleware``, so streaming responses pass
+through untouched and no extra task is spawned per request.
 """
 import asyncio
-from typing import Callable
-from fastapi import Request, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+
+from fastapi import status
+
+from app.core.request_context import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+    get_request_context,
+    send_json,
+    wrap_response_start,
+)
+
+
+class RequestBodyTooLarge(Exception):
+    """Raised from ``receive`` when a streamed body exceeds the size limit"""
 
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
+class RequestSizeLimitMiddleware:
     """Middleware to limit request body size"""
-    
-    def __init__(self, app, max_size: int = 10 * 1024 * 1024):  # 10MB default
-        super().__init__(app)
+
+    def __init__(self, app: ASGIApp, max_size: int = 10 * 1024 * 1024):  # 10MB default
+        self.app = app
         self.max_size = max_size
-    
-    async def dispatch(self, request: Request, call_next: Callable):
+
+    async def _reject(self, send: Send, received_size=None) -> None:
+        content = {
+            "detail": f"Request body too large. Maximum size allowed: {self.max_size / 1024 / 1024:.1f}MB",
+            "max_size": self.max_size,
+        }
+        if received_size is not None:
+            content["received_size"] = received_size
+        await send_json(send, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = get_request_context(scope)
+
         # Check Content-Length header
-        content_length = request.headers.get("content-length")
-        
+        content_length = context.headers.get("content-length")
         if content_length:
             try:
-                content_length = int(content_length)
-                if content_length > self.max_size:
-                    return JSONResponse(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        content={
-                            "detail": f"Request body too large. Maximum size allowed: {self.max_size / 1024 / 1024:.1f}MB",
-                            "max_size": self.max_size,
-                            "received_size": content_length
-                        }
-                    )
+                declared = int(content_length)
+                if declared > self.max_size:
+                    await self._reject(send, declared)
+                    return
             except ValueError:
                 # Invalid Content-Length header
                 pass
-        
-        # For requests without Content-Length, we'll let FastAPI handle it
-        # but we can add streaming size check if needed
-        
+
+        # Also enforce the limit on streamed (chunked) bodies
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise RequestBodyTooLarge()
+            return message
+
         try:
-            response = await call_next(request)
-            return response
-        except Exception as e:
-            # Handle any other payload-related errors
-            if "too large" in str(e).lower() or "payload" in str(e).lower():
-                return JSONResponse(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    content={
-                        "detail": "Request payload too large or malformed",
-                        "max_size": self.max_size
-                    }
-                )
-            raise
+            await self.app(scope, limited_receive, send)
+        except RequestBodyTooLarge:
+            if context.response_started:
+                raise
+            await self._reject(send)
+
 
+class RequestTimeoutMiddleware:
+    """
+    Middleware to handle request timeouts
 
-class RequestTimeoutMiddleware(BaseHTTPMiddleware):
-    """Middleware to handle request timeouts"""
-    
-    def __init__(self, app, timeout: int = 30):  # 30 second default
-        super().__init__(app)
+    The timeout covers the time until the response starts; once headers have
+    been sent, streaming bodies (e.g. exports) are allowed to run to completion.
+    """
+
+    def __init__(self, app: ASGIApp, timeout: int = 30):  # 30 second default
+        self.app = app
         self.timeout = timeout
-    
-    async def dispatch(self, request: Request, call_next: Callable):
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = asyncio.Event()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                started.set()
+            await send(message)
+
+        task = asyncio.ensure_future(self.app(scope, receive, send_wrapper))
+        started_waiter = asyncio.ensure_future(started.wait())
         try:
-            response = await asyncio.wait_for(
-                call_next(request), 
-                timeout=self.timeout
+            done, _ = await asyncio.wait(
+                {task, started_waiter}, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED
             )
-            return response
-        except asyncio.TimeoutError:
-            return JSONResponse(
-                status_code=status.HTTP_408_REQUEST_TIMEOUT,
-                content={
+        finally:
+            started_waiter.cancel()
+
+        if not done:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            await send_json(
+                send,
+                status.HTTP_408_REQUEST_TIMEOUT,
+                {
                     "detail": f"Request timeout after {self.timeout} seconds",
                     "timeout": self.timeout
                 }
             )
+            return
+
+        await task
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """Middleware to add security headers"""
-    
-    async def dispatch(self, request: Request, call_next: Callable):
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        # Remove server header for security
-        if "server" in response.headers:
-            del response.headers["server"]
-        
-        return response
-
-
-class ValidationErrorMiddleware(BaseHTTPMiddleware):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        def add_headers(headers, message) -> None:
+            headers["X-Content-Type-Options"] = "nosniff"
+            headers["X-Frame-Options"] = "DENY"
+            headers["X-XSS-Protection"] = "1; mode=block"
+            headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+            # Remove server header for security
+            if "server" in headers:
+                del headers["server"]
+
+        await self.app(scope, receive, wrap_response_start(send, add_headers))
+
+
+class ValidationErrorMiddleware:
     """Middleware to standardize validation error responses"""
-    
-    async def dispatch(self, request: Request, call_next: Callable):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = get_request_context(scope)
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send)
         except Exception as e:
+            if context.response_started:
+                raise
+
             # Handle Pydantic validation errors
             if "validation error" in str(type(e)).lower():
-                return JSONResponse(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    content={
+                await send_json(
+                    send,
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    {
                         "detail": "Validation error",
                         "errors": str(e)
                     }
                 )
-            
+                return
+
             # Handle JSON decode errors
             if "json" in str(type(e)).lower() and "decode" in str(e).lower():
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content={
+                await send_json(
+                    send,
+                    status.HTTP_400_BAD_REQUEST,
+                    {
                         "detail": "Invalid JSON format",
                         "error": "Request body contains invalid JSON"
                     }
                 )
-            
-            raise
\ No newline at end of file
+                return
+
+            raise
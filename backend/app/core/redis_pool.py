@@ -0,0 +1,194 @@
+"""
+Process-wide async Redis connection pools
+
+Services share one ``BlockingConnectionPool`` per event loop, Redis URL and
+response decoding instead of each opening clients of their own:
+
+* ``shared_redis`` returns a client on the shared pool
+* ``available_redis`` does the same but returns ``None`` while Redis is
+  unreachable; availability is pinged at most once per
+  ``REDIS_HEALTH_CHECK_INTERVAL``, so callers with a fallback do not each pay
+  a connect timeout
+* ``coalesced_get`` merges single-key GETs issued in the same event-loop tick
+  into one MGET
+* ``connection_stats`` reports connections created and in use per pool
+
+Pools are per event loop because asyncio connections cannot move between
+loops (Celery tasks run each coroutine under its own ``asyncio.run``).
+"""
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PoolEntry:
+    pool: aioredis.BlockingConnectionPool
+    client: aioredis.Redis
+    healthy: bool = True
+    checked_at: float = 0.0
+
+
+# event loop -> (url, decode_responses) -> pool
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, bool], _PoolEntry]]" = (
+    weakref.WeakKeyDictionary()
+)
+_coalescers: "weakref.WeakKeyDictionary[Any, GetCoalescer]" = weakref.WeakKeyDictionary()
+
+
+def _entry(url: Optional[str], decode_responses: bool) -> _PoolEntry:
+    loop = asyncio.get_running_loop()
+    key = (url or settings.REDIS_URL, decode_responses)
+    pools = _pools.setdefault(loop, {})
+    entry = pools.get(key)
+    if entry is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            key[0],
+            decode_responses=decode_responses,
+            max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_keepalive=True,
+            retry_on_timeout=True,
+            # Idle connections are pinged before reuse after this long
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        entry = pools[key] = _PoolEntry(pool, aioredis.Redis(connection_pool=pool))
+    return entry
+
+
+def shared_redis(url: Optional[str] = None, *, decode_responses: bool = True) -> aioredis.Redis:
+    """Client on the shared pool for ``url`` (default ``REDIS_URL``); must be called inside a running loop"""
+    return _entry(url, decode_responses).client
+
+
+async def available_redis(url: Optional[str] = None, *, decode_responses: bool = True) -> Optional[aioredis.Redis]:
+    """Client on the shared pool, or ``None`` if Redis did not answer its last health check"""
+    entry = _entry(url, decode_responses)
+    if time.monotonic() - entry.checked_at >= settings.REDIS_HEALTH_CHECK_INTERVAL:
+        entry.checked_at = time.monotonic()
+        try:
+            await asyncio.wait_for(entry.client.ping(), timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS)
+            healthy = True
+        except Exception as e:
+            healthy = False
+            if entry.healthy:
+                logger.warning(f"Redis unavailable at {_location(entry.pool)}: {e}")
+        if healthy and not entry.healthy:
+            logger.info(f"Redis available again at {_location(entry.pool)}")
+        entry.healthy = healthy
+    return entry.client if entry.healthy else None
+
+
+class GetCoalescer:
+    """Merges concurrent single-key GETs on one client into MGET round trips"""
+
+    def __init__(self, client: Any):
+        # Weak, so the registry below does not keep the client alive
+        self._client = weakref.ref(client)
+        self._pending: Dict[Any, List[asyncio.Future]] = {}
+        # The loop only keeps weak references to tasks; hold fetches until they finish
+        self._fetches: Set[asyncio.Task] = set()
+        self.gets = 0
+        self.round_trips = 0
+
+    async def get(self, key: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            # Runs after every task already ready in this tick has had its turn
+            loop.call_soon(self._flush)
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        self.gets += 1
+        return await future
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        fetch = asyncio.ensure_future(self._fetch(pending))
+        self._fetches.add(fetch)
+        fetch.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, pending: Dict[Any, List[asyncio.Future]]) -> None:
+        keys = list(pending)
+        client = self._client()
+        self.round_trips += 1
+        try:
+            if client is None:
+                raise RuntimeError("Redis client was closed before its GETs were sent")
+            if len(keys) == 1:
+                values = [await client.get(keys[0])]
+            else:
+                values = await client.mget(keys)
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, value in zip(keys, values):
+            for future in pending[key]:
+                if not future.done():
+                    future.set_result(value)
+
+
+async def coalesced_get(client: Any, key: Any) -> Any:
+    """``client.get(key)``, batched with the other GETs on ``client`` from the same loop tick"""
+    coalescer = _coalescers.get(client)
+    if coalescer is None:
+        coalescer = _coalescers[client] = GetCoalescer(client)
+    return await coalescer.get(key)
+
+
+def _location(pool: aioredis.ConnectionPool) -> str:
+    """Pool address without credentials, for logs and stats"""
+    kwargs = pool.connection_kwargs
+    if kwargs.get("path"):
+        return f"unix://{kwargs['path']}?db={kwargs.get('db', 0)}"
+    return f"redis://{kwargs.get('host', 'localhost')}:{kwargs.get('port', 6379)}/{kwargs.get('db', 0)}"
+
+
+def connection_stats() -> Dict[str, Any]:
+    """Connections created and in use for every shared pool in this process"""
+    pools = []
+    for loop, entries in list(_pools.items()):
+        for (_, decode_responses), entry in entries.items():
+            in_use = len(entry.pool._in_use_connections)
+            pools.append({
+                "url": _location(entry.pool),
+                "decode_responses": decode_responses,
+                "loop_running": loop.is_running(),
+                "created": len(entry.pool._available_connections) + in_use,
+                "in_use": in_use,
+                "max_connections": entry.pool.max_connections,
+                "healthy": entry.healthy,
+            })
+    coalescers = list(_coalescers.values())
+    return {
+        "pools": len(pools),
+        "connections_created": sum(pool["created"] for pool in pools),
+        "connections_in_use": sum(pool["in_use"] for pool in pools),
+        "coalesced_gets": sum(c.gets for c in coalescers),
+        "coalesced_round_trips": sum(c.round_trips for c in coalescers),
+        "details": pools,
+    }
+
+
+async def close_redis_pools() -> None:
+    """Disconnect the pools that belong to the running loop"""
+    entries = _pools.pop(asyncio.get_running_loop(), {})
+    for entry in entries.values():
+        _coalescers.pop(entry.client, None)
+        try:
+            await entry.pool.disconnect()
+        except Exception as e:
+            logger.warning(f"Error closing Redis pool {_location(entry.pool)}: {e}")
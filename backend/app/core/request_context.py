@@ -0,0 +1,177 @@
+"""
+Shared per-request context and helpers for pure ASGI middleware
+
+Every middleware in the stack reads and writes the same ``RequestContext``
+(stored in ``scope["state"]``, so it is also reachable as
+``request.state.request_context``) instead of re-parsing headers or
+re-fetching the session from Redis.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, MutableMapping, Optional, Tuple
+from uuid import uuid4
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.metrics import observe_http_request
+from app.services.session_store import SessionData, get_session_store
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+_UNSET = object()
+
+
+@dataclass
+class RequestContext:
+    """Request-scoped state shared by the middleware stack"""
+    request_id: str
+    method: str
+    path: str
+    client_ip: str
+    user_agent: Optional[str]
+    headers: Dict[str, str]
+    cookies: Dict[str, str]
+    start_time: float = field(default_factory=time.time)
+    start_perf: float = field(default_factory=time.perf_counter)
+    status_code: Optional[int] = None
+    response_headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    response_started: bool = False
+    request_body: Optional[bytes] = None
+    request_body_size: int = 0
+    error: Optional[BaseException] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+    _session: Any = field(default=_UNSET, repr=False)
+
+    @property
+    def elapsed_ms(self) -> int:
+        return int((time.perf_counter() - self.start_perf) * 1000)
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self.cookies.get("session_id")
+
+    async def get_session(self) -> Optional[SessionData]:
+        """Load the Redis session at most once per request"""
+        if self._session is _UNSET:
+            session = None
+            if self.session_id:
+                try:
+                    store = await get_session_store()
+                    session = await store.get_session(self.session_id)
+                except Exception:
+                    session = None
+            self._session = session
+        return self._session
+
+    @classmethod
+    def from_scope(cls, scope: Scope) -> "RequestContext":
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        return cls(
+            request_id=headers.get("x-request-id") or str(uuid4()),
+            method=scope.get("method", ""),
+            path=scope.get("path", ""),
+            client_ip=_client_ip(scope, headers),
+            user_agent=headers.get("user-agent"),
+            headers=headers,
+            cookies=_parse_cookies(headers.get("cookie", "")),
+        )
+
+
+def _client_ip(scope: Scope, headers: Dict[str, str]) -> str:
+    """Client IP honouring proxy headers, in the order the old middleware used"""
+    for header in ("x-forwarded-for", "x-real-ip", "cf-connecting-ip", "x-client-ip"):
+        value = headers.get(header)
+        if value:
+            ip = value.split(",")[0].strip()
+            if ip:
+                return ip
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _parse_cookies(cookie_header: str) -> Dict[str, str]:
+    cookies: Dict[str, str] = {}
+    for chunk in cookie_header.split(";"):
+        if "=" in chunk:
+            key, value = chunk.split("=", 1)
+            cookies[key.strip()] = value.strip()
+    return cookies
+
+
+def get_request_context(scope: Scope) -> RequestContext:
+    """Return the context for this request, creating it if no middleware has yet"""
+    state = scope.setdefault("state", {})
+    context = state.get("request_context")
+    if context is None:
+        context = RequestContext.from_scope(scope)
+        state["request_context"] = context
+    return context
+
+
+def wrap_response_start(
+    send: Send,
+    on_start: Callable[[MutableHeaders, Message], Optional[Awaitable[None]]],
+) -> Send:
+    """Wrap ``send`` so ``on_start`` can edit headers of the response start message"""
+    async def wrapped(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            result = on_start(headers, message)
+            if result is not None:
+                await result
+        await send(message)
+    return wrapped
+
+
+async def send_json(send: Send, status_code: int, content: Any, headers: Optional[Dict[str, str]] = None) -> None:
+    """Send a complete JSON response without building a Response object"""
+    body = json.dumps(content).encode("utf-8")
+    raw_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ]
+    for key, value in (headers or {}).items():
+        raw_headers.append((key.lower().encode("latin-1"), str(value).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class RequestContextMiddleware:
+    """
+    Outermost middleware: creates the shared context and records the response
+    status so inner middleware and background writers can use it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = get_request_context(scope)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                context.response_started = True
+                context.status_code = message["status"]
+                MutableHeaders(scope=message).setdefault("x-request-id", context.request_id)
+                context.response_headers = list(message.get("headers", []))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            observe_http_request(
+                context.method,
+                getattr(route, "path", None),
+                context.status_code,
+                time.perf_counter() - context.start_perf,
+            )
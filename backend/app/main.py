@@ -24,6 +24,11 @@ from app.core.security_middleware import (
     SessionSecurityMiddleware
 )
 from app.core.csrf_protection import CSRFMiddleware
+from app.core.event_queue import request_event_queue
+from app.core.redis_pool import close_redis_pools
+from app.services.search_suggestions import search_suggestion_service
+from app.core.request_context import RequestContextMiddleware
+from app.middleware.audit_middleware import AuditMiddleware
 from app.services.session_store import session_store, get_session_store
 # from app.services.alert_integration import initialize_alert_integrations, shutdown_alert_integrations  # Disabled for validation
 from app.services.optimization_integration import init_optimization_system, shutdown_optimization_system
@@ -69,6 +74,11 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("Query optimization system disabled by configuration")
     
+    # Refresh DB-derived Prometheus gauges off the scrape path
+    if settings.ENABLE_PROMETHEUS_METRICS and settings.PROMETHEUS_BACKGROUND_COLLECTION:
+        from app.services.prometheus_metrics_service import prometheus_metrics_service
+        prometheus_metrics_service.start_background_collection()
+    
     yield
     
     # Shutdown
@@ -91,8 +101,17 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error shutting down optimization system: {e}")
     
+    if settings.ENABLE_PROMETHEUS_METRICS and settings.PROMETHEUS_BACKGROUND_COLLECTION:
+        from app.services.prometheus_metrics_service import prometheus_metrics_service
+        await prometheus_metrics_service.stop_background_collection()
+    
+    # Flush deferred request log/audit writes before closing their backends
+    await request_event_queue.shutdown(timeout=5.0)
+    await search_suggestion_service.shutdown()
+    
     logger.info("Closing Redis session store...")
     await session_store.close()
+    await close_redis_pools()
 
 
 app = FastAPI(
@@ -109,7 +128,10 @@ normalized_cors_origins = [
     str(origin).rstrip("/") for origin in settings.BACKEND_CORS_ORIGINS
 ]
 
-# Add security middleware (order matters - last added is first to process)
+# Add security middleware (order matters - last added is first to process).
+# All of these are pure ASGI middleware sharing one RequestContext per request.
+if settings.AUDIT_MIDDLEWARE_ENABLED:
+    app.add_middleware(AuditMiddleware)
 app.add_middleware(EnhancedSecurityHeaders)
 app.add_middleware(SessionSecurityMiddleware)
 app.add_middleware(RequestLoggingMiddleware, log_sensitive_endpoints=True)
@@ -132,6 +154,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost: creates the shared request context and records the response status
+app.add_middleware(RequestContextMiddleware)
+
 
 # Global exception handlers
 @app.exception_handler(RequestValidationError)
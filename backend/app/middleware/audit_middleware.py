@@ -1,28 +1,42 @@
 """
 Audit middleware for automatic request/response logging with comprehensive security monitoring
+
+Implemented as pure ASGI middleware: the request body is teed while the app
+reads it, and audit writes are handed to the background event queue after the
+response has been sent instead of being awaited on the request path.
 """
 import json
-import time
+import logging
 import traceback
-from typing import Callable, Dict, Any, Optional, List
-from uuid import uuid4
+from urllib.parse import parse_qsl
+from typing import Dict, Any, Optional, List
 
-from fastapi import Request, Response, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
 
 from app.core.audit_logger import audit_logger, AuditContext
 from app.core.config import settings
+from app.core.event_queue import request_event_queue
+from app.core.request_context import (
+    ASGIApp,
+    Message,
+    Receive,
+    RequestContext,
+    Scope,
+    Send,
+    get_request_context,
+    send_json,
+)
 from app.models.audit_log import (
     AuditCategory, 
     SeverityLevel, 
     AuditActions, 
     ResourceTypes
 )
-from app.api.deps import get_current_user_optional
 
+logger = logging.getLogger(__name__)
 
-class AuditMiddleware(BaseHTTPMiddleware):
+
+class AuditMiddleware:
     """
     Comprehensive audit middleware that:
     - Automatically logs all API requests and responses
@@ -33,8 +47,8 @@ class AuditMiddleware(BaseHTTPMiddleware):
     - Provides request/response correlation
     """
     
-    def __init__(self, app, exclude_paths: Optional[List[str]] = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, exclude_paths: Optional[List[str]] = None):
+        self.app = app
         self.exclude_paths = exclude_paths or [
             "/health",
             "/metrics",
@@ -47,50 +61,54 @@ class AuditMiddleware(BaseHTTPMiddleware):
         }
         self.max_body_size = getattr(settings, 'AUDIT_MAX_BODY_SIZE', 10000)  # 10KB
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Main middleware dispatch function"""
-        # Skip audit logging for excluded paths
-        if self._should_skip_audit(request):
-            return await call_next(request)
-        
-        # Generate request ID for correlation
-        request_id = str(uuid4())
-        request.state.request_id = request_id
-        
-        # Start timing
-        start_time = time.time()
-        request.state.start_time = start_time
-        
-        # Extract request information
-        request_info = await self._extract_request_info(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Main middleware entry point"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Get user context
-        user_context = await self._get_user_context(request)
-        
-        # Create audit context
-        audit_context = AuditContext(
-            user_id=user_context.get('user_id'),
-            admin_user_id=user_context.get('admin_user_id'),
-            session_id=user_context.get('session_id'),
-            request_id=request_id,
-            ip_address=self._get_client_ip(request),
-            user_agent=request.headers.get('user-agent'),
-            start_time=start_time
-        )
-        
-        # Store audit context in request state
-        request.state.audit_context = audit_context
-        
-        response = None
-        error_occurred = False
+        context = get_request_context(scope)
         
+        # Skip audit logging for excluded paths
+        if self._should_skip_audit(context.path):
+            await self.app(scope, receive, send)
+            return
+        
+        # Tee the request body (up to max_body_size) while the app consumes it
+        capture_body = self._should_log_request_body(context.path, context.method)
+        body_chunks: List[bytes] = []
+        captured_size = 0
+        
+        async def receive_wrapper() -> Message:
+            nonlocal captured_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                context.request_body_size += len(chunk)
+                if capture_body and captured_size <= self.max_body_size:
+                    body_chunks.append(chunk)
+                    captured_size += len(chunk)
+            return message
+        
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        response_headers: List[tuple] = []
+        response_started = False
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_headers, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                response_headers = list(message.get("headers", []))
+            await send(message)
+        
+        error_info = None
         try:
             # Process the request
-            response = await call_next(request)
+            await self.app(scope, receive_wrapper, send_wrapper)
             
         except Exception as e:
             # Log the error
-            error_occurred = True
             error_info = {
                 'error_message': str(e),
                 'error_type': type(e).__name__,
@@ -98,39 +116,64 @@ class AuditMiddleware(BaseHTTPMiddleware):
             }
             
             # Create error response
-            response = JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Internal server error"}
-            )
-            
-            # Log security event for server errors
-            await self._log_security_event(
-                request, audit_context, error_info, response
-            )
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            if not response_started:
+                await send_json(send, status_code, {"detail": "Internal server error"})
             
         finally:
-            # Calculate processing time
-            processing_time = time.time() - start_time
-            processing_time_ms = int(processing_time * 1000)
-            
-            # Extract response information
-            response_info = self._extract_response_info(response)
-            
-            # Update audit context with performance metrics
-            audit_context.database_queries = getattr(request.state, 'db_queries', 0)
+            processing_time_ms = context.elapsed_ms
+            request_info = self._extract_request_info(scope, context, body_chunks, capture_body)
+            response_info = self._extract_response_info(status_code, response_headers)
             
-            # Log the request/response audit event
-            await self._log_audit_event(
-                request, response, audit_context, request_info, 
-                response_info, processing_time_ms, error_occurred
+            # Audit writes (including the session lookup) happen off the request path
+            request_event_queue.submit(
+                lambda: self._record(
+                    context, status_code, request_info, response_info,
+                    processing_time_ms, error_info
+                )
             )
-        
-        return response
     
-    def _should_skip_audit(self, request: Request) -> bool:
+    async def _record(
+        self,
+        context: RequestContext,
+        status_code: int,
+        request_info: Dict[str, Any],
+        response_info: Dict[str, Any],
+        processing_time_ms: int,
+        error_info: Optional[Dict[str, Any]]
+    ) -> None:
+        """Build the audit context and write the audit (and security) events"""
+        audit_context = await self._get_audit_context(context)
+        
+        # Log security event for server errors
+        if error_info is not None:
+            await self._log_security_event(context, audit_context, error_info, status_code)
+        
+        # Log the request/response audit event
+        await self._log_audit_event(
+            context, status_code, audit_context, request_info,
+            response_info, processing_time_ms, error_info is not None
+        )
+    
+    async def _get_audit_context(self, context: RequestContext) -> AuditContext:
+        """Extract user context from the (memoized) request session"""
+        session = await context.get_session()
+        user_id = getattr(session, 'user_id', None)
+        is_admin = getattr(session, 'is_admin', False) or getattr(session, 'is_superuser', False)
+        return AuditContext(
+            user_id=user_id,
+            admin_user_id=user_id if is_admin else None,
+            session_id=context.session_id,
+            request_id=context.request_id,
+            ip_address=context.client_ip,
+            user_agent=context.user_agent,
+            start_time=context.start_time,
+            # Update audit context with performance metrics
+            database_queries=context.extra.get('db_queries', 0)
+        )
+    
+    def _should_skip_audit(self, path: str) -> bool:
         """Determine if audit logging should be skipped for this request"""
-        path = request.url.path
-        
         # Skip excluded paths
         if any(excluded in path for excluded in self.exclude_paths):
             return True
@@ -145,88 +188,45 @@ class AuditMiddleware(BaseHTTPMiddleware):
         
         return False
     
-    def _get_client_ip(self, request: Request) -> Optional[str]:
-        """Extract client IP address from request headers"""
-        # Check for forwarded headers in order of precedence
-        forwarded_headers = [
-            'x-forwarded-for',
-            'x-real-ip',
-            'cf-connecting-ip',  # Cloudflare
-            'x-client-ip'
-        ]
-        
-        for header in forwarded_headers:
-            if header in request.headers:
-                # Take the first IP in case of comma-separated list
-                ip = request.headers[header].split(',')[0].strip()
-                if ip:
-                    return ip
-        
-        # Fall back to direct client IP
-        return request.client.host if request.client else None
-    
-    async def _get_user_context(self, request: Request) -> Dict[str, Any]:
-        """Extract user context from request"""
-        try:
-            # Try to get current user
-            current_user = await get_current_user_optional(request)
-            
-            context = {}
-            if current_user:
-                context['user_id'] = current_user.id
-                # Check if this is an admin user
-                if hasattr(current_user, 'is_admin') and current_user.is_admin:
-                    context['admin_user_id'] = current_user.id
-            
-            # Extract session ID if available
-            if hasattr(request, 'session') and request.session:
-                context['session_id'] = request.session.get('session_id')
-            
-            return context
-            
-        except Exception:
-            # Ignore errors in user context extraction
-            return {}
-    
-    async def _extract_request_info(self, request: Request) -> Dict[str, Any]:
+    def _extract_request_info(
+        self,
+        scope: Scope,
+        context: RequestContext,
+        body_chunks: List[bytes],
+        capture_body: bool
+    ) -> Dict[str, Any]:
         """Extract comprehensive request information for audit logging"""
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        host = context.headers.get("host", "")
+        url = f"{scope.get('scheme', 'http')}://{host}{context.path}"
+        if query_string:
+            url += f"?{query_string}"
+        
         request_info = {
-            'method': request.method,
-            'url': str(request.url),
-            'path': request.url.path,
-            'query_params': dict(request.query_params),
-            'headers': self._filter_sensitive_headers(dict(request.headers)),
+            'method': context.method,
+            'url': url,
+            'path': context.path,
+            'query_params': dict(parse_qsl(query_string)),
+            'headers': self._filter_sensitive_headers(context.headers),
         }
         
         # Extract request body for auditable endpoints
-        if self._should_log_request_body(request):
-            try:
-                body = await self._read_request_body(request)
-                if body:
-                    request_info['body'] = body
-            except Exception:
-                # Don't fail if body can't be read
-                pass
+        if capture_body:
+            body = self._decode_request_body(
+                b"".join(body_chunks), context.request_body_size, context.headers.get('content-type', '')
+            )
+            if body:
+                request_info['body'] = body
         
         return request_info
     
-    def _extract_response_info(self, response: Response) -> Dict[str, Any]:
+    def _extract_response_info(self, status_code: int, raw_headers: List[tuple]) -> Dict[str, Any]:
         """Extract response information for audit logging"""
-        response_info = {
-            'status_code': response.status_code,
-            'headers': self._filter_sensitive_headers(dict(response.headers)),
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in raw_headers}
+        return {
+            'status_code': status_code,
+            'headers': self._filter_sensitive_headers(headers),
         }
-        
-        # Extract response body for specific status codes and content types
-        if self._should_log_response_body(response):
-            try:
-                # This is limited as we can't easily read the response body
-                # without consuming it. In production, consider using a streaming approach
-                pass
-            except Exception:
-                pass
-        
-        return response_info
     
     def _filter_sensitive_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
         """Filter out sensitive headers from audit logs"""
@@ -240,46 +240,29 @@ class AuditMiddleware(BaseHTTPMiddleware):
                 filtered[key] = value
         return filtered
     
-    def _should_log_request_body(self, request: Request) -> bool:
+    def _should_log_request_body(self, path: str, method: str) -> bool:
         """Determine if request body should be logged"""
         # Log request body for admin operations and user management
         admin_paths = ['/api/v1/admin/', '/api/v1/users/', '/api/v1/auth/']
         
-        if any(path in request.url.path for path in admin_paths):
+        if any(admin_path in path for admin_path in admin_paths):
             return True
         
         # Log for specific methods
-        if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
+        if method in ['POST', 'PUT', 'PATCH', 'DELETE']:
             return True
         
         return False
     
-    def _should_log_response_body(self, response: Response) -> bool:
-        """Determine if response body should be logged"""
-        # Log error responses
-        if response.status_code >= 400:
-            return True
-        
-        # Log for specific content types
-        content_type = response.headers.get('content-type', '')
-        if 'application/json' in content_type:
-            return True
-        
-        return False
-    
-    async def _read_request_body(self, request: Request) -> Optional[Dict[str, Any]]:
-        """Safely read request body for audit logging"""
+    def _decode_request_body(self, body_bytes: bytes, body_size: int, content_type: str) -> Optional[Dict[str, Any]]:
+        """Safely decode the captured request body for audit logging"""
         try:
-            # Read body
-            body_bytes = await request.body()
-            
             # Limit size to prevent memory issues
-            if len(body_bytes) > self.max_body_size:
-                return {"_truncated": True, "_size": len(body_bytes)}
+            if body_size > self.max_body_size:
+                return {"_truncated": True, "_size": body_size}
             
             # Try to parse as JSON
             if body_bytes:
-                content_type = request.headers.get('content-type', '')
                 if 'application/json' in content_type:
                     return json.loads(body_bytes)
                 else:
@@ -297,8 +280,8 @@ class AuditMiddleware(BaseHTTPMiddleware):
     
     async def _log_audit_event(
         self,
-        request: Request,
-        response: Response,
+        context: RequestContext,
+        status_code: int,
         audit_context: AuditContext,
         request_info: Dict[str, Any],
         response_info: Dict[str, Any],
@@ -308,19 +291,19 @@ class AuditMiddleware(BaseHTTPMiddleware):
         """Log the main audit event for this request"""
         try:
             # Determine action and category based on request
-            action, category = self._determine_action_and_category(request, response)
+            action, category = self._determine_action_and_category(context.path, context.method, status_code)
             
             # Determine severity based on response and content
-            severity = self._determine_severity(request, response, error_occurred)
+            severity = self._determine_severity(context.path, status_code, error_occurred)
             
             # Log the audit event
             await audit_logger.log_audit_event(
                 action=action,
-                resource_type=self._determine_resource_type(request),
+                resource_type=self._determine_resource_type(context.path),
                 category=category,
                 context=audit_context,
                 severity=severity,
-                success=not error_occurred and response.status_code < 400,
+                success=not error_occurred and status_code < 400,
                 request_method=request_info['method'],
                 request_url=request_info['url'],
                 request_headers=request_info.get('headers'),
@@ -332,23 +315,21 @@ class AuditMiddleware(BaseHTTPMiddleware):
                     'path': request_info['path'],
                     'query_params': request_info.get('query_params', {}),
                     'user_agent_parsed': self._parse_user_agent_details(
-                        request.headers.get('user-agent')
+                        context.user_agent
                     )
                 }
             )
             
         except Exception as e:
             # Log error but don't fail the request
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Failed to log audit event: {e}")
     
     async def _log_security_event(
         self,
-        request: Request,
+        context: RequestContext,
         audit_context: AuditContext,
         error_info: Dict[str, Any],
-        response: Response
+        status_code: int
     ):
         """Log security-related events"""
         try:
@@ -362,27 +343,24 @@ class AuditMiddleware(BaseHTTPMiddleware):
                 details={
                     'error_type': error_info.get('error_type'),
                     'error_message': error_info.get('error_message'),
-                    'request_path': request.url.path,
-                    'request_method': request.method
+                    'request_path': context.path,
+                    'request_method': context.method
                 },
                 error_message=error_info.get('error_message'),
-                response_status=response.status_code
+                response_status=status_code
             )
             
         except Exception as e:
             # Log error but don't fail
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Failed to log security event: {e}")
     
     def _determine_action_and_category(
         self, 
-        request: Request, 
-        response: Response
+        path: str, 
+        method: str,
+        status_code: int
     ) -> tuple[str, AuditCategory]:
         """Determine audit action and category based on request"""
-        path = request.url.path
-        method = request.method
         
         # Admin operations
         if '/admin/' in path:
@@ -396,7 +374,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
         # Authentication operations
         if '/auth/' in path:
             if 'login' in path:
-                if response.status_code < 400:
+                if status_code < 400:
                     return AuditActions.USER_LOGIN, AuditCategory.AUTHENTICATION
                 else:
                     return AuditActions.USER_LOGIN_FAILED, AuditCategory.SECURITY_EVENT
@@ -430,9 +408,8 @@ class AuditMiddleware(BaseHTTPMiddleware):
         # Default API request
         return AuditActions.API_REQUEST, AuditCategory.API_ACCESS
     
-    def _determine_resource_type(self, request: Request) -> str:
+    def _determine_resource_type(self, path: str) -> str:
         """Determine resource type based on request path"""
-        path = request.url.path
         
         if '/users/' in path:
             return ResourceTypes.USER
@@ -451,21 +428,21 @@ class AuditMiddleware(BaseHTTPMiddleware):
     
     def _determine_severity(
         self, 
-        request: Request, 
-        response: Response, 
+        path: str, 
+        status_code: int, 
         error_occurred: bool
     ) -> SeverityLevel:
         """Determine severity level based on request/response characteristics"""
         # Critical for server errors
-        if error_occurred or response.status_code >= 500:
+        if error_occurred or status_code >= 500:
             return SeverityLevel.CRITICAL
         
         # High for client errors and admin operations
-        if response.status_code >= 400 or '/admin/' in request.url.path:
+        if status_code >= 400 or '/admin/' in path:
             return SeverityLevel.HIGH
         
         # Medium for authentication and user management
-        if '/auth/' in request.url.path or '/users/' in request.url.path:
+        if '/auth/' in path or '/users/' in path:
             return SeverityLevel.MEDIUM
         
         # Low for regular operations
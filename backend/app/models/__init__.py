@@ -143,7 +143,11 @@ from .scraping import (
     CDXResumeStateRead,
     ScrapeProgressUpdate,
     ScrapePageStatus,
-    CDXResumeStatus
+    CDXResumeStatus,
+    ScrapePageDailyRollup,
+    ScrapePageRollupWatermark,
+    DomainTimelineBucket,
+    DomainTimelineWatermark
 )
 from .shared_pages import (
     PageV2,
@@ -340,6 +344,10 @@ __all__ = [
     "PageErrorLog",
     "ScrapePageCreate",
     "ScrapePageRead",
+    "ScrapePageDailyRollup",
+    "ScrapePageRollupWatermark",
+    "DomainTimelineBucket",
+    "DomainTimelineWatermark",
     "CDXResumeStateRead",
     "ScrapeProgressUpdate",
     
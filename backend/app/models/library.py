@@ -213,6 +213,10 @@ class SearchSuggestion(SQLModel, table=True):
     __table_args__ = (
         UniqueConstraint("user_id", "suggestion_text"),
         Index("idx_search_suggestion_score", "user_id", "score"),
+        Index(
+            "ix_search_suggestions_user_text_prefix", "user_id", "suggestion_text",
+            postgresql_ops={"suggestion_text": "text_pattern_ops"},
+        ),
     )
     
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -223,7 +227,7 @@ class SearchSuggestion(SQLModel, table=True):
     suggestion_type: str  # query, filter, entity, topic
     display_text: str  # Formatted for display
     
-    # Scoring and ranking
+    # Scoring and ranking; score is forward-decayed (see app.services.search_suggestions)
     score: float = Field(default=0.0, index=True)
     frequency: int = Field(default=1)
     last_used: Optional[datetime] = None
@@ -74,6 +74,10 @@ class ScrapePageQueryParams(BaseModel):
     # Manual processing filters
     can_be_manually_processed: Optional[bool] = Field(default=None, description="Filter by manual processing eligibility")
     is_manually_overridden: Optional[bool] = Field(default=None, description="Filter by manual override status")
+    
+    # Keyset pagination and totals
+    cursor: Optional[str] = Field(default=None, max_length=512, description="next_cursor of the previous page; replaces page")
+    exact_total: bool = Field(default=True, description="Count matches exactly instead of estimating large totals")
 
 
 class ScrapePageSummary(BaseModel):
@@ -154,11 +158,14 @@ class ScrapePageListResponse(BaseModel):
     """Response model for paginated scrape page lists"""
     pages: List[ScrapePageSummary]
     total: int
-    page: int
+    # None when the page was located by cursor
+    page: Optional[int] = None
     limit: int
     total_pages: int
     has_next: bool
     has_previous: bool
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 
 class ManualProcessingRequest(BaseModel):
@@ -261,11 +268,18 @@ class BulkManualProcessingRequest(BaseModel):
     new_status: Optional[ScrapePageStatus] = Field(default=None, description="New status for reset operations")
     
     # Safety limits
-    max_pages: int = Field(default=1000, ge=1, le=10000, description="Maximum number of pages to process")
+    max_pages: int = Field(default=1000, ge=1, le=200000, description="Maximum number of pages to process")
     dry_run: bool = Field(default=False, description="Preview operation without making changes")
     
     # Batch processing
-    batch_size: int = Field(default=100, ge=1, le=500, description="Number of pages to process per batch")
+    batch_size: Optional[int] = Field(
+        default=None, ge=1, le=50000,
+        description="Pages per set-based UPDATE chunk (defaults to SCRAPE_PAGE_BULK_CHUNK_SIZE)"
+    )
+    run_async: bool = Field(
+        default=False,
+        description="Run as a background job; selections above SCRAPE_PAGE_BULK_ASYNC_THRESHOLD always do"
+    )
     
     @validator('filters')
     def validate_filters(cls, v):
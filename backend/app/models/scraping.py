@@ -1,10 +1,10 @@
 """
 Scraping-related models for Wayback Machine integration
 """
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from sqlmodel import SQLModel, Field, Column, String, DateTime, Text, JSON
-from sqlalchemy import func, Index
+from sqlalchemy import func, text, Index, Date, BigInteger, LargeBinary
 from sqlalchemy.dialects.postgresql import JSONB
 from enum import Enum
 from pydantic import field_validator, field_serializer
@@ -103,7 +103,20 @@ class ScrapePageBase(SQLModel):
 class ScrapePage(ScrapePageBase, table=True):
     """Scrape page model for database"""
     __tablename__ = "scrape_pages"
-    
+    __table_args__ = (
+        # Conflict target for COPY-based bulk ingestion. The URL is hashed because
+        # archived URLs can exceed the btree tuple size limit; md5() is Postgres-only.
+        Index(
+            'uq_scrape_pages_domain_url_timestamp', 'domain_id', text('md5(original_url)'), 'unix_timestamp',
+            unique=True,
+        ).ddl_if(dialect='postgresql'),
+        # Keyset pagination of project listings (ScrapePageService.get_project_scrape_pages)
+        Index('ix_scrape_pages_domain_created_id', 'domain_id', 'created_at', 'id'),
+        Index('ix_scrape_pages_domain_status_created_id', 'domain_id', 'status', 'created_at', 'id'),
+        Index('ix_scrape_pages_domain_updated_id', 'domain_id', 'updated_at', 'id'),
+        Index('ix_scrape_pages_domain_priority_id', 'domain_id', 'priority_score', 'id'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     domain_id: int = Field(foreign_key="domains.id")
     scrape_session_id: Optional[int] = Field(default=None, foreign_key="scrape_sessions.id")
@@ -539,6 +552,92 @@ class IncrementalScrapingHistory(IncrementalScrapingHistoryBase, table=True):
         return 0.0
 
 
+class ScrapePageDailyRollup(SQLModel, table=True):
+    """
+    ScrapePage counts per project, domain and creation day, split by the
+    dimensions the statistics endpoints group on
+
+    Maintained by app.services.scrape_page_rollups; rows for a (domain, day)
+    bucket are always rewritten together from scrape_pages.
+    """
+    __tablename__ = "scrape_page_daily_rollups"
+    __table_args__ = (
+        Index('ix_scrape_page_daily_rollups_project_day', 'project_id', 'day'),
+        Index('ix_scrape_page_daily_rollups_domain_day', 'domain_id', 'day'),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    project_id: int = Field(foreign_key="projects.id")
+    domain_id: int = Field(foreign_key="domains.id")
+    day: date = Field(sa_column=Column(Date, nullable=False))
+
+    status: str = Field(sa_column=Column(String(30), nullable=False))
+    filter_category: Optional[str] = Field(default=None, sa_column=Column(String(50)))
+    filter_reason: Optional[str] = Field(default=None, sa_column=Column(String(100)))
+    priority_score: Optional[int] = Field(default=None)
+    confidence_bucket: Optional[str] = Field(default=None, sa_column=Column(String(10)))
+    is_manually_overridden: bool = Field(default=False)
+    can_be_manually_processed: bool = Field(default=True)
+
+    page_count: int = Field(default=0)
+    processing_time_sum: float = Field(default=0.0)
+    processing_time_count: int = Field(default=0)
+    content_length_sum: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
+    content_length_count: int = Field(default=0)
+
+
+class ScrapePageRollupWatermark(SQLModel, table=True):
+    """How far scrape_pages changes have been folded into a project's rollups"""
+    __tablename__ = "scrape_page_rollup_watermarks"
+
+    project_id: int = Field(foreign_key="projects.id", primary_key=True)
+    # Pages updated after this moment may not be reflected yet
+    refreshed_through: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    refreshed_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class DomainTimelineBucket(SQLModel, table=True):
+    """
+    ScrapePage totals for one domain over one hour, day or month of creation
+    time, with a HyperLogLog sketch of the distinct URLs
+
+    Maintained by app.services.domain_timeline_cubes; hour and day buckets of
+    a (domain, day) are rewritten together, month buckets are merged from
+    their day buckets.
+    """
+    __tablename__ = "domain_timeline_buckets"
+    __table_args__ = (
+        Index('uq_domain_timeline_buckets_domain_grain_start', 'domain_id', 'granularity', 'bucket_start', unique=True),
+        Index('ix_domain_timeline_buckets_grain_start', 'granularity', 'bucket_start'),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    project_id: int = Field(foreign_key="projects.id")
+    domain_id: int = Field(foreign_key="domains.id")
+    granularity: str = Field(sa_column=Column(String(10), nullable=False))  # hour, day or month
+    bucket_start: datetime = Field(sa_column=Column(DateTime, nullable=False))  # UTC
+
+    page_count: int = Field(default=0)
+    successful_count: int = Field(default=0)
+    failed_count: int = Field(default=0)
+    content_length_sum: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
+    processing_time_sum: float = Field(default=0.0)
+    processing_time_count: int = Field(default=0)
+    first_created_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime))
+    last_created_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime))
+    url_sketch: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+class DomainTimelineWatermark(SQLModel, table=True):
+    """How far scrape_pages changes have been folded into a project's timeline buckets"""
+    __tablename__ = "domain_timeline_watermarks"
+
+    project_id: int = Field(foreign_key="projects.id", primary_key=True)
+    # Pages updated after this moment may not be reflected yet
+    refreshed_through: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    refreshed_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
 # Pydantic schemas for API
 class ScrapePageCreate(ScrapePageBase):
     """Schema for creating scrape pages"""
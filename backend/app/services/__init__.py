@@ -1,4 +1,10 @@
 """Business logic services module"""
 
-# Re-export commonly used service singletons for convenience
-from .meilisearch_service import meilisearch_service  # noqa: F401
\ No newline at end of file
+
+def __getattr__(name):
+    # Re-export commonly used service singletons for convenience, imported on
+    # first access so loading any one service does not pull in the others
+    if name == "meilisearch_service":
+        from .meilisearch_service import meilisearch_service
+        return meilisearch_service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
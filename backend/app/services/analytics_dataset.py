@@ -0,0 +1,391 @@
+"""
+Hive-partitioned Parquet datasets for DuckDB analytics
+
+Implements the layout in ``analytics/partitioning_strategy.md``: each dataset
+lives under ``<PARQUET_STORAGE_PATH>/datasets/<name>/`` in
+``year=YYYY/month=MM/day=DD[/hour=HH]/<sub>=<value>/`` directories, so DuckDB
+(``read_parquet(..., hive_partitioning=1)``) prunes whole directories on time
+and source filters.
+
+``HivePartitionedWriter`` keeps one open Parquet file per partition across
+batches and rolls to a new file once the current one reaches the target
+size, instead of writing one small file per batch. Files are written under an
+``.inprogress`` name and renamed when closed, so readers never see a partial
+file. ``compact_dataset`` merges the small files that accumulate in older
+partitions (e.g. from many short runs) into target-sized ones.
+"""
+import glob
+import logging
+import math
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from app.core.lazy_imports import require_module
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS_SUFFIX = ".inprogress"
+_UNSAFE_VALUE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _pandas():
+    return require_module("pandas", "Analytics datasets")
+
+
+def _pyarrow():
+    return require_module("pyarrow", "Analytics datasets")
+
+
+def _parquet():
+    return require_module("pyarrow.parquet", "Analytics datasets")
+
+
+def _partition_value(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value == "":
+        return "unknown"
+    return _UNSAFE_VALUE.sub("_", str(value)) or "unknown"
+
+
+def cdx_source(content_url: Optional[str]) -> str:
+    """Archive a capture came from, judged by its content URL"""
+    url = (content_url or "").lower()
+    if "commoncrawl" in url:
+        return "common_crawl"
+    if "archive.org" in url:
+        return "wayback_machine"
+    return "unknown"
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """How one analytics dataset is partitioned"""
+    name: str
+    time_column: str
+    sub_partition: str  # directory key below the time levels
+    sub_partition_value: Callable[["pd.DataFrame"], "pd.Series"]
+    hourly: bool = False
+    # Files written before this layout, relative to the storage root
+    legacy_glob: Optional[str] = None
+
+    @property
+    def time_levels(self) -> Tuple[str, ...]:
+        return ("year", "month", "day", "hour") if self.hourly else ("year", "month", "day")
+
+    @property
+    def partition_keys(self) -> Tuple[str, ...]:
+        return (*self.time_levels, self.sub_partition)
+
+    @property
+    def hive_types(self) -> Dict[str, str]:
+        types = {"year": "SMALLINT", "month": "TINYINT", "day": "TINYINT", "hour": "TINYINT"}
+        return {**{level: types[level] for level in self.time_levels}, self.sub_partition: "VARCHAR"}
+
+
+def _column_or_unknown(column: str) -> Callable[["pd.DataFrame"], "pd.Series"]:
+    def value(df: "pd.DataFrame") -> "pd.Series":
+        if column in df:
+            return df[column]
+        return _pandas().Series(["unknown"] * len(df), index=df.index)
+    return value
+
+
+DATASETS: Dict[str, DatasetSpec] = {
+    "cdx_records": DatasetSpec(
+        name="cdx_records",
+        time_column="created_at",
+        sub_partition="source",
+        sub_partition_value=lambda df: df["content_url"].map(cdx_source),
+        legacy_glob="cdx_analytics/*/*.parquet",
+    ),
+    "content_analytics": DatasetSpec(
+        name="content_analytics",
+        time_column="created_at",
+        sub_partition="method",
+        sub_partition_value=_column_or_unknown("extraction_method"),
+        legacy_glob="content_analytics/*.parquet",
+    ),
+    "project_analytics": DatasetSpec(
+        name="project_analytics",
+        time_column="analytics_date",
+        sub_partition="level",
+        sub_partition_value=_column_or_unknown("aggregation_level"),
+        legacy_glob="project_analytics/*.parquet",
+    ),
+    "events": DatasetSpec(
+        name="events",
+        time_column="timestamp",
+        sub_partition="type",
+        sub_partition_value=_column_or_unknown("event_type"),
+        hourly=True,
+        legacy_glob="events/*/*.parquet",
+    ),
+}
+
+
+def dataset_root(storage_path, name: str) -> Path:
+    return Path(storage_path) / "datasets" / name
+
+
+def dataset_glob(storage_path, name: str) -> str:
+    """Glob matching every data file of a dataset, for read_parquet"""
+    levels = len(DATASETS[name].partition_keys)
+    return str(dataset_root(storage_path, name).joinpath(*(["*"] * levels), "*.parquet"))
+
+
+def has_files(storage_path, name: str) -> bool:
+    return next(iter(glob.iglob(dataset_glob(storage_path, name))), None) is not None
+
+
+def view_sql(storage_path, name: str) -> str:
+    """
+    ``CREATE VIEW`` exposing a dataset to DuckDB with its partition columns
+
+    ``hive_partitioning`` turns the directory keys into columns and lets
+    filters on them skip whole directories; ``union_by_name`` tolerates files
+    whose columns differ between batches. DuckDB refuses the view while the
+    dataset has no files, see ``has_files``.
+    """
+    spec = DATASETS[name]
+    path = dataset_glob(storage_path, name).replace("'", "''")
+    hive_types = ", ".join(f"'{key}': {sql_type}" for key, sql_type in spec.hive_types.items())
+    return (
+        f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM read_parquet('{path}', "
+        f"hive_partitioning = true, union_by_name = true, hive_types = {{{hive_types}}})"
+    )
+
+
+def _partition_columns(df: "pd.DataFrame", spec: DatasetSpec) -> "pd.DataFrame":
+    pd = _pandas()
+    times = pd.to_datetime(df[spec.time_column], errors="coerce", utc=True)
+    keys = pd.DataFrame(index=df.index)
+    keys["year"] = times.dt.year
+    keys["month"] = times.dt.month
+    keys["day"] = times.dt.day
+    if spec.hourly:
+        keys["hour"] = times.dt.hour
+    keys[spec.sub_partition] = spec.sub_partition_value(df).map(_partition_value)
+    return keys
+
+
+def _partition_dir(spec: DatasetSpec, values) -> Path:
+    parts = []
+    for key, value in zip(spec.partition_keys, values):
+        if key == spec.sub_partition:
+            parts.append(f"{key}={value}")
+        elif _pandas().isna(value):
+            parts.append(f"{key}=0")
+        else:
+            parts.append(f"{key}={int(value):04d}" if key == "year" else f"{key}={int(value):02d}")
+    return Path(*parts)
+
+
+class _PartitionFile:
+    """One open output file of a partition"""
+
+    def __init__(self, final_path: Path, schema: "pa.Schema", write_options: Dict):
+        self.final_path = final_path
+        self.temp_path = final_path.with_name(final_path.name + IN_PROGRESS_SUFFIX)
+        self.sink = _pyarrow().OSFile(str(self.temp_path), "wb")
+        self.writer = _parquet().ParquetWriter(self.sink, schema, **write_options)
+        self.rows = 0
+
+    @property
+    def schema(self) -> "pa.Schema":
+        return self.writer.schema
+
+    @property
+    def size(self) -> int:
+        # Row groups are flushed on every write_table, so this tracks the file closely
+        return self.sink.tell()
+
+    def write(self, table: "pa.Table") -> None:
+        self.writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self) -> Path:
+        self.writer.close()
+        self.sink.close()
+        os.replace(self.temp_path, self.final_path)
+        return self.final_path
+
+
+class HivePartitionedWriter:
+    """
+    Appends DataFrames to a Hive-partitioned dataset, one rolling file per partition
+
+    Use as a context manager, or call ``close()``; only closed files become
+    visible to readers.
+    """
+
+    def __init__(
+        self,
+        root,
+        spec: DatasetSpec,
+        target_file_bytes: int = 128 * 1024 * 1024,
+        max_open_files: int = 64,
+        write_options: Optional[Dict] = None,
+    ):
+        self.root = Path(root)
+        self.spec = spec
+        self.target_file_bytes = target_file_bytes
+        self.max_open_files = max_open_files
+        self.write_options = write_options or {"compression": "zstd"}
+        self._open: Dict[Path, _PartitionFile] = {}
+        self._run_id = uuid.uuid4().hex[:12]
+        self._sequence = 0
+        self.files: List[str] = []
+
+    def __enter__(self) -> "HivePartitionedWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, df: "pd.DataFrame") -> None:
+        if df.empty:
+            return
+        pa = _pyarrow()
+        keys = _partition_columns(df, self.spec)
+        # Partition values live in the directory names, not in the files
+        data = df.drop(columns=[c for c in self.spec.partition_keys if c in df.columns])
+        for values, index in keys.groupby(list(keys.columns), dropna=False).groups.items():
+            table = pa.Table.from_pandas(data.loc[index], preserve_index=False)
+            self._write_partition(_partition_dir(self.spec, values), table)
+
+    def _write_partition(self, relative_dir: Path, table: "pa.Table") -> None:
+        current = self._open.get(relative_dir)
+        if current is not None and not current.schema.equals(table.schema):
+            pa = _pyarrow()
+            try:
+                table = table.cast(current.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                # Columns changed type; start a new file (DuckDB reads with union_by_name)
+                self._close_partition(relative_dir)
+                current = None
+        if current is None:
+            current = self._open_partition(relative_dir, table.schema)
+        current.write(table)
+        if current.size >= self.target_file_bytes:
+            self._close_partition(relative_dir)
+
+    def _open_partition(self, relative_dir: Path, schema: "pa.Schema") -> _PartitionFile:
+        if len(self._open) >= self.max_open_files:
+            # Close the partition written least recently (dicts keep insertion order)
+            self._close_partition(next(iter(self._open)))
+        directory = self.root / relative_dir
+        directory.mkdir(parents=True, exist_ok=True)
+        self._sequence += 1
+        path = directory / f"part-{self._run_id}-{self._sequence:05d}.parquet"
+        handle = _PartitionFile(path, schema, self.write_options)
+        self._open[relative_dir] = handle
+        return handle
+
+    def _close_partition(self, relative_dir: Path) -> None:
+        handle = self._open.pop(relative_dir)
+        self.files.append(str(handle.close()))
+
+    def close(self) -> List[str]:
+        for relative_dir in list(self._open):
+            self._close_partition(relative_dir)
+        return self.files
+
+    def abort(self) -> None:
+        """Discard files that were not closed yet"""
+        for handle in self._open.values():
+            try:
+                handle.writer.close()
+                handle.sink.close()
+            finally:
+                handle.temp_path.unlink(missing_ok=True)
+        self._open.clear()
+
+
+def _partition_dirs(root: Path, depth: int) -> List[Path]:
+    return sorted(p for p in root.glob("/".join(["*"] * depth)) if p.is_dir())
+
+
+def compact_dataset(
+    storage_path,
+    name: str,
+    target_file_bytes: int = 128 * 1024 * 1024,
+    min_age_seconds: float = 3600,
+    write_options: Optional[Dict] = None,
+    now: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Merge the small files of each settled partition into target-sized files
+
+    A file is small when it is under half the target size. Partitions
+    modified within ``min_age_seconds`` are left alone since writers may
+    still be adding to them. New files are renamed into place before the
+    old ones are removed, so a reader never misses rows (it may briefly see
+    both during the swap).
+    """
+    spec = DATASETS[name]
+    root = dataset_root(storage_path, name)
+    now = now if now is not None else time.time()
+    stats = {"partitions_compacted": 0, "files_removed": 0, "files_written": 0}
+    if not root.exists():
+        return stats
+
+    pa, pq = _pyarrow(), _parquet()
+    for partition in _partition_dirs(root, len(spec.partition_keys)):
+        files = sorted(partition.glob("*.parquet"))
+        if any(f.stat().st_mtime > now - min_age_seconds for f in partition.iterdir()):
+            continue
+        small = [f for f in files if f.stat().st_size < target_file_bytes / 2]
+        if len(small) < 2:
+            continue
+
+        tables = [pq.read_table(f) for f in small]
+        merged = pa.concat_tables(tables, promote_options="default")
+        writer = HivePartitionedWriter(root, spec, target_file_bytes, write_options=write_options)
+        relative = partition.relative_to(root)
+        # Row groups of about a tenth of the target let files roll close to it
+        batch_rows = max(1, merged.num_rows * target_file_bytes // max(sum(f.stat().st_size for f in small), 1) // 10)
+        for batch in merged.to_batches(max_chunksize=batch_rows):
+            writer._write_partition(relative, pa.Table.from_batches([batch], schema=merged.schema))
+        written = writer.close()
+
+        for f in small:
+            f.unlink()
+        stats["partitions_compacted"] += 1
+        stats["files_removed"] += len(small)
+        stats["files_written"] += len(written)
+        logger.info(f"Compacted {len(small)} files into {len(written)} in {name}/{relative}")
+    return stats
+
+
+def import_legacy_files(storage_path, name: str, writer: HivePartitionedWriter,
+                        prepare: Optional[Callable[["pd.DataFrame"], "pd.DataFrame"]] = None) -> int:
+    """Rewrite files from the pre-partitioning layout into the dataset, removing the originals"""
+    spec = DATASETS[name]
+    if not spec.legacy_glob:
+        return 0
+    imported = []
+    for path in sorted(Path(storage_path).glob(spec.legacy_glob)):
+        df = _parquet().read_table(path).to_pandas()
+        if prepare is not None:
+            df = prepare(df)
+        if spec.time_column in df:
+            writer.write(df)
+            imported.append(path)
+        else:
+            logger.warning(f"Skipping legacy file without {spec.time_column}: {path}")
+    writer.close()
+    # Originals go only once their rows are in closed dataset files
+    for path in imported:
+        path.unlink()
+    return len(imported)
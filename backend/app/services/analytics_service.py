@@ -19,7 +19,6 @@ import hashlib
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Union, Tuple
 from uuid import UUID
-import pandas as pd
 from pathlib import Path
 import tempfile
 from dataclasses import dataclass
@@ -32,11 +31,13 @@ import redis.asyncio as aioredis
 
 from ..core.config import settings
 from ..core.database import AsyncSessionLocal
+from ..core.redis_pool import available_redis, coalesced_get
 from ..models.user import User
 from ..models.project import Project, Domain
 from ..models.shared_pages import PageV2, ProjectPage
 from ..models.scraping import ScrapePage, ScrapePageStatus
 from ..services.duckdb_service import DuckDBService, get_duckdb_service
+from ..services import domain_timeline_cubes as cubes
 from ..services.hybrid_query_router import (
     HybridQueryRouter, get_hybrid_router, QueryType, DatabaseTarget, QueryPriority
 )
@@ -72,13 +73,11 @@ class AnalyticsCache:
         
     async def initialize(self):
         """Initialize Redis connection"""
-        try:
-            self.redis_client = aioredis.from_url(settings.REDIS_URL)
-            await self.redis_client.ping()
+        self.redis_client = await available_redis()
+        if self.redis_client:
             logger.info("Analytics cache initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize analytics cache: {e}")
-            self.redis_client = None
+        else:
+            logger.error("Failed to initialize analytics cache: Redis unavailable")
     
     def _generate_cache_key(self, prefix: str, **kwargs) -> str:
         """Generate cache key from parameters"""
@@ -99,7 +98,8 @@ class AnalyticsCache:
             
             # Try Redis cache
             if self.redis_client:
-                cached = await self.redis_client.get(key)
+                # Dashboards request several analytics at once; their lookups share MGETs
+                cached = await coalesced_get(self.redis_client, key)
                 if cached:
                     data = json.loads(cached)
                     self.local_cache[key] = (data, datetime.now())
@@ -215,6 +215,26 @@ class AnalyticsService:
         """Get domain timeline analytics with specified granularity"""
         context = context or AnalyticsQueryContext()
         
+        if self._use_timeline_cubes(granularity):
+            # Merging pre-aggregated buckets is cheap enough not to cache
+            async with AsyncSessionLocal() as db:
+                periods = await cubes.domain_timeline(
+                    db, domain, granularity.value, context.start_date, context.end_date
+                )
+            self.query_metrics["total_queries"] += 1
+            return [
+                DomainTimelineDataPoint(
+                    timestamp=start,
+                    pages_scraped=totals.page_count,
+                    pages_successful=totals.successful_count,
+                    pages_failed=totals.failed_count,
+                    content_size_mb=totals.content_size_mb,
+                    unique_urls=totals.unique_urls,
+                    error_rate=totals.error_rate
+                )
+                for start, totals in periods
+            ]
+        
         # Generate cache key
         cache_key = self.cache._generate_cache_key(
             "domain_timeline",
@@ -303,6 +323,29 @@ class AnalyticsService:
         """Get comprehensive domain statistics"""
         context = context or AnalyticsQueryContext()
         
+        if self._use_timeline_cubes():
+            async with AsyncSessionLocal() as db:
+                totals = await cubes.domain_totals(db, domain, context.start_date, context.end_date)
+            self.query_metrics["total_queries"] += 1
+            if not totals.page_count:
+                return DomainStatistics(domain=domain)
+            return DomainStatistics(
+                domain=domain,
+                total_pages=totals.page_count,
+                successful_pages=totals.successful_count,
+                failed_pages=totals.failed_count,
+                success_rate=totals.success_rate,
+                avg_content_size=totals.content_length_sum / totals.page_count / 1024.0,
+                total_content_size=totals.content_size_mb,
+                first_scraped=totals.first_created_at,
+                last_scraped=totals.last_created_at,
+                unique_urls=totals.unique_urls,
+                avg_scrape_duration=totals.avg_processing_time,
+                popular_paths=await self._get_popular_paths(domain, context),
+                content_types=await self._get_content_types_distribution(domain, context),
+                error_distribution=await self._get_error_distribution(domain, context)
+            )
+        
         cache_key = self.cache._generate_cache_key(
             "domain_stats",
             domain=domain,
@@ -411,6 +454,23 @@ class AnalyticsService:
         """Get top domains ranked by specified metric"""
         context = context or AnalyticsQueryContext()
         
+        if self._use_timeline_cubes():
+            async with AsyncSessionLocal() as db:
+                rows = await cubes.top_domains(db, metric, limit, context.start_date, context.end_date)
+            self.query_metrics["total_queries"] += 1
+            return [
+                TopDomainEntry(
+                    domain=name,
+                    rank=rank,
+                    total_pages=pages,
+                    success_rate=successful * 100.0 / pages if pages else 0.0,
+                    content_size_mb=content_bytes / (1024.0 * 1024.0),
+                    last_activity=last_activity,
+                    projects_count=projects
+                )
+                for rank, (name, pages, successful, content_bytes, last_activity, projects) in enumerate(rows, 1)
+            ]
+        
         cache_key = self.cache._generate_cache_key(
             "top_domains",
             metric=metric,
@@ -522,6 +582,15 @@ class AnalyticsService:
             project = await session.get(Project, project_id)
             if not project:
                 raise ValueError(f"Project {project_id} not found")
+            
+            if self._use_timeline_cubes():
+                overall, by_domain = await cubes.project_totals(
+                    session, project_id, context.start_date, context.end_date
+                )
+                self.query_metrics["total_queries"] += 1
+                return self._project_performance_from_totals(
+                    project_id, project.name, overall, by_domain if include_domain_breakdown else {}
+                )
         
         # Main performance query
         perf_query = """
@@ -725,6 +794,47 @@ class AnalyticsService:
             raise
     
     # Helper Methods
+    def _use_timeline_cubes(self, granularity: TimeGranularity = TimeGranularity.DAY) -> bool:
+        """Whether a query can be answered from the domain timeline buckets"""
+        return settings.ANALYTICS_TIMELINE_CUBES_ENABLED and granularity.value in cubes.BUCKET_GRAIN
+    
+    def _project_performance_from_totals(
+        self,
+        project_id: UUID,
+        project_name: str,
+        overall: cubes.TimelineTotals,
+        by_domain: Dict[str, cubes.TimelineTotals]
+    ) -> ProjectPerformanceData:
+        """Build ProjectPerformanceData from timeline bucket totals"""
+        duration_hours = 1.0
+        if overall.first_created_at and overall.last_created_at and overall.last_created_at > overall.first_created_at:
+            duration_hours = (overall.last_created_at - overall.first_created_at).total_seconds() / 3600.0
+        
+        breakdown = [
+            ProjectDomainMetrics(
+                domain=name,
+                total_pages=totals.page_count,
+                successful_pages=totals.successful_count,
+                error_rate=totals.error_rate,
+                avg_response_time=totals.avg_processing_time,
+                content_size_mb=totals.content_size_mb
+            )
+            for name, totals in sorted(by_domain.items(), key=lambda item: item[1].page_count, reverse=True)
+        ]
+        
+        return ProjectPerformanceData(
+            project_id=project_id,
+            project_name=project_name,
+            total_pages=overall.page_count,
+            successful_pages=overall.successful_count,
+            failed_pages=overall.failed_count,
+            overall_success_rate=overall.success_rate,
+            avg_scrape_duration=overall.avg_processing_time,
+            total_content_size=overall.content_size_mb,
+            scraping_efficiency=overall.page_count / duration_hours,
+            domain_breakdown=breakdown
+        )
+    
     def _get_date_trunc_format(self, granularity: TimeGranularity) -> str:
         """Convert TimeGranularity to PostgreSQL date_trunc format"""
         mapping = {
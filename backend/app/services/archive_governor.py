@@ -0,0 +1,363 @@
+"""
+Cluster-wide request governor for archive.org
+
+Every archive fetch path (Wayback content, CDX queries, generic URL fetches
+that hit archive.org) asks the governor for permission before sending a
+request. Permission is decided with GCRA (generic cell rate algorithm) in a
+Redis Lua script, so all Celery processes on all hosts share one schedule per
+scope. A scope is the upstream host plus the proxy the request leaves through,
+since archive.org throttles per client address. CDX queries get a scope and
+budget of their own, so index paging is not held to the content fetch rate.
+
+The admitted rate adapts to what archive.org answers: 429/5xx responses and
+network errors cut the rate multiplicatively (at most once per cooldown), a
+429 pauses the whole scope for its Retry-After, and every successful response
+restores the rate additively. Granted and throttled counts per scope are kept
+next to the schedule for the monitoring endpoint.
+
+When Redis is unreachable the governor falls back to the same algorithm in
+process memory, which still paces this worker.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from ..core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - redis is a hard dependency in deployments
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+GOVERNED_HOST_SUFFIXES = ("archive.org",)
+
+# CDX server paths, governed apart from content fetches on the same host
+CDX_PATH_PREFIX = "/cdx/"
+CDX_SCOPE_SUFFIX = "/cdx"
+
+# Statuses that mean archive.org wants us to slow down
+BACKOFF_STATUSES = {429, 500, 502, 503, 504, 520, 521, 522, 523, 524}
+
+# KEYS: schedule, state. ARGV: interval_ms, burst, state_ttl_s, first_attempt.
+# Returns 0 when granted, otherwise the milliseconds to wait.
+ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local factor = tonumber(redis.call('HGET', KEYS[2], 'factor') or '1')
+local paused_until = tonumber(redis.call('HGET', KEYS[2], 'paused_until') or '0')
+local interval = tonumber(ARGV[1]) / factor
+local tolerance = interval * (tonumber(ARGV[2]) - 1)
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+local wait = paused_until - now
+if wait <= 0 then
+  local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+  if tat < now then tat = now end
+  wait = tat - tolerance - now
+  if wait <= 0 then
+    redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil(tat + interval - now) + 1000)
+    redis.call('HINCRBY', KEYS[2], 'granted', 1)
+    return 0
+  end
+end
+if ARGV[4] == '1' then
+  redis.call('HINCRBY', KEYS[2], 'throttled', 1)
+end
+return math.ceil(wait)
+"""
+
+# KEYS: state. ARGV: outcome ('ok' or 'error'), decrease, increase, min_factor,
+# cooldown_ms, pause_ms, state_ttl_s. Returns the new rate factor.
+OUTCOME_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local factor = tonumber(redis.call('HGET', KEYS[1], 'factor') or '1')
+if ARGV[1] == 'ok' then
+  redis.call('HINCRBY', KEYS[1], 'ok', 1)
+  factor = math.min(1, factor + tonumber(ARGV[3]))
+else
+  redis.call('HINCRBY', KEYS[1], 'errors', 1)
+  local decreased_at = tonumber(redis.call('HGET', KEYS[1], 'decreased_at') or '0')
+  if now - decreased_at >= tonumber(ARGV[5]) then
+    factor = math.max(tonumber(ARGV[4]), factor * tonumber(ARGV[2]))
+    redis.call('HSET', KEYS[1], 'decreased_at', now)
+  end
+  local pause = tonumber(ARGV[6])
+  if pause > 0 and now + pause > tonumber(redis.call('HGET', KEYS[1], 'paused_until') or '0') then
+    redis.call('HSET', KEYS[1], 'paused_until', now + pause)
+  end
+end
+redis.call('HSET', KEYS[1], 'factor', tostring(factor))
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+return tostring(factor)
+"""
+
+
+def governor_scope(url: str, proxy: Optional[str] = None) -> Optional[str]:
+    """Scope a request is governed under, or None for non-archive hosts"""
+    parsed_url = urlparse(url)
+    host = (parsed_url.hostname or "").lower()
+    if not host or not any(host == s or host.endswith("." + s) for s in GOVERNED_HOST_SUFFIXES):
+        return None
+    if parsed_url.path.startswith(CDX_PATH_PREFIX):
+        host += CDX_SCOPE_SUFFIX
+    if proxy:
+        parsed = urlparse(proxy if "://" in proxy else f"http://{proxy}")
+        # Never put proxy credentials into Redis keys
+        route = f"{parsed.hostname}:{parsed.port}" if parsed.port else (parsed.hostname or "proxy")
+    else:
+        route = "direct"
+    return f"{host}|{route}"
+
+
+@dataclass
+class GovernorPolicy:
+    requests_per_minute: float
+    burst: int
+    decrease: float
+    increase: float
+    min_factor: float
+    cooldown_seconds: float
+    default_pause_seconds: float
+
+    @property
+    def interval_ms(self) -> float:
+        return 60000.0 / self.requests_per_minute
+
+    @classmethod
+    def for_host(cls, host: str) -> "GovernorPolicy":
+        rates = settings.ARCHIVE_GOVERNOR_HOST_RATES or {}
+        if host.endswith(CDX_SCOPE_SUFFIX):
+            default_rate = settings.ARCHIVE_GOVERNOR_CDX_REQUESTS_PER_MINUTE
+        else:
+            default_rate = settings.ARCHIVE_GOVERNOR_REQUESTS_PER_MINUTE
+        return cls(
+            requests_per_minute=float(rates.get(host, default_rate)),
+            burst=settings.ARCHIVE_GOVERNOR_BURST,
+            decrease=settings.ARCHIVE_GOVERNOR_DECREASE_FACTOR,
+            increase=settings.ARCHIVE_GOVERNOR_INCREASE_STEP,
+            min_factor=settings.ARCHIVE_GOVERNOR_MIN_FACTOR,
+            cooldown_seconds=settings.ARCHIVE_GOVERNOR_DECREASE_COOLDOWN_SECONDS,
+            default_pause_seconds=settings.ARCHIVE_GOVERNOR_429_PAUSE_SECONDS,
+        )
+
+
+@dataclass
+class _LocalScope:
+    tat: float = 0.0
+    factor: float = 1.0
+    paused_until: float = 0.0
+    decreased_at: float = float("-inf")
+    counters: Dict[str, int] = field(default_factory=lambda: {"granted": 0, "throttled": 0, "ok": 0, "errors": 0})
+
+
+class LocalGovernorBackend:
+    """In-process GCRA with the same semantics as the Redis scripts"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.scopes: Dict[str, _LocalScope] = {}
+
+    def _scope(self, scope: str) -> _LocalScope:
+        return self.scopes.setdefault(scope, _LocalScope())
+
+    async def acquire(self, scope: str, policy: GovernorPolicy, first_attempt: bool) -> float:
+        state = self._scope(scope)
+        now = self.clock() * 1000
+        interval = policy.interval_ms / state.factor
+        wait = state.paused_until - now
+        if wait <= 0:
+            tat = max(state.tat, now)
+            wait = tat - interval * (policy.burst - 1) - now
+            if wait <= 0:
+                state.tat = tat + interval
+                state.counters["granted"] += 1
+                return 0.0
+        if first_attempt:
+            state.counters["throttled"] += 1
+        return wait
+
+    async def record(self, scope: str, policy: GovernorPolicy, ok: bool, pause_ms: float) -> float:
+        state = self._scope(scope)
+        now = self.clock() * 1000
+        if ok:
+            state.counters["ok"] += 1
+            state.factor = min(1.0, state.factor + policy.increase)
+        else:
+            state.counters["errors"] += 1
+            if now - state.decreased_at >= policy.cooldown_seconds * 1000:
+                state.factor = max(policy.min_factor, state.factor * policy.decrease)
+                state.decreased_at = now
+            if pause_ms > 0:
+                state.paused_until = max(state.paused_until, now + pause_ms)
+        return state.factor
+
+    async def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = self.clock() * 1000
+        return {
+            scope: {**state.counters, "factor": state.factor,
+                    "paused_for_seconds": max(0.0, (state.paused_until - now) / 1000)}
+            for scope, state in self.scopes.items()
+        }
+
+
+class RedisGovernorBackend:
+    """GCRA schedule and adaptive state shared through Redis"""
+
+    KEY_PREFIX = "archive_governor"
+
+    def __init__(self, redis_url: Optional[str] = None, state_ttl_seconds: int = 86400):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.state_ttl_seconds = state_ttl_seconds
+        self._client = None
+        self._client_loop = None
+        self._acquire = None
+        self._outcome = None
+
+    def _ensure_client(self):
+        # Celery tasks run each job in a fresh event loop; connections are loop bound
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = aioredis.from_url(self.redis_url, socket_timeout=2, socket_connect_timeout=2)
+            self._client_loop = loop
+            self._acquire = self._client.register_script(ACQUIRE_SCRIPT)
+            self._outcome = self._client.register_script(OUTCOME_SCRIPT)
+        return self._client
+
+    def _keys(self, scope: str):
+        return f"{self.KEY_PREFIX}:{scope}:tat", f"{self.KEY_PREFIX}:{scope}:state"
+
+    async def acquire(self, scope: str, policy: GovernorPolicy, first_attempt: bool) -> float:
+        self._ensure_client()
+        return float(await self._acquire(
+            keys=list(self._keys(scope)),
+            args=[policy.interval_ms, policy.burst, self.state_ttl_seconds, "1" if first_attempt else "0"],
+        ))
+
+    async def record(self, scope: str, policy: GovernorPolicy, ok: bool, pause_ms: float) -> float:
+        self._ensure_client()
+        factor = await self._outcome(
+            keys=[self._keys(scope)[1]],
+            args=["ok" if ok else "error", policy.decrease, policy.increase, policy.min_factor,
+                  int(policy.cooldown_seconds * 1000), int(pause_ms), self.state_ttl_seconds],
+        )
+        return float(factor)
+
+    async def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        client = self._ensure_client()
+        now_ms = time.time() * 1000
+        result = {}
+        async for key in client.scan_iter(match=f"{self.KEY_PREFIX}:*:state", count=100):
+            key = key.decode() if isinstance(key, bytes) else key
+            raw = await client.hgetall(key)
+            data = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                    for k, v in raw.items()}
+            scope = key[len(self.KEY_PREFIX) + 1:-len(":state")]
+            result[scope] = {
+                **{name: int(data.get(name, 0)) for name in ("granted", "throttled", "ok", "errors")},
+                "factor": float(data.get("factor", 1)),
+                "paused_for_seconds": max(0.0, (float(data.get("paused_until", 0)) - now_ms) / 1000),
+            }
+        return result
+
+
+class ArchiveRequestGovernor:
+    """Entry point used by every archive.org fetch path"""
+
+    def __init__(self, backend=None, fallback=None, enabled: Optional[bool] = None,
+                 max_sleep_seconds: float = 5.0):
+        self.enabled = settings.ARCHIVE_GOVERNOR_ENABLED if enabled is None else enabled
+        if backend is None and REDIS_AVAILABLE:
+            backend = RedisGovernorBackend()
+        self.backend = backend
+        self.fallback = fallback or LocalGovernorBackend()
+        self.max_sleep_seconds = max_sleep_seconds
+        self._policies: Dict[str, GovernorPolicy] = {}
+        self._backend_failed_at = 0.0
+
+    def _policy(self, scope: str) -> GovernorPolicy:
+        host = scope.split("|", 1)[0]
+        if host not in self._policies:
+            self._policies[host] = GovernorPolicy.for_host(host)
+        return self._policies[host]
+
+    async def _call(self, method: str, *args):
+        # Retry Redis at most every 30 seconds after a failure
+        if self.backend is not None and time.monotonic() - self._backend_failed_at > 30:
+            try:
+                return await getattr(self.backend, method)(*args)
+            except Exception as e:
+                self._backend_failed_at = time.monotonic()
+                logger.warning(f"Archive governor falling back to in-process pacing: {e}")
+        return await getattr(self.fallback, method)(*args)
+
+    async def acquire(self, url: str, proxy: Optional[str] = None) -> float:
+        """Wait until the scope of ``url`` admits a request; returns seconds waited"""
+        scope = governor_scope(url, proxy)
+        if not self.enabled or scope is None:
+            return 0.0
+        policy = self._policy(scope)
+        waited = 0.0
+        first_attempt = True
+        while True:
+            wait_ms = await self._call("acquire", scope, policy, first_attempt)
+            if wait_ms <= 0:
+                if waited:
+                    logger.debug(f"Archive governor delayed {url} by {waited:.1f}s")
+                return waited
+            first_attempt = False
+            # Short slices with jitter so waiters do not wake up in lockstep
+            delay = min(wait_ms / 1000, self.max_sleep_seconds) + random.uniform(0, 0.05)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def record_response(self, url: str, proxy: Optional[str], status_code: int,
+                              retry_after: Optional[str] = None) -> None:
+        """Feed an upstream response into the adaptive rate"""
+        scope = governor_scope(url, proxy)
+        if not self.enabled or scope is None:
+            return
+        policy = self._policy(scope)
+        pause_ms = 0.0
+        if status_code == 429:
+            try:
+                pause_ms = float(retry_after) * 1000
+            except (TypeError, ValueError):
+                pause_ms = policy.default_pause_seconds * 1000
+        try:
+            await self._call("record", scope, policy, status_code not in BACKOFF_STATUSES, pause_ms)
+        except Exception as e:
+            logger.debug(f"Archive governor could not record response: {e}")
+
+    async def record_error(self, url: str, proxy: Optional[str] = None) -> None:
+        """Feed a timeout or connection failure into the adaptive rate"""
+        await self.record_response(url, proxy, 522)
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        """Granted versus throttled requests and current rate for every scope"""
+        scopes = await self._call("snapshot")
+        rows = []
+        for scope, stats in sorted(scopes.items()):
+            host, _, route = scope.partition("|")
+            policy = self._policy(scope)
+            requested = stats["granted"] + stats["throttled"]
+            rows.append({
+                "host": host,
+                "route": route,
+                **stats,
+                "throttled_ratio": stats["throttled"] / requested if requested else 0.0,
+                "error_ratio": stats["errors"] / (stats["ok"] + stats["errors"]) if stats["ok"] + stats["errors"] else 0.0,
+                "configured_requests_per_minute": policy.requests_per_minute,
+                "effective_requests_per_minute": policy.requests_per_minute * stats["factor"],
+            })
+        return rows
+
+
+archive_governor = ArchiveRequestGovernor()
@@ -17,6 +17,8 @@ from tenacity import (
     before_sleep_log
 )
 
+from .archive_governor import archive_governor
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,8 +31,14 @@ class ArchiveOrgRateLimiter:
         self.last_request_time = 0.0
         self._lock = asyncio.Lock()
     
-    async def wait_if_needed(self):
+    async def wait_if_needed(self, url: Optional[str] = None, proxy: Optional[str] = None):
         """Wait if necessary to comply with rate limiting"""
+        if url and archive_governor.enabled:
+            # Pacing is shared with every other worker through the governor
+            await archive_governor.acquire(url, proxy)
+            self.last_request_time = time.time()
+            return
+
         async with self._lock:
             now = time.time()
             time_since_last = now - self.last_request_time
@@ -122,7 +130,12 @@ class ArchiveOrgClient:
     )
     async def _make_request(self, url: str, method: str = "GET", **kwargs) -> httpx.Response:
         """Make HTTP request with retries and error handling"""
-        await self.rate_limiter.wait_if_needed()
+        proxy_url = None
+        if self.proxy_settings:
+            # httpx uses a single proxy string, not a dict like requests
+            proxy_url = self.proxy_settings.get("http://") or self.proxy_settings.get("https://")
+
+        await self.rate_limiter.wait_if_needed(url, proxy_url)
         
         headers = kwargs.pop("headers", {})
         request_headers = self._get_headers_for_url(url)
@@ -146,17 +159,22 @@ class ArchiveOrgClient:
             "follow_redirects": True
         }
         
-        if self.proxy_settings:
-            # httpx uses a single proxy string, not a dict like requests
-            proxy_url = self.proxy_settings.get("http://") or self.proxy_settings.get("https://")
+        if proxy_url:
             client_kwargs["proxy"] = proxy_url
         
         async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(
-                method=method,
-                url=url,
-                headers=request_headers,
-                **kwargs
+            try:
+                response = await client.request(
+                    method=method,
+                    url=url,
+                    headers=request_headers,
+                    **kwargs
+                )
+            except (httpx.TimeoutException, httpx.ConnectError):
+                await archive_governor.record_error(url, proxy_url)
+                raise
+            await archive_governor.record_response(
+                url, proxy_url, response.status_code, response.headers.get("Retry-After")
             )
             
             # Handle specific Archive.org error codes
@@ -169,8 +187,9 @@ class ArchiveOrgClient:
                 )
             elif response.status_code == 429:
                 logger.warning(f"Archive.org rate limit exceeded (429) for {url}")
-                # Wait longer for rate limiting
-                await asyncio.sleep(60)
+                if not archive_governor.enabled:
+                    # Wait longer for rate limiting; the governor pauses every worker instead
+                    await asyncio.sleep(60)
                 raise httpx.HTTPStatusError(
                     "Archive.org rate limit (429)", 
                     request=response.request, 
@@ -42,6 +42,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.database import get_db
 from app.services.monitoring_service import monitoring_service
+from app.services.audit_pipeline import AuditCopyWriter, create_audit_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -238,10 +239,13 @@ class AuditLoggingService:
     
     def __init__(self):
         self.redis_client: Optional[aioredis.Redis] = None
-        self._audit_buffer: List[AuditEvent] = []
+        # Audit events go through a bounded ring buffer drained by the flush loop;
+        # security events are rare and keep the simple list buffer
+        self._audit_pipeline = create_audit_pipeline()
+        self._audit_store = AuditCopyWriter() if settings.AUDIT_DB_PERSISTENCE_ENABLED else None
         self._security_buffer: List[SecurityEvent] = []
         self._max_buffer_size = 1000
-        self._buffer_flush_interval = 60  # seconds
+        self._buffer_flush_interval = settings.AUDIT_FLUSH_INTERVAL_SECONDS
         
         # Log files
         self._audit_log_path = Path(getattr(settings, 'AUDIT_LOG_PATH', 'logs/audit.jsonl'))
@@ -335,8 +339,10 @@ class AuditLoggingService:
         """Background loop for flushing audit buffers to storage"""
         while not self._shutdown_event.is_set():
             try:
+                # Wake early once a full COPY batch is buffered
+                await self._audit_pipeline.wait_for_batch(self._buffer_flush_interval)
                 await self._flush_buffers()
-                await asyncio.sleep(self._buffer_flush_interval)
+                await self._run_sampled_analysis()
                 
             except Exception as e:
                 logger.error(f"Error in buffer flush loop: {e}")
@@ -403,11 +409,9 @@ class AuditLoggingService:
             sensitive_data=self._contains_sensitive_data(description, details or {})
         )
         
+        # Security implications are checked from the sampled analysis stream
         await self._add_audit_event(event)
         
-        # Check for security implications
-        await self._analyze_user_activity(event)
-        
         return event.event_id
     
     async def log_system_event(
@@ -633,22 +637,16 @@ class AuditLoggingService:
             bytes_processed=response_size
         )
         
+        # Suspicious API usage patterns are analyzed from the sampled stream
         await self._add_audit_event(event)
         
-        # Analyze for suspicious API usage patterns
-        await self._analyze_api_patterns(event)
-        
         return event.event_id
     
     # Internal helper methods
     
     async def _add_audit_event(self, event: AuditEvent):
-        """Add audit event to buffer"""
-        self._audit_buffer.append(event)
-        
-        # Flush buffer if it's getting full
-        if len(self._audit_buffer) >= self._max_buffer_size:
-            await self._flush_audit_buffer()
+        """Add audit event to the ring buffer; never blocks or waits on I/O"""
+        self._audit_pipeline.submit(event)
     
     async def _add_security_event(self, event: SecurityEvent):
         """Add security event to buffer"""
@@ -666,36 +664,61 @@ class AuditLoggingService:
         await self._flush_security_buffer()
     
     async def _flush_audit_buffer(self):
-        """Flush audit buffer to log file and Redis"""
-        if not self._audit_buffer:
-            return
-        
+        """Drain the audit ring buffer to the log file, Postgres (COPY) and Redis"""
+        batch_size = self._audit_pipeline.batch_size
+        while True:
+            events = self._audit_pipeline.events.drain(batch_size)
+            if not events:
+                return
+            await self._persist_audit_events(events)
+            if len(events) < batch_size:
+                return
+    
+    async def _persist_audit_events(self, events: List[AuditEvent]):
+        """Write one drained batch of audit events to storage"""
         try:
             # Write to log file
+            lines = [
+                json.dumps(asdict(self._redact_event_sensitive_data(event)), default=str) + '\n'
+                for event in events
+            ]
             async with aiofiles.open(self._audit_log_path, 'a') as f:
-                for event in self._audit_buffer:
-                    redacted_event = self._redact_event_sensitive_data(event)
-                    json_line = json.dumps(asdict(redacted_event), default=str) + '\n'
-                    await f.write(json_line)
-            
+                await f.write(''.join(lines))
+        except Exception as e:
+            logger.error(f"Error writing audit log file: {e}")
+        
+        # Bulk-load into the partitioned audit table
+        if self._audit_store:
+            await self._audit_store.write([self._redact_event_sensitive_data(event) for event in events])
+        
+        try:
             # Store recent events in Redis for fast access
             if self.redis_client:
-                for event in self._audit_buffer[-100:]:  # Keep last 100 events
-                    await self.redis_client.setex(
+                pipe = self.redis_client.pipeline(transaction=False)
+                for event in events[-100:]:  # Keep last 100 events
+                    pipe.setex(
                         f"audit_event:{event.event_id}",
                         3600,  # 1 hour TTL
                         json.dumps(asdict(event), default=str)
                     )
+                await pipe.execute()
                 
                 # Update audit statistics
-                await self._update_audit_statistics(self._audit_buffer)
+                await self._update_audit_statistics(events)
             
-            logger.debug(f"Flushed {len(self._audit_buffer)} audit events to storage")
-            self._audit_buffer.clear()
+            logger.debug(f"Flushed {len(events)} audit events to storage")
             
         except Exception as e:
             logger.error(f"Error flushing audit buffer: {e}")
     
+    async def _run_sampled_analysis(self):
+        """Run security pattern analysis over the sampled event stream"""
+        for event in self._audit_pipeline.analysis.drain(self._audit_pipeline.analysis.capacity):
+            if event.event_type == AuditEventType.API_REQUEST:
+                await self._analyze_api_patterns(event)
+            else:
+                await self._analyze_user_activity(event)
+    
     async def _flush_security_buffer(self):
         """Flush security buffer to log file and Redis"""
         if not self._security_buffer:
@@ -744,18 +767,20 @@ class AuditLoggingService:
                 severity_counts[event.severity.value] = severity_counts.get(event.severity.value, 0) + 1
                 component_counts[event.component] = component_counts.get(event.component, 0) + 1
             
-            # Update Redis counters
+            # Update Redis counters in a single round trip
+            pipe = self.redis_client.pipeline(transaction=False)
             for event_type, count in event_type_counts.items():
-                await self.redis_client.incrby(f"audit_stats:event_type:{event_type}", count)
+                pipe.incrby(f"audit_stats:event_type:{event_type}", count)
             
             for severity, count in severity_counts.items():
-                await self.redis_client.incrby(f"audit_stats:severity:{severity}", count)
+                pipe.incrby(f"audit_stats:severity:{severity}", count)
             
             for component, count in component_counts.items():
-                await self.redis_client.incrby(f"audit_stats:component:{component}", count)
+                pipe.incrby(f"audit_stats:component:{component}", count)
             
             # Update total count
-            await self.redis_client.incrby("audit_stats:total_events", len(events))
+            pipe.incrby("audit_stats:total_events", len(events))
+            await pipe.execute()
             
         except Exception as e:
             logger.error(f"Error updating audit statistics: {e}")
@@ -1122,10 +1147,16 @@ class AuditLoggingService:
             
             # Additional metrics
             stats["buffer_sizes"] = {
-                "audit_buffer": len(self._audit_buffer),
+                "audit_buffer": len(self._audit_pipeline.events),
                 "security_buffer": len(self._security_buffer)
             }
             
+            # Backpressure and persistence counters
+            stats["pipeline"] = self._audit_pipeline.stats()
+            if self._audit_store:
+                stats["pipeline"]["rows_copied"] = self._audit_store.rows_written
+                stats["pipeline"]["failed_copy_batches"] = self._audit_store.failed_batches
+            
             stats["security_metrics"] = {
                 "suspicious_ips": len(self._suspicious_ips),
                 "failed_login_tracking": len(self._failed_login_attempts),
@@ -0,0 +1,275 @@
+"""
+High-throughput audit event pipeline
+
+Request handlers hand audit events to an in-process ring buffer and return
+immediately. A background writer drains the buffer in batches and persists
+them with PostgreSQL ``COPY`` into the monthly-partitioned ``audit_events``
+table, while a sampled side stream feeds security pattern analysis.
+
+Audit must never stall the API: when the buffer is close to full low-severity
+events are shed first, and once it is full every new event is dropped. Both
+cases are counted so the loss is visible in the audit statistics.
+"""
+import asyncio
+import json
+import logging
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+AUDIT_EVENTS_TABLE = "audit_events"
+
+
+class AuditRingBuffer(Generic[T]):
+    """
+    Fixed-capacity ring buffer with non-blocking push
+
+    Producers write the slot before advancing ``_tail`` and the single consumer
+    reads before advancing ``_head``, so no lock is needed on the event loop
+    (or across threads under the GIL). A full buffer rejects the new item
+    rather than overwriting unread ones.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._slots: List[Optional[T]] = [None] * capacity
+        self._head = 0  # next slot to read
+        self._tail = 0  # next slot to write
+        self.pushed = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    @property
+    def fill_ratio(self) -> float:
+        return len(self) / self.capacity
+
+    def push(self, item: T) -> bool:
+        """Append an item; returns False (and counts a drop) when full"""
+        tail = self._tail
+        if tail - self._head >= self.capacity:
+            self.dropped += 1
+            return False
+        self._slots[tail % self.capacity] = item
+        self._tail = tail + 1
+        self.pushed += 1
+        return True
+
+    def drain(self, max_items: int) -> List[T]:
+        """Remove and return up to ``max_items`` items in insertion order"""
+        count = min(len(self), max_items)
+        items: List[T] = []
+        head = self._head
+        for _ in range(count):
+            index = head % self.capacity
+            items.append(self._slots[index])
+            self._slots[index] = None
+            head += 1
+        self._head = head
+        return items
+
+
+class AuditPipeline:
+    """Bounded, sampled intake for audit events"""
+
+    # Events matching these always reach analysis regardless of the sample rate
+    ALWAYS_ANALYZE_EVENT_TYPES = {"user_login", "user_login_failed"}
+    ALWAYS_ANALYZE_STATUS_CODES = {401, 403, 429}
+
+    def __init__(
+        self,
+        capacity: int = 50000,
+        batch_size: int = 5000,
+        sample_rate: float = 0.1,
+        shed_watermark: float = 0.8,
+        analysis_capacity: int = 10000,
+    ):
+        self.events: AuditRingBuffer = AuditRingBuffer(capacity)
+        self.analysis: AuditRingBuffer = AuditRingBuffer(analysis_capacity)
+        self.batch_size = batch_size
+        self.sample_rate = sample_rate
+        self.shed_watermark = shed_watermark
+        self.shed = 0
+        self.dropped_by_severity: Counter = Counter()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def submit(self, event: Any) -> bool:
+        """Queue an event without blocking; returns False if it was dropped"""
+        severity = getattr(getattr(event, "severity", None), "value", "low")
+
+        # Backpressure: shed routine events before the buffer is full so that
+        # high-severity events still fit
+        if severity == "low" and self.events.fill_ratio >= self.shed_watermark:
+            self.shed += 1
+            self.dropped_by_severity[severity] += 1
+            return False
+
+        if not self.events.push(event):
+            self.dropped_by_severity[severity] += 1
+            if self.events.dropped % 1000 == 1:
+                logger.warning(f"Audit ring buffer full; {self.events.dropped} events dropped so far")
+            return False
+
+        if self._should_analyze(event):
+            self.analysis.push(event)
+
+        if len(self.events) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _should_analyze(self, event: Any) -> bool:
+        event_type = getattr(getattr(event, "event_type", None), "value", None)
+        if event_type in self.ALWAYS_ANALYZE_EVENT_TYPES:
+            return True
+        if getattr(getattr(event, "severity", None), "value", None) in ("high", "critical"):
+            return True
+        status_code = (getattr(event, "details", None) or {}).get("status_code")
+        if status_code in self.ALWAYS_ANALYZE_STATUS_CODES:
+            return True
+        return random.random() < self.sample_rate
+
+    async def wait_for_batch(self, timeout: float) -> None:
+        """Sleep until a full batch is buffered or ``timeout`` elapses"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if len(self.events) >= self.batch_size:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._wakeup.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self.events),
+            "capacity": self.events.capacity,
+            "accepted": self.events.pushed,
+            "dropped": self.events.dropped + self.shed,
+            "dropped_buffer_full": self.events.dropped,
+            "shed_low_severity": self.shed,
+            "dropped_by_severity": dict(self.dropped_by_severity),
+            "analysis_pending": len(self.analysis),
+            "analysis_dropped": self.analysis.dropped,
+        }
+
+
+class AuditCopyWriter:
+    """Persist audit event batches with COPY into the partitioned audit table"""
+
+    COLUMNS = (
+        "event_id", "timestamp", "event_type", "severity", "outcome",
+        "user_id", "username", "session_id", "ip_address", "user_agent",
+        "resource_type", "resource_id", "operation", "description", "component",
+        "environment", "correlation_id", "request_id", "duration_ms",
+        "bytes_processed", "records_affected", "error_code", "error_message",
+        "sensitive_data", "details",
+    )
+
+    def __init__(self, table_name: str = AUDIT_EVENTS_TABLE):
+        self.table_name = table_name
+        self._known_partitions: Set[str] = set()
+        self.rows_written = 0
+        self.failed_batches = 0
+
+    @staticmethod
+    def _utc(value: datetime) -> datetime:
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+    @classmethod
+    def to_record(cls, event: Any) -> Tuple:
+        def enum_value(value):
+            return getattr(value, "value", value)
+
+        return (
+            event.event_id,
+            cls._utc(event.timestamp),
+            enum_value(event.event_type),
+            enum_value(event.severity),
+            enum_value(event.outcome),
+            event.user_id,
+            event.username,
+            event.session_id,
+            event.ip_address,
+            event.user_agent,
+            event.resource_type,
+            event.resource_id,
+            event.operation,
+            event.description,
+            event.component,
+            event.environment,
+            event.correlation_id,
+            event.request_id,
+            event.duration_ms,
+            event.bytes_processed,
+            event.records_affected,
+            event.error_code,
+            event.error_message,
+            event.sensitive_data,
+            json.dumps(event.details or {}, default=str),
+        )
+
+    def partition_for(self, timestamp: datetime) -> Tuple[str, datetime, datetime]:
+        """Monthly partition name and [start, end) bounds for a timestamp"""
+        start = datetime(timestamp.year, timestamp.month, 1, tzinfo=timezone.utc)
+        if timestamp.month == 12:
+            end = datetime(timestamp.year + 1, 1, 1, tzinfo=timezone.utc)
+        else:
+            end = datetime(timestamp.year, timestamp.month + 1, 1, tzinfo=timezone.utc)
+        return f"{self.table_name}_y{start.year}m{start.month:02d}", start, end
+
+    async def _ensure_partitions(self, conn, timestamps: Iterable[datetime]) -> None:
+        for timestamp in timestamps:
+            name, start, end = self.partition_for(timestamp)
+            if name in self._known_partitions:
+                continue
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {self.table_name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            self._known_partitions.add(name)
+
+    async def write(self, events: List[Any]) -> int:
+        """COPY a batch of events; returns the number of rows written"""
+        if not events:
+            return 0
+
+        from app.core.database import copy_records, engine
+
+        records = [self.to_record(event) for event in events]
+        months = {datetime(r[1].year, r[1].month, 1) for r in records}
+        try:
+            async with engine.begin() as conn:
+                await self._ensure_partitions(conn, months)
+                await copy_records(conn, self.table_name, self.COLUMNS, records)
+        except Exception as e:
+            self.failed_batches += 1
+            # Partitions may have been rolled back with the transaction
+            self._known_partitions.clear()
+            logger.error(f"Failed to COPY {len(records)} audit events: {e}")
+            return 0
+
+        self.rows_written += len(records)
+        return len(records)
+
+
+def create_audit_pipeline() -> AuditPipeline:
+    """Build the pipeline from settings"""
+    return AuditPipeline(
+        capacity=settings.AUDIT_RING_BUFFER_SIZE,
+        batch_size=settings.AUDIT_COPY_BATCH_SIZE,
+        sample_rate=settings.AUDIT_ANALYSIS_SAMPLE_RATE,
+    )
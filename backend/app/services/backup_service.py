@@ -14,9 +14,6 @@ This service provides:
 
 import os
 import json
-import gzip
-import lz4.frame
-import zstandard as zstd
 import hashlib
 import tempfile
 import asyncio
@@ -24,7 +21,7 @@ import stat
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from enum import Enum
 import aiofiles
 import boto3
@@ -38,6 +35,14 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
 from app.core.config import settings
+from app.services.backup_streaming import (
+    ChunkInfo,
+    ChunkManifest,
+    StreamingBackupPipeline,
+    file_digest,
+    verify_file,
+    verify_parts,
+)
 from app.services.monitoring import MonitoringService
 
 
@@ -120,6 +125,7 @@ class BackupMetadata:
     error_message: str = ""
     backup_config: BackupConfig = None
     included_components: List[str] = None
+    chunk_manifest: Optional[Dict[str, Any]] = None
     
     def __post_init__(self):
         if self.included_components is None:
@@ -129,6 +135,10 @@ class BackupMetadata:
 class StorageBackendBase:
     """Base class for storage backends."""
     
+    # Backends with multipart uploads receive streamed archives part by part;
+    # the others get the finished archive through upload_file
+    supports_multipart = False
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
     
@@ -152,11 +162,39 @@ class StorageBackendBase:
     async def get_file_info(self, remote_path: str) -> Dict[str, Any]:
         """Get information about a file."""
         raise NotImplementedError
+    
+    async def upload_part(self, remote_path: str, part: ChunkInfo, data: bytes) -> bool:
+        """Store one part of a multipart upload."""
+        raise NotImplementedError
+    
+    async def uploaded_parts(self, remote_path: str) -> Dict[int, ChunkInfo]:
+        """Parts already stored for an unfinished multipart upload, by part number."""
+        raise NotImplementedError
+    
+    async def complete_multipart(self, remote_path: str, manifest: ChunkManifest,
+                                 metadata: Dict[str, str] = None) -> bool:
+        """Assemble the uploaded parts into one object and store its manifest."""
+        raise NotImplementedError
+    
+    async def abort_multipart(self, remote_path: str) -> bool:
+        """Discard the parts of an unfinished multipart upload."""
+        raise NotImplementedError
+    
+    async def read_uploaded_part(self, remote_path: str, part: ChunkInfo) -> Optional[bytes]:
+        """Bytes of a part of an unfinished multipart upload, or None if they cannot be read back."""
+        return None
+    
+    async def read_range(self, remote_path: str, offset: int, length: int) -> bytes:
+        """Read ``length`` bytes of a stored object starting at ``offset``."""
+        raise NotImplementedError
 
 
 class LocalStorageBackend(StorageBackendBase):
     """Local filesystem storage backend."""
     
+    supports_multipart = True
+    SIDECAR_SUFFIXES = ('.metadata', '.manifest', '.partial', '.parts')
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.base_path = Path(config.get("base_path", "/tmp/backups"))
@@ -212,10 +250,11 @@ class LocalStorageBackend(StorageBackendBase):
             if file_path.exists():
                 file_path.unlink()
             
-            # Delete metadata file if exists
-            metadata_path = file_path.with_suffix(file_path.suffix + '.metadata')
-            if metadata_path.exists():
-                metadata_path.unlink()
+            # Delete metadata and manifest files if they exist
+            for suffix in ('.metadata', '.manifest'):
+                sidecar_path = file_path.with_suffix(file_path.suffix + suffix)
+                if sidecar_path.exists():
+                    sidecar_path.unlink()
             
             return True
         except Exception as e:
@@ -238,7 +277,7 @@ class LocalStorageBackend(StorageBackendBase):
                 })
             elif search_path.is_dir():
                 for path in search_path.rglob("*"):
-                    if path.is_file() and not path.name.endswith('.metadata'):
+                    if path.is_file() and not path.name.endswith(self.SIDECAR_SUFFIXES):
                         stat = path.stat()
                         files.append({
                             "name": str(path.relative_to(self.base_path)),
@@ -251,6 +290,126 @@ class LocalStorageBackend(StorageBackendBase):
         except Exception as e:
             print(f"Local list failed: {e}")
             return []
+    
+    def _multipart_paths(self, remote_path: str):
+        """Destination, in-progress file and part log of a multipart upload."""
+        dest_path = self.base_path / remote_path
+        return (
+            dest_path,
+            dest_path.with_suffix(dest_path.suffix + '.partial'),
+            dest_path.with_suffix(dest_path.suffix + '.parts'),
+        )
+    
+    async def upload_part(self, remote_path: str, part: ChunkInfo, data: bytes) -> bool:
+        """Write a part at its offset in the in-progress file and record it in the part log."""
+        try:
+            _, partial_path, log_path = self._multipart_paths(remote_path)
+            partial_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            def write():
+                fd = os.open(partial_path, os.O_WRONLY | os.O_CREAT, 0o600)
+                try:
+                    os.pwrite(fd, data, part.offset)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                # Logged only once the data is on disk, so a logged part can be skipped on retry
+                with open(log_path, 'a') as log:
+                    log.write(json.dumps(asdict(part)) + "\n")
+            
+            await asyncio.to_thread(write)
+            return True
+        except Exception as e:
+            print(f"Local part upload failed: {e}")
+            return False
+    
+    async def uploaded_parts(self, remote_path: str) -> Dict[int, ChunkInfo]:
+        """Read the part log of an unfinished upload."""
+        _, partial_path, log_path = self._multipart_paths(remote_path)
+        if not partial_path.exists() or not log_path.exists():
+            return {}
+        
+        parts = {}
+        async with aiofiles.open(log_path, 'r') as f:
+            async for line in f:
+                try:
+                    part = ChunkInfo(**json.loads(line))
+                except (ValueError, TypeError):
+                    # A line cut short by a crash
+                    continue
+                parts[part.part_number] = part
+        return parts
+    
+    async def complete_multipart(self, remote_path: str, manifest: ChunkManifest,
+                                 metadata: Dict[str, str] = None) -> bool:
+        """Move the in-progress file into place once every manifest part is logged."""
+        try:
+            dest_path, partial_path, log_path = self._multipart_paths(remote_path)
+            logged = await self.uploaded_parts(remote_path)
+            missing = [
+                part.part_number for part in manifest.parts
+                if logged.get(part.part_number, ChunkInfo(0, 0, 0, "")).sha256 != part.sha256
+            ]
+            if missing:
+                print(f"Local multipart completion failed: parts {missing} not uploaded")
+                return False
+            
+            def assemble():
+                with open(partial_path, 'ab') as f:
+                    # Drops the tail of a longer archive left by an earlier attempt
+                    f.truncate(manifest.size_bytes)
+                os.replace(partial_path, dest_path)
+            
+            await asyncio.to_thread(assemble)
+            
+            if metadata:
+                metadata_path = dest_path.with_suffix(dest_path.suffix + '.metadata')
+                async with aiofiles.open(metadata_path, 'w') as f:
+                    await f.write(json.dumps(metadata, indent=2))
+            
+            manifest_path = dest_path.with_suffix(dest_path.suffix + '.manifest')
+            async with aiofiles.open(manifest_path, 'w') as f:
+                await f.write(json.dumps(manifest.to_dict()))
+            
+            log_path.unlink(missing_ok=True)
+            return True
+        except Exception as e:
+            print(f"Local multipart completion failed: {e}")
+            return False
+    
+    async def read_uploaded_part(self, remote_path: str, part: ChunkInfo) -> Optional[bytes]:
+        """Read a logged part back from the in-progress file."""
+        _, partial_path, _ = self._multipart_paths(remote_path)
+        
+        def read():
+            with open(partial_path, 'rb') as f:
+                f.seek(part.offset)
+                return f.read(part.size)
+        
+        try:
+            return await asyncio.to_thread(read)
+        except OSError:
+            return None
+    
+    async def abort_multipart(self, remote_path: str) -> bool:
+        """Remove the in-progress file and its part log."""
+        try:
+            _, partial_path, log_path = self._multipart_paths(remote_path)
+            partial_path.unlink(missing_ok=True)
+            log_path.unlink(missing_ok=True)
+            return True
+        except Exception as e:
+            print(f"Local multipart abort failed: {e}")
+            return False
+    
+    async def read_range(self, remote_path: str, offset: int, length: int) -> bytes:
+        """Read a byte range of a stored file."""
+        def read():
+            with open(self.base_path / remote_path, 'rb') as f:
+                f.seek(offset)
+                return f.read(length)
+        
+        return await asyncio.to_thread(read)
 
 
 class GCSStorageBackend(StorageBackendBase):
@@ -553,6 +712,8 @@ class SFTPStorageBackend(StorageBackendBase):
 class S3StorageBackend(StorageBackendBase):
     """AWS S3 storage backend."""
     
+    supports_multipart = True
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.client = boto3.client(
@@ -563,6 +724,8 @@ class S3StorageBackend(StorageBackendBase):
         )
         self.bucket = config['bucket_name']
         self.prefix = config.get('prefix', 'backups/')
+        self._upload_ids: Dict[str, str] = {}
+        self._upload_lock = asyncio.Lock()
     
     async def upload_file(self, local_path: str, remote_path: str, 
                          metadata: Dict[str, str] = None) -> bool:
@@ -597,6 +760,7 @@ class S3StorageBackend(StorageBackendBase):
         try:
             full_key = f"{self.prefix}{remote_path}"
             self.client.delete_object(Bucket=self.bucket, Key=full_key)
+            self.client.delete_object(Bucket=self.bucket, Key=f"{full_key}.manifest")
             return True
         except Exception as e:
             print(f"S3 delete failed: {e}")
@@ -610,6 +774,8 @@ class S3StorageBackend(StorageBackendBase):
             
             files = []
             for obj in response.get('Contents', []):
+                if obj['Key'].endswith('.manifest'):
+                    continue
                 files.append({
                     "name": obj['Key'].replace(self.prefix, '', 1),
                     "size": obj['Size'],
@@ -621,6 +787,151 @@ class S3StorageBackend(StorageBackendBase):
         except Exception as e:
             print(f"S3 list failed: {e}")
             return []
+    
+    async def _upload_id(self, full_key: str, create: bool) -> Optional[str]:
+        """Id of the open multipart upload for a key, resuming one left by an earlier run."""
+        async with self._upload_lock:
+            if full_key not in self._upload_ids:
+                response = await asyncio.to_thread(
+                    self.client.list_multipart_uploads, Bucket=self.bucket, Prefix=full_key
+                )
+                uploads = [u for u in response.get('Uploads', []) if u['Key'] == full_key]
+                if uploads:
+                    self._upload_ids[full_key] = max(uploads, key=lambda u: u['Initiated'])['UploadId']
+                elif create:
+                    response = await asyncio.to_thread(
+                        self.client.create_multipart_upload,
+                        Bucket=self.bucket, Key=full_key, ChecksumAlgorithm='SHA256'
+                    )
+                    self._upload_ids[full_key] = response['UploadId']
+            return self._upload_ids.get(full_key)
+    
+    async def _list_parts(self, full_key: str, upload_id: str) -> List[Dict[str, Any]]:
+        parts = []
+        kwargs = {'Bucket': self.bucket, 'Key': full_key, 'UploadId': upload_id}
+        while True:
+            response = await asyncio.to_thread(self.client.list_parts, **kwargs)
+            parts.extend(response.get('Parts', []))
+            if not response.get('IsTruncated'):
+                return parts
+            kwargs['PartNumberMarker'] = response['NextPartNumberMarker']
+    
+    async def upload_part(self, remote_path: str, part: ChunkInfo, data: bytes) -> bool:
+        """Upload one part with its SHA-256 so S3 rejects a corrupted transfer."""
+        try:
+            full_key = f"{self.prefix}{remote_path}"
+            upload_id = await self._upload_id(full_key, create=True)
+            await asyncio.to_thread(
+                self.client.upload_part,
+                Bucket=self.bucket, Key=full_key, UploadId=upload_id,
+                PartNumber=part.part_number, Body=data,
+                ChecksumAlgorithm='SHA256',
+                ChecksumSHA256=base64.b64encode(bytes.fromhex(part.sha256)).decode()
+            )
+            return True
+        except Exception as e:
+            print(f"S3 part upload failed: {e}")
+            return False
+    
+    async def uploaded_parts(self, remote_path: str) -> Dict[int, ChunkInfo]:
+        """Parts S3 holds for an open multipart upload of this key."""
+        try:
+            full_key = f"{self.prefix}{remote_path}"
+            upload_id = await self._upload_id(full_key, create=False)
+            if not upload_id:
+                return {}
+            
+            parts, offset = {}, 0
+            for stored in sorted(await self._list_parts(full_key, upload_id), key=lambda p: p['PartNumber']):
+                checksum = stored.get('ChecksumSHA256')
+                parts[stored['PartNumber']] = ChunkInfo(
+                    part_number=stored['PartNumber'],
+                    offset=offset,
+                    size=stored['Size'],
+                    sha256=base64.b64decode(checksum).hex() if checksum else "",
+                )
+                offset += stored['Size']
+            return parts
+        except Exception as e:
+            print(f"S3 part listing failed: {e}")
+            return {}
+    
+    async def complete_multipart(self, remote_path: str, manifest: ChunkManifest,
+                                 metadata: Dict[str, str] = None) -> bool:
+        """Complete the upload and store metadata and manifest in a sidecar object."""
+        try:
+            full_key = f"{self.prefix}{remote_path}"
+            upload_id = await self._upload_id(full_key, create=True)
+            stored = {p['PartNumber']: p for p in await self._list_parts(full_key, upload_id)}
+            await asyncio.to_thread(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket, Key=full_key, UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {
+                        'PartNumber': part.part_number,
+                        'ETag': stored[part.part_number]['ETag'],
+                        'ChecksumSHA256': stored[part.part_number]['ChecksumSHA256'],
+                    }
+                    for part in manifest.parts
+                ]}
+            )
+            self._upload_ids.pop(full_key, None)
+            
+            await asyncio.to_thread(
+                self.client.put_object,
+                Bucket=self.bucket, Key=f"{full_key}.manifest",
+                Body=json.dumps({"metadata": metadata or {}, "manifest": manifest.to_dict()}).encode(),
+                ContentType='application/json'
+            )
+            return True
+        except Exception as e:
+            print(f"S3 multipart completion failed: {e}")
+            return False
+    
+    async def abort_multipart(self, remote_path: str) -> bool:
+        """Abort the open multipart upload of this key."""
+        try:
+            full_key = f"{self.prefix}{remote_path}"
+            upload_id = await self._upload_id(full_key, create=False)
+            if upload_id:
+                await asyncio.to_thread(
+                    self.client.abort_multipart_upload,
+                    Bucket=self.bucket, Key=full_key, UploadId=upload_id
+                )
+                self._upload_ids.pop(full_key, None)
+            return True
+        except Exception as e:
+            print(f"S3 multipart abort failed: {e}")
+            return False
+    
+    async def read_range(self, remote_path: str, offset: int, length: int) -> bytes:
+        """Ranged GET of a stored object."""
+        if length <= 0:
+            return b""
+        response = await asyncio.to_thread(
+            self.client.get_object,
+            Bucket=self.bucket, Key=f"{self.prefix}{remote_path}",
+            Range=f"bytes={offset}-{offset + length - 1}"
+        )
+        return await asyncio.to_thread(response['Body'].read)
+
+
+class _TarOutput:
+    """tar's stdout as a pipeline source; end of stream raises if tar failed."""
+    
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        # Drained alongside stdout so a chatty tar cannot block on a full pipe
+        self.stderr = asyncio.ensure_future(process.stderr.read())
+    
+    async def read(self, size: int) -> bytes:
+        block = await self.process.stdout.read(size)
+        if not block:
+            returncode = await self.process.wait()
+            stderr = await self.stderr
+            if returncode != 0:
+                raise RuntimeError(f"tar failed with exit code {returncode}: {stderr.decode(errors='replace').strip()}")
+        return block
 
 
 class BackupService:
@@ -750,30 +1061,31 @@ class BackupService:
                 if config_success:
                     metadata.included_components.append("configuration")
                 
-                # Create backup archive
-                archive_path = await self._create_backup_archive(backup_path, config)
-                
-                # Calculate metadata
-                metadata.size_bytes = archive_path.stat().st_size
-                metadata.checksum = await self._calculate_checksum(archive_path)
-                
-                # Upload to storage backend
-                storage_backend = self.storage_backends[config.storage_backend]
-                remote_path = f"{backup_id}/{archive_path.name}"
-                
-                upload_success = await storage_backend.upload_file(
-                    str(archive_path), 
+                # Archive, compress, hash and upload in one pass
+                remote_path = f"{backup_id}/{self._archive_name(backup_path, config)}"
+                manifest = await self._stream_backup_archive(
+                    backup_path,
+                    config,
                     remote_path,
                     {
                         'backup_id': backup_id,
                         'backup_type': config.backup_type.value,
                         'created_at': metadata.created_at.isoformat(),
-                        'checksum': metadata.checksum,
                         'components': ','.join(metadata.included_components)
                     }
                 )
+                upload_success = manifest is not None
                 
                 if upload_success:
+                    # Calculate metadata
+                    metadata.size_bytes = manifest.source_size_bytes
+                    metadata.compressed_size_bytes = manifest.size_bytes
+                    metadata.compression_ratio = (
+                        manifest.source_size_bytes / manifest.size_bytes if manifest.size_bytes else 1.0
+                    )
+                    metadata.checksum = manifest.sha256
+                    metadata.chunk_manifest = manifest.to_dict()
+                    
                     metadata.status = BackupStatus.COMPLETED
                     metadata.completed_at = datetime.utcnow()
                     metadata.storage_location = remote_path
@@ -1043,8 +1355,8 @@ class BackupService:
             print(f"Configuration backup failed: {e}")
             return False
     
-    async def _create_backup_archive(self, backup_path: Path, config: BackupConfig) -> Path:
-        """Create compressed and encrypted backup archive."""
+    def _archive_name(self, backup_path: Path, config: BackupConfig) -> str:
+        """Archive file name, encoding compression and encryption in its extensions."""
         archive_name = f"{backup_path.name}.tar"
         
         if config.compression == CompressionType.GZIP:
@@ -1057,59 +1369,94 @@ class BackupService:
         if config.encrypt:
             archive_name += ".enc"
         
-        archive_path = backup_path.parent / archive_name
+        return archive_name
+    
+    async def _stream_backup_archive(self, backup_path: Path, config: BackupConfig,
+                                     remote_path: str, upload_metadata: Dict[str, str]) -> Optional[ChunkManifest]:
+        """
+        Stream a tar of the backup directory through compression, encryption and
+        hashing straight into a multipart upload.
+        
+        Backends without multipart uploads get the archive assembled in a local
+        staging directory first. Failed attempts are retried up to
+        BACKUP_UPLOAD_ATTEMPTS times, skipping parts the backend already holds.
+        Returns None if the archive could not be stored.
+        """
+        storage_backend = self.storage_backends[config.storage_backend]
+        target = storage_backend
+        if not storage_backend.supports_multipart:
+            target = LocalStorageBackend({"base_path": str(backup_path.parent / "staging")})
         
-        # Create tar archive
         tar_cmd = ["tar", "-cf", "-", "-C", str(backup_path.parent), backup_path.name]
+        manifest = None
         
-        tar_process = await asyncio.create_subprocess_exec(
-            *tar_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        for attempt in range(1, settings.BACKUP_UPLOAD_ATTEMPTS + 1):
+            pipeline = StreamingBackupPipeline(
+                target,
+                remote_path,
+                config.compression,
+                encrypt=self.fernet.encrypt if config.encrypt else None,
+                max_parallel_uploads=config.max_parallel_uploads
+            )
+            tar_process = await asyncio.create_subprocess_exec(
+                *tar_cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                manifest = await pipeline.run(_TarOutput(tar_process), upload_metadata)
+                break
+            except Exception as e:
+                print(f"Backup upload attempt {attempt} failed: {e}")
+            finally:
+                if tar_process.returncode is None:
+                    tar_process.kill()
+                    await tar_process.wait()
         
-        # Apply compression and encryption pipeline
-        async with aiofiles.open(archive_path, 'wb') as archive_file:
-            tar_stdout, _ = await tar_process.communicate()
-            
-            # Compress
-            if config.compression == CompressionType.GZIP:
-                compressed_data = gzip.compress(tar_stdout)
-            elif config.compression == CompressionType.LZ4:
-                compressed_data = lz4.frame.compress(tar_stdout)
-            elif config.compression == CompressionType.ZSTD:
-                cctx = zstd.ZstdCompressor()
-                compressed_data = cctx.compress(tar_stdout)
-            else:
-                compressed_data = tar_stdout
-            
-            # Encrypt
-            if config.encrypt:
-                final_data = self.fernet.encrypt(compressed_data)
-            else:
-                final_data = compressed_data
-            
-            await archive_file.write(final_data)
+        if manifest is None:
+            await target.abort_multipart(remote_path)
+            return None
+        
+        if target is not storage_backend:
+            staged_path = target.base_path / remote_path
+            uploaded = await storage_backend.upload_file(
+                str(staged_path), remote_path, {**upload_metadata, 'checksum': manifest.sha256}
+            )
+            if not uploaded:
+                return None
         
-        return archive_path
+        return manifest
     
     async def _calculate_checksum(self, file_path: Path) -> str:
         """Calculate SHA-256 checksum of a file."""
-        sha256_hash = hashlib.sha256()
-        
-        async with aiofiles.open(file_path, 'rb') as f:
-            while chunk := await f.read(8192):
-                sha256_hash.update(chunk)
-        
-        return sha256_hash.hexdigest()
+        return await file_digest(str(file_path))
     
-    async def _verify_backup_integrity(self, metadata: BackupMetadata, config: BackupConfig) -> bool:
-        """Verify backup integrity by downloading and checking checksum."""
+    async def _verify_backup_integrity(self, metadata: BackupMetadata, config: BackupConfig,
+                                       part_numbers: Optional[List[int]] = None) -> bool:
+        """
+        Verify backup integrity against its per-part checksums.
+        
+        Multipart backends re-hash the stored parts with ranged reads, so
+        ``part_numbers`` can limit verification to a sample; other backends
+        download the archive. Backups without a part manifest fall back to the
+        whole-file checksum.
+        """
         try:
+            storage_backend = self.storage_backends[config.storage_backend]
+            chunk_manifest = getattr(metadata, 'chunk_manifest', None)
+            manifest = ChunkManifest.from_dict(chunk_manifest) if chunk_manifest else None
+            
+            if manifest and storage_backend.supports_multipart:
+                mismatched = await verify_parts(
+                    storage_backend, metadata.storage_location, manifest, part_numbers
+                )
+                if mismatched:
+                    print(f"Backup verification failed: parts {mismatched} do not match")
+                return not mismatched
+            
             with tempfile.TemporaryDirectory() as temp_dir:
                 temp_path = Path(temp_dir) / "verify_backup"
                 
-                storage_backend = self.storage_backends[config.storage_backend]
                 success = await storage_backend.download_file(
                     metadata.storage_location, 
                     str(temp_path)
@@ -1118,6 +1465,12 @@ class BackupService:
                 if not success:
                     return False
                 
+                if manifest:
+                    mismatched = await verify_file(str(temp_path), manifest)
+                    if mismatched:
+                        print(f"Backup verification failed: parts {mismatched} do not match")
+                    return not mismatched
+                
                 # Verify checksum
                 actual_checksum = await self._calculate_checksum(temp_path)
                 return actual_checksum == metadata.checksum
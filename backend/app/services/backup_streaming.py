@@ -0,0 +1,350 @@
+"""
+Streaming backup pipeline.
+
+``StreamingBackupPipeline`` makes a single pass over an archive stream. Each
+block read is hashed and fed to a streaming compressor (zstd compresses on
+worker threads), and the compressed output is cut into fixed-size parts that
+are optionally encrypted, hashed and uploaded in parallel through the storage
+backend's multipart methods. Nothing is staged on disk and nothing is read
+twice.
+
+The resulting ``ChunkManifest`` records every part's offset, size and SHA-256,
+so verification can re-hash any subset of parts with ranged reads, and a
+retried upload skips the parts the backend already holds. The manifest
+``sha256`` is the SHA-256 of the whole stored archive, hashed part by part
+in the same pass; ``parts_sha256`` is the SHA-256 of the concatenated part
+digests.
+
+Encrypted archives are a sequence of Fernet tokens, one per part, each
+followed by a newline; ``decode_archive`` reverses the pipeline.
+"""
+import asyncio
+import hashlib
+import zlib
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import lz4.frame
+
+from app.core.config import settings
+
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class ChunkInfo:
+    """One stored part of a backup archive."""
+    part_number: int
+    offset: int
+    size: int
+    sha256: str
+    # Digest before encryption; lets a retry recognise a part whose ciphertext differs
+    content_sha256: str = ""
+
+
+@dataclass
+class ChunkManifest:
+    """Part layout and digests of a streamed backup archive."""
+    part_size: int
+    compression: str
+    encrypted: bool
+    parts: List[ChunkInfo] = field(default_factory=list)
+    size_bytes: int = 0
+    # Whole stored archive, as file_digest computes it
+    sha256: str = ""
+    # Over the concatenated part digests, see composite_sha256
+    parts_sha256: str = ""
+    source_size_bytes: int = 0
+    source_sha256: str = ""
+    resumed_parts: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChunkManifest":
+        return cls(**{**data, "parts": [ChunkInfo(**part) for part in data.get("parts", [])]})
+
+
+def composite_sha256(parts: Iterable[ChunkInfo]) -> str:
+    """SHA-256 over the concatenated part digests, in part order."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(bytes.fromhex(part.sha256))
+    return digest.hexdigest()
+
+
+class _StreamCompressor:
+    """Incremental compressor with the container formats ``gzip``/``lz4``/``zstd`` tools read."""
+
+    def __init__(self, compression: str, level: Optional[int] = None, threads: Optional[int] = None):
+        self._header = b""
+        if compression == "zstd":
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError("zstd compression requires the zstandard package")
+            self._obj = zstd.ZstdCompressor(
+                level=settings.BACKUP_ZSTD_LEVEL if level is None else level,
+                threads=settings.BACKUP_ZSTD_THREADS if threads is None else threads,
+            ).compressobj()
+        elif compression == "gzip":
+            # wbits=31 writes a gzip member, same level as gzip.compress
+            self._obj = zlib.compressobj(9 if level is None else level, zlib.DEFLATED, 31)
+        elif compression == "lz4":
+            self._obj = lz4.frame.LZ4FrameCompressor()
+            self._header = self._obj.begin()
+        elif compression == "none":
+            self._obj = None
+        else:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self._obj is None:
+            return data
+        header, self._header = self._header, b""
+        return header + self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        if self._obj is None:
+            return b""
+        header, self._header = self._header, b""
+        return header + self._obj.flush()
+
+
+class StreamingBackupPipeline:
+    """Compress, encrypt, hash and upload an archive stream in one pass."""
+
+    def __init__(
+        self,
+        backend,
+        remote_path: str,
+        compression: str = "zstd",
+        encrypt: Optional[Callable[[bytes], bytes]] = None,
+        part_size: Optional[int] = None,
+        max_parallel_uploads: int = 3,
+        zstd_level: Optional[int] = None,
+        zstd_threads: Optional[int] = None,
+    ):
+        compression = getattr(compression, "value", compression)
+        self.backend = backend
+        self.remote_path = remote_path
+        self.encrypt = encrypt
+        self.part_size = part_size or settings.BACKUP_UPLOAD_PART_SIZE_MB * 1024 * 1024
+        self.max_parallel_uploads = max(1, max_parallel_uploads)
+        self.manifest = ChunkManifest(
+            part_size=self.part_size, compression=compression, encrypted=encrypt is not None
+        )
+        self._compressor = _StreamCompressor(compression, zstd_level, zstd_threads)
+        self._buffer = bytearray()
+        self._source_hash = hashlib.sha256()
+        self._archive_hash = hashlib.sha256()
+
+    def _process(self, block: bytes) -> List[Tuple[bytes, str, str]]:
+        """Hash and compress one block; returns the parts it completed. Runs on a worker thread."""
+        self._source_hash.update(block)
+        self.manifest.source_size_bytes += len(block)
+        self._buffer += self._compressor.compress(block)
+        return self._cut(final=False)
+
+    def _finish(self) -> List[Tuple[bytes, str, str]]:
+        self._buffer += self._compressor.flush()
+        self.manifest.source_sha256 = self._source_hash.hexdigest()
+        return self._cut(final=True)
+
+    def _cut(self, final: bool) -> List[Tuple[bytes, str, str]]:
+        parts = []
+        while len(self._buffer) >= self.part_size or (final and self._buffer):
+            content = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            content_sha256 = hashlib.sha256(content).hexdigest()
+            data = self.encrypt(content) + b"\n" if self.encrypt else content
+            sha256 = hashlib.sha256(data).hexdigest() if self.encrypt else content_sha256
+            parts.append((data, sha256, content_sha256))
+        return parts
+
+    async def run(self, source, metadata: Optional[Dict[str, str]] = None) -> ChunkManifest:
+        """
+        Stream ``source`` (anything with ``async read(n)``) to the backend.
+
+        Raises ``RuntimeError`` if a part or the final assembly is rejected;
+        parts already stored are kept so a retry can skip them.
+        """
+        existing = await self.backend.uploaded_parts(self.remote_path)
+        uploads: Set[asyncio.Task] = set()
+        slots = asyncio.Semaphore(self.max_parallel_uploads)
+        try:
+            processing = None
+            while True:
+                # The next block is read while the previous one is compressed
+                block = await source.read(READ_BLOCK_SIZE)
+                if processing is not None:
+                    await self._emit(await processing, existing, uploads, slots)
+                if not block:
+                    break
+                processing = asyncio.ensure_future(asyncio.to_thread(self._process, block))
+            await self._emit(await asyncio.to_thread(self._finish), existing, uploads, slots)
+            await asyncio.gather(*uploads)
+        except BaseException:
+            for task in uploads:
+                task.cancel()
+            await asyncio.gather(*uploads, return_exceptions=True)
+            raise
+
+        self.manifest.sha256 = self._archive_hash.hexdigest()
+        self.manifest.parts_sha256 = composite_sha256(self.manifest.parts)
+        completed = await self.backend.complete_multipart(
+            self.remote_path, self.manifest, {**(metadata or {}), "checksum": self.manifest.sha256}
+        )
+        if not completed:
+            raise RuntimeError(f"Failed to complete upload of {self.remote_path}")
+        return self.manifest
+
+    async def _emit(
+        self,
+        parts: List[Tuple[bytes, str, str]],
+        existing: Dict[int, ChunkInfo],
+        uploads: Set[asyncio.Task],
+        slots: asyncio.Semaphore,
+    ) -> None:
+        for data, sha256, content_sha256 in parts:
+            part = ChunkInfo(
+                part_number=len(self.manifest.parts) + 1,
+                offset=self.manifest.size_bytes,
+                size=len(data),
+                sha256=sha256,
+                content_sha256=content_sha256,
+            )
+            self.manifest.size_bytes += part.size
+            stored = existing.get(part.part_number)
+            if stored and stored.size == part.size and (
+                stored.sha256 == sha256 or stored.content_sha256 == content_sha256
+            ):
+                # Left by an earlier attempt; an encrypted part keeps its stored ciphertext,
+                # which is read back so the archive digest covers the bytes actually stored
+                stored_data = data if stored.sha256 == sha256 else await self.backend.read_uploaded_part(
+                    self.remote_path, stored
+                )
+                if stored_data is not None and _sha256(stored_data) == stored.sha256:
+                    await asyncio.to_thread(self._archive_hash.update, stored_data)
+                    part.sha256 = stored.sha256
+                    self.manifest.parts.append(part)
+                    self.manifest.resumed_parts += 1
+                    continue
+            # Parts are emitted in order, so the archive digest is updated in order
+            await asyncio.to_thread(self._archive_hash.update, data)
+            self.manifest.parts.append(part)
+
+            # Bounds memory to the parts in flight
+            await slots.acquire()
+            for task in [task for task in uploads if task.done()]:
+                uploads.discard(task)
+                task.result()
+            uploads.add(asyncio.ensure_future(self._upload(part, data, slots)))
+
+    async def _upload(self, part: ChunkInfo, data: bytes, slots: asyncio.Semaphore) -> None:
+        try:
+            if not await self.backend.upload_part(self.remote_path, part, data):
+                raise RuntimeError(f"Failed to upload part {part.part_number} of {self.remote_path}")
+        finally:
+            slots.release()
+
+
+async def verify_parts(
+    backend, remote_path: str, manifest: ChunkManifest, part_numbers: Optional[Iterable[int]] = None
+) -> List[int]:
+    """Re-hash stored parts with ranged reads; returns the numbers of parts that do not match."""
+    wanted = set(part_numbers) if part_numbers is not None else None
+    mismatched = []
+    for part in manifest.parts:
+        if wanted is not None and part.part_number not in wanted:
+            continue
+        try:
+            data = await backend.read_range(remote_path, part.offset, part.size)
+        except Exception:
+            data = b""
+        if len(data) != part.size or await asyncio.to_thread(_sha256, data) != part.sha256:
+            mismatched.append(part.part_number)
+    return mismatched
+
+
+async def verify_file(path: str, manifest: ChunkManifest) -> List[int]:
+    """Check a downloaded archive against its manifest; returns the numbers of parts that do not match."""
+    def check() -> List[int]:
+        mismatched = []
+        with open(path, "rb") as f:
+            for part in manifest.parts:
+                f.seek(part.offset)
+                data = f.read(part.size)
+                if len(data) != part.size or _sha256(data) != part.sha256:
+                    mismatched.append(part.part_number)
+            # Trailing bytes count against the last part
+            if f.seek(0, 2) != manifest.size_bytes and manifest.parts and manifest.parts[-1].part_number not in mismatched:
+                mismatched.append(manifest.parts[-1].part_number)
+        return mismatched
+
+    return await asyncio.to_thread(check)
+
+
+async def file_digest(path: str, algorithm: str = "sha256") -> str:
+    """Hash a file in 1 MiB reads on a worker thread."""
+    def digest() -> str:
+        hash_func = hashlib.new(algorithm)
+        with open(path, "rb") as f:
+            while block := f.read(READ_BLOCK_SIZE):
+                hash_func.update(block)
+        return hash_func.hexdigest()
+
+    return await asyncio.to_thread(digest)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _decompressor(name: str):
+    if name.endswith(".zst"):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd archives require the zstandard package")
+        return zstd.ZstdDecompressor().decompressobj()
+    if name.endswith(".gz"):
+        return zlib.decompressobj(31)
+    if name.endswith(".lz4"):
+        return lz4.frame.LZ4FrameDecompressor()
+    return None
+
+
+async def decode_archive(
+    source: str, destination: str, archive_name: str, decrypt: Optional[Callable[[bytes], bytes]] = None
+) -> None:
+    """
+    Decrypt and decompress a stored archive into a plain tar file.
+
+    The format is taken from ``archive_name`` (``.tar[.gz|.lz4|.zst][.enc]``).
+    Single-token encrypted archives from before the streaming pipeline decode
+    the same way.
+    """
+    name = archive_name[:-len(".enc")] if archive_name.endswith(".enc") else archive_name
+    encrypted = archive_name.endswith(".enc")
+
+    def decode() -> None:
+        decompressor = _decompressor(name)
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            blocks = (line.rstrip(b"\n") for line in src) if encrypted else iter(lambda: src.read(READ_BLOCK_SIZE), b"")
+            for block in blocks:
+                if not block:
+                    continue
+                if encrypted:
+                    block = decrypt(block)
+                dst.write(decompressor.decompress(block) if decompressor else block)
+
+    if encrypted and decrypt is None:
+        raise ValueError(f"{archive_name} is encrypted but no key was given")
+    Path(destination).parent.mkdir(parents=True, exist_ok=True)
+    await asyncio.to_thread(decode)
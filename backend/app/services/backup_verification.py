@@ -12,7 +12,6 @@ This service provides:
 """
 
 import os
-import hashlib
 import tempfile
 import json
 from datetime import datetime, timedelta
@@ -32,6 +31,7 @@ from app.models.backup import (
     BackupStatusEnum
 )
 from app.services.backup_service import backup_service, StorageBackend
+from app.services.backup_streaming import file_digest
 from app.services.recovery_service import recovery_service
 from app.services.monitoring import MonitoringService
 
@@ -659,13 +659,7 @@ class BackupVerificationService:
     async def _calculate_file_checksum(self, file_path: str, algorithm: str = 'sha256') -> str:
         """Calculate checksum for a file."""
         
-        hash_func = hashlib.new(algorithm)
-        
-        async with aiofiles.open(file_path, 'rb') as f:
-            while chunk := await f.read(8192):
-                hash_func.update(chunk)
-        
-        return hash_func.hexdigest()
+        return await file_digest(file_path, algorithm)
     
     async def _store_verification_progress(self, report: VerificationReport):
         """Store verification progress in Redis."""
@@ -18,6 +18,7 @@ from enum import Enum
 
 try:
     import redis.asyncio as redis
+    from ..core.redis_pool import available_redis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
@@ -69,7 +70,7 @@ class BatchSyncManager:
         self.batch_size = settings.MEILISEARCH_BATCH_SIZE or 100
         self.batch_timeout = settings.MEILISEARCH_BATCH_TIMEOUT or 30  # seconds
         self.max_retries = settings.MEILISEARCH_MAX_RETRIES or 3
-        self.redis_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT or 6379}"
+        self.redis_url = settings.REDIS_URL
         
         # Redis keys
         self.sync_queue_key = "meilisearch:sync_queue"
@@ -82,28 +83,16 @@ class BatchSyncManager:
             logger.warning("Redis not available, using mock batch sync manager")
             return
         
-        try:
-            self.redis_client = redis.from_url(
-                self.redis_url,
-                encoding="utf-8",
-                decode_responses=True,
-                socket_keepalive=True,
-                socket_keepalive_options={}
-            )
-            
-            # Test connection
-            await self.redis_client.ping()
+        # Shared pool client; None if Redis did not answer its health check
+        self.redis_client = await available_redis(self.redis_url)
+        if self.redis_client:
             logger.info(f"Connected to Redis for batch sync: {self.redis_url}")
-            
-        except Exception as e:
-            logger.error(f"Failed to connect to Redis: {str(e)}")
-            self.redis_client = None
+        else:
+            logger.error("Failed to connect to Redis for batch sync")
     
     async def disconnect(self):
-        """Close Redis connection"""
-        if self.redis_client:
-            await self.redis_client.aclose()
-            self.redis_client = None
+        """Release the Redis client; its connections stay in the shared pool"""
+        self.redis_client = None
     
     async def __aenter__(self):
         await self.connect()
@@ -144,30 +133,27 @@ class BatchSyncManager:
             
             # Check for existing request for same page (deduplication)
             existing_key = await self._find_existing_request(page_id, project_id)
+            
+            # Replace, enqueue, store and count in one round trip
+            queue_key = f"{project_id}:{page_id}:{operation.value}:{sync_request.timestamp.timestamp()}"
+            pipe = self.redis_client.pipeline()
             if existing_key:
                 # Remove old request (will be replaced with newer one)
-                await self.redis_client.zrem(self.sync_queue_key, existing_key)
+                pipe.zrem(self.sync_queue_key, existing_key)
                 logger.debug(f"Replaced existing sync request for page {page_id}")
             
             # Add to priority queue (sorted set)
-            queue_key = f"{project_id}:{page_id}:{operation.value}:{sync_request.timestamp.timestamp()}"
-            await self.redis_client.zadd(
-                self.sync_queue_key,
-                {queue_key: sync_request.priority}
-            )
+            pipe.zadd(self.sync_queue_key, {queue_key: sync_request.priority})
             
             # Store request data
-            await self.redis_client.hset(
-                f"{self.sync_queue_key}:data",
-                queue_key,
-                sync_request.to_json()
-            )
+            pipe.hset(f"{self.sync_queue_key}:data", queue_key, sync_request.to_json())
             
             # Update statistics
-            await self._update_stats("queued", operation.value)
+            self._queue_stats(pipe, "queued", operation.value)
             
             # Check if we should trigger batch processing
-            queue_size = await self.redis_client.zcard(self.sync_queue_key)
+            pipe.zcard(self.sync_queue_key)
+            queue_size = (await pipe.execute())[-1]
             if queue_size >= self.batch_size:
                 await self._trigger_batch_processing()
             
@@ -243,12 +229,8 @@ class BatchSyncManager:
             
             # Get operation data
             operations = []
-            for queue_key in queue_keys:
-                request_data = await self.redis_client.hget(
-                    f"{self.sync_queue_key}:data", 
-                    queue_key
-                )
-                
+            requests_data = await self.redis_client.hmget(f"{self.sync_queue_key}:data", queue_keys)
+            for queue_key, request_data in zip(queue_keys, requests_data):
                 if request_data:
                     try:
                         sync_request = SyncRequest.from_json(request_data)
@@ -390,16 +372,19 @@ class BatchSyncManager:
             return
         
         try:
+            pipe = self.redis_client.pipeline()
+            
             # Remove from priority queue
             queue_keys = [queue_key for queue_key, _ in operations]
             if queue_keys:
-                await self.redis_client.zrem(self.sync_queue_key, *queue_keys)
+                pipe.zrem(self.sync_queue_key, *queue_keys)
                 
                 # Remove data
-                await self.redis_client.hdel(f"{self.sync_queue_key}:data", *queue_keys)
+                pipe.hdel(f"{self.sync_queue_key}:data", *queue_keys)
                 
             # Release batch lock
-            await self.redis_client.delete(self.batch_lock_key)
+            pipe.delete(self.batch_lock_key)
+            await pipe.execute()
             
         except Exception as e:
             logger.error(f"Failed to clear processed operations: {str(e)}")
@@ -410,31 +395,38 @@ class BatchSyncManager:
             return
         
         try:
-            timestamp = datetime.utcnow().isoformat()
-            stats_key = f"{self.stats_key}:{datetime.utcnow().strftime('%Y-%m-%d')}"
-            
-            # Increment counters
-            await self.redis_client.hincrby(stats_key, f"{stat_type}_{operation_type}", count)
-            await self.redis_client.hset(stats_key, "last_update", timestamp)
-            
-            # Set expiry (30 days)
-            await self.redis_client.expire(stats_key, 30 * 24 * 3600)
+            pipe = self.redis_client.pipeline()
+            self._queue_stats(pipe, stat_type, operation_type, count)
+            await pipe.execute()
             
         except Exception as e:
             logger.warning(f"Failed to update sync stats: {str(e)}")
     
+    def _queue_stats(self, pipe, stat_type: str, operation_type: str, count: int = 1):
+        """Add the statistics updates to a pipeline"""
+        timestamp = datetime.utcnow().isoformat()
+        stats_key = f"{self.stats_key}:{datetime.utcnow().strftime('%Y-%m-%d')}"
+        
+        # Increment counters
+        pipe.hincrby(stats_key, f"{stat_type}_{operation_type}", count)
+        pipe.hset(stats_key, "last_update", timestamp)
+        
+        # Set expiry (30 days)
+        pipe.expire(stats_key, 30 * 24 * 3600)
+    
     async def get_queue_stats(self) -> Dict[str, Any]:
         """Get current queue statistics"""
         if not self.redis_client:
             return {"queue_size": 0, "available": False}
         
         try:
-            queue_size = await self.redis_client.zcard(self.sync_queue_key)
-            is_processing = await self.redis_client.exists(self.batch_lock_key)
-            
-            # Get today's stats
+            # Get today's stats along with the queue state
             today_stats_key = f"{self.stats_key}:{datetime.utcnow().strftime('%Y-%m-%d')}"
-            today_stats = await self.redis_client.hgetall(today_stats_key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zcard(self.sync_queue_key)
+            pipe.exists(self.batch_lock_key)
+            pipe.hgetall(today_stats_key)
+            queue_size, is_processing, today_stats = await pipe.execute()
             
             return {
                 "queue_size": queue_size,
@@ -1,13 +1,14 @@
 """
 Redis-based caching service for page lookups and deduplication
 """
-import redis
 import json
 import logging
 from typing import Optional, List, Tuple, Dict
 from uuid import UUID
 
-from app.core.config import settings
+import redis.asyncio as aioredis
+
+from app.core.redis_pool import available_redis, coalesced_get
 
 logger = logging.getLogger(__name__)
 
@@ -16,23 +17,12 @@ class PageCacheService:
     """Redis-based caching for page lookups and deduplication"""
     
     def __init__(self):
-        try:
-            self.redis = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=getattr(settings, 'REDIS_PORT', 6379),
-                db=getattr(settings, 'REDIS_DB', 0),
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            # Test connection
-            self.redis.ping()
-            self.ttl = 3600  # 1 hour TTL
-            logger.info("Page cache service initialized successfully")
-        except (redis.ConnectionError, redis.TimeoutError) as e:
-            logger.warning(f"Redis not available, using mock cache: {e}")
-            self.redis = None
-            self.ttl = 3600
+        # Connections come from the process-wide pool in app.core.redis_pool
+        self.ttl = 3600  # 1 hour TTL
+    
+    async def _redis(self) -> Optional[aioredis.Redis]:
+        """Shared Redis client, or None while Redis is unavailable"""
+        return await available_redis()
     
     def _get_page_key(self, url: str, timestamp: int) -> str:
         """Generate cache key for page existence"""
@@ -48,12 +38,14 @@ class PageCacheService:
     
     async def get_page_exists(self, url: str, timestamp: int) -> Optional[UUID]:
         """Check if page exists in cache"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return None
         
         try:
             key = self._get_page_key(url, timestamp)
-            page_id_str = self.redis.get(key)
+            # Lookups for many pages arrive concurrently; they share MGET round trips
+            page_id_str = await coalesced_get(redis_client, key)
             return UUID(page_id_str) if page_id_str else None
         except Exception as e:
             logger.warning(f"Cache get error: {e}")
@@ -61,12 +53,13 @@ class PageCacheService:
     
     async def set_page_exists(self, url: str, timestamp: int, page_id: UUID) -> None:
         """Cache page existence"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return
         
         try:
             key = self._get_page_key(url, timestamp)
-            self.redis.setex(key, self.ttl, str(page_id))
+            await redis_client.setex(key, self.ttl, str(page_id))
         except Exception as e:
             logger.warning(f"Cache set error: {e}")
     
@@ -75,19 +68,13 @@ class PageCacheService:
         url_timestamp_pairs: List[Tuple[str, int]]
     ) -> Dict[Tuple[str, int], UUID]:
         """Bulk check cache for existing pages"""
-        if not self.redis or not url_timestamp_pairs:
+        redis_client = await self._redis()
+        if not redis_client or not url_timestamp_pairs:
             return {}
         
         try:
-            pipeline = self.redis.pipeline()
-            keys = []
-            
-            for url, timestamp in url_timestamp_pairs:
-                key = self._get_page_key(url, timestamp)
-                keys.append(key)
-                pipeline.get(key)
-            
-            results = pipeline.execute()
+            keys = [self._get_page_key(url, timestamp) for url, timestamp in url_timestamp_pairs]
+            results = await redis_client.mget(keys)
             
             existing = {}
             for (url, timestamp), page_id_str in zip(url_timestamp_pairs, results):
@@ -108,29 +95,31 @@ class PageCacheService:
         page_data: List[Tuple[str, int, UUID]]
     ) -> None:
         """Bulk cache page existence"""
-        if not self.redis or not page_data:
+        redis_client = await self._redis()
+        if not redis_client or not page_data:
             return
         
         try:
-            pipeline = self.redis.pipeline()
+            pipeline = redis_client.pipeline(transaction=False)
             
             for url, timestamp, page_id in page_data:
                 key = self._get_page_key(url, timestamp)
                 pipeline.setex(key, self.ttl, str(page_id))
             
-            pipeline.execute()
+            await pipeline.execute()
             
         except Exception as e:
             logger.warning(f"Bulk cache set error: {e}")
     
     async def invalidate_page(self, url: str, timestamp: int) -> None:
         """Remove page from cache"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return
         
         try:
             key = self._get_page_key(url, timestamp)
-            self.redis.delete(key)
+            await redis_client.delete(key)
         except Exception as e:
             logger.warning(f"Cache invalidation error: {e}")
     
@@ -141,25 +130,27 @@ class PageCacheService:
         ttl: Optional[int] = None
     ) -> None:
         """Cache list of page IDs for a project"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return
         
         try:
             key = self._get_project_pages_key(project_id)
             page_ids_str = json.dumps([str(pid) for pid in page_ids])
             cache_ttl = ttl or self.ttl
-            self.redis.setex(key, cache_ttl, page_ids_str)
+            await redis_client.setex(key, cache_ttl, page_ids_str)
         except Exception as e:
             logger.warning(f"Project pages cache error: {e}")
     
     async def get_project_pages(self, project_id: int) -> Optional[List[UUID]]:
         """Get cached page IDs for a project"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return None
         
         try:
             key = self._get_project_pages_key(project_id)
-            page_ids_str = self.redis.get(key)
+            page_ids_str = await redis_client.get(key)
             if page_ids_str:
                 page_ids_list = json.loads(page_ids_str)
                 return [UUID(pid) for pid in page_ids_list]
@@ -170,12 +161,13 @@ class PageCacheService:
     
     async def invalidate_project_pages(self, project_id: int) -> None:
         """Invalidate cached project pages"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return
         
         try:
             key = self._get_project_pages_key(project_id)
-            self.redis.delete(key)
+            await redis_client.delete(key)
         except Exception as e:
             logger.warning(f"Project pages cache invalidation error: {e}")
     
@@ -186,24 +178,26 @@ class PageCacheService:
         ttl: Optional[int] = None
     ) -> None:
         """Cache user's accessible project IDs"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return
         
         try:
             key = self._get_user_projects_key(user_id)
             cache_ttl = ttl or self.ttl
-            self.redis.setex(key, cache_ttl, json.dumps(project_ids))
+            await redis_client.setex(key, cache_ttl, json.dumps(project_ids))
         except Exception as e:
             logger.warning(f"User projects cache error: {e}")
     
     async def get_user_projects(self, user_id: int) -> Optional[List[int]]:
         """Get cached project IDs for a user"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return None
         
         try:
             key = self._get_user_projects_key(user_id)
-            project_ids_str = self.redis.get(key)
+            project_ids_str = await redis_client.get(key)
             if project_ids_str:
                 return json.loads(project_ids_str)
             return None
@@ -213,22 +207,24 @@ class PageCacheService:
     
     async def invalidate_user_projects(self, user_id: int) -> None:
         """Invalidate cached user projects"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return
         
         try:
             key = self._get_user_projects_key(user_id)
-            self.redis.delete(key)
+            await redis_client.delete(key)
         except Exception as e:
             logger.warning(f"User projects cache invalidation error: {e}")
     
     async def get_cache_stats(self) -> Dict:
         """Get cache statistics"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return {"status": "unavailable", "reason": "Redis not connected"}
         
         try:
-            info = self.redis.info()
+            info = await redis_client.info()
             return {
                 "status": "available",
                 "connected_clients": info.get("connected_clients", 0),
@@ -252,13 +248,14 @@ class PageCacheService:
     
     async def clear_pattern(self, pattern: str) -> int:
         """Clear all keys matching a pattern"""
-        if not self.redis:
+        redis_client = await self._redis()
+        if not redis_client:
             return 0
         
         try:
-            keys = self.redis.keys(pattern)
+            keys = await redis_client.keys(pattern)
             if keys:
-                return self.redis.delete(*keys)
+                return await redis_client.delete(*keys)
             return 0
         except Exception as e:
             logger.warning(f"Cache pattern clear error: {e}")
@@ -287,11 +284,13 @@ class MockCacheService(PageCacheService):
     """Mock cache service for testing without Redis"""
     
     def __init__(self):
-        self.redis = None
         self.ttl = 3600
         self._data = {}
         logger.info("Using mock cache service (Redis not available)")
     
+    async def _redis(self) -> Optional[aioredis.Redis]:
+        return None
+    
     async def get_page_exists(self, url: str, timestamp: int) -> Optional[UUID]:
         key = self._get_page_key(url, timestamp)
         page_id_str = self._data.get(key)
@@ -1,7 +1,6 @@
 """
 Content change detection and diff tracking service
 """
-import difflib
 import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
@@ -11,6 +10,7 @@ import logging
 
 from app.models.project import Domain, Project
 from app.models.shared_pages import PageV2 as Page
+from app.services.diff_engine import diff_engine, render_html_diff, text_similarity
 
 logger = logging.getLogger(__name__)
 
@@ -43,55 +43,35 @@ class ChangeDetectionService:
     @staticmethod
     def calculate_text_similarity(text1: str, text2: str) -> float:
         """
-        Calculate similarity between two text strings using difflib
-        Returns a score between 0.0 and 1.0
+        Calculate similarity between two text strings
+        Exact ratio for short texts, shingle-sketch estimate for long ones;
+        returns a score between 0.0 and 1.0
         """
-        if not text1 and not text2:
-            return 1.0
-        if not text1 or not text2:
-            return 0.0
-        
-        # Use SequenceMatcher for similarity
-        matcher = difflib.SequenceMatcher(None, text1, text2)
-        return matcher.ratio()
+        return text_similarity(text1 or "", text2 or "")
     
     @staticmethod
     def generate_content_diff(old_content: str, new_content: str, context_lines: int = 3) -> str:
         """
         Generate a unified diff between old and new content
         """
-        old_lines = old_content.splitlines(keepends=True) if old_content else []
-        new_lines = new_content.splitlines(keepends=True) if new_content else []
-        
-        diff = difflib.unified_diff(
-            old_lines,
-            new_lines,
-            fromfile='old',
-            tofile='new',
-            n=context_lines
-        )
-        
-        return ''.join(diff)
+        result = diff_engine.compare_sync(old_content or "", new_content or "", context_lines)
+        return ''.join(result.unified('old', 'new'))
     
     @staticmethod
     def generate_html_diff(old_content: str, new_content: str) -> str:
         """
         Generate an HTML diff for visual comparison
         """
-        old_lines = old_content.splitlines() if old_content else []
-        new_lines = new_content.splitlines() if new_content else []
-        
-        differ = difflib.HtmlDiff(wrapcolumn=80)
-        html_diff = differ.make_file(
-            old_lines,
-            new_lines,
+        old_content = old_content or ""
+        new_content = new_content or ""
+        result = diff_engine.compare_sync(old_content, new_content)
+        return render_html_diff(
+            old_content.splitlines(),
+            new_content.splitlines(),
+            result.opcodes,
             fromdesc='Previous Version',
             todesc='Current Version',
-            context=True,
-            numlines=3
         )
-        
-        return html_diff
     
     @staticmethod
     async def detect_page_changes(
@@ -120,8 +100,9 @@ class ChangeDetectionService:
         if page.content_hash == new_content_hash:
             return None  # No change detected
         
-        # Calculate similarity
-        similarity = ChangeDetectionService.calculate_text_similarity(old_content, new_content)
+        # Diff off the event loop (large pages go to the diff worker pool)
+        diff_result = await diff_engine.compare(old_content, new_content)
+        similarity = diff_result.similarity
         
         # Determine change type
         if not old_content and new_content:
@@ -136,7 +117,7 @@ class ChangeDetectionService:
         # Generate diff if content changed significantly
         diff = None
         if change_type in ["modified", "minor_update"] and old_content != new_content:
-            diff = ChangeDetectionService.generate_content_diff(old_content, new_content)
+            diff = ''.join(diff_result.unified('old', 'new'))
         
         return ContentChange(
             page_id=page_id,
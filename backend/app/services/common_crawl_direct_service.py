@@ -1,11 +1,23 @@
 """
 Direct Common Crawl index processing service.
 Bypasses CDX API entirely by downloading and processing index files directly.
+
+Common Crawl's cc-index is a ZipNum index: ``cdx-NNNNN.gz`` files are
+concatenations of independently gzipped blocks of SURT-sorted lines, and
+``cluster.idx`` lists the first key, file, offset and length of every block.
+Lookups binary-search ``cluster.idx`` (cached locally and mmap'd) for the
+domain's SURT range and fetch only the matching blocks with HTTP range
+requests. Scanning whole segments remains as a fallback.
 """
 import asyncio
 import gzip
+import json
 import logging
+import mmap
 import re
+import weakref
+import zlib
+from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from urllib.parse import urlparse
@@ -31,6 +43,128 @@ class DirectCommonCrawlException(WaybackMachineException):
     pass
 
 
+def surt_host(host: str) -> str:
+    """SURT form of a host as used in cc-index keys (``www.example.com`` -> ``com,example``)"""
+    host = host.lower().strip().strip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    return ','.join(reversed(host.split('.')))
+
+
+def surt_key_range(domain_pattern: str, match_type: str) -> Optional[Tuple[str, str]]:
+    """
+    Half-open [start, end) SURT key range that contains every match
+
+    Subdomains sort directly after the host (``com,example)`` then
+    ``com,example,sub)``), so ``[host, host + '-')`` covers a whole domain.
+    Ranges can still be wider than the match, so records are checked with
+    ``_matches_domain`` as well.
+    Returns None for patterns that cannot be mapped to a range.
+    """
+    pattern = domain_pattern.strip().lower()
+    if match_type == "prefix":
+        parsed = urlparse(pattern if '://' in pattern else f"http://{pattern}")
+        if not parsed.netloc:
+            return None
+        start = f"{surt_host(parsed.netloc.split(':')[0])}){parsed.path or '/'}"
+        return start, start + '\x7f'
+    if match_type == "glob":
+        if not pattern.startswith('*.'):
+            return None
+        pattern = pattern[2:]
+        if any(c in pattern for c in '*?[]'):
+            return None
+    if not pattern or '/' in pattern:
+        return None
+    host = surt_host(pattern)
+    if match_type == "exact":
+        return f"{host})", f"{host})\x7f"
+    # Subdomains sort as "com,example," right after "com,example)"
+    return host, host + '-'
+
+
+@dataclass(frozen=True)
+class ClusterBlock:
+    """One compressed block of a cc-index file"""
+    key: str
+    filename: str
+    offset: int
+    length: int
+
+
+class ClusterIndex:
+    """Memory-mapped ``cluster.idx`` supporting binary search by SURT key"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def _line(self, start: int) -> Tuple[bytes, int]:
+        end = self._mm.find(b'\n', start)
+        if end == -1:
+            end = len(self._mm)
+        return self._mm[start:end], end
+
+    @staticmethod
+    def _key(line: bytes) -> bytes:
+        # "<surt> <timestamp>\t<file>\t<offset>\t<length>\t<seq>"
+        return line.split(b'\t', 1)[0]
+
+    def _first_line_at_or_after(self, target: bytes) -> int:
+        """Byte offset of the first line whose key is >= target"""
+        lo, hi = 0, len(self._mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._mm.rfind(b'\n', 0, mid) + 1
+            line, end = self._line(start)
+            if self._key(line) < target:
+                lo = end + 1
+            else:
+                hi = start
+        return lo
+
+    def lookup(self, start_key: str, end_key: str) -> List[ClusterBlock]:
+        """Blocks that may contain keys in [start_key, end_key)"""
+        if not len(self._mm):
+            return []
+        pos = self._first_line_at_or_after(start_key.encode())
+        # The block starting before the range can still hold its first keys
+        if pos > 0:
+            pos = self._mm.rfind(b'\n', 0, pos - 1) + 1
+        end_bytes = end_key.encode()
+        blocks = []
+        size = len(self._mm)
+        while pos < size:
+            line, end = self._line(pos)
+            pos = end + 1
+            if not line.strip():
+                continue
+            key = self._key(line)
+            if key >= end_bytes:
+                break
+            fields = line.decode('utf-8', 'replace').split('\t')
+            if len(fields) < 4:
+                continue
+            blocks.append(ClusterBlock(fields[0], fields[1], int(fields[2]), int(fields[3])))
+        return blocks
+
+
+def decompress_blocks(data: bytes) -> bytes:
+    """Inflate a run of concatenated gzip members"""
+    out = []
+    while data:
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        out.append(inflater.decompress(data))
+        out.append(inflater.flush())
+        data = inflater.unused_data
+    return b''.join(out)
+
+
 class CommonCrawlDirectService:
     """
     Direct Common Crawl index processing service.
@@ -40,6 +174,18 @@ class CommonCrawlDirectService:
     CC_INDEX_BASE_URL = "https://data.commoncrawl.org"
     CC_CRAWL_LIST_URL = f"{CC_INDEX_BASE_URL}/crawl-data/CC-MAIN-2024-33/cc-index.paths.gz"
     
+    # Adjacent blocks are fetched with one range request up to this size
+    MAX_RANGE_BYTES = 8 * 1024 * 1024
+    MAX_PARALLEL_CRAWLS = 4
+    MAX_PARALLEL_RANGES = 4
+    
+    # cluster.idx files opened by this process, keyed by crawl id
+    _cluster_indexes: Dict[str, ClusterIndex] = {}
+    # Per event loop, per crawl id locks so concurrent lookups download cluster.idx once
+    _cluster_index_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+        weakref.WeakKeyDictionary()
+    )
+    
     def __init__(self, cache_dir: Optional[str] = None):
         self.cache_dir = Path(cache_dir or "/tmp/cc_direct_cache")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -84,7 +230,7 @@ class CommonCrawlDirectService:
         retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError, DirectCommonCrawlException)),
         before_sleep=before_sleep_log(logger, logging.INFO)
     )
-    async def _download_file(self, url: str, local_path: Path) -> bool:
+    async def _download_file(self, url: str, local_path: Path, verify_gzip: bool = True) -> bool:
         """Download a file with retry logic"""
         try:
             logger.info(f"Downloading {url} to {local_path}")
@@ -121,15 +267,16 @@ class CommonCrawlDirectService:
                             f"Content length mismatch: expected {expected}, got {bytes_written}"
                         )
                     # Quick gzip integrity probe: try opening and reading a small chunk
-                    try:
-                        with gzip.open(local_path, 'rb') as gz:
-                            _ = gz.read(1024)
-                    except Exception as gz_err:
+                    if verify_gzip:
                         try:
-                            local_path.unlink(missing_ok=True)
-                        except Exception:
-                            pass
-                        raise DirectCommonCrawlException(f"Corrupt gzip after download: {gz_err}")
+                            with gzip.open(local_path, 'rb') as gz:
+                                _ = gz.read(1024)
+                        except Exception as gz_err:
+                            try:
+                                local_path.unlink(missing_ok=True)
+                            except Exception:
+                                pass
+                            raise DirectCommonCrawlException(f"Corrupt gzip after download: {gz_err}")
 
                     return True
 
@@ -171,15 +318,32 @@ class CommonCrawlDirectService:
         # Use http for proxy to avoid HTTPS CONNECT issues; fall back to https when not via proxy in downloader
         return f"{self.CC_INDEX_BASE_URL.replace('https://','http://')}/cc-index/collections/{crawl_id}/indexes/cdx-{segment:05d}.gz"
     
+    def _build_cluster_index_url(self, crawl_id: str) -> str:
+        return f"{self.CC_INDEX_BASE_URL.replace('https://','http://')}/cc-index/collections/{crawl_id}/indexes/cluster.idx"
+    
+    def _build_index_file_url(self, crawl_id: str, filename: str) -> str:
+        return f"{self.CC_INDEX_BASE_URL.replace('https://','http://')}/cc-index/collections/{crawl_id}/indexes/{filename}"
+    
     def _parse_cdx_line(self, line: str) -> Optional[CDXRecord]:
         """Parse a CDX line into a CDXRecord object"""
         try:
             parts = line.strip().split(' ')
-            # Common Crawl cc-index format typically: urlkey timestamp original mimetype statuscode digest length offset filename
-            if len(parts) < 9:
+            if len(parts) >= 3 and parts[2].startswith('{'):
+                # cc-index JSON format: urlkey timestamp {"url": ..., "mime": ..., ...}
+                fields = json.loads(line.strip().split(' ', 2)[2])
+                timestamp = parts[1]
+                original_url = fields.get('url', '')
+                mime_type = fields.get('mime', '')
+                status_code = str(fields.get('status', ''))
+                digest = fields.get('digest', '')
+                length = str(fields.get('length', '') or '')
+                offset = str(fields.get('offset', '') or '')
+                filename = fields.get('filename')
+            elif len(parts) >= 9:
+                # Classic CDX: urlkey timestamp original mimetype statuscode digest length offset filename
+                url_key, timestamp, original_url, mime_type, status_code, digest, length, offset, filename = parts[:9]
+            else:
                 return None
-
-            url_key, timestamp, original_url, mime_type, status_code, digest, length, offset, filename = parts[:9]
             
             # Basic filtering - only HTML and PDF
             if mime_type not in ['text/html', 'application/pdf']:
@@ -316,6 +480,146 @@ class CommonCrawlDirectService:
             logger.error(f"Error processing index file {index_url}: {e}")
             return []
     
+    async def _load_cluster_index(self, crawl_id: str) -> ClusterIndex:
+        """Open the crawl's cluster.idx, downloading it on first use"""
+        index = self._cluster_indexes.get(crawl_id)
+        if index is not None:
+            return index
+        locks = self._cluster_index_locks.setdefault(asyncio.get_running_loop(), {})
+        async with locks.setdefault(crawl_id, asyncio.Lock()):
+            index = self._cluster_indexes.get(crawl_id)
+            if index is not None:
+                return index
+            cache_file = self.cache_dir / f"{crawl_id}-cluster.idx"
+            if not cache_file.exists():
+                partial = cache_file.with_suffix('.idx.part')
+                await self._download_file(self._build_cluster_index_url(crawl_id), partial, verify_gzip=False)
+                partial.replace(cache_file)
+            index = ClusterIndex(cache_file)
+            self._cluster_indexes[crawl_id] = index
+            return index
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=2, min=4, max=60),
+        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError, DirectCommonCrawlException)),
+        before_sleep=before_sleep_log(logger, logging.INFO)
+    )
+    async def _fetch_range(self, url: str, offset: int, length: int) -> bytes:
+        """Fetch ``length`` bytes at ``offset``, via proxy first and then direct"""
+        headers = {'Range': f"bytes={offset}-{offset + length - 1}"}
+        last_error: Optional[Exception] = None
+        for use_proxy in (True, False):
+            if use_proxy and not getattr(self, "_proxy_url", None):
+                continue
+            kwargs = {"proxy": self._proxy_url} if use_proxy else {}
+            req_url = url if use_proxy else url.replace("http://", "https://")
+            try:
+                async with self.session.get(req_url, headers=headers, **kwargs) as response:
+                    if response.status not in (200, 206):
+                        raise DirectCommonCrawlException(f"HTTP {response.status}")
+                    data = await response.read()
+                    if response.status == 200:
+                        # Server ignored the range
+                        data = data[offset:offset + length]
+                    if len(data) != length:
+                        raise DirectCommonCrawlException(f"Short range read: expected {length}, got {len(data)}")
+                    return data
+            except Exception as e:
+                last_error = e
+                if use_proxy:
+                    logger.warning(f"Proxy range request failed for {url}: {e}; retrying without proxy")
+        raise DirectCommonCrawlException(f"Range request failed for {url}: {last_error}")
+    
+    @classmethod
+    def _coalesce_blocks(cls, blocks: List[ClusterBlock]) -> List[Tuple[str, int, int]]:
+        """Merge contiguous blocks of the same file into (filename, offset, length) ranges"""
+        ranges: List[List] = []
+        for block in blocks:
+            if ranges:
+                last = ranges[-1]
+                if (last[0] == block.filename and last[1] + last[2] == block.offset
+                        and last[2] + block.length <= cls.MAX_RANGE_BYTES):
+                    last[2] += block.length
+                    continue
+            ranges.append([block.filename, block.offset, block.length])
+        return [tuple(r) for r in ranges]
+    
+    def _records_from_block_data(self, data: bytes, key_range: Tuple[str, str],
+                                 domain_pattern: str, match_type: str,
+                                 from_date: str, to_date: str) -> List[CDXRecord]:
+        start_key, end_key = key_range
+        records = []
+        for raw_line in decompress_blocks(data).decode('utf-8', 'replace').splitlines():
+            key = raw_line.split(' ', 1)[0]
+            if key < start_key or key >= end_key:
+                continue
+            record = self._parse_cdx_line(raw_line)
+            if not record:
+                continue
+            if not self._matches_domain(record, domain_pattern, match_type):
+                continue
+            if not self._filter_by_date_range(record, from_date, to_date):
+                continue
+            records.append(record)
+        return records
+    
+    async def _lookup_crawl_indexed(self, crawl_id: str, key_range: Tuple[str, str],
+                                    domain_pattern: str, match_type: str,
+                                    from_date: str, to_date: str) -> Tuple[List[CDXRecord], int]:
+        """All matching records of one crawl; returns (records, blocks fetched)"""
+        index = await self._load_cluster_index(crawl_id)
+        blocks = index.lookup(*key_range)
+        ranges = self._coalesce_blocks(blocks)
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_RANGES)
+        
+        async def fetch(filename: str, offset: int, length: int) -> List[CDXRecord]:
+            async with semaphore:
+                data = await self._fetch_range(self._build_index_file_url(crawl_id, filename), offset, length)
+            return self._records_from_block_data(data, key_range, domain_pattern, match_type, from_date, to_date)
+        
+        results = await asyncio.gather(*(fetch(*r) for r in ranges))
+        records = [record for chunk in results for record in chunk]
+        logger.info(f"{crawl_id}: {len(records)} records for {domain_pattern} from {len(blocks)} blocks "
+                    f"in {len(ranges)} range requests")
+        return records, len(blocks)
+    
+    async def fetch_cdx_records_indexed(self, domain_name: str, from_date: str, to_date: str,
+                                        match_type: str = "domain",
+                                        crawls: Optional[List[str]] = None) -> Tuple[List[CDXRecord], Dict[str, int]]:
+        """
+        Look up a domain in every crawl via cluster.idx, crawls in parallel
+        
+        Raises DirectCommonCrawlException when the pattern cannot be mapped to
+        a SURT range or no crawl could be searched.
+        """
+        key_range = surt_key_range(domain_name, match_type)
+        if key_range is None:
+            raise DirectCommonCrawlException(f"Cannot derive a SURT range for {match_type} pattern {domain_name}")
+        
+        crawls = crawls or await self._get_available_crawls()
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_CRAWLS)
+        
+        async def lookup(crawl_id: str):
+            async with semaphore:
+                return await self._lookup_crawl_indexed(crawl_id, key_range, domain_name, match_type, from_date, to_date)
+        
+        results = await asyncio.gather(*(lookup(c) for c in crawls), return_exceptions=True)
+        records: List[CDXRecord] = []
+        stats = {"crawls_searched": 0, "crawls_failed": 0, "blocks_fetched": 0}
+        for crawl_id, result in zip(crawls, results):
+            if isinstance(result, Exception):
+                stats["crawls_failed"] += 1
+                logger.warning(f"Indexed lookup failed for {crawl_id}: {result}")
+                continue
+            crawl_records, blocks = result
+            records.extend(crawl_records)
+            stats["crawls_searched"] += 1
+            stats["blocks_fetched"] += blocks
+        if not stats["crawls_searched"]:
+            raise DirectCommonCrawlException(f"Indexed lookup failed for all {len(crawls)} crawls")
+        return records, stats
+    
     async def fetch_cdx_records_simple(self, domain_name: str, from_date: str, to_date: str,
                                      match_type: str = "domain", url_path: Optional[str] = None,
                                      page_size: int = None, max_pages: Optional[int] = None,
@@ -340,8 +644,19 @@ class CommonCrawlDirectService:
             all_records = []
             max_records = page_size or 5000
             
-            # Process crawls until we have enough records
-            for crawl_id in crawls:
+            # Binary search cluster.idx and fetch only the domain's blocks
+            indexed = False
+            try:
+                all_records, index_stats = await self.fetch_cdx_records_indexed(
+                    domain_name, from_date, to_date, match_type, crawls=crawls
+                )
+                stats["fetched_pages"] = index_stats["blocks_fetched"]
+                indexed = True
+            except DirectCommonCrawlException as e:
+                logger.warning(f"Indexed lookup unavailable for {domain_name}: {e}; scanning index segments")
+            
+            # Fallback: process crawls segment by segment until we have enough records
+            for crawl_id in ([] if indexed else crawls):
                 logger.info(f"Processing crawl: {crawl_id}")
                 
                 # Process first few segments (index files are large)
@@ -364,8 +679,8 @@ class CommonCrawlDirectService:
                 if len(all_records) >= max_records:
                     break
             
-            # Limit results
-            if len(all_records) > max_records:
+            # Limit the segment scan; the indexed lookup already returns only the domain's records
+            if not indexed and len(all_records) > max_records:
                 all_records = all_records[:max_records]
             
             # Apply additional filtering
@@ -380,7 +695,7 @@ class CommonCrawlDirectService:
             })
             
             logger.info(f"Direct processing complete: {len(filtered_records)} records "
-                       f"from {stats['fetched_pages']} segments")
+                       f"from {stats['fetched_pages']} {'index blocks' if indexed else 'segments'}")
             
             return filtered_records, stats
             
@@ -391,6 +706,8 @@ class CommonCrawlDirectService:
 
 # Export for use in other modules
 __all__ = [
+    'ClusterIndex',
     'CommonCrawlDirectService',
-    'DirectCommonCrawlException'
+    'DirectCommonCrawlException',
+    'surt_key_range'
 ]
\ No newline at end of file
@@ -154,7 +154,7 @@ class CommonCrawlService:
                 logger.debug("Record missing required fields for HTML retrieval")
                 return None
                 
-            s3_url = f"https://data.commoncrawl.org/{record.filename}"
+            s3_url = f"{settings.COMMON_CRAWL_DATA_URL}/{record.filename}"
             offset = int(record.offset)
             length = int(record.length)
             
@@ -127,8 +127,17 @@ class ContentExtractionService:
                         client_kwargs["proxy"] = proxy_url
                     if "web.archive.org" in content_url:
                         client_kwargs["headers"]["Referer"] = "https://web.archive.org/"
+                    from app.services.archive_governor import archive_governor
+                    await archive_governor.acquire(content_url, proxy_url)
                     async with httpx.AsyncClient(**client_kwargs) as client:
-                        resp = await client.get(content_url)
+                        try:
+                            resp = await client.get(content_url)
+                        except (httpx.TimeoutException, httpx.ConnectError):
+                            await archive_governor.record_error(content_url, proxy_url)
+                            raise
+                        await archive_governor.record_response(
+                            content_url, proxy_url, resp.status_code, resp.headers.get("Retry-After")
+                        )
                         if resp.status_code != 200:
                             raise Exception(f"HTTP {resp.status_code}: {resp.text[:500]}")
                         html_content = resp.text
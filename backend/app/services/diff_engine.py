@@ -0,0 +1,551 @@
+"""
+Structural diff engine for archived page comparisons
+
+Large archived pages made ``difflib`` the bottleneck of investigation
+comparisons and change detection: ``SequenceMatcher`` is quadratic in the
+worst case and ran synchronously in the request. This engine:
+
+- hashes paragraphs and lines to integers and diffs paragraphs first, so
+  unchanged paragraphs are matched in one step and only changed regions are
+  diffed line by line
+- diffs line regions with patience diff (anchored on lines unique to both
+  sides) and falls back to Myers' O(ND) algorithm between anchors
+- estimates similarity from bottom-k sketches of word shingles for long texts
+  (an exact ratio is still used for short fields such as titles)
+- gives every diff a time budget that grows with input size; regions left
+  when it runs out are reported as replaced and the result is marked inexact
+- runs large comparisons in a worker process pool and caches results by
+  (baseline digest, target digest), so repeating a comparison is instant
+"""
+import asyncio
+import difflib
+import hashlib
+import heapq
+import html
+import logging
+import multiprocessing
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Opcode = Tuple[str, int, int, int, int]
+
+SHINGLE_SIZE = 5
+SKETCH_SIZE = 128
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class DiffResult:
+    """Line-level diff of two texts"""
+    similarity: float
+    opcodes: List[Opcode]
+    hunks: List[str]  # unified diff without the ---/+++ header
+    lines_added: int
+    lines_removed: int
+    exact: bool = True  # False when the time budget forced a coarse diff
+    elapsed_ms: float = 0.0
+    cached: bool = field(default=False, compare=False)
+
+    def unified(self, fromfile: str = "old", tofile: str = "new") -> List[str]:
+        """Unified diff lines, as ``difflib.unified_diff`` would produce them"""
+        if not self.hunks:
+            return []
+        return [f"--- {fromfile}\n", f"+++ {tofile}\n"] + self.hunks
+
+
+def content_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def diff_budget_seconds(size_bytes: int) -> float:
+    """Time allowed for one diff: a base allowance plus a per-MB share, capped"""
+    budget = settings.DIFF_ENGINE_BASE_BUDGET_SECONDS + settings.DIFF_ENGINE_BUDGET_SECONDS_PER_MB * size_bytes / 1_048_576
+    return min(budget, settings.DIFF_ENGINE_MAX_BUDGET_SECONDS)
+
+
+# Similarity ---------------------------------------------------------------
+
+def shingle_sketch(text: str, shingle_size: int = SHINGLE_SIZE, sketch_size: int = SKETCH_SIZE) -> Tuple[int, ...]:
+    """Bottom-k sketch: the ``sketch_size`` smallest hashes of the text's word shingles"""
+    words = text.lower().split()
+    if not words:
+        return ()
+    # Words become CRC32 ids and shingles tuples of ids: hashing int tuples is
+    # done in C and, unlike str hashing, is not randomized per process
+    word_ids = {word: zlib.crc32(word.encode("utf-8", "surrogatepass")) for word in set(words)}
+    ids = [word_ids[word] for word in words]
+    size = min(shingle_size, len(ids))
+    shingles = set(zip(*(ids[offset:] for offset in range(size))))
+    return tuple(sorted(heapq.nsmallest(sketch_size, map(hash, shingles))))
+
+
+def sketch_similarity(sketch_a: Sequence[int], sketch_b: Sequence[int], sketch_size: int = SKETCH_SIZE) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two bottom-k sketches"""
+    if not sketch_a and not sketch_b:
+        return 1.0
+    if not sketch_a or not sketch_b:
+        return 0.0
+    set_a, set_b = set(sketch_a), set(sketch_b)
+    union = heapq.nsmallest(sketch_size, set_a | set_b)
+    return sum(1 for h in union if h in set_a and h in set_b) / len(union)
+
+
+def text_similarity(text_a: str, text_b: str) -> float:
+    """Similarity between 0.0 and 1.0; exact for short texts, sketch-estimated for long ones"""
+    if text_a == text_b:
+        return 1.0
+    if not text_a or not text_b:
+        return 0.0
+    if max(len(text_a), len(text_b)) <= settings.DIFF_ENGINE_EXACT_SIMILARITY_MAX_CHARS:
+        return difflib.SequenceMatcher(None, text_a, text_b).ratio()
+    return sketch_similarity(shingle_sketch(text_a), shingle_sketch(text_b))
+
+
+# Sequence diff ------------------------------------------------------------
+
+def _check(deadline: float) -> None:
+    if time.monotonic() > deadline:
+        raise _BudgetExceeded
+
+
+def _myers_matches(a: Sequence[int], b: Sequence[int], alo: int, ahi: int, blo: int, bhi: int,
+                   deadline: float) -> List[Tuple[int, int]]:
+    """Matched index pairs of a shortest edit script (Myers' greedy O(ND) algorithm)"""
+    n, m = ahi - alo, bhi - blo
+    offset = n + m + 1
+    v = array("q", [0]) * (2 * offset + 1)
+    # trace[d] keeps only the diagonals -(d-1)..d-1 that backtracking reads at step d
+    trace: List[array] = []
+    for d in range(n + m + 1):
+        if d % 32 == 0:
+            _check(deadline)
+        trace.append(v[offset - d + 1:offset + d:2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, n, m, alo, blo)
+    return []
+
+
+def _myers_backtrack(trace: List[array], n: int, m: int, alo: int, blo: int) -> List[Tuple[int, int]]:
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        saved = trace[d]
+
+        def at(k: int) -> int:
+            return saved[(k + d - 1) // 2]
+
+        k = x - y
+        if k == -d or (k != d and at(k - 1) < at(k + 1)):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = at(prev_k)
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((alo + x, blo + y))
+        x, y = prev_x, prev_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        matches.append((alo + x, blo + y))
+    matches.reverse()
+    return matches
+
+
+def _unique_anchors(a: Sequence[int], b: Sequence[int], alo: int, ahi: int, blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """Longest increasing run of lines occurring exactly once on each side (patience sorting)"""
+    counts: Dict[int, List[int]] = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, 0, i, 0])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+    pairs = sorted((entry[2], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[1] == 1)
+    if not pairs:
+        return []
+
+    # Patience sorting over b positions, keeping back-pointers to rebuild the sequence
+    tops: List[int] = []
+    tails: List[int] = []
+    back: List[int] = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        lo, hi = 0, len(tops)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tops[mid] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo > 0:
+            back[index] = tails[lo - 1]
+        if lo == len(tops):
+            tops.append(j)
+            tails.append(index)
+        else:
+            tops[lo] = j
+            tails[lo] = index
+    anchors = []
+    index = tails[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = back[index]
+    anchors.reverse()
+    return anchors
+
+
+def _patience_matches(a: Sequence[int], b: Sequence[int], deadline: float) -> Tuple[List[Tuple[int, int]], bool]:
+    """Matched index pairs of ``a`` and ``b``; ``exact`` is False if the budget ran out"""
+    matches: List[Tuple[int, int]] = []
+    exact = True
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        # Common prefix and suffix are matched without search
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        if not exact:
+            continue  # Out of budget: the rest of the region stays a replacement
+
+        try:
+            _check(deadline)
+            anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+            if not anchors:
+                matches.extend(_myers_matches(a, b, alo, ahi, blo, bhi, deadline))
+                continue
+        except _BudgetExceeded:
+            exact = False
+            continue
+
+        previous_a, previous_b = alo, blo
+        for i, j in anchors:
+            matches.append((i, j))
+            regions.append((previous_a, i, previous_b, j))
+            previous_a, previous_b = i + 1, j + 1
+        regions.append((previous_a, ahi, previous_b, bhi))
+    matches.sort()
+    return matches, exact
+
+
+def _opcodes_from_matches(matches: List[Tuple[int, int]], len_a: int, len_b: int) -> List[Opcode]:
+    """``difflib``-style opcodes from sorted matched index pairs"""
+    opcodes: List[Opcode] = []
+    i = j = 0
+    index = 0
+    while index < len(matches):
+        mi, mj = matches[index]
+        end = index
+        while end + 1 < len(matches) and matches[end + 1] == (matches[end][0] + 1, matches[end][1] + 1):
+            end += 1
+        if i < mi and j < mj:
+            opcodes.append(("replace", i, mi, j, mj))
+        elif i < mi:
+            opcodes.append(("delete", i, mi, j, j))
+        elif j < mj:
+            opcodes.append(("insert", i, i, j, mj))
+        size = end - index + 1
+        opcodes.append(("equal", mi, mi + size, mj, mj + size))
+        i, j = mi + size, mj + size
+        index = end + 1
+    if i < len_a and j < len_b:
+        opcodes.append(("replace", i, len_a, j, len_b))
+    elif i < len_a:
+        opcodes.append(("delete", i, len_a, j, j))
+    elif j < len_b:
+        opcodes.append(("insert", i, i, j, len_b))
+    return opcodes
+
+
+def _paragraphs(lines: Sequence[str]) -> List[Tuple[int, int]]:
+    """(start, end) line ranges of blank-line separated paragraphs, blank lines included"""
+    spans = []
+    start = 0
+    for index, line in enumerate(lines):
+        if not line.strip():
+            spans.append((start, index + 1))
+            start = index + 1
+    if start < len(lines):
+        spans.append((start, len(lines)))
+    return spans
+
+
+def diff_lines(a_lines: Sequence[str], b_lines: Sequence[str], deadline: float) -> Tuple[List[Opcode], bool]:
+    """Line opcodes: paragraphs are diffed by hash first, changed paragraph runs line by line"""
+    table: Dict[str, int] = {}
+    a = [table.setdefault(line, len(table)) for line in a_lines]
+    b = [table.setdefault(line, len(table)) for line in b_lines]
+
+    a_spans, b_spans = _paragraphs(a_lines), _paragraphs(b_lines)
+    paragraph_table: Dict[Tuple[int, ...], int] = {}
+    a_paragraphs = [paragraph_table.setdefault(tuple(a[s:e]), len(paragraph_table)) for s, e in a_spans]
+    b_paragraphs = [paragraph_table.setdefault(tuple(b[s:e]), len(paragraph_table)) for s, e in b_spans]
+    paragraph_matches, exact = _patience_matches(a_paragraphs, b_paragraphs, deadline)
+
+    matches: List[Tuple[int, int]] = []
+    for tag, i1, i2, j1, j2 in _opcodes_from_matches(paragraph_matches, len(a_spans), len(b_spans)):
+        a_start = a_spans[i1][0] if i1 < i2 else (a_spans[i1][0] if i1 < len(a_spans) else len(a))
+        b_start = b_spans[j1][0] if j1 < j2 else (b_spans[j1][0] if j1 < len(b_spans) else len(b))
+        a_end = a_spans[i2 - 1][1] if i1 < i2 else a_start
+        b_end = b_spans[j2 - 1][1] if j1 < j2 else b_start
+        if tag == "equal":
+            matches.extend(zip(range(a_start, a_end), range(b_start, b_end)))
+        elif tag == "replace" and exact:
+            region_matches, region_exact = _patience_matches(a[a_start:a_end], b[b_start:b_end], deadline)
+            matches.extend((a_start + i, b_start + j) for i, j in region_matches)
+            exact = exact and region_exact
+    return _opcodes_from_matches(matches, len(a), len(b)), exact
+
+
+def grouped_opcodes(opcodes: List[Opcode], context: int = 3) -> List[List[Opcode]]:
+    """Hunks of changes with up to ``context`` lines around them (``SequenceMatcher.get_grouped_opcodes``)"""
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    groups = []
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return groups
+
+
+def _format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def unified_hunks(a_lines: Sequence[str], b_lines: Sequence[str], opcodes: List[Opcode], context: int = 3) -> List[str]:
+    hunks = []
+    for group in grouped_opcodes(opcodes, context):
+        first, last = group[0], group[-1]
+        hunks.append(f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                hunks.extend(" " + line for line in a_lines[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                hunks.extend("-" + line for line in a_lines[i1:i2])
+            if tag in ("replace", "insert"):
+                hunks.extend("+" + line for line in b_lines[j1:j2])
+    return hunks
+
+
+def compute_diff(baseline: str, target: str, context_lines: int = 3,
+                 budget_seconds: Optional[float] = None) -> DiffResult:
+    """Diff two texts within a size-based time budget (runs in pool workers)"""
+    started = time.perf_counter()
+    if budget_seconds is None:
+        budget_seconds = diff_budget_seconds(len(baseline) + len(target))
+    deadline = time.monotonic() + budget_seconds
+
+    a_lines = baseline.splitlines(keepends=True)
+    b_lines = target.splitlines(keepends=True)
+    opcodes, exact = diff_lines(a_lines, b_lines, deadline)
+    added = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag in ("insert", "replace"))
+    removed = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag in ("delete", "replace"))
+    return DiffResult(
+        similarity=text_similarity(baseline, target),
+        opcodes=opcodes,
+        hunks=unified_hunks(a_lines, b_lines, opcodes, context_lines) if baseline != target else [],
+        lines_added=added,
+        lines_removed=removed,
+        exact=exact,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style type="text/css">
+table.diff {{font-family: Courier; border: medium;}}
+.diff_header {{background-color: #e0e0e0;}}
+td.diff_header {{text-align: right;}}
+.diff_next {{background-color: #c0c0c0;}}
+.diff_add {{background-color: #aaffaa;}}
+.diff_chg {{background-color: #ffff77;}}
+.diff_sub {{background-color: #ffaaaa;}}
+td {{white-space: pre-wrap; word-break: break-all;}}
+</style>
+</head>
+<body>
+<table class="diff" summary="Legends">
+<thead><tr><th class="diff_next"><br /></th><th colspan="2" class="diff_header">{fromdesc}</th>
+<th class="diff_next"><br /></th><th colspan="2" class="diff_header">{todesc}</th></tr></thead>
+<tbody>
+{rows}
+</tbody>
+</table>
+</body>
+</html>
+"""
+
+
+def render_html_diff(a_lines: Sequence[str], b_lines: Sequence[str], opcodes: List[Opcode],
+                     fromdesc: str = "", todesc: str = "", context: int = 3) -> str:
+    """Side-by-side HTML table of the changed hunks, styled like ``difflib.HtmlDiff``"""
+    def cell(number, text, css):
+        if number is None:
+            return '<td class="diff_next"></td><td class="diff_header"></td><td nowrap="nowrap"></td>'
+        content = html.escape(text.rstrip("\r\n"))
+        if css:
+            content = f'<span class="{css}">{content}</span>'
+        return f'<td class="diff_next"></td><td class="diff_header">{number}</td><td nowrap="nowrap">{content}</td>'
+
+    rows = []
+    groups = grouped_opcodes(opcodes, context)
+    for index, group in enumerate(groups):
+        if index:
+            rows.append('<tr><td class="diff_next"></td><td class="diff_header">...</td><td></td>'
+                        '<td class="diff_next"></td><td class="diff_header">...</td><td></td></tr>')
+        for tag, i1, i2, j1, j2 in group:
+            css_a = {"replace": "diff_chg", "delete": "diff_sub"}.get(tag, "")
+            css_b = {"replace": "diff_chg", "insert": "diff_add"}.get(tag, "")
+            for offset in range(max(i2 - i1, j2 - j1)):
+                i, j = i1 + offset, j1 + offset
+                left = cell(i + 1, a_lines[i], css_a) if i < i2 else cell(None, "", "")
+                right = cell(j + 1, b_lines[j], css_b) if j < j2 else cell(None, "", "")
+                rows.append(f"<tr>{left}{right}</tr>")
+    if not rows:
+        rows.append('<tr><td class="diff_next"></td><td colspan="5">No Differences Found</td></tr>')
+    return _HTML_TEMPLATE.format(fromdesc=html.escape(fromdesc), todesc=html.escape(todesc), rows="\n".join(rows))
+
+
+class DiffEngine:
+    """
+    Cached, pooled front end of ``compute_diff``
+
+    Results are cached by (baseline digest, target digest, context) in a
+    process-local LRU. Inputs above ``DIFF_ENGINE_INLINE_MAX_BYTES`` are diffed
+    in a worker process so the event loop keeps serving requests.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cache_size: Optional[int] = None):
+        self.max_workers = settings.DIFF_ENGINE_WORKERS if max_workers is None else max_workers
+        self.cache_size = settings.DIFF_ENGINE_CACHE_SIZE if cache_size is None else cache_size
+        self._cache: "OrderedDict[Tuple[str, str, int], DiffResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _cache_get(self, key: Tuple[str, str, int]) -> Optional[DiffResult]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key: Tuple[str, str, int], result: DiffResult) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers must not inherit the event loop, sockets or DB pools
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @staticmethod
+    def _hit(result: DiffResult) -> DiffResult:
+        return DiffResult(**{**result.__dict__, "cached": True})
+
+    def compare_sync(self, baseline: str, target: str, context_lines: int = 3) -> DiffResult:
+        """Diff in the calling thread (for synchronous callers), using the cache"""
+        key = (content_digest(baseline), content_digest(target), context_lines)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._hit(cached)
+        result = compute_diff(baseline, target, context_lines)
+        self._cache_put(key, result)
+        return result
+
+    async def compare(self, baseline: str, target: str, context_lines: int = 3) -> DiffResult:
+        """Diff without blocking the event loop: large inputs go to the worker pool"""
+        key = (content_digest(baseline), content_digest(target), context_lines)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._hit(cached)
+
+        size = len(baseline) + len(target)
+        if size <= settings.DIFF_ENGINE_INLINE_MAX_BYTES:
+            result = compute_diff(baseline, target, context_lines)
+        else:
+            loop = asyncio.get_running_loop()
+            budget = diff_budget_seconds(size)
+            if self.max_workers > 0:
+                future = loop.run_in_executor(self._get_executor(), compute_diff, baseline, target, context_lines, budget)
+            else:
+                future = loop.run_in_executor(None, compute_diff, baseline, target, context_lines, budget)
+            result = await future
+        self._cache_put(key, result)
+        return result
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+diff_engine = DiffEngine()
@@ -0,0 +1,371 @@
+"""
+Persistent per-domain digest membership index
+
+Incremental scrapes skip CDX captures whose content digest has already been
+scraped for the domain. Instead of loading every completed digest from
+``scrape_pages`` into a Python set on each run, a scalable Bloom filter per
+domain is kept in Redis:
+
+* ``digest_index:{domain_id}:meta`` is a hash describing the slices and their
+  item counts, ``digest_index:{domain_id}:s{n}`` holds each slice's bitmap.
+* The whole filter is loaded with a single pipelined read. Bits are laid out
+  the way Redis ``SETBIT`` addresses them, so pages completing later are added
+  in place with ``SETBIT`` without rewriting the filter.
+* The filter only rules digests out. Bloom positives are confirmed against the
+  database in batches, so results match the exact query.
+
+The keys expire after ``DIGEST_INDEX_TTL_SECONDS``; the next run rebuilds the
+filter from the database, which also picks up pages completed by code paths
+that do not report to the index.
+"""
+import hashlib
+import logging
+import math
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..models.scraping import ScrapePage, ScrapePageStatus
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - redis is a hard dependency in deployments
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over a bytearray using Redis bit order"""
+
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytes] = None, count: int = 0):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        num_bits = math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_bytes = (num_bits + 7) // 8
+        self.num_bits = self.num_bytes * 8
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray(self.num_bytes)
+        if bits:
+            # Redis returns a shorter string when high bits were never set
+            self.bits[:len(bits)] = bits[:self.num_bytes]
+        self.count = count
+
+    def positions(self, item: str) -> List[int]:
+        """Bit offsets for an item (Kirsch-Mitzenmacher double hashing)"""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _test(self, position: int) -> bool:
+        return bool(self.bits[position >> 3] & (0x80 >> (position & 7)))
+
+    def add(self, item: str) -> None:
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 0x80 >> (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._test(position) for position in self.positions(item))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows by adding slices
+
+    Each new slice has ``growth`` times the capacity of the previous one and a
+    tighter error rate, which keeps the compound false positive rate bounded.
+    """
+
+    GROWTH = 4
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int, error_rate: float, slices: Optional[List[BloomFilter]] = None):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.slices: List[BloomFilter] = slices or []
+
+    def slice_params(self, index: int) -> Dict[str, float]:
+        return {
+            "capacity": self.initial_capacity * (self.GROWTH ** index),
+            "error_rate": self.error_rate * (self.TIGHTENING ** (index + 1)),
+        }
+
+    def active_slice(self) -> BloomFilter:
+        if not self.slices or self.slices[-1].is_full:
+            self.slices.append(BloomFilter(**self.slice_params(len(self.slices))))
+        return self.slices[-1]
+
+    def add(self, item: str) -> None:
+        self.active_slice().add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in bloom for bloom in self.slices)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.slices)
+
+
+class DigestMembership:
+    """
+    Set-like view of a domain's already-scraped digests
+
+    ``in`` checks the Bloom filter first and only asks the database about
+    positives. Call ``prefetch`` with every digest of a CDX batch to confirm
+    all positives in a few ``IN (...)`` queries instead of one per record.
+    """
+
+    def __init__(self, bloom: ScalableBloomFilter, confirm: Callable[[List[str]], Set[str]], batch_size: int = 1000):
+        self.bloom = bloom
+        self._confirm = confirm
+        self.batch_size = batch_size
+        self._known: Dict[str, bool] = {}
+        self.bloom_negatives = 0
+        self.false_positives = 0
+
+    def prefetch(self, digests: Iterable[Optional[str]]) -> None:
+        candidates = []
+        for digest in set(digests):
+            if not digest or digest in self._known:
+                continue
+            if digest in self.bloom:
+                candidates.append(digest)
+            else:
+                self._known[digest] = False
+                self.bloom_negatives += 1
+        for start in range(0, len(candidates), self.batch_size):
+            batch = candidates[start:start + self.batch_size]
+            confirmed = self._confirm(batch)
+            for digest in batch:
+                self._known[digest] = digest in confirmed
+                if digest not in confirmed:
+                    self.false_positives += 1
+
+    def __contains__(self, digest: Optional[str]) -> bool:
+        if not digest:
+            return False
+        if digest not in self._known:
+            self.prefetch([digest])
+        return self._known[digest]
+
+    def __len__(self) -> int:
+        # Approximate: digests recorded in the filter, not the confirmed set
+        return len(self.bloom)
+
+    def __bool__(self) -> bool:
+        return True
+
+
+class DigestIndex:
+    """Redis-backed store for per-domain digest Bloom filters"""
+
+    KEY_PREFIX = "digest_index"
+    MAX_SLICES = 8
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.initial_capacity = settings.DIGEST_INDEX_INITIAL_CAPACITY
+        self.error_rate = settings.DIGEST_INDEX_ERROR_RATE
+        self.ttl_seconds = settings.DIGEST_INDEX_TTL_SECONDS
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url, socket_timeout=5, socket_connect_timeout=2)
+        return self._client
+
+    def _meta_key(self, domain_id: int) -> str:
+        return f"{self.KEY_PREFIX}:{domain_id}:meta"
+
+    def _slice_key(self, domain_id: int, index: int) -> str:
+        return f"{self.KEY_PREFIX}:{domain_id}:s{index}"
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def _parse_meta(self, meta) -> Dict[str, str]:
+        return {self._decode(k): self._decode(v) for k, v in (meta or {}).items()}
+
+    def _skeleton(self, meta: Dict[str, str], slice_bits: Optional[List[Optional[bytes]]] = None) -> ScalableBloomFilter:
+        bloom = ScalableBloomFilter(int(meta["initial_capacity"]), float(meta["error_rate"]))
+        for index in range(int(meta.get("slices", 0))):
+            params = bloom.slice_params(index)
+            bloom.slices.append(BloomFilter(
+                params["capacity"], params["error_rate"],
+                bits=slice_bits[index] if slice_bits else None,
+                count=int(meta.get(f"count{index}", 0)),
+            ))
+        return bloom
+
+    def load(self, domain_id: int) -> Optional[ScalableBloomFilter]:
+        """Fetch meta and every slice in one round trip; None if not built"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(self._meta_key(domain_id))
+        for index in range(self.MAX_SLICES):
+            pipe.get(self._slice_key(domain_id, index))
+        meta, *slice_bits = pipe.execute()
+        meta = self._parse_meta(meta)
+        if "initial_capacity" not in meta:
+            return None
+        return self._skeleton(meta, slice_bits)
+
+    def save(self, domain_id: int, bloom: ScalableBloomFilter) -> None:
+        """Replace the stored filter for a domain"""
+        meta_key = self._meta_key(domain_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(meta_key, *(self._slice_key(domain_id, i) for i in range(self.MAX_SLICES)))
+        mapping = {
+            "initial_capacity": bloom.initial_capacity,
+            "error_rate": bloom.error_rate,
+            "slices": len(bloom.slices),
+            "built_at": datetime.utcnow().isoformat(),
+        }
+        for index, bloom_slice in enumerate(bloom.slices):
+            mapping[f"count{index}"] = bloom_slice.count
+            pipe.set(self._slice_key(domain_id, index), bytes(bloom_slice.bits), ex=self.ttl_seconds)
+        pipe.hset(meta_key, mapping=mapping)
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.execute()
+
+    def add(self, domain_id: int, digests: Iterable[Optional[str]]) -> int:
+        """
+        Record newly completed digests with SETBIT
+
+        Only the meta hash is read; bitmaps are updated in place. Does nothing
+        when the domain has no stored filter yet, since the next load builds
+        it from the database including these pages.
+        """
+        digests = [d for d in set(digests) if d]
+        if not digests:
+            return 0
+        meta_key = self._meta_key(domain_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(meta_key)
+        pipe.ttl(meta_key)
+        meta, ttl = pipe.execute()
+        meta = self._parse_meta(meta)
+        if "initial_capacity" not in meta:
+            return 0
+
+        # Bits are not loaded, so counts may include re-added digests; that
+        # only makes slices grow slightly early
+        bloom = self._skeleton(meta)
+        pipe = self.client.pipeline(transaction=False)
+        for digest in digests:
+            new_slice = bloom.slices[-1].is_full if bloom.slices else True
+            if new_slice and len(bloom.slices) >= self.MAX_SLICES:
+                # Out of room; let the filter expire and be rebuilt larger
+                pipe.expire(meta_key, 1)
+                break
+            target = bloom.active_slice()
+            index = len(bloom.slices) - 1
+            slice_key = self._slice_key(domain_id, index)
+            if new_slice:
+                pipe.hset(meta_key, "slices", len(bloom.slices))
+            for position in target.positions(digest):
+                pipe.setbit(slice_key, position, 1)
+            if new_slice and ttl and ttl > 0:
+                pipe.expire(slice_key, ttl)
+            pipe.hincrby(meta_key, f"count{index}", 1)
+            target.count += 1
+        pipe.execute()
+        return len(digests)
+
+
+def _completed_digests_query(domain_id: int):
+    return select(ScrapePage.digest_hash).where(
+        ScrapePage.domain_id == domain_id,
+        ScrapePage.digest_hash.isnot(None),
+        ScrapePage.status == ScrapePageStatus.COMPLETED,
+    )
+
+
+def build_domain_filter(engine, domain_id: int, initial_capacity: int, error_rate: float) -> ScalableBloomFilter:
+    """Build a domain filter from every completed digest, streaming the rows"""
+    from sqlmodel import Session
+
+    bloom = ScalableBloomFilter(initial_capacity, error_rate)
+    with Session(bind=engine) as session:
+        result = session.execute(_completed_digests_query(domain_id).execution_options(yield_per=10000))
+        for (digest,) in result:
+            bloom.add(digest)
+    return bloom
+
+
+def make_digest_confirmer(engine, domain_id: int, cutoff_date: datetime) -> Callable[[List[str]], Set[str]]:
+    """Exact membership check for Bloom positives, with the original scoping"""
+    from sqlmodel import Session
+
+    def confirm(digests: List[str]) -> Set[str]:
+        if not digests:
+            return set()
+        stmt = _completed_digests_query(domain_id).where(
+            ScrapePage.created_at >= cutoff_date,
+            ScrapePage.digest_hash.in_(digests),
+        ).distinct()
+        with Session(bind=engine) as session:
+            return {row[0] for row in session.execute(stmt)}
+
+    return confirm
+
+
+_digest_index: Optional[DigestIndex] = None
+
+
+def get_digest_index() -> Optional[DigestIndex]:
+    """Shared index instance, or None when disabled or Redis is missing"""
+    global _digest_index
+    if not settings.DIGEST_INDEX_ENABLED or not REDIS_AVAILABLE:
+        return None
+    if _digest_index is None:
+        _digest_index = DigestIndex()
+    return _digest_index
+
+
+def load_digest_membership(engine, domain_id: int, cutoff_date: datetime) -> Optional[DigestMembership]:
+    """
+    Load (or build and persist) the domain filter
+
+    Returns None when the index is unavailable so callers can fall back to
+    the exact set query.
+    """
+    index = get_digest_index()
+    if index is None:
+        return None
+    try:
+        bloom = index.load(domain_id)
+    except Exception as e:
+        logger.warning(f"Digest index unavailable for domain {domain_id}: {e}")
+        return None
+
+    if bloom is None:
+        bloom = build_domain_filter(engine, domain_id, index.initial_capacity, index.error_rate)
+        try:
+            index.save(domain_id, bloom)
+        except Exception as e:
+            logger.warning(f"Failed to persist digest index for domain {domain_id}: {e}")
+        logger.info(f"Built digest index for domain {domain_id} with {len(bloom)} digests")
+
+    return DigestMembership(bloom, make_digest_confirmer(engine, domain_id, cutoff_date))
+
+
+def record_completed_digests(domain_id: int, digests: Iterable[Optional[str]]) -> None:
+    """Add digests of pages that just completed; failures are only logged"""
+    index = get_digest_index()
+    if index is None:
+        return
+    try:
+        index.add(domain_id, digests)
+    except Exception as e:
+        logger.warning(f"Failed to update digest index for domain {domain_id}: {e}")
@@ -0,0 +1,594 @@
+"""
+Pre-aggregated domain timelines for AnalyticsService
+
+Domain timelines, domain statistics, top-domain rankings and project
+performance are answered from ``domain_timeline_buckets`` instead of grouping
+``scrape_pages`` per request. Every domain has hour, day and month buckets
+holding page, success and failure counts, content bytes, processing time and
+a HyperLogLog sketch of its distinct URLs.
+
+A date range is covered by the coarsest buckets that fit inside it: whole
+months in the middle, then days, then hours towards the edges (``cover``).
+Any range at any supported granularity therefore reads a handful of bucket
+rows per domain and period, and because sketches merge, distinct URL counts
+stay correct across buckets, domains and projects. Buckets answer the whole
+hours of a range; pages in its partial first and last hours are read from
+``scrape_pages`` (``query_window``), so bounds are as exact as a scan.
+
+Buckets are refreshed per project from a watermark with the machinery shared
+with the statistics rollups (app.services.project_refresh), using
+``DOMAIN_TIMELINE_OVERLAP_SECONDS`` as the overlap: the pages updated since the last
+refresh name the (domain, creation day) pairs whose hour and day buckets are
+recomputed from ``scrape_pages``; the month buckets containing those days are
+then re-merged from their day buckets. Code that deletes pages passes the
+affected (domain, day) pairs to ``refresh_timeline_days``.
+"""
+import hashlib
+import logging
+import math
+import struct
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, false, func, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import Domain
+from app.models.scraping import DomainTimelineBucket, DomainTimelineWatermark, ScrapePage, ScrapePageStatus
+from app.services.project_refresh import Bucket, ProjectRefresh, changed_buckets, project_domain_ids
+
+logger = logging.getLogger(__name__)
+
+# Namespace for the per-project advisory lock serialising refreshes
+TIMELINE_LOCK_NAMESPACE = 7047
+
+# 4096 registers, about 1.6% standard error. Stored sketches carry their
+# precision and only merge with sketches of the same precision.
+HLL_PRECISION = 12
+
+# Coarsest bucket grain that nests inside each TimeGranularity period
+BUCKET_GRAIN = {
+    "hour": "hour",
+    "day": "day",
+    "week": "day",
+    "month": "month",
+    "quarter": "month",
+    "year": "month",
+}
+
+Range = Tuple[str, Optional[datetime], Optional[datetime]]
+Window = Tuple[Optional[datetime], Optional[datetime], List[Tuple[datetime, datetime]]]
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit blake2b hashes"""
+
+    DENSE = 1
+    SPARSE = 2
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    def add(self, item: str) -> None:
+        hashed = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError(
+                f"Cannot merge HyperLogLog sketches of precision {self.precision} and {other.precision}"
+            )
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        zeros = self.registers.count(0)
+        if zeros == self.size:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -rank for rank in self.registers)
+        if estimate <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """Serialise, listing only the non-empty registers while that is smaller"""
+        used = [(index, rank) for index, rank in enumerate(self.registers) if rank]
+        if len(used) * 3 < self.size:
+            return bytes((self.SPARSE, self.precision)) + b"".join(
+                struct.pack(">HB", index, rank) for index, rank in used
+            )
+        return bytes((self.DENSE, self.precision)) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        encoding, precision = data[0], data[1]
+        if encoding == cls.DENSE:
+            return cls(precision, data[2:])
+        sketch = cls(precision)
+        for index, rank in struct.iter_unpack(">HB", data[2:]):
+            sketch.registers[index] = rank
+        return sketch
+
+
+@dataclass
+class TimelineTotals:
+    """Totals over a set of pages or buckets"""
+    page_count: int = 0
+    successful_count: int = 0
+    failed_count: int = 0
+    content_length_sum: int = 0
+    processing_time_sum: float = 0.0
+    processing_time_count: int = 0
+    first_created_at: Optional[datetime] = None
+    last_created_at: Optional[datetime] = None
+    sketch: HyperLogLog = field(default_factory=HyperLogLog)
+
+    def _span(self, first: Optional[datetime], last: Optional[datetime]) -> None:
+        if first is not None and (self.first_created_at is None or first < self.first_created_at):
+            self.first_created_at = first
+        if last is not None and (self.last_created_at is None or last > self.last_created_at):
+            self.last_created_at = last
+
+    def add_page(
+        self, created_at: datetime, status: str, content_length: Optional[int],
+        processing_time: Optional[float], url: Optional[str]
+    ) -> None:
+        self.page_count += 1
+        if status == ScrapePageStatus.COMPLETED:
+            self.successful_count += 1
+        elif status == ScrapePageStatus.FAILED:
+            self.failed_count += 1
+        self.content_length_sum += content_length or 0
+        if processing_time is not None:
+            self.processing_time_sum += processing_time
+            self.processing_time_count += 1
+        self._span(created_at, created_at)
+        if url:
+            self.sketch.add(url)
+
+    def merge(self, other: "TimelineTotals") -> None:
+        self.page_count += other.page_count
+        self.successful_count += other.successful_count
+        self.failed_count += other.failed_count
+        self.content_length_sum += other.content_length_sum
+        self.processing_time_sum += other.processing_time_sum
+        self.processing_time_count += other.processing_time_count
+        self._span(other.first_created_at, other.last_created_at)
+        self.sketch.merge(other.sketch)
+
+    def add_bucket(self, bucket: DomainTimelineBucket) -> None:
+        self.merge(TimelineTotals(
+            page_count=bucket.page_count,
+            successful_count=bucket.successful_count,
+            failed_count=bucket.failed_count,
+            content_length_sum=bucket.content_length_sum,
+            processing_time_sum=bucket.processing_time_sum,
+            processing_time_count=bucket.processing_time_count,
+            first_created_at=bucket.first_created_at,
+            last_created_at=bucket.last_created_at,
+            sketch=HyperLogLog.from_bytes(bucket.url_sketch),
+        ))
+
+    @property
+    def unique_urls(self) -> int:
+        return self.sketch.count()
+
+    @property
+    def content_size_mb(self) -> float:
+        return self.content_length_sum / (1024.0 * 1024.0)
+
+    @property
+    def success_rate(self) -> float:
+        return self.successful_count * 100.0 / self.page_count if self.page_count else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.failed_count * 100.0 / self.page_count if self.page_count else 0.0
+
+    @property
+    def avg_processing_time(self) -> float:
+        """Average over all pages, counting pages without a timing as zero"""
+        return self.processing_time_sum / self.page_count if self.page_count else 0.0
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """Start of the hour, day, week, month, quarter or year containing ``moment``"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    month = day.replace(day=1)
+    if granularity == "month":
+        return month
+    if granularity == "quarter":
+        return month.replace(month=(month.month - 1) // 3 * 3 + 1)
+    if granularity == "year":
+        return month.replace(month=1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def _next_bucket(start: datetime, grain: str) -> datetime:
+    if grain == "hour":
+        return start + timedelta(hours=1)
+    if grain == "day":
+        return start + timedelta(days=1)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def _ceil(moment: datetime, grain: str) -> datetime:
+    start = truncate(moment, grain)
+    return start if start == moment else _next_bucket(start, grain)
+
+
+def query_window(start_date: Optional[datetime], end_date: Optional[datetime]) -> Window:
+    """
+    Split ``start_date <= created_at <= end_date`` into buckets and edges
+
+    Returns the hour-aligned ``[start, end)`` inside the range, answered from
+    buckets, and the ``[from, to)`` ranges of partial hours around it, read
+    from ``scrape_pages``. A range within one hour is all edge.
+    """
+    low = _naive_utc(start_date) if start_date else None
+    # Timestamps have microsecond resolution, so this makes the end exclusive
+    high = _naive_utc(end_date) + timedelta(microseconds=1) if end_date else None
+    start = _ceil(low, "hour") if low is not None else None
+    end = truncate(high, "hour") if high is not None else None
+    if start is not None and end is not None and start >= end:
+        return start, start, [(low, high)]
+    edges = []
+    if low is not None and low < start:
+        edges.append((low, start))
+    if high is not None and end < high:
+        edges.append((end, high))
+    return start, end, edges
+
+
+def cover(start: Optional[datetime], end: Optional[datetime], grain: str) -> List[Range]:
+    """
+    (grain, from, to) ranges of buckets that exactly tile ``[start, end)``
+
+    ``start`` and ``end`` are hour-aligned, None meaning unbounded; no bucket
+    is coarser than ``grain``.
+    """
+    if grain == "hour":
+        return [("hour", start, end)]
+    finer = "hour" if grain == "day" else "day"
+    low = _ceil(start, grain) if start is not None else None
+    high = truncate(end, grain) if end is not None else None
+    if low is not None and high is not None and low >= high:
+        return cover(start, end, finer)
+    ranges = []
+    if start is not None and start < low:
+        ranges += cover(start, low, finer)
+    ranges.append((grain, low, high))
+    if end is not None and high < end:
+        ranges += cover(high, end, finer)
+    return ranges
+
+
+def _covering(start: Optional[datetime], end: Optional[datetime], grain: str):
+    if start is not None and start == end:
+        return false()
+    b = DomainTimelineBucket
+    clauses = []
+    for bucket_grain, low, high in cover(start, end, grain):
+        conditions = [b.granularity == bucket_grain]
+        if low is not None:
+            conditions.append(b.bucket_start >= low)
+        if high is not None:
+            conditions.append(b.bucket_start < high)
+        clauses.append(and_(*conditions))
+    return or_(*clauses)
+
+
+def _bucket(project_id: int, domain_id: int, grain: str, start: datetime, totals: TimelineTotals) -> DomainTimelineBucket:
+    return DomainTimelineBucket(
+        project_id=project_id,
+        domain_id=domain_id,
+        granularity=grain,
+        bucket_start=start,
+        page_count=totals.page_count,
+        successful_count=totals.successful_count,
+        failed_count=totals.failed_count,
+        content_length_sum=totals.content_length_sum,
+        processing_time_sum=totals.processing_time_sum,
+        processing_time_count=totals.processing_time_count,
+        first_created_at=totals.first_created_at,
+        last_created_at=totals.last_created_at,
+        url_sketch=totals.sketch.to_bytes(),
+    )
+
+
+# Refresh
+
+async def _rebuild_day(db: AsyncSession, project_id: int, domain_id: int, day: date) -> None:
+    """Rewrite a domain's hour buckets and day bucket for one creation day"""
+    b = DomainTimelineBucket
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+    await db.execute(delete(b).where(
+        b.domain_id == domain_id,
+        b.granularity.in_(("hour", "day")),
+        b.bucket_start >= start,
+        b.bucket_start < end,
+    ))
+    pages = await db.execute(
+        select(
+            ScrapePage.created_at, ScrapePage.status, ScrapePage.content_length,
+            ScrapePage.total_processing_time, ScrapePage.original_url,
+        ).where(
+            ScrapePage.domain_id == domain_id,
+            ScrapePage.created_at >= start,
+            ScrapePage.created_at < end,
+        )
+    )
+    hours: Dict[datetime, TimelineTotals] = defaultdict(TimelineTotals)
+    for created_at, status, content_length, processing_time, url in pages:
+        created_at = _naive_utc(created_at)
+        hours[truncate(created_at, "hour")].add_page(created_at, status, content_length, processing_time, url)
+    if not hours:
+        return
+    day_totals = TimelineTotals()
+    for hour, totals in hours.items():
+        db.add(_bucket(project_id, domain_id, "hour", hour, totals))
+        day_totals.merge(totals)
+    db.add(_bucket(project_id, domain_id, "day", start, day_totals))
+
+
+async def _merge_month(db: AsyncSession, project_id: int, domain_id: int, month: datetime) -> None:
+    """Rewrite a domain's month bucket from its day buckets"""
+    b = DomainTimelineBucket
+    await db.execute(delete(b).where(
+        b.domain_id == domain_id, b.granularity == "month", b.bucket_start == month
+    ))
+    days = (await db.execute(
+        select(b).where(
+            b.domain_id == domain_id,
+            b.granularity == "day",
+            b.bucket_start >= month,
+            b.bucket_start < _next_bucket(month, "month"),
+        )
+    )).scalars().all()
+    if not days:
+        return
+    totals = TimelineTotals()
+    for day in days:
+        totals.add_bucket(day)
+    db.add(_bucket(project_id, domain_id, "month", month, totals))
+
+
+async def _rebuild_days(db: AsyncSession, project_id: int, buckets: Iterable[Bucket]) -> int:
+    by_domain: Dict[int, Set[date]] = defaultdict(set)
+    for domain_id, day in buckets:
+        by_domain[domain_id].add(day)
+
+    for domain_id, days in by_domain.items():
+        months = set()
+        for day in sorted(days):
+            await _rebuild_day(db, project_id, domain_id, day)
+            months.add(datetime(day.year, day.month, 1))
+        await db.flush()
+        for month in sorted(months):
+            await _merge_month(db, project_id, domain_id, month)
+        await db.flush()
+    return sum(len(days) for days in by_domain.values())
+
+
+async def _rebuild_all(db: AsyncSession, project_id: int) -> None:
+    await db.execute(delete(DomainTimelineBucket).where(DomainTimelineBucket.project_id == project_id))
+    days = await changed_buckets(db, await project_domain_ids(db, project_id))
+    await _rebuild_days(db, project_id, days)
+
+
+TIMELINE_REFRESH = ProjectRefresh(
+    watermark_model=DomainTimelineWatermark,
+    lock_namespace=TIMELINE_LOCK_NAMESPACE,
+    overlap_setting="DOMAIN_TIMELINE_OVERLAP_SECONDS",
+    rebuild_all=_rebuild_all,
+    rebuild_buckets=_rebuild_days,
+)
+
+
+async def rebuild_project_timelines(db: AsyncSession, project_id: int) -> None:
+    """Recompute all of a project's timeline buckets from scratch"""
+    await TIMELINE_REFRESH.rebuild(db, project_id)
+
+
+async def refresh_project_timelines(db: AsyncSession, project_id: int) -> Optional[int]:
+    """
+    Fold changes since the project's watermark into its timeline buckets
+
+    Returns the number of (domain, day) pairs recomputed, or None when the
+    project had no buckets yet and they were built from scratch.
+    """
+    return await TIMELINE_REFRESH.refresh(db, project_id)
+
+
+async def refresh_timeline_days(db: AsyncSession, project_id: int, buckets: Iterable[Bucket]) -> int:
+    """Recompute specific (domain_id, day) pairs, e.g. after pages were deleted"""
+    return await TIMELINE_REFRESH.refresh_buckets(db, project_id, buckets)
+
+
+async def refresh_all_domain_timelines(
+    db: AsyncSession, project_ids: Optional[List[int]] = None
+) -> Dict[int, Optional[int]]:
+    """Incrementally refresh the timeline buckets of every project with domains (or the given ones)"""
+    if project_ids is None:
+        project_ids = list((await db.execute(select(Domain.project_id).distinct())).scalars().all())
+    refreshed = {}
+    for project_id in project_ids:
+        try:
+            refreshed[project_id] = await refresh_project_timelines(db, project_id)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to refresh domain timelines for project {project_id}: {e}")
+    return refreshed
+
+
+# Queries
+
+def _in_edges(edges: List[Tuple[datetime, datetime]]):
+    return or_(*(
+        and_(ScrapePage.created_at >= low, ScrapePage.created_at < high) for low, high in edges
+    ))
+
+
+async def _edge_pages(db: AsyncSession, edges: List[Tuple[datetime, datetime]], *where):
+    """(domain name, created_at, status, content length, processing time, url) of pages in the edges"""
+    if not edges:
+        return []
+    return (await db.execute(
+        select(
+            Domain.domain_name, ScrapePage.created_at, ScrapePage.status, ScrapePage.content_length,
+            ScrapePage.total_processing_time, ScrapePage.original_url,
+        )
+        .join(Domain, Domain.id == ScrapePage.domain_id)
+        .where(_in_edges(edges), *where)
+    )).all()
+
+
+async def domain_timeline(
+    db: AsyncSession,
+    domain_name: str,
+    granularity: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> List[Tuple[datetime, TimelineTotals]]:
+    """Per-period totals for a domain name across all projects, oldest first"""
+    start, end, edges = query_window(start_date, end_date)
+    b = DomainTimelineBucket
+    buckets = (await db.execute(
+        select(b)
+        .join(Domain, Domain.id == b.domain_id)
+        .where(Domain.domain_name == domain_name, _covering(start, end, BUCKET_GRAIN[granularity]))
+    )).scalars().all()
+    periods: Dict[datetime, TimelineTotals] = defaultdict(TimelineTotals)
+    for bucket in buckets:
+        periods[truncate(bucket.bucket_start, granularity)].add_bucket(bucket)
+    for _, created_at, *page in await _edge_pages(db, edges, Domain.domain_name == domain_name):
+        created_at = _naive_utc(created_at)
+        periods[truncate(created_at, granularity)].add_page(created_at, *page)
+    return sorted(periods.items(), key=lambda item: item[0])
+
+
+async def domain_totals(
+    db: AsyncSession,
+    domain_name: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> TimelineTotals:
+    """Totals for a domain name across all projects"""
+    start, end, edges = query_window(start_date, end_date)
+    b = DomainTimelineBucket
+    buckets = (await db.execute(
+        select(b)
+        .join(Domain, Domain.id == b.domain_id)
+        .where(Domain.domain_name == domain_name, _covering(start, end, "month"))
+    )).scalars().all()
+    totals = TimelineTotals()
+    for bucket in buckets:
+        totals.add_bucket(bucket)
+    for _, created_at, *page in await _edge_pages(db, edges, Domain.domain_name == domain_name):
+        totals.add_page(_naive_utc(created_at), *page)
+    return totals
+
+
+async def project_totals(
+    db: AsyncSession,
+    project_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Tuple[TimelineTotals, Dict[str, TimelineTotals]]:
+    """Totals for a project overall and per domain name"""
+    start, end, edges = query_window(start_date, end_date)
+    b = DomainTimelineBucket
+    rows = (await db.execute(
+        select(b, Domain.domain_name)
+        .join(Domain, Domain.id == b.domain_id)
+        .where(b.project_id == project_id, _covering(start, end, "month"))
+    )).all()
+    overall = TimelineTotals()
+    by_domain: Dict[str, TimelineTotals] = defaultdict(TimelineTotals)
+    for bucket, domain_name in rows:
+        by_domain[domain_name].add_bucket(bucket)
+    for domain_name, created_at, *page in await _edge_pages(db, edges, Domain.project_id == project_id):
+        by_domain[domain_name].add_page(_naive_utc(created_at), *page)
+    for totals in by_domain.values():
+        overall.merge(totals)
+    return overall, dict(by_domain)
+
+
+async def top_domains(
+    db: AsyncSession,
+    metric: str = "total_pages",
+    limit: int = 100,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> List[Tuple[str, int, int, int, Optional[datetime], int]]:
+    """
+    Domain names ranked by ``metric``
+
+    Rows are (domain, pages, successful pages, content bytes, last activity,
+    projects). Ranking needs no sketches, so it is aggregated in SQL, over
+    the buckets and the pages of the edge hours together.
+    """
+    start, end, edges = query_window(start_date, end_date)
+    b = DomainTimelineBucket
+    parts = [
+        select(
+            Domain.domain_name.label("domain_name"), b.project_id.label("project_id"),
+            b.page_count.label("pages"), b.successful_count.label("successful"),
+            b.content_length_sum.label("content_bytes"), b.last_created_at.label("last_created_at"),
+        )
+        .join(Domain, Domain.id == b.domain_id)
+        .where(_covering(start, end, "month"))
+    ]
+    if edges:
+        parts.append(
+            select(
+                Domain.domain_name, Domain.project_id, literal(1),
+                case((ScrapePage.status == ScrapePageStatus.COMPLETED, 1), else_=0),
+                func.coalesce(ScrapePage.content_length, 0), ScrapePage.created_at,
+            )
+            .join(Domain, Domain.id == ScrapePage.domain_id)
+            .where(_in_edges(edges))
+        )
+    rows = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+    pages = func.sum(rows.c.pages)
+    successful = func.sum(rows.c.successful)
+    content_bytes = func.sum(rows.c.content_bytes)
+    order = {
+        "success_rate": successful * 100.0 / func.nullif(pages, 0),
+        "content_size": content_bytes,
+    }.get(metric, pages)
+    result = await db.execute(
+        select(
+            rows.c.domain_name, pages, successful, content_bytes,
+            func.max(rows.c.last_created_at), func.count(func.distinct(rows.c.project_id)),
+        )
+        .group_by(rows.c.domain_name)
+        .order_by(order.desc(), rows.c.domain_name)
+        .limit(limit)
+    )
+    return [
+        (name, int(pages or 0), int(successful or 0), int(content_bytes or 0), last_activity, int(projects))
+        for name, pages, successful, content_bytes, last_activity, projects in result.all()
+    ]
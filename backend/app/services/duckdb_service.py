@@ -4,32 +4,39 @@ Production-ready async wrapper with connection management and operational excell
 """
 import asyncio
 import logging
+import math
 import os
 import psutil
+import re
 import tempfile
 import threading
 import time
+import uuid
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
 
-try:
-    import duckdb
+from ..core.config import settings
+from ..core.lazy_imports import module_available, require_module
+
+if TYPE_CHECKING:
     from duckdb import DuckDBPyConnection
-    DUCKDB_AVAILABLE = True
-except ImportError:
-    duckdb = None
-    DuckDBPyConnection = None
-    DUCKDB_AVAILABLE = False
 
-from ..core.config import settings
+# duckdb and pyarrow are imported when the first connection is opened
+DUCKDB_AVAILABLE = module_available("duckdb")
+PYARROW_AVAILABLE = module_available("pyarrow")
 from .circuit_breaker import CircuitBreaker, CircuitBreakerConfig, circuit_registry
 
 logger = logging.getLogger(__name__)
 
+# DuckDB catalog error raised when a query names a view that is not registered
+_MISSING_TABLE_RE = re.compile(r"Table with name (\w+) does not exist")
+
 
 class DuckDBException(Exception):
     """Base exception for DuckDB operations"""
@@ -61,6 +68,10 @@ class ConnectionMetrics:
     failed_queries: int = 0
     avg_query_time: float = 0.0
     memory_usage_mb: float = 0.0
+    peak_memory_mb: float = 0.0
+    memory_sampled_at: Optional[datetime] = None
+    prepared_cache_hits: int = 0
+    prepared_cache_misses: int = 0
     last_query_time: Optional[datetime] = None
     created_at: datetime = field(default_factory=datetime.now)
     
@@ -82,6 +93,130 @@ class QueryResult:
     query_hash: Optional[str] = None
 
 
+_PARAM_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _sql_literal(value: Any) -> str:
+    """
+    Render a parameter value as a typed DuckDB literal for ``EXECUTE``
+
+    DuckDB's ``EXECUTE`` does not accept client-side parameters, so cached
+    prepared statements receive their arguments as literals. Only the types
+    below are accepted and strings are quoted by doubling single quotes
+    (DuckDB strings have no backslash escapes).
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return f"'{value}'::DOUBLE"
+        return repr(value)
+    if isinstance(value, Decimal):
+        return f"'{value}'::DECIMAL" if not value.is_finite() else str(value)
+    if isinstance(value, str):
+        if "\x00" in value:
+            raise DuckDBQueryError("NUL characters are not allowed in query parameters")
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, datetime):
+        cast = "TIMESTAMPTZ" if value.tzinfo else "TIMESTAMP"
+        return f"{cast} '{value.isoformat(sep=' ')}'"
+    if isinstance(value, date):
+        return f"DATE '{value.isoformat()}'"
+    if isinstance(value, dt_time):
+        return f"TIME '{value.isoformat()}'"
+    if isinstance(value, uuid.UUID):
+        return f"'{value}'::UUID"
+    if isinstance(value, (bytes, bytearray)):
+        return f"unhex('{bytes(value).hex()}')"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_sql_literal(item) for item in value) + "]"
+    raise DuckDBQueryError(f"Unsupported query parameter type: {type(value).__name__}")
+
+
+class PreparedStatementCache:
+    """
+    LRU cache of SQL-level prepared statements for a single connection
+
+    Only ever touched by the thread that currently holds the connection.
+    Statements DuckDB refuses to prepare (DDL, multi-statement SQL, ...) are
+    remembered so they go straight to ``execute`` next time.
+    """
+    
+    def __init__(self, max_statements: int = 256):
+        self.max_statements = max_statements
+        self._statements: 'OrderedDict[str, Optional[str]]' = OrderedDict()
+        self._counter = 0
+    
+    def __len__(self) -> int:
+        return len(self._statements)
+    
+    def get(self, conn: 'DuckDBPyConnection', query: str) -> Tuple[Optional[str], bool]:
+        """Return ``(statement_name, cache_hit)``; name is None if unpreparable"""
+        if query in self._statements:
+            self._statements.move_to_end(query)
+            return self._statements[query], True
+        
+        self._counter += 1
+        name = f"chrono_ps_{self._counter}"
+        try:
+            conn.execute(f"PREPARE {name} AS {query}")
+        except Exception:
+            name = None
+        self._statements[query] = name
+        
+        if len(self._statements) > self.max_statements:
+            _, evicted = self._statements.popitem(last=False)
+            if evicted:
+                try:
+                    conn.execute(f"DEALLOCATE {evicted}")
+                except Exception:
+                    pass
+        return name, False
+    
+    def discard(self, query: str) -> None:
+        """Forget ``query`` so its next use prepares it again"""
+        self._statements.pop(query, None)
+
+
+class _PooledBatches:
+    """
+    Record batches pulled from a live DuckDB result
+
+    The connection stays checked out while the result is read and goes back
+    to the pool once the batches are exhausted, reading fails, or the
+    iterator is discarded.
+    """
+    
+    def __init__(self, batches, release):
+        self._batches = batches
+        self._release = release
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self._release is None:
+            raise StopIteration
+        try:
+            return self._batches.read_next_batch()
+        except BaseException:
+            self.close()
+            raise
+    
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            self._batches.close()
+            release()
+    
+    def __del__(self):
+        self.close()
+
+
 class ConnectionPool:
     """Thread-safe connection pool for DuckDB"""
     
@@ -105,7 +240,7 @@ class ConnectionPool:
             
             # Create new connection if under limit
             if self._connection_count < self.max_connections:
-                conn = duckdb.connect(self.database_path)
+                conn = require_module("duckdb", "DuckDB analytics").connect(self.database_path)
                 self._connections.append(conn)
                 self._created_connections.add(id(conn))
                 self._connection_count += 1
@@ -154,6 +289,11 @@ class DuckDBService:
     _instance: Optional['DuckDBService'] = None
     _lock = threading.Lock()
     
+    # Process memory is sampled on this interval instead of around every query
+    MEMORY_SAMPLE_INTERVAL_SECONDS = 15.0
+    MAX_PREPARED_STATEMENTS_PER_CONNECTION = 256
+    DEFAULT_ARROW_BATCH_SIZE = 65536
+    
     def __new__(cls) -> 'DuckDBService':
         """Singleton pattern for service instance"""
         if cls._instance is None:
@@ -185,6 +325,10 @@ class DuckDBService:
         self._initialized = False
         self._shutdown = False
         
+        # Prepared statement caches keyed by id() of the pooled connection
+        self._statement_caches: Dict[int, PreparedStatementCache] = {}
+        self._memory_sampler_task: Optional[asyncio.Task] = None
+        
         # Metrics and monitoring
         self.metrics = ConnectionMetrics()
         self._query_times = []
@@ -238,7 +382,12 @@ class DuckDBService:
             # Validate installation
             await self._validate_setup()
             
+            await self.register_dataset_views()
+            
             self._initialized = True
+            self._shutdown = False
+            self._sample_memory()
+            self._memory_sampler_task = asyncio.create_task(self._memory_sampler_loop())
             logger.info(f"DuckDBService initialized successfully")
             
         except Exception as e:
@@ -298,7 +447,7 @@ class DuckDBService:
     async def _initialize_database(self, memory_limit_bytes: int) -> None:
         """Initialize database with extensions and configuration"""
         def _init_db():
-            conn = duckdb.connect(self.database_path)
+            conn = require_module("duckdb", "DuckDB analytics").connect(self.database_path)
             
             try:
                 # Set memory limit
@@ -387,6 +536,54 @@ class DuckDBService:
         
         logger.info("DuckDB setup validation completed successfully")
     
+    async def register_dataset_views(self, storage_path: Optional[str] = None) -> List[str]:
+        """
+        (Re)create one view per Hive-partitioned analytics dataset
+
+        Views glob the dataset directory at query time, so files written later
+        are picked up without re-registering. Datasets without any files yet
+        are skipped here and registered by the first query that misses their
+        view once the pipeline has written a partition.
+        """
+        from .analytics_dataset import DATASETS, has_files, view_sql
+        
+        storage_path = storage_path or settings.PARQUET_STORAGE_PATH
+        names = [name for name in DATASETS if has_files(storage_path, name)]
+        
+        def _register():
+            conn = self._connection_pool.get_connection()
+            registered = []
+            try:
+                for name in names:
+                    try:
+                        conn.execute(view_sql(storage_path, name))
+                        registered.append(name)
+                    except Exception as e:
+                        logger.warning(f"Could not register DuckDB view {name}: {e}")
+            finally:
+                self._connection_pool.return_connection(conn)
+            return registered
+        
+        registered = await asyncio.get_event_loop().run_in_executor(self._thread_pool, _register)
+        if registered:
+            logger.info(f"Registered DuckDB dataset views: {', '.join(registered)}")
+        return registered
+    
+    def _register_missing_view(self, conn: 'DuckDBPyConnection', error: Exception) -> bool:
+        """Create the dataset view ``error`` complains about if it has files by now"""
+        from .analytics_dataset import DATASETS, has_files, view_sql
+        
+        match = _MISSING_TABLE_RE.search(str(error))
+        if not match or match.group(1) not in DATASETS:
+            return False
+        name = match.group(1)
+        storage_path = settings.PARQUET_STORAGE_PATH
+        if not has_files(storage_path, name):
+            return False
+        conn.execute(view_sql(storage_path, name))
+        logger.info(f"Registered DuckDB dataset view {name} on first use")
+        return True
+    
     async def get_connection(self) -> 'DuckDBPyConnection':
         """Get a database connection (async wrapper)"""
         if not self._initialized:
@@ -431,15 +628,13 @@ class DuckDBService:
             try:
                 conn = self._connection_pool.get_connection()
                 
-                # Monitor memory before query
-                process = psutil.Process()
-                memory_before = process.memory_info().rss / (1024 * 1024)  # MB
-                
                 # Execute query with parameters
-                if params:
-                    cursor = conn.execute(query, params)
-                else:
-                    cursor = conn.execute(query)
+                try:
+                    cursor = conn.execute(query, params) if params else conn.execute(query)
+                except Exception as e:
+                    if not self._register_missing_view(conn, e):
+                        raise
+                    cursor = conn.execute(query, params) if params else conn.execute(query)
                 
                 # Fetch results based on mode
                 if fetch_mode == "none":
@@ -458,16 +653,12 @@ class DuckDBService:
                 # Get column information
                 columns = [desc[0] for desc in cursor.description] if cursor.description else []
                 
-                # Monitor memory after query
-                memory_after = process.memory_info().rss / (1024 * 1024)  # MB
-                memory_usage = memory_after - memory_before
-                
                 execution_time = time.time() - start_time
                 
                 return QueryResult(
                     data=data,
                     execution_time=execution_time,
-                    memory_usage=memory_usage,
+                    memory_usage=self.metrics.memory_usage_mb,
                     row_count=row_count,
                     columns=columns,
                     query_hash=str(hash(query))
@@ -486,7 +677,7 @@ class DuckDBService:
             self.metrics.successful_queries += 1
             
             logger.debug(f"Query executed successfully in {result.execution_time:.3f}s, "
-                        f"memory: {result.memory_usage:.1f}MB, rows: {result.row_count}")
+                        f"rows: {result.row_count}")
             
             return result
             
@@ -505,6 +696,152 @@ class DuckDBService:
             else:
                 raise DuckDBQueryError(f"Query error: {e}") from e
     
+    def _statement_cache_for(self, conn: 'DuckDBPyConnection') -> PreparedStatementCache:
+        cache = self._statement_caches.get(id(conn))
+        if cache is None:
+            cache = PreparedStatementCache(self.MAX_PREPARED_STATEMENTS_PER_CONNECTION)
+            self._statement_caches[id(conn)] = cache
+        return cache
+    
+    def _execute_cached(
+        self,
+        conn: 'DuckDBPyConnection',
+        query: str,
+        params: Optional[Union[Dict[str, Any], List[Any], Tuple[Any, ...]]]
+    ):
+        """Run ``query`` through the connection's prepared statement cache"""
+        name, hit = self._statement_cache_for(conn).get(conn, query)
+        if hit:
+            self.metrics.prepared_cache_hits += 1
+        else:
+            self.metrics.prepared_cache_misses += 1
+        
+        if name is None:
+            # Not preparable; fall back to driver-side parameter binding
+            return conn.execute(query, params) if params else conn.execute(query)
+        
+        if not params:
+            return conn.execute(f"EXECUTE {name}")
+        if isinstance(params, dict):
+            args = []
+            for key, value in params.items():
+                if not _PARAM_NAME_RE.match(key):
+                    raise DuckDBQueryError(f"Invalid parameter name: {key!r}")
+                args.append(f"{key} := {_sql_literal(value)}")
+        else:
+            args = [_sql_literal(value) for value in params]
+        return conn.execute(f"EXECUTE {name}({', '.join(args)})")
+    
+    async def execute_prepared(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], List[Any], Tuple[Any, ...]]] = None,
+        result_format: str = "arrow",
+        batch_size: Optional[int] = None
+    ) -> QueryResult:
+        """
+        Execute a query through the per-connection prepared statement cache
+        
+        The statement is planned once per pooled connection and re-executed
+        with bound parameters (``?`` placeholders with a list, ``$name`` with a
+        dict). Execution runs on the service thread pool.
+        
+        Args:
+            query: SQL query string with placeholders
+            params: Positional (list/tuple) or named (dict) parameters
+            result_format: 'arrow' (pyarrow.Table), 'reader'
+                (pyarrow.RecordBatchReader streaming the result; its pooled
+                connection is held until the reader is exhausted or closed,
+                and row_count is None), 'rows' (list of tuples, as
+                execute_query) or 'none'
+            batch_size: Rows per record batch for 'reader'
+            
+        Returns:
+            QueryResult whose data is in the requested format
+        """
+        if not self._initialized:
+            raise DuckDBException("Service not initialized")
+        if result_format not in ("arrow", "reader", "rows", "none"):
+            raise DuckDBQueryError(f"Unsupported result format: {result_format}")
+        if result_format in ("arrow", "reader") and not PYARROW_AVAILABLE:
+            raise DuckDBException("pyarrow is required for Arrow results. Install with: pip install pyarrow")
+        
+        start_time = time.time()
+        
+        def _execute():
+            conn = self._connection_pool.get_connection()
+            streaming = False
+            try:
+                try:
+                    cursor = self._execute_cached(conn, query, params)
+                except Exception as e:
+                    if not self._register_missing_view(conn, e):
+                        raise
+                    # The failed PREPARE was cached as unpreparable
+                    self._statement_cache_for(conn).discard(query)
+                    cursor = self._execute_cached(conn, query, params)
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                
+                if result_format == "none":
+                    data, row_count = None, None
+                elif result_format == "rows":
+                    data = cursor.fetchall()
+                    row_count = len(data)
+                elif result_format == "reader":
+                    # Streamed: batches are produced as the reader is consumed, so the
+                    # row count is unknown and the connection is held until then
+                    batches = cursor.fetch_record_batch(batch_size or self.DEFAULT_ARROW_BATCH_SIZE)
+                    data = require_module("pyarrow", "Arrow query results").RecordBatchReader.from_batches(
+                        batches.schema,
+                        _PooledBatches(batches, lambda: self._connection_pool.return_connection(conn))
+                    )
+                    row_count = None
+                    streaming = True
+                else:
+                    # Columnar result: hands off to pandas (to_pandas) or Arrow IPC without row conversion
+                    data = cursor.fetch_arrow_table()
+                    row_count = data.num_rows
+                
+                return QueryResult(
+                    data=data,
+                    execution_time=time.time() - start_time,
+                    memory_usage=self.metrics.memory_usage_mb,
+                    row_count=row_count,
+                    columns=columns,
+                    query_hash=str(hash(query))
+                )
+            finally:
+                if not streaming:
+                    self._connection_pool.return_connection(conn)
+        
+        async def _run_in_pool():
+            return await asyncio.get_event_loop().run_in_executor(self._thread_pool, _execute)
+        
+        try:
+            result = await self.circuit_breaker.execute(_run_in_pool)
+            self._update_query_metrics(result.execution_time, success=True)
+            self.metrics.successful_queries += 1
+            return result
+            
+        except DuckDBException:
+            execution_time = time.time() - start_time
+            self._update_query_metrics(execution_time, success=False)
+            self.metrics.failed_queries += 1
+            raise
+        except Exception as e:
+            execution_time = time.time() - start_time
+            self._update_query_metrics(execution_time, success=False)
+            self.metrics.failed_queries += 1
+            
+            logger.error(f"Prepared query execution failed after {execution_time:.3f}s: {e}")
+            
+            if "memory" in str(e).lower():
+                raise DuckDBResourceError(f"Memory limit exceeded: {e}") from e
+            elif "connection" in str(e).lower():
+                raise DuckDBConnectionError(f"Connection error: {e}") from e
+            else:
+                raise DuckDBQueryError(f"Query error: {e}") from e
+    
     async def execute_batch(self, queries: List[str]) -> List[Optional[QueryResult]]:
         """
         Execute multiple queries in batch with transaction support
@@ -691,6 +1028,10 @@ class DuckDBService:
             "success_rate": round(self.metrics.success_rate(), 2),
             "avg_query_time": round(self.metrics.avg_query_time, 3),
             "memory_usage_mb": round(self.metrics.memory_usage_mb, 1),
+            "peak_memory_mb": round(self.metrics.peak_memory_mb, 1),
+            "memory_sampled_at": self.metrics.memory_sampled_at.isoformat() if self.metrics.memory_sampled_at else None,
+            "prepared_cache_hits": self.metrics.prepared_cache_hits,
+            "prepared_cache_misses": self.metrics.prepared_cache_misses,
             "last_query_time": self.metrics.last_query_time.isoformat() if self.metrics.last_query_time else None
         }
     
@@ -725,13 +1066,22 @@ class DuckDBService:
         # Update average query time
         if self._query_times:
             self.metrics.avg_query_time = sum(self._query_times) / len(self._query_times)
-        
-        # Update memory usage
+    
+    def _sample_memory(self) -> None:
+        """Record current process memory (RSS) in the service metrics"""
         try:
-            process = psutil.Process()
-            self.metrics.memory_usage_mb = process.memory_info().rss / (1024 * 1024)
+            rss_mb = psutil.Process().memory_info().rss / (1024 * 1024)
         except Exception:
-            pass
+            return
+        self.metrics.memory_usage_mb = rss_mb
+        self.metrics.peak_memory_mb = max(self.metrics.peak_memory_mb, rss_mb)
+        self.metrics.memory_sampled_at = datetime.now()
+    
+    async def _memory_sampler_loop(self) -> None:
+        """Periodically sample process memory off the query path"""
+        while not self._shutdown:
+            await asyncio.sleep(self.MEMORY_SAMPLE_INTERVAL_SECONDS)
+            self._sample_memory()
     
     @asynccontextmanager
     async def transaction(self):
@@ -774,6 +1124,10 @@ class DuckDBService:
         logger.info("Shutting down DuckDBService...")
         self._shutdown = True
         
+        if self._memory_sampler_task and not self._memory_sampler_task.done():
+            self._memory_sampler_task.cancel()
+        self._memory_sampler_task = None
+        
         # Close connection pool
         if self._connection_pool:
             await asyncio.get_event_loop().run_in_executor(
@@ -785,6 +1139,7 @@ class DuckDBService:
         if self._thread_pool:
             self._thread_pool.shutdown(wait=True)
         
+        self._statement_caches.clear()
         self._initialized = False
         logger.info("DuckDBService shutdown completed")
     
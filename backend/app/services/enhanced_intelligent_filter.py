@@ -13,6 +13,7 @@ from sqlalchemy import create_engine
 from ..models.scraping import ScrapePage, ScrapePageStatus
 from ..core.config import settings
 from .wayback_machine import CDXRecord
+from .digest_index import load_digest_membership
 
 logger = logging.getLogger(__name__)
 
@@ -191,6 +192,13 @@ class EnhancedIntelligentContentFilter:
             logger.warning("No database connection available, returning empty digest set")
             return set()
         
+        if domain_id is not None:
+            # Persistent Bloom filter; positives are confirmed against the database
+            membership = load_digest_membership(self.engine, domain_id, cutoff_date)
+            if membership is not None:
+                logger.info(f"Loaded digest index for {domain_name} (domain_id={domain_id}, ~{len(membership)} digests)")
+                return membership
+        
         with Session(bind=self.engine) as session:
             # Query existing scrape pages scoped to this target when possible
             if domain_id is not None:
@@ -618,6 +626,10 @@ class EnhancedIntelligentContentFilter:
             'total_included': 0
         }
         
+        # Confirm Bloom filter positives for the whole batch up front
+        if hasattr(existing_digests, 'prefetch'):
+            existing_digests.prefetch(getattr(record, 'digest', None) for record in records)
+        
         for record in records:
             decision = self.make_filtering_decision(record, existing_digests, include_attachments)
             results.append((record, decision))
@@ -60,6 +60,19 @@ class EntityExtractionService:
         
         return self.nlp_model if self.nlp_model else None
     
+    async def preload(self) -> None:
+        """Load the NLP model and the default backend before the first extraction"""
+        await self._get_nlp_model()
+        cache_key = self._backend_cache_key(self.default_backend, None)
+        if cache_key not in self.backends_cache:
+            backend = await get_backend(self.default_backend)
+            if backend.is_available:
+                self.backends_cache[cache_key] = backend
+    
+    @staticmethod
+    def _backend_cache_key(backend_name: str, backend_config: Optional[Dict[str, Any]]) -> str:
+        return f"{backend_name}_{hash(str(backend_config or {}))}"
+    
     async def extract_entities_from_text(
         self, 
         text: str,
@@ -117,7 +130,7 @@ class EntityExtractionService:
         
         try:
             # Get or create backend instance
-            cache_key = f"{backend_name}_{hash(str(backend_config or {}))}"
+            cache_key = self._backend_cache_key(backend_name, backend_config)
             
             if cache_key not in self.backends_cache:
                 backend = await get_backend(backend_name, backend_config)
@@ -182,53 +195,59 @@ class EntityExtractionService:
         """
         enriched_entities = []
         
+        # Skip entities that are too short or low confidence
+        eligible = [
+            entity for entity in entities
+            if len(entity['text']) >= 2 and entity.get('confidence', 0) >= 0.5
+        ]
+        
         async with wikidata_service as wd:
-            for entity in entities:
-                try:
-                    # Skip entities that are too short or low confidence
-                    if len(entity['text']) < 2 or entity.get('confidence', 0) < 0.5:
-                        enriched_entities.append(entity)
-                        continue
+            try:
+                # One bulk resolution shares searches and entity lookups across entities
+                matches = await wd.resolve_entities(
+                    [(entity['text'], entity['entity_type'], entity.get('context', '')) for entity in eligible],
+                    language
+                )
+            except Exception as e:
+                logger.error(f"Failed to enrich entities with Wikidata: {e}")
+                matches = [None] * len(eligible)
+        
+        match_by_entity = {id(entity): match for entity, match in zip(eligible, matches)}
+        for entity in entities:
+            try:
+                wikidata_match = match_by_entity.get(id(entity))
+                
+                if wikidata_match:
+                    # Enhance entity with Wikidata information
+                    enhanced_entity = entity.copy()
+                    enhanced_entity['wikidata'] = {
+                        'id': wikidata_match['wikidata_id'],
+                        'url': wikidata_match['url'],
+                        'description': wikidata_match['description'],
+                        'confidence': wikidata_match['match_score']
+                    }
                     
-                    # Get Wikidata disambiguation
-                    wikidata_match = await wd.disambiguate_entity(
-                        entity['text'],
-                        entity['entity_type'],
-                        entity.get('context', ''),
-                        language
+                    # Update confidence based on Wikidata match
+                    enhanced_entity['confidence'] = max(
+                        entity['confidence'], 
+                        wikidata_match['match_score']
                     )
                     
-                    if wikidata_match:
-                        # Enhance entity with Wikidata information
-                        enhanced_entity = entity.copy()
-                        enhanced_entity['wikidata'] = {
-                            'id': wikidata_match['wikidata_id'],
-                            'url': wikidata_match['url'],
-                            'description': wikidata_match['description'],
-                            'confidence': wikidata_match['match_score']
-                        }
-                        
-                        # Update confidence based on Wikidata match
-                        enhanced_entity['confidence'] = max(
-                            entity['confidence'], 
-                            wikidata_match['match_score']
-                        )
-                        
-                        # Add Wikidata details to attributes
-                        details = wikidata_match.get('details', {})
-                        if details:
-                            enhanced_entity['attributes']['wikidata_details'] = details
-                        
-                        enriched_entities.append(enhanced_entity)
-                        logger.debug(f"Enriched entity '{entity['text']}' with Wikidata ID: {wikidata_match['wikidata_id']}")
-                    else:
-                        # No Wikidata match found
-                        enriched_entities.append(entity)
-                        
-                except Exception as e:
-                    logger.error(f"Failed to enrich entity '{entity['text']}' with Wikidata: {e}")
+                    # Add Wikidata details to attributes
+                    details = wikidata_match.get('details', {})
+                    if details:
+                        enhanced_entity['attributes']['wikidata_details'] = details
+                    
+                    enriched_entities.append(enhanced_entity)
+                    logger.debug(f"Enriched entity '{entity['text']}' with Wikidata ID: {wikidata_match['wikidata_id']}")
+                else:
+                    # No Wikidata match found
                     enriched_entities.append(entity)
-        
+                    
+            except Exception as e:
+                logger.error(f"Failed to enrich entity '{entity['text']}' with Wikidata: {e}")
+                enriched_entities.append(entity)
+    
         return enriched_entities
     
     async def _extract_with_nlp(self, text: str) -> List[Dict[str, Any]]:
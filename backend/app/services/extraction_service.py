@@ -8,13 +8,10 @@ from typing import Dict, List, Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, and_, func
 
-# Optional dependency: spaCy. Avoid import-time failure in minimal test envs.
-try:  # pragma: no cover - import guard
-    import spacy as _spacy
-except Exception:  # pragma: no cover
-    _spacy = None
 from concurrent.futures import ThreadPoolExecutor
 
+from app.core.lazy_imports import optional_import
+
 from app.models.user import User
 from app.models.shared_pages import PageV2 as Page
 from app.models.extraction_schemas import (
@@ -36,6 +33,7 @@ class ExtractionService:
     
     async def _load_nlp_model(self):
         """Load spaCy NLP model in thread pool"""
+        _spacy = optional_import("spacy")
         if self.nlp is None and _spacy is not None:
             def load_model():
                 try:
@@ -313,7 +311,7 @@ class ExtractionService:
     async def _extract_with_ml(self, content: str, schema: ContentExtractionSchema) -> Dict[str, Any]:
         """Extract content using ML models (NLP)"""
         # If spaCy is unavailable in the environment, gracefully skip ML extraction
-        if _spacy is None:
+        if optional_import("spacy") is None:
             return {}
         await self._load_nlp_model()
         
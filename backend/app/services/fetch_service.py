@@ -12,6 +12,7 @@ from dataclasses import dataclass
 import random
 
 from app.core.config import settings
+from app.services.archive_governor import archive_governor, governor_scope
 
 logger = logging.getLogger(__name__)
 
@@ -146,11 +147,21 @@ class URLFetchService:
         
         return self.rate_limiters[domain]
     
+    @staticmethod
+    def _proxy_url(config: FetchConfig) -> Optional[str]:
+        return config.proxy.url if config.proxy and config.proxy.enabled else None
+
     async def apply_rate_limiting(self, url: str, config: FetchConfig):
         """Apply rate limiting for a URL"""
         parsed = urlparse(url)
         domain = parsed.netloc
         
+        # archive.org is paced cluster-wide instead of per process
+        if archive_governor.enabled and governor_scope(url, self._proxy_url(config)):
+            await archive_governor.acquire(url, self._proxy_url(config))
+            self.last_request_times[domain] = time.time()
+            return
+        
         # Apply rate limiter if configured
         rate_limiter = self.get_rate_limiter(domain, config)
         if rate_limiter:
@@ -205,6 +216,7 @@ class URLFetchService:
                 if attempt > 0:
                     jitter = random.uniform(0.1, 0.5)
                     await asyncio.sleep(config.retry_delay + jitter)
+                    await archive_governor.acquire(url, self._proxy_url(config))
                 
                 async with session.request(
                     method,
@@ -213,6 +225,9 @@ class URLFetchService:
                     max_redirects=config.max_redirects,
                     allow_redirects=True
                 ) as response:
+                    await archive_governor.record_response(
+                        url, self._proxy_url(config), response.status, response.headers.get("Retry-After")
+                    )
                     content = await response.read()
                     text_content = None
                     
@@ -245,9 +260,11 @@ class URLFetchService:
             except asyncio.TimeoutError as e:
                 last_exception = e
                 logger.warning(f"Timeout fetching {url} (attempt {attempt + 1})")
+                await archive_governor.record_error(url, self._proxy_url(config))
                 
             except aiohttp.ClientError as e:
                 last_exception = e
+                await archive_governor.record_error(url, self._proxy_url(config))
                 logger.warning(f"Client error fetching {url} (attempt {attempt + 1}): {str(e)}")
                 
             except Exception as e:
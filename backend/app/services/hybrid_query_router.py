@@ -35,6 +35,7 @@ from sqlmodel import select
 
 from ..core.config import settings
 from ..core.database import AsyncSessionLocal
+from ..core.redis_pool import available_redis, coalesced_get
 from .circuit_breaker import CircuitBreaker, CircuitBreakerConfig
 from .duckdb_service import DuckDBService, get_duckdb_service
 
@@ -183,13 +184,11 @@ class QueryCache:
         
     async def initialize(self):
         """Initialize Redis connection"""
-        try:
-            self.redis_client = aioredis.from_url(self.redis_url)
-            await self.redis_client.ping()
+        self.redis_client = await available_redis(self.redis_url)
+        if self.redis_client:
             logger.info("Redis cache initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Redis cache: {e}")
-            self.redis_client = None
+        else:
+            logger.error("Failed to initialize Redis cache: Redis unavailable")
     
     async def get(self, key: str) -> Optional[Any]:
         """Get cached result"""
@@ -206,7 +205,7 @@ class QueryCache:
             
             # Try Redis cache
             if self.redis_client:
-                cached = await self.redis_client.get(f"query_cache:{key}")
+                cached = await coalesced_get(self.redis_client, f"query_cache:{key}")
                 if cached:
                     self.cache_stats["hits"] += 1
                     data = json.loads(cached)
@@ -797,8 +796,8 @@ class HybridQueryRouter:
         start_time = time.time()
         
         async def _execute():
-            result = await self.duckdb_service.execute_query(query, params)
-            return result
+            # Reuses the connection's cached plan for repeated query shapes
+            return await self.duckdb_service.execute_prepared(query, params, result_format="rows")
         
         try:
             duck_result = await self.duckdb_breaker.execute(_execute)
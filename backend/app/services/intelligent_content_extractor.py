@@ -18,38 +18,15 @@ from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 from lxml import html
 
-# Intelligent content extraction
-try:
-    import trafilatura
-    TRAFILATURA_AVAILABLE = True
-except ImportError:
-    TRAFILATURA_AVAILABLE = False
+from app.core.lazy_imports import module_available, optional_import, require_module
 
-try:
-    from newspaper import Article
-    NEWSPAPER_AVAILABLE = True
-except ImportError:
-    NEWSPAPER_AVAILABLE = False
-
-# Metadata extraction
-try:
-    import htmldate
-    HTMLDATE_AVAILABLE = True
-except ImportError:
-    HTMLDATE_AVAILABLE = False
-
-try:
-    import extruct
-    EXTRUCT_AVAILABLE = True
-except ImportError:
-    EXTRUCT_AVAILABLE = False
-
-# Language detection
-try:
-    from langdetect import detect, LangDetectError
-    LANGDETECT_AVAILABLE = True
-except ImportError:
-    LANGDETECT_AVAILABLE = False
+# Extraction libraries are imported on first use (trafilatura alone pulls in
+# dateparser and htmldate); only their presence is checked here
+TRAFILATURA_AVAILABLE = module_available("trafilatura")
+NEWSPAPER_AVAILABLE = module_available("newspaper")
+HTMLDATE_AVAILABLE = module_available("htmldate")
+EXTRUCT_AVAILABLE = module_available("extruct")
+LANGDETECT_AVAILABLE = module_available("langdetect")
 
 logger = logging.getLogger(__name__)
 
@@ -174,6 +151,8 @@ class IntelligentContentExtractor:
     def _extract_trafilatura(self, html_content: str, url: Optional[str]) -> ContentExtractionResult:
         """Extract using Trafilatura (best F1 score: 0.945)"""
         
+        trafilatura = require_module("trafilatura", "Trafilatura extraction")
+        
         # Configure trafilatura for maximum quality
         config = trafilatura.settings.use_config()
         config.set("DEFAULT", "EXTRACTION_TIMEOUT", "0")  # No timeout
@@ -233,7 +212,7 @@ class IntelligentContentExtractor:
     def _extract_newspaper(self, html_content: str, url: Optional[str]) -> ContentExtractionResult:
         """Extract using Newspaper3k (good for news content)"""
         
-        article = Article('')
+        article = require_module("newspaper", "Newspaper3k extraction").Article('')
         article.set_html(html_content)
         article.parse()
         
@@ -506,7 +485,8 @@ class IntelligentContentExtractor:
         soup = BeautifulSoup(html_content, 'lxml')
         
         # Extract publication date using htmldate (if available)
-        if HTMLDATE_AVAILABLE:
+        htmldate = optional_import("htmldate") if HTMLDATE_AVAILABLE else None
+        if htmldate is not None:
             try:
                 pub_date_str = htmldate.find_date(html_content, original_date=True)
                 if pub_date_str:
@@ -515,7 +495,8 @@ class IntelligentContentExtractor:
                 logger.debug(f"htmldate extraction failed: {e}")
         
         # Extract structured data using extruct (if available)
-        if EXTRUCT_AVAILABLE:
+        extruct = optional_import("extruct") if EXTRUCT_AVAILABLE else None
+        if extruct is not None:
             try:
                 structured_data = extruct.extract(html_content, base_url=url or "")
                 
@@ -550,15 +531,16 @@ class IntelligentContentExtractor:
         self._extract_html_metadata(soup, metadata)
         
         # Detect language
-        if LANGDETECT_AVAILABLE and text:
+        langdetect = optional_import("langdetect") if LANGDETECT_AVAILABLE else None
+        if langdetect is not None and text:
             try:
-                metadata.language = detect(text)
-            except LangDetectError:
+                metadata.language = langdetect.detect(text)
+            except langdetect.LangDetectException:
                 # Try with first 1000 chars if full text fails
                 try:
                     if len(text) > 1000:
-                        metadata.language = detect(text[:1000])
-                except LangDetectError:
+                        metadata.language = langdetect.detect(text[:1000])
+                except langdetect.LangDetectException:
                     pass
         
         # Extract keywords from meta tags
@@ -11,6 +11,7 @@ from sqlalchemy import create_engine
 from ..models.scraping import ScrapePage
 from ..core.config import settings
 from .wayback_machine import CDXRecord
+from .digest_index import load_digest_membership
 
 logger = logging.getLogger(__name__)
 
@@ -129,6 +130,13 @@ class IntelligentContentFilter:
             logger.warning("No database connection available, returning empty digest set")
             return set()
         
+        if domain_id is not None:
+            # Persistent Bloom filter; positives are confirmed against the database
+            membership = load_digest_membership(self.engine, domain_id, cutoff_date)
+            if membership is not None:
+                logger.info(f"Loaded digest index for {domain_name} (domain_id={domain_id}, ~{len(membership)} digests)")
+                return membership
+        
         with Session(bind=self.engine) as session:
             # Query existing scrape pages scoped to this target when possible
             if domain_id is not None:
@@ -302,6 +310,10 @@ class IntelligentContentFilter:
         filtered_records = []
         high_value_records = []
         
+        # Confirm Bloom filter positives for the whole batch up front
+        if prioritize_changes and hasattr(existing_digests, 'prefetch'):
+            existing_digests.prefetch(record.digest for record in records)
+        
         for record in records:
             len(filtered_records) + len(high_value_records)
             
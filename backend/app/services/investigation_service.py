@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, and_, or_, func
-import difflib
+import asyncio
 import hashlib
 
 from app.models.user import User
@@ -21,6 +21,7 @@ from app.models.investigations import (
     EvidenceType,
     EvidenceStatus
 )
+from app.services.diff_engine import diff_engine
 
 
 class InvestigationService:
@@ -403,6 +404,7 @@ class InvestigationService:
         change_categories = []
         significance_scores = []
         
+        changed_fields = {}
         for field in comparison_fields:
             if field in ignore_fields:
                 continue
@@ -415,42 +417,40 @@ class InvestigationService:
             target_str = str(target_value) if target_value is not None else ""
             
             if baseline_str != target_str:
-                # Calculate similarity ratio
-                similarity = difflib.SequenceMatcher(None, baseline_str, target_str).ratio()
-                
-                # Generate detailed diff
-                diff = list(difflib.unified_diff(
-                    baseline_str.splitlines(keepends=True),
-                    target_str.splitlines(keepends=True),
-                    fromfile=f"baseline_{field}",
-                    tofile=f"target_{field}",
-                    n=3
-                ))
-                
-                changes[field] = {
-                    "baseline": baseline_str[:1000] if len(baseline_str) > 1000 else baseline_str,
-                    "target": target_str[:1000] if len(target_str) > 1000 else target_str,
-                    "similarity": similarity,
-                    "diff": diff[:100],  # Limit diff size
-                    "change_type": self._classify_change_type(field, baseline_str, target_str)
-                }
-                
-                # Categorize changes
-                if field in ["title", "extracted_title"]:
-                    change_categories.append("title_change")
-                    significance_scores.append(0.8)
-                elif field in ["content", "extracted_text"]:
-                    change_categories.append("content_change")
-                    significance_scores.append(0.9)
-                elif field in ["meta_description", "meta_keywords"]:
-                    change_categories.append("metadata_change")
-                    significance_scores.append(0.4)
-                elif field == "author":
-                    change_categories.append("authorship_change")
-                    significance_scores.append(0.6)
-                elif field == "published_date":
-                    change_categories.append("temporal_change")
-                    significance_scores.append(0.7)
+                changed_fields[field] = (baseline_str, target_str)
+        
+        # Diff changed fields concurrently; large fields run in the diff worker pool
+        diff_results = await asyncio.gather(*(
+            diff_engine.compare(baseline_str, target_str)
+            for baseline_str, target_str in changed_fields.values()
+        ))
+        
+        for (field, (baseline_str, target_str)), result in zip(changed_fields.items(), diff_results):
+            changes[field] = {
+                "baseline": baseline_str[:1000] if len(baseline_str) > 1000 else baseline_str,
+                "target": target_str[:1000] if len(target_str) > 1000 else target_str,
+                "similarity": result.similarity,
+                "diff": result.unified(f"baseline_{field}", f"target_{field}")[:100],  # Limit diff size
+                "diff_complete": result.exact,
+                "change_type": self._classify_change_type(field, baseline_str, target_str)
+            }
+            
+            # Categorize changes
+            if field in ["title", "extracted_title"]:
+                change_categories.append("title_change")
+                significance_scores.append(0.8)
+            elif field in ["content", "extracted_text"]:
+                change_categories.append("content_change")
+                significance_scores.append(0.9)
+            elif field in ["meta_description", "meta_keywords"]:
+                change_categories.append("metadata_change")
+                significance_scores.append(0.4)
+            elif field == "author":
+                change_categories.append("authorship_change")
+                significance_scores.append(0.6)
+            elif field == "published_date":
+                change_categories.append("temporal_change")
+                significance_scores.append(0.7)
         
         differences_found = len(changes) > 0
         overall_similarity = 1.0 - (len(changes) / len(comparison_fields)) if comparison_fields else 1.0
@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 import redis.asyncio as redis
 import json
 
-from app.core.config import settings
+from app.core.redis_pool import available_redis, coalesced_get
 from app.models.project import LangExtractProvider
 from app.services.cdx_service import cdx_service
 
@@ -166,7 +166,6 @@ class LangExtractService:
     
     def __init__(self):
         self.calculator = LangExtractCostCalculator()
-        self._redis_client = None
         
         # Cache settings (in seconds)
         self.CACHE_SETTINGS = {
@@ -186,27 +185,14 @@ class LangExtractService:
     
     async def _get_redis_client(self) -> Optional[redis.Redis]:
         """Get Redis client for caching"""
-        if not self._redis_client:
-            try:
-                self._redis_client = redis.Redis(
-                    host=settings.REDIS_HOST,
-                    port=settings.REDIS_PORT,
-                    decode_responses=True
-                )
-                # Test connection
-                await self._redis_client.ping()
-            except Exception as e:
-                logger.warning(f"Redis connection failed: {e}")
-                self._redis_client = None
-        
-        return self._redis_client
+        return await available_redis()
     
     async def _cache_get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         try:
             redis_client = await self._get_redis_client()
             if redis_client:
-                value = await redis_client.get(key)
+                value = await coalesced_get(redis_client, key)
                 if value:
                     return json.loads(value)
         except Exception as e:
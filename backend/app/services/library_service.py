@@ -9,11 +9,12 @@ from sqlmodel import select, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.library import (
-    StarredItem, SavedSearch, SearchHistory, SearchSuggestion, 
+    StarredItem, SavedSearch, SearchHistory, 
     UserCollection, ItemType, AlertFrequency
 )
 from app.models.user import User
 from app.models.project import Project, Page
+from app.services.search_suggestions import SearchEvent, SuggestionEntry, search_suggestion_service
 
 logger = logging.getLogger(__name__)
 
@@ -406,76 +407,25 @@ class LibraryService:
         execution_time_ms: Optional[int] = None,
         session_id: Optional[str] = None
     ) -> SearchHistory:
-        """Record a search in user's search history"""
-        try:
-            search_history = SearchHistory(
-                user_id=user.id,
-                project_id=project_id,
-                saved_search_id=saved_search_id,
-                query_text=query_text,
-                filters=filters or {},
-                result_count=result_count,
-                execution_time_ms=execution_time_ms,
-                session_id=session_id
-            )
-            
-            db.add(search_history)
-            await db.commit()
-            
-            # Update search suggestions based on this search
-            await self._update_search_suggestions(db, user, query_text)
-            
-            return search_history
-            
-        except Exception as e:
-            logger.error(f"Failed to record search history: {e}")
-            await db.rollback()
-            raise
-    
-    async def _update_search_suggestions(
-        self, 
-        db: AsyncSession,
-        user: User,
-        query_text: str
-    ):
-        """Update search suggestions based on search history"""
-        try:
-            # Clean query text
-            query_text = query_text.strip().lower()
-            if len(query_text) < 3:  # Skip very short queries
-                return
-            
-            # Check if suggestion already exists
-            result = await db.execute(
-                select(SearchSuggestion).where(
-                    SearchSuggestion.user_id == user.id,
-                    SearchSuggestion.suggestion_text == query_text
-                )
-            )
-            suggestion = result.scalar_one_or_none()
-            
-            if suggestion:
-                # Update existing suggestion
-                suggestion.frequency += 1
-                suggestion.last_used = datetime.utcnow()
-                suggestion.score = min(1.0, suggestion.frequency * 0.1)
-            else:
-                # Create new suggestion
-                suggestion = SearchSuggestion(
-                    user_id=user.id,
-                    suggestion_text=query_text,
-                    suggestion_type="query",
-                    display_text=query_text.title(),
-                    score=0.1,
-                    frequency=1,
-                    last_used=datetime.utcnow()
-                )
-                db.add(suggestion)
-            
-            await db.commit()
-            
-        except Exception as e:
-            logger.error(f"Failed to update search suggestions: {e}")
+        """
+        Record a search in user's search history
+        
+        The search is queued and written in a batch by the suggestion service,
+        which also folds it into the user's suggestions; the returned entry is
+        not persisted yet and has no id.
+        """
+        event = SearchEvent(
+            user_id=user.id,
+            query_text=query_text,
+            filters=filters or {},
+            result_count=result_count,
+            project_id=project_id,
+            saved_search_id=saved_search_id,
+            execution_time_ms=execution_time_ms,
+            session_id=session_id
+        )
+        search_suggestion_service.record(event)
+        return SearchHistory(**event.history_row())
     
     async def get_search_suggestions(
         self, 
@@ -483,22 +433,10 @@ class LibraryService:
         user: User,
         query_prefix: str = "",
         limit: int = 10
-    ) -> List[SearchSuggestion]:
-        """Get search suggestions for user"""
+    ) -> List[SuggestionEntry]:
+        """Get search suggestions for user starting with ``query_prefix``"""
         try:
-            query = select(SearchSuggestion).where(SearchSuggestion.user_id == user.id)
-            
-            if query_prefix:
-                query = query.where(
-                    SearchSuggestion.suggestion_text.contains(query_prefix.lower())
-                )
-            
-            query = query.order_by(SearchSuggestion.score.desc(), SearchSuggestion.frequency.desc())
-            query = query.limit(limit)
-            
-            result = await db.execute(query)
-            return result.scalars().all()
-            
+            return await search_suggestion_service.suggest(db, user.id, query_prefix, limit)
         except Exception as e:
             logger.error(f"Failed to get search suggestions: {e}")
             return []
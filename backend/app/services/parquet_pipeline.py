@@ -16,7 +16,7 @@ Features:
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union, Generator, AsyncGenerator
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Union, Generator, AsyncGenerator
 from pathlib import Path
 import tempfile
 import shutil
@@ -24,22 +24,30 @@ from dataclasses import dataclass, asdict
 from contextlib import asynccontextmanager
 import json
 
-import pandas as pd
-import pyarrow as pa
-import pyarrow.parquet as pq
 from sqlmodel import Session, select, func
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import text
 import psutil
 
 from app.core.config import Settings
+from app.core.lazy_imports import require_module
 from app.core.database import engine
 from app.models.scraping import ScrapePage, ScrapePageStatus, CDXResumeState
 from app.services.cache_service import PageCacheService
+from app.services.analytics_dataset import (
+    DATASETS, HivePartitionedWriter, compact_dataset, dataset_root
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 
+def _pandas():
+    return require_module("pandas", "Parquet pipeline")
+
+
 @dataclass
 class ProcessingMetrics:
     """Metrics for pipeline processing performance."""
@@ -164,7 +172,8 @@ class ParquetPipeline:
         Args:
             batch_size: Number of records to process per batch
             filters: Additional SQL filters for data selection
-            partition_by_date: Whether to partition output by date
+            partition_by_date: Ignored; the dataset is always partitioned by
+                year/month/day/source (kept for existing callers)
             
         Returns:
             Path to generated Parquet file(s)
@@ -174,53 +183,34 @@ class ParquetPipeline:
         try:
             logger.info(f"Starting CDX records processing with batch size: {batch_size}")
             
-            # Create output directory
-            output_dir = self.storage_path / "cdx_analytics"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Process data in streaming batches
-            parquet_files = []
             batch_num = 0
             
-            async for batch_data in self._stream_cdx_data(batch_size, filters):
-                if not batch_data:
-                    continue
-                
-                # Validate schema
-                if not self.schema_validator.validate_cdx_analytics_schema(batch_data):
-                    raise ValueError("CDX analytics schema validation failed")
-                
-                # Convert timestamps for Parquet compatibility
-                batch_data = self.schema_validator.convert_timestamps(batch_data)
-                
-                # Create DataFrame and optimize dtypes
-                df = pd.DataFrame(batch_data)
-                df = self._optimize_dataframe_dtypes(df)
-                
-                # Generate output filename
-                timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-                if partition_by_date and not df.empty:
-                    # Partition by date extracted from created_at
-                    df['partition_date'] = pd.to_datetime(df['created_at']).dt.date
+            with self._dataset_writer("cdx_records") as writer:
+                async for batch_data in self._stream_cdx_data(batch_size, filters):
+                    if not batch_data:
+                        continue
                     
-                    for date, group_df in df.groupby('partition_date'):
-                        partition_dir = output_dir / str(date)
-                        partition_dir.mkdir(parents=True, exist_ok=True)
-                        
-                        filename = partition_dir / f"cdx_batch_{batch_num:06d}_{timestamp}.parquet"
-                        await self._write_parquet_file(group_df.drop('partition_date', axis=1), filename)
-                        parquet_files.append(str(filename))
-                else:
-                    filename = output_dir / f"cdx_batch_{batch_num:06d}_{timestamp}.parquet"
-                    await self._write_parquet_file(df, filename)
-                    parquet_files.append(str(filename))
-                
-                batch_num += 1
-                self.current_metrics.processed_records += len(batch_data)
-                
-                # Log progress every 10 batches
-                if batch_num % 10 == 0:
-                    logger.info(f"Processed {batch_num} batches, {self.current_metrics.processed_records} records")
+                    # Validate schema
+                    if not self.schema_validator.validate_cdx_analytics_schema(batch_data):
+                        raise ValueError("CDX analytics schema validation failed")
+                    
+                    # Convert timestamps for Parquet compatibility
+                    batch_data = self.schema_validator.convert_timestamps(batch_data)
+                    
+                    # Create DataFrame and optimize dtypes
+                    df = _pandas().DataFrame(batch_data)
+                    df = self._optimize_dataframe_dtypes(df)
+                    
+                    # Appended to the open file of each year/month/day/source partition
+                    writer.write(df)
+                    
+                    batch_num += 1
+                    self.current_metrics.processed_records += len(batch_data)
+                    
+                    # Log progress every 10 batches
+                    if batch_num % 10 == 0:
+                        logger.info(f"Processed {batch_num} batches, {self.current_metrics.processed_records} records")
+            parquet_files = writer.files
             
             self.current_metrics.end_time = datetime.utcnow()
             self._calculate_final_metrics(parquet_files)
@@ -253,37 +243,30 @@ class ParquetPipeline:
         try:
             logger.info(f"Starting content analytics processing with batch size: {batch_size}")
             
-            output_dir = self.storage_path / "content_analytics"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            parquet_files = []
             batch_num = 0
             
-            async for batch_data in self._stream_content_data(batch_size, include_full_text):
-                if not batch_data:
-                    continue
-                
-                # Validate schema
-                if not self.schema_validator.validate_content_analytics_schema(batch_data):
-                    raise ValueError("Content analytics schema validation failed")
-                
-                # Convert timestamps and optimize
-                batch_data = self.schema_validator.convert_timestamps(batch_data)
-                df = pd.DataFrame(batch_data)
-                df = self._optimize_dataframe_dtypes(df)
-                
-                # Generate filename
-                timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-                filename = output_dir / f"content_batch_{batch_num:06d}_{timestamp}.parquet"
-                
-                await self._write_parquet_file(df, filename)
-                parquet_files.append(str(filename))
-                
-                batch_num += 1
-                self.current_metrics.processed_records += len(batch_data)
-                
-                if batch_num % 5 == 0:
-                    logger.info(f"Processed {batch_num} content batches, {self.current_metrics.processed_records} records")
+            with self._dataset_writer("content_analytics") as writer:
+                async for batch_data in self._stream_content_data(batch_size, include_full_text):
+                    if not batch_data:
+                        continue
+                    
+                    # Validate schema
+                    if not self.schema_validator.validate_content_analytics_schema(batch_data):
+                        raise ValueError("Content analytics schema validation failed")
+                    
+                    # Convert timestamps and optimize
+                    batch_data = self.schema_validator.convert_timestamps(batch_data)
+                    df = _pandas().DataFrame(batch_data)
+                    df = self._optimize_dataframe_dtypes(df)
+                    
+                    writer.write(df)
+                    
+                    batch_num += 1
+                    self.current_metrics.processed_records += len(batch_data)
+                    
+                    if batch_num % 5 == 0:
+                        logger.info(f"Processed {batch_num} content batches, {self.current_metrics.processed_records} records")
+            parquet_files = writer.files
             
             self.current_metrics.end_time = datetime.utcnow()
             self._calculate_final_metrics(parquet_files)
@@ -311,9 +294,6 @@ class ParquetPipeline:
         try:
             logger.info("Starting project analytics processing")
             
-            output_dir = self.storage_path / "project_analytics"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
             # For project analytics, we'll generate aggregated data
             project_data = await self._generate_project_analytics()
             
@@ -325,22 +305,25 @@ class ParquetPipeline:
             if not self.schema_validator.validate_project_analytics_schema(project_data):
                 raise ValueError("Project analytics schema validation failed")
             
+            # Each run is a snapshot, partitioned by the day it was taken
+            snapshot_at = datetime.utcnow()
+            for record in project_data:
+                record.setdefault("analytics_date", snapshot_at)
+                record.setdefault("aggregation_level", "project")
+            
             project_data = self.schema_validator.convert_timestamps(project_data)
-            df = pd.DataFrame(project_data)
+            df = _pandas().DataFrame(project_data)
             df = self._optimize_dataframe_dtypes(df)
             
-            # Generate filename
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            filename = output_dir / f"projects_{timestamp}.parquet"
-            
-            await self._write_parquet_file(df, filename)
+            with self._dataset_writer("project_analytics") as writer:
+                writer.write(df)
             
             self.current_metrics.processed_records = len(project_data)
             self.current_metrics.end_time = datetime.utcnow()
-            self._calculate_final_metrics([str(filename)])
+            self._calculate_final_metrics(writer.files)
             
-            logger.info(f"Project analytics processing completed: 1 file created with {len(project_data)} projects")
-            return json.dumps([str(filename)])
+            logger.info(f"Project analytics processing completed: {len(writer.files)} files created with {len(project_data)} projects")
+            return json.dumps(writer.files)
             
         except Exception as e:
             logger.error(f"Project analytics processing failed: {str(e)}")
@@ -364,22 +347,21 @@ class ParquetPipeline:
         try:
             logger.info(f"Processing {len(event_data)} {event_type} events")
             
-            output_dir = self.storage_path / "events" / event_type
-            output_dir.mkdir(parents=True, exist_ok=True)
+            received_at = datetime.utcnow()
+            for event in event_data:
+                event.setdefault("timestamp", received_at)
+                event.setdefault("event_type", event_type)
             
             # Convert timestamps and create DataFrame
             event_data = self.schema_validator.convert_timestamps(event_data)
-            df = pd.DataFrame(event_data)
+            df = _pandas().DataFrame(event_data)
             df = self._optimize_dataframe_dtypes(df)
             
-            # Generate filename
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            filename = output_dir / f"events_{timestamp}.parquet"
-            
-            await self._write_parquet_file(df, filename)
+            with self._dataset_writer("events") as writer:
+                writer.write(df)
             
-            logger.info(f"Events processing completed: {len(event_data)} events written to {filename}")
-            return json.dumps([str(filename)])
+            logger.info(f"Events processing completed: {len(event_data)} events written to {len(writer.files)} files")
+            return json.dumps(writer.files)
             
         except Exception as e:
             logger.error(f"Events processing failed: {str(e)}")
@@ -648,14 +630,49 @@ class ParquetPipeline:
             logger.error(f"Database error in project analytics: {str(e)}")
             raise
     
-    async def _write_parquet_file(self, df: pd.DataFrame, filepath: Path) -> None:
+    def _dataset_writer(self, name: str) -> HivePartitionedWriter:
+        """Writer appending to one of the Hive-partitioned analytics datasets"""
+        return HivePartitionedWriter(
+            dataset_root(self.storage_path, name),
+            DATASETS[name],
+            target_file_bytes=self.settings.ANALYTICS_TARGET_FILE_SIZE_MB * 1024 * 1024,
+            max_open_files=self.settings.ANALYTICS_MAX_OPEN_PARTITION_FILES,
+            write_options=self._parquet_write_options(),
+        )
+    
+    def _parquet_write_options(self) -> Dict[str, Any]:
+        return {
+            "compression": self.parquet_config.compression,
+            "compression_level": self.parquet_config.compression_level,
+            "data_page_size": self.parquet_config.page_size,
+            "use_dictionary": self.parquet_config.use_dictionary,
+            "write_statistics": self.parquet_config.write_statistics,
+            "allow_truncated_timestamps": self.parquet_config.allow_truncated_timestamps,
+        }
+    
+    def compact_datasets(self, min_age_minutes: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """Merge small files in settled partitions of every analytics dataset"""
+        if min_age_minutes is None:
+            min_age_minutes = self.settings.ANALYTICS_COMPACTION_MIN_AGE_MINUTES
+        return {
+            name: compact_dataset(
+                self.storage_path,
+                name,
+                target_file_bytes=self.settings.ANALYTICS_TARGET_FILE_SIZE_MB * 1024 * 1024,
+                min_age_seconds=min_age_minutes * 60,
+                write_options=self._parquet_write_options(),
+            )
+            for name in DATASETS
+        }
+    
+    async def _write_parquet_file(self, df: "pd.DataFrame", filepath: Path) -> None:
         """Write DataFrame to optimized Parquet file."""
         try:
             # Convert DataFrame to PyArrow Table for better control
-            table = pa.Table.from_pandas(df)
+            table = require_module("pyarrow", "Parquet pipeline").Table.from_pandas(df)
             
             # Configure Parquet writer
-            pq.write_table(
+            require_module("pyarrow.parquet", "Parquet pipeline").write_table(
                 table,
                 str(filepath),
                 compression=self.parquet_config.compression,
@@ -678,7 +695,7 @@ class ParquetPipeline:
             logger.error(f"Error writing Parquet file {filepath}: {str(e)}")
             raise
     
-    def _optimize_dataframe_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _optimize_dataframe_dtypes(self, df: "pd.DataFrame") -> "pd.DataFrame":
         """Optimize DataFrame dtypes for better Parquet compression and performance."""
         try:
             # Convert object columns to category where appropriate
@@ -705,7 +722,7 @@ class ParquetPipeline:
             
             # Optimize float columns
             for col in df.select_dtypes(include=['float64']).columns:
-                df[col] = pd.to_numeric(df[col], downcast='float')
+                df[col] = _pandas().to_numeric(df[col], downcast='float')
             
             return df
             
@@ -751,6 +768,11 @@ class ParquetPipeline:
     def _calculate_final_metrics(self, parquet_files: List[str]) -> None:
         """Calculate final processing metrics."""
         try:
+            if not self.current_metrics.file_size_mb:
+                self.current_metrics.file_size_mb = sum(
+                    Path(f).stat().st_size for f in parquet_files if Path(f).exists()
+                ) / 1024 / 1024
+            
             # Calculate compression ratio
             if self.current_metrics.file_size_mb > 0 and self.current_metrics.processed_records > 0:
                 # Estimate original size (rough approximation)
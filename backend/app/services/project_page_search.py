@@ -0,0 +1,255 @@
+"""
+Project page listing and search backed by Postgres full-text and trigram indexes
+
+The listing never ships full page bodies: only a fixed column projection plus
+a short snippet computed in the database (``ts_headline`` when searching,
+a bounded prefix otherwise). Pagination uses opaque keyset cursors so deep
+pages cost the same as the first one.
+"""
+import base64
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import cast, func, literal, literal_column, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import REAL
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.shared_pages import PageV2, ProjectPage
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration used by the generated ``pages_v2.search_vector``
+# column (see migration ``add_pages_v2_search_indexes``). Must stay in sync.
+SEARCH_CONFIG = "simple"
+search_config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+SNIPPET_LENGTH = 200
+HEADLINE_OPTIONS = (
+    'MaxFragments=1, MaxWords=35, MinWords=15, ShortWord=2, '
+    'StartSel="", StopSel="", FragmentDelimiter=" ... "'
+)
+
+# Generated column that only exists in Postgres; it is deliberately not mapped
+# on PageV2 so that SQLite test databases can still be created from metadata.
+search_vector = literal_column("pages_v2.search_vector")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+@dataclass
+class PageListCursor:
+    """Keyset position: the last row's project_page id and (optionally) rank"""
+    project_page_id: uuid.UUID
+    rank: Optional[float] = None
+
+    def encode(self) -> str:
+        payload = {"id": str(self.project_page_id)}
+        if self.rank is not None:
+            payload["r"] = self.rank
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "PageListCursor":
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            rank = payload.get("r")
+            return cls(
+                project_page_id=uuid.UUID(payload["id"]),
+                rank=float(rank) if rank is not None else None,
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursorError(f"Invalid pagination cursor: {token!r}") from e
+
+
+@dataclass
+class ProjectPageFilters:
+    """Filters accepted by the project page listing"""
+    search: Optional[str] = None
+    starred_only: bool = False
+    tags: Optional[List[str]] = None
+    review_statuses: Optional[List[str]] = None
+
+
+class ProjectPageSearchService:
+    """Indexed listing/search over the pages attached to a project"""
+
+    # Column projection returned to the listing; deliberately excludes
+    # content, markdown_content and extracted_text.
+    LISTING_COLUMNS = (
+        PageV2.id.label("page_id"),
+        PageV2.url,
+        PageV2.title,
+        PageV2.extracted_title,
+        PageV2.content_type,
+        PageV2.word_count,
+        PageV2.capture_date,
+        PageV2.unix_timestamp,
+        PageV2.status_code,
+        PageV2.language,
+        PageV2.author,
+        PageV2.meta_description,
+        PageV2.quality_score,
+        PageV2.processed,
+        PageV2.indexed,
+        PageV2.error_message,
+        ProjectPage.id.label("project_page_id"),
+        ProjectPage.review_status,
+        ProjectPage.page_category,
+        ProjectPage.priority_level,
+        ProjectPage.tags,
+        ProjectPage.notes,
+        ProjectPage.is_starred,
+        ProjectPage.reviewed_at,
+    )
+
+    @staticmethod
+    def _is_postgres(db: AsyncSession) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    @staticmethod
+    def _apply_filters(query, project_id: int, filters: ProjectPageFilters):
+        query = query.where(ProjectPage.project_id == project_id)
+        if filters.starred_only:
+            query = query.where(ProjectPage.is_starred.is_(True))
+        for tag in filters.tags or []:
+            query = query.where(ProjectPage.tags.contains([tag]))
+        if filters.review_statuses:
+            query = query.where(ProjectPage.review_status.in_(filters.review_statuses))
+        return query
+
+    @staticmethod
+    async def list_pages(
+        db: AsyncSession,
+        project_id: int,
+        filters: ProjectPageFilters,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List pages for a project.
+
+        Returns the page rows and the cursor for the next page (None when the
+        result set is exhausted). ``skip`` is only honoured when no cursor is
+        given, for clients still paging by offset.
+        """
+        position = PageListCursor.decode(cursor) if cursor else None
+        search = (filters.search or "").strip() or None
+
+        if search and ProjectPageSearchService._is_postgres(db):
+            rows = await ProjectPageSearchService._search_postgres(
+                db, project_id, filters, search, limit + 1, position, skip
+            )
+        else:
+            rows = await ProjectPageSearchService._list_plain(
+                db, project_id, filters, search, limit + 1, position, skip
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = PageListCursor(
+                project_page_id=last["project_page_id"], rank=last.get("rank")
+            ).encode()
+        return rows, next_cursor
+
+    @staticmethod
+    async def _search_postgres(
+        db: AsyncSession,
+        project_id: int,
+        filters: ProjectPageFilters,
+        search: str,
+        limit: int,
+        position: Optional[PageListCursor],
+        skip: int,
+    ) -> List[Dict[str, Any]]:
+        ts_query = func.websearch_to_tsquery(search_config, search)
+        pattern = f"%{search}%"
+        rank = cast(func.ts_rank_cd(search_vector, ts_query), REAL).label("rank")
+
+        # Inner query: index-driven match + keyset ordering, no heavy columns.
+        # title/url ILIKE is served by the gin_trgm_ops indexes.
+        matched = select(ProjectPage.id.label("pp_id"), PageV2.id.label("pg_id"), rank).join(
+            PageV2, PageV2.id == ProjectPage.page_id
+        )
+        matched = ProjectPageSearchService._apply_filters(matched, project_id, filters)
+        matched = matched.where(
+            or_(
+                search_vector.op("@@")(ts_query),
+                PageV2.title.ilike(pattern),
+                PageV2.url.ilike(pattern),
+            )
+        )
+        if position is not None:
+            matched = matched.where(
+                tuple_(rank, ProjectPage.id)
+                < tuple_(cast(literal(position.rank or 0.0), REAL), literal(position.project_page_id))
+            )
+        elif skip:
+            matched = matched.offset(skip)
+        matched = matched.order_by(rank.desc(), ProjectPage.id.desc()).limit(limit).subquery()
+
+        # Outer query: projection and headline computed only for the page of results
+        snippet = func.ts_headline(
+            search_config,
+            func.left(PageV2.extracted_text, 100000),
+            ts_query,
+            HEADLINE_OPTIONS,
+        ).label("snippet")
+        query = (
+            select(*ProjectPageSearchService.LISTING_COLUMNS, matched.c.rank, snippet)
+            .select_from(matched)
+            .join(ProjectPage, ProjectPage.id == matched.c.pp_id)
+            .join(PageV2, PageV2.id == matched.c.pg_id)
+            .order_by(matched.c.rank.desc(), matched.c.pp_id.desc())
+        )
+        result = await db.execute(query)
+        return [dict(row._mapping) for row in result.all()]
+
+    @staticmethod
+    async def _list_plain(
+        db: AsyncSession,
+        project_id: int,
+        filters: ProjectPageFilters,
+        search: Optional[str],
+        limit: int,
+        position: Optional[PageListCursor],
+        skip: int,
+    ) -> List[Dict[str, Any]]:
+        snippet = func.substr(PageV2.extracted_text, 1, SNIPPET_LENGTH).label("snippet")
+        query = select(*ProjectPageSearchService.LISTING_COLUMNS, snippet).join(
+            PageV2, PageV2.id == ProjectPage.page_id
+        )
+        query = ProjectPageSearchService._apply_filters(query, project_id, filters)
+        if search:
+            # Non-Postgres backends (tests) have no search_vector column
+            pattern = f"%{search}%"
+            query = query.where(
+                or_(
+                    PageV2.title.ilike(pattern),
+                    PageV2.extracted_text.ilike(pattern),
+                    PageV2.url.ilike(pattern),
+                )
+            )
+        if position is not None:
+            query = query.where(ProjectPage.id < position.project_page_id)
+        elif skip:
+            query = query.offset(skip)
+        query = query.order_by(ProjectPage.id.desc()).limit(limit)
+
+        result = await db.execute(query)
+        rows = []
+        for row in result.all():
+            data = dict(row._mapping)
+            if data.get("snippet") and len(data["snippet"]) >= SNIPPET_LENGTH:
+                data["snippet"] = data["snippet"] + "..."
+            rows.append(data)
+        return rows
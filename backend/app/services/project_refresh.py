@@ -0,0 +1,120 @@
+"""
+Watermarked, per-project refresh of tables materialized from ScrapePages
+
+The statistics rollups (app.services.scrape_page_rollups) and the domain
+timeline buckets (app.services.domain_timeline_cubes) are both kept current
+the same way: a per-project watermark records how far ``scrape_pages`` has
+been folded in, every insert and status change bumps
+``scrape_pages.updated_at``, and the pages updated since the watermark name
+the (domain, creation day) buckets to recompute. The scan starts an overlap
+window before the watermark to pick up rows from transactions that committed
+after the previous refresh but carry an earlier ``updated_at``. Refreshes of
+one project are serialised with a transaction-scoped advisory lock.
+
+``ProjectRefresh`` holds that machinery; each materialization supplies its
+watermark model, lock namespace, overlap setting and the callbacks that
+rebuild everything or a set of buckets.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple, Type
+
+from sqlalchemy import Date, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.project import Domain
+from app.models.scraping import ScrapePage
+
+Bucket = Tuple[int, date]
+
+CREATED_DAY = func.date(ScrapePage.created_at, type_=Date)
+
+RebuildAll = Callable[[AsyncSession, int], Awaitable[None]]
+RebuildBuckets = Callable[[AsyncSession, int, Iterable[Bucket]], Awaitable[int]]
+
+
+async def project_domain_ids(db: AsyncSession, project_id: int) -> List[int]:
+    return list((await db.execute(
+        select(Domain.id).where(Domain.project_id == project_id)
+    )).scalars().all())
+
+
+async def changed_buckets(db: AsyncSession, domain_ids: List[int], *where) -> List[Bucket]:
+    """Distinct (domain_id, creation day) of the domains' pages matching ``where``"""
+    if not domain_ids:
+        return []
+    return (await db.execute(
+        select(ScrapePage.domain_id, CREATED_DAY)
+        .where(ScrapePage.domain_id.in_(domain_ids), *where)
+        .distinct()
+    )).all()
+
+
+@dataclass(frozen=True)
+class ProjectRefresh:
+    """Watermark, advisory lock and overlap handling of one materialization"""
+    watermark_model: Type
+    lock_namespace: int
+    overlap_setting: str
+    rebuild_all: RebuildAll
+    rebuild_buckets: RebuildBuckets
+
+    async def lock(self, db: AsyncSession, project_id: int) -> None:
+        """Serialise refreshes of one project until the transaction ends"""
+        if db.bind.dialect.name == "postgresql":
+            await db.execute(
+                text("SELECT pg_advisory_xact_lock(:namespace, :project_id)"),
+                {"namespace": self.lock_namespace, "project_id": project_id},
+            )
+
+    async def save_watermark(self, db: AsyncSession, project_id: int, refreshed_through: datetime) -> None:
+        watermark = await db.get(self.watermark_model, project_id)
+        if watermark is None:
+            db.add(self.watermark_model(
+                project_id=project_id, refreshed_through=refreshed_through, refreshed_at=datetime.utcnow()
+            ))
+        else:
+            watermark.refreshed_through = refreshed_through
+            watermark.refreshed_at = datetime.utcnow()
+
+    async def rebuild(self, db: AsyncSession, project_id: int) -> None:
+        """Recompute everything for the project and move its watermark"""
+        started = datetime.utcnow()
+        await self.lock(db, project_id)
+        await self.rebuild_all(db, project_id)
+        await self.save_watermark(db, project_id, started)
+        await db.commit()
+
+    async def refresh(self, db: AsyncSession, project_id: int) -> Optional[int]:
+        """
+        Recompute the buckets changed since the project's watermark
+
+        Returns the number of buckets recomputed, or None when the project
+        had no watermark yet and was rebuilt from scratch.
+        """
+        watermark = await db.get(self.watermark_model, project_id)
+        if watermark is None:
+            await self.rebuild(db, project_id)
+            return None
+
+        started = datetime.utcnow()
+        await self.lock(db, project_id)
+        since = watermark.refreshed_through - timedelta(seconds=getattr(settings, self.overlap_setting))
+        buckets = await changed_buckets(
+            db, await project_domain_ids(db, project_id), ScrapePage.updated_at > since
+        )
+        rebuilt = await self.rebuild_buckets(db, project_id, buckets)
+        await self.save_watermark(db, project_id, started)
+        await db.commit()
+        return rebuilt
+
+    async def refresh_buckets(self, db: AsyncSession, project_id: int, buckets: Iterable[Bucket]) -> int:
+        """Recompute specific buckets, e.g. after pages were deleted"""
+        buckets = list(buckets)
+        if not buckets:
+            return 0
+        await self.lock(db, project_id)
+        rebuilt = await self.rebuild_buckets(db, project_id, buckets)
+        await db.commit()
+        return rebuilt
@@ -16,14 +16,22 @@ Provides Prometheus-compatible metrics in the standard exposition format with:
 - Performance histograms and gauges
 - Health status indicators
 - SLA compliance metrics
+
+Exposition never queries anything: derived metrics are grouped (``MetricGroup``)
+and each group is refreshed by a background collector on its own interval,
+with cheap in-memory stats every few seconds and the 30-day business
+aggregates every few minutes. A scrape serializes the last snapshot of every
+group plus the in-process hot-path registry from ``app.core.metrics``. A group
+that fails or times out keeps its previous values and reports the error in
+``chrono_metrics_group_refresh_error``.
 """
 
 import asyncio
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict
 
 from sqlalchemy import text
@@ -31,7 +39,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, func
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import METRICS_GROUP_REFRESH_SECONDS, render_registry
 from app.services.duckdb_service import duckdb_service
 from app.services.meilisearch_service import MeilisearchService
 from app.services.monitoring_service import monitoring_service, get_monitoring_service
@@ -53,6 +62,27 @@ class PrometheusMetric:
     timestamp: Optional[float] = None
 
 
+@dataclass
+class MetricGroup:
+    """Derived metrics that are collected together on their own schedule"""
+    name: str
+    collect: Callable[..., Awaitable[List[str]]]
+    interval_seconds: float
+    uses_db: bool = False
+    lines: List[str] = field(default_factory=list)
+    refreshed_at: Optional[float] = None  # wall clock of the last successful refresh
+    attempted_at: Optional[float] = None  # monotonic time of the last attempt
+    last_error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def is_due(self, now: float) -> bool:
+        return self.attempted_at is None or now - self.attempted_at >= self.interval_seconds
+
+    @property
+    def in_flight(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
 class PrometheusMetricsService:
     """
     Enhanced Prometheus metrics service for Phase 2 DuckDB analytics system
@@ -65,10 +95,12 @@ class PrometheusMetricsService:
     - Health status and SLA compliance
     """
     
-    def __init__(self):
-        self._metrics_cache: Dict[str, PrometheusMetric] = {}
-        self._cache_ttl = 30  # seconds
-        self._last_collection_time: Optional[datetime] = None
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._groups: Dict[str, MetricGroup] = {
+            group.name: group for group in self._build_groups()
+        }
+        self._collector_task: Optional[asyncio.Task] = None
         
         # Metric name prefixes for organization
         self.prefixes = {
@@ -83,75 +115,191 @@ class PrometheusMetricsService:
             "chrono_business_": "Business and cost metrics"
         }
     
-    async def generate_all_metrics(self, db: AsyncSession) -> str:
-        """Generate all Prometheus metrics in exposition format"""
+    def _build_groups(self) -> List[MetricGroup]:
+        """Metric groups in exposition order, with their refresh intervals"""
+        fast = settings.PROMETHEUS_FAST_GROUP_INTERVAL_SECONDS
+        db = settings.PROMETHEUS_DB_GROUP_INTERVAL_SECONDS
+        business = settings.PROMETHEUS_BUSINESS_GROUP_INTERVAL_SECONDS
+        return [
+            MetricGroup("system_overview", self.generate_system_overview_metrics, db, uses_db=True),
+            MetricGroup("shared_pages", self.generate_shared_pages_metrics, db, uses_db=True),
+            MetricGroup("duckdb", self.generate_duckdb_metrics, fast),
+            MetricGroup("data_sync", self.generate_data_sync_metrics, fast),
+            MetricGroup("query_routing", self.generate_query_routing_metrics, fast),
+            MetricGroup("parquet_pipeline", self.generate_parquet_pipeline_metrics, fast),
+            MetricGroup("analytics_api", self.generate_analytics_api_metrics, fast),
+            MetricGroup("system_resources", self.generate_system_resource_metrics, fast),
+            MetricGroup("health_status", self.generate_health_status_metrics, fast),
+            MetricGroup("business", self.generate_business_metrics, business, uses_db=True),
+            MetricGroup("performance_histograms", self.generate_performance_histograms, fast),
+            MetricGroup("sla_compliance", self.generate_sla_compliance_metrics, fast),
+        ]
+    
+    @property
+    def groups(self) -> List[MetricGroup]:
+        return list(self._groups.values())
+    
+    @property
+    def collector_running(self) -> bool:
+        return self._collector_task is not None and not self._collector_task.done()
+    
+    async def refresh_group(self, group: MetricGroup) -> bool:
+        """Collect one group into its snapshot; on failure the previous snapshot is kept"""
+        group.attempted_at = time.monotonic()
+        started = time.perf_counter()
+        timeout = settings.PROMETHEUS_GROUP_TIMEOUT_SECONDS
         try:
-            # Check cache validity
-            if (self._last_collection_time and 
-                (datetime.utcnow() - self._last_collection_time).seconds < self._cache_ttl):
-                return self._format_cached_metrics()
-            
-            metrics_lines = []
-            
-            # Header comment
-            metrics_lines.extend([
-                "# Chrono Scraper Phase 2 DuckDB Analytics Metrics",
-                f"# Generated at: {datetime.utcnow().isoformat()}",
-                ""
-            ])
-            
-            # Core shared pages metrics (legacy compatibility)
-            shared_metrics = await self.generate_shared_pages_metrics(db)
-            metrics_lines.extend(shared_metrics)
-            
-            # Phase 2 DuckDB analytics metrics
-            duckdb_metrics = await self.generate_duckdb_metrics()
-            metrics_lines.extend(duckdb_metrics)
-            
-            # Data synchronization metrics
-            sync_metrics = await self.generate_data_sync_metrics()
-            metrics_lines.extend(sync_metrics)
-            
-            # Query routing and optimization metrics
-            query_metrics = await self.generate_query_routing_metrics()
-            metrics_lines.extend(query_metrics)
-            
-            # Parquet pipeline metrics
-            parquet_metrics = await self.generate_parquet_pipeline_metrics()
-            metrics_lines.extend(parquet_metrics)
-            
-            # Analytics API metrics
-            api_metrics = await self.generate_analytics_api_metrics()
-            metrics_lines.extend(api_metrics)
-            
-            # System resource metrics
-            system_metrics = await self.generate_system_resource_metrics()
-            metrics_lines.extend(system_metrics)
-            
-            # Health status metrics
-            health_metrics = await self.generate_health_status_metrics()
-            metrics_lines.extend(health_metrics)
-            
-            # Business and cost metrics
-            business_metrics = await self.generate_business_metrics(db)
-            metrics_lines.extend(business_metrics)
-            
-            # Performance percentiles and histograms
-            performance_metrics = await self.generate_performance_histograms()
-            metrics_lines.extend(performance_metrics)
-            
-            # SLA compliance metrics
-            sla_metrics = await self.generate_sla_compliance_metrics()
-            metrics_lines.extend(sla_metrics)
-            
-            self._last_collection_time = datetime.utcnow()
-            
-            return "\n".join(metrics_lines)
-            
+            if group.uses_db:
+                async with self._session_factory() as db:
+                    lines = await asyncio.wait_for(group.collect(db), timeout=timeout)
+            else:
+                lines = await asyncio.wait_for(group.collect(), timeout=timeout)
+        except Exception as e:
+            group.last_error = str(e) or type(e).__name__
+            METRICS_GROUP_REFRESH_SECONDS.labels(group.name, "error").observe(time.perf_counter() - started)
+            logger.warning(f"Refreshing metrics group {group.name} failed: {group.last_error}")
+            return False
+        
+        group.lines = lines
+        group.refreshed_at = time.time()
+        group.last_error = None
+        METRICS_GROUP_REFRESH_SECONDS.labels(group.name, "success").observe(time.perf_counter() - started)
+        return True
+    
+    def _schedule_due_groups(self, force: bool = False) -> List[asyncio.Task]:
+        """Start a refresh for every due group that is not already refreshing"""
+        now = time.monotonic()
+        scheduled = []
+        for group in self._groups.values():
+            if group.in_flight or not (force or group.is_due(now)):
+                continue
+            group.task = asyncio.create_task(self.refresh_group(group), name=f"metrics-{group.name}")
+            scheduled.append(group.task)
+        return scheduled
+    
+    async def refresh_due_groups(self, force: bool = False) -> List[str]:
+        """Refresh the due (or, with ``force``, all) groups concurrently; returns their names"""
+        tasks = self._schedule_due_groups(force=force)
+        await asyncio.gather(*tasks)
+        return [task.get_name().removeprefix("metrics-") for task in tasks]
+    
+    async def _collection_loop(self) -> None:
+        # Wake often enough that no group is refreshed much later than its interval
+        tick = max(1.0, min(group.interval_seconds for group in self._groups.values()) / 5)
+        while True:
+            try:
+                self._schedule_due_groups()
+            except Exception as e:
+                logger.error(f"Metrics collector error: {e}")
+            await asyncio.sleep(tick)
+    
+    def start_background_collection(self) -> None:
+        """Start refreshing metric groups on their schedules (idempotent)"""
+        if self.collector_running:
+            return
+        self._collector_task = asyncio.create_task(self._collection_loop(), name="prometheus-metrics-collector")
+        logger.info(f"Prometheus metrics collector started for {len(self._groups)} groups")
+    
+    async def stop_background_collection(self) -> None:
+        tasks = [self._collector_task] + [group.task for group in self._groups.values()]
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+        await asyncio.gather(*(task for task in tasks if task is not None), return_exceptions=True)
+        self._collector_task = None
+    
+    def render_metrics(self) -> str:
+        """Serialize the current snapshot of every group plus the hot-path registry"""
+        metrics_lines = [
+            "# Chrono Scraper Phase 2 DuckDB Analytics Metrics",
+            f"# Generated at: {datetime.utcnow().isoformat()}",
+            ""
+        ]
+        for group in self._groups.values():
+            metrics_lines.extend(group.lines)
+        metrics_lines.extend(self._collector_status_lines())
+        metrics_lines.append(render_registry())
+        return "\n".join(metrics_lines)
+    
+    def _collector_status_lines(self) -> List[str]:
+        metrics_lines = [
+            "# HELP chrono_metrics_group_last_refresh_timestamp_seconds Unix time of the last successful refresh of a metrics group",
+            "# TYPE chrono_metrics_group_last_refresh_timestamp_seconds gauge",
+        ]
+        metrics_lines.extend(
+            f'chrono_metrics_group_last_refresh_timestamp_seconds{{group="{group.name}"}} {group.refreshed_at or 0}'
+            for group in self._groups.values()
+        )
+        metrics_lines.extend([
+            "",
+            "# HELP chrono_metrics_group_refresh_error Whether the last refresh of a metrics group failed (values are stale)",
+            "# TYPE chrono_metrics_group_refresh_error gauge",
+        ])
+        metrics_lines.extend(
+            f'chrono_metrics_group_refresh_error{{group="{group.name}"}} {1 if group.last_error else 0}'
+            for group in self._groups.values()
+        )
+        metrics_lines.append("")
+        return metrics_lines
+    
+    async def generate_all_metrics(self, db: Optional[AsyncSession] = None) -> str:
+        """
+        Prometheus exposition of the current metric values
+        
+        With the background collector running this only serializes snapshots.
+        Without it (scripts, tests), due groups are refreshed concurrently first.
+        ``db`` is accepted for compatibility; groups open their own sessions.
+        """
+        try:
+            if not self.collector_running:
+                await self.refresh_due_groups()
+            return self.render_metrics()
         except Exception as e:
             logger.error(f"Error generating Prometheus metrics: {e}")
             return self._generate_error_metrics(str(e))
     
+    async def generate_system_overview_metrics(self, db: AsyncSession) -> List[str]:
+        """Generate user, project, domain and page totals"""
+        from app.services.monitoring import MonitoringService
+        
+        try:
+            overview = await MonitoringService.get_system_overview(db)
+        except Exception as e:
+            logger.error(f"Error generating system overview metrics: {e}")
+            return [
+                "# HELP chrono_metrics_error Metrics collection error",
+                "# TYPE chrono_metrics_error gauge",
+                "chrono_metrics_error 1",
+                ""
+            ]
+        
+        return [
+            "# HELP chrono_users_total Total number of users",
+            "# TYPE chrono_users_total gauge",
+            f"chrono_users_total {overview['totals']['users']}",
+            "",
+            "# HELP chrono_projects_total Total number of projects",
+            "# TYPE chrono_projects_total gauge",
+            f"chrono_projects_total {overview['totals']['projects']}",
+            "",
+            "# HELP chrono_domains_total Total number of domains",
+            "# TYPE chrono_domains_total gauge",
+            f"chrono_domains_total {overview['totals']['domains']}",
+            "",
+            "# HELP chrono_pages_total Total number of pages",
+            "# TYPE chrono_pages_total gauge",
+            f"chrono_pages_total {overview['totals']['pages']}",
+            "",
+            "# HELP chrono_active_users Total number of active users",
+            "# TYPE chrono_active_users gauge",
+            f"chrono_active_users {overview['active']['users']}",
+            "",
+            "# HELP chrono_active_projects Total number of active projects",
+            "# TYPE chrono_active_projects gauge",
+            f"chrono_active_projects {overview['active']['projects']}",
+            ""
+        ]
+    
     async def generate_shared_pages_metrics(self, db: AsyncSession) -> List[str]:
         """Generate shared pages architecture metrics (legacy compatibility)"""
         metrics_lines = []
@@ -1065,22 +1213,6 @@ class PrometheusMetricsService:
         
         return metrics_lines
     
-    def _format_cached_metrics(self) -> str:
-        """Format cached metrics for quick response"""
-        try:
-            metrics_lines = []
-            for metric in self._metrics_cache.values():
-                metrics_lines.extend([
-                    f"# HELP {metric.name} {metric.help_text}",
-                    f"# TYPE {metric.name} {metric.metric_type}",
-                    f"{metric.name} {metric.value}",
-                    ""
-                ])
-            return "\n".join(metrics_lines)
-        except Exception as e:
-            logger.error(f"Error formatting cached metrics: {e}")
-            return self._generate_error_metrics("Cache formatting error")
-    
     def _generate_error_metrics(self, error_message: str) -> str:
         """Generate error metrics when collection fails"""
         return f"""# Chrono Scraper Metrics Collection Error
@@ -7,6 +7,7 @@ import redis.asyncio as redis
 from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.core.redis_pool import available_redis
 
 
 class RateLimitExceeded(HTTPException):
@@ -24,6 +25,7 @@ class RateLimiter:
     
     def __init__(self, redis_url: str = None):
         self.redis_url = redis_url or settings.REDIS_URL
+        # Overrides the shared pool client when set
         self._redis: Optional[redis.Redis] = None
         
         # In-memory fallback for when Redis is unavailable
@@ -31,23 +33,11 @@ class RateLimiter:
         self._memory_cleanup_interval = 300  # 5 minutes
         self._last_cleanup = time.time()
     
-    async def get_redis(self) -> redis.Redis:
-        """Get Redis connection"""
-        if self._redis is None:
-            try:
-                self._redis = redis.from_url(
-                    self.redis_url,
-                    encoding="utf-8",
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5
-                )
-                # Test connection
-                await self._redis.ping()
-            except Exception:
-                # Redis unavailable, will fall back to memory store
-                self._redis = None
-        return self._redis
+    async def get_redis(self) -> Optional[redis.Redis]:
+        """Get Redis connection, or None to fall back to the memory store"""
+        if self._redis is not None:
+            return self._redis
+        return await available_redis(self.redis_url)
     
     async def check_rate_limit(
         self,
@@ -124,12 +114,11 @@ class RateLimiter:
                 retry_after=max(retry_after, 1)
             )
         
-        # Add current request(s)
-        for _ in range(cost):
-            await redis_client.zadd(key, {str(now + (_ * 0.001)): now})
-        
-        # Set expiration
-        await redis_client.expire(key, window_seconds + 60)
+        # Add current request(s) and set expiration in one round trip
+        pipe = redis_client.pipeline()
+        pipe.zadd(key, {str(now + (i * 0.001)): now for i in range(cost)})
+        pipe.expire(key, window_seconds + 60)
+        await pipe.execute()
         
         return True
     
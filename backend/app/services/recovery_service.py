@@ -14,9 +14,6 @@ This service provides:
 
 import os
 import json
-import gzip
-import lz4.frame
-import zstandard as zstd
 import tempfile
 import asyncio
 import shutil
@@ -34,6 +31,7 @@ from app.services.backup_service import (
     BackupConfig, BackupType, 
     StorageBackend, backup_service
 )
+from app.services.backup_streaming import decode_archive
 from app.services.monitoring import MonitoringService
 
 
@@ -372,45 +370,15 @@ class RecoveryService:
         extract_path = temp_path / "extracted"
         extract_path.mkdir()
         
-        # Decrypt if necessary
-        if download_path.name.endswith('.enc'):
-            decrypted_path = temp_path / "decrypted"
-            async with aiofiles.open(download_path, 'rb') as encrypted_file:
-                encrypted_data = await encrypted_file.read()
-                decrypted_data = self.fernet.decrypt(encrypted_data)
-                
-                async with aiofiles.open(decrypted_path, 'wb') as decrypted_file:
-                    await decrypted_file.write(decrypted_data)
-            
-            download_path = decrypted_path
-        
-        # Decompress if necessary
+        # Decrypt and decompress, streaming part by part; the format comes from
+        # the stored archive's extensions
         decompressed_path = temp_path / "decompressed"
-        
-        if download_path.name.endswith('.gz'):
-            async with aiofiles.open(download_path, 'rb') as compressed_file:
-                compressed_data = await compressed_file.read()
-                decompressed_data = gzip.decompress(compressed_data)
-                
-                async with aiofiles.open(decompressed_path, 'wb') as decompressed_file:
-                    await decompressed_file.write(decompressed_data)
-        elif download_path.name.endswith('.lz4'):
-            async with aiofiles.open(download_path, 'rb') as compressed_file:
-                compressed_data = await compressed_file.read()
-                decompressed_data = lz4.frame.decompress(compressed_data)
-                
-                async with aiofiles.open(decompressed_path, 'wb') as decompressed_file:
-                    await decompressed_file.write(decompressed_data)
-        elif download_path.name.endswith('.zst'):
-            async with aiofiles.open(download_path, 'rb') as compressed_file:
-                compressed_data = await compressed_file.read()
-                dctx = zstd.ZstdDecompressor()
-                decompressed_data = dctx.decompress(compressed_data)
-                
-                async with aiofiles.open(decompressed_path, 'wb') as decompressed_file:
-                    await decompressed_file.write(decompressed_data)
-        else:
-            decompressed_path = download_path
+        await decode_archive(
+            str(download_path),
+            str(decompressed_path),
+            Path(backup_file).name,
+            self.fernet.decrypt if self.fernet else None
+        )
         
         # Extract tar archive
         cmd = ["tar", "-xf", str(decompressed_path), "-C", str(extract_path)]
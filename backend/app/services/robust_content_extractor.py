@@ -22,9 +22,9 @@ import json
 
 from pybreaker import CircuitBreaker
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-import redis
 
 from ..core.config import settings
+from ..core.redis_pool import available_redis, coalesced_get
 from .intelligent_content_extractor import get_intelligent_extractor, ContentExtractionResult
 from .archive_org_client import get_archive_client
 from ..models.extraction_data import ExtractedContent, ContentExtractionException
@@ -78,7 +78,7 @@ class DeadLetterQueue:
     """Redis-based Dead Letter Queue for failed extractions"""
     
     def __init__(self, redis_url: str = None):
-        self.redis_client = redis.from_url(redis_url or settings.REDIS_URL)
+        self.redis_url = redis_url or settings.REDIS_URL
         self.dlq_stream = "extraction_failures"
         self.retry_stream = "extraction_retries"
         
@@ -94,7 +94,11 @@ class DeadLetterQueue:
                 'total_duration': sum(attempt.duration for attempt in attempts)
             }
             
-            self.redis_client.xadd(self.dlq_stream, failure_data)
+            redis_client = await available_redis(self.redis_url)
+            if not redis_client:
+                logger.warning(f"Redis unavailable, failed extraction not queued: {url}")
+                return
+            await redis_client.xadd(self.dlq_stream, failure_data)
             logger.info(f"Added failed extraction to DLQ: {url}")
             
         except Exception as e:
@@ -103,9 +107,11 @@ class DeadLetterQueue:
     async def get_failed_extractions(self, count: int = 10) -> List[Dict[str, Any]]:
         """Retrieve failed extractions for analysis"""
         try:
-            entries = self.redis_client.xrevrange(self.dlq_stream, count=count)
-            return [{'id': entry_id.decode(), **{k.decode(): v.decode() for k, v in fields.items()}} 
-                   for entry_id, fields in entries]
+            redis_client = await available_redis(self.redis_url)
+            if not redis_client:
+                return []
+            entries = await redis_client.xrevrange(self.dlq_stream, count=count)
+            return [{'id': entry_id, **fields} for entry_id, fields in entries]
         except Exception as e:
             logger.error(f"Failed to retrieve DLQ entries: {e}")
             return []
@@ -177,8 +183,7 @@ class RobustContentExtractor:
         self.quality_scorer = QualityScorer()
         self.dlq = DeadLetterQueue()
         
-        # Cache configuration
-        self.redis_client = redis.from_url(settings.REDIS_URL)
+        # Cache configuration (connections come from the shared pool)
         self.cache_prefix = "robust_extraction:"
         self.cache_ttl = 3600  # 1 hour
         
@@ -202,8 +207,12 @@ class RobustContentExtractor:
     async def _get_cached_result(self, url: str) -> Optional[ExtractedContent]:
         """Retrieve cached extraction result"""
         try:
+            redis_client = await available_redis()
+            if not redis_client:
+                return None
             cache_key = self._get_cache_key(url)
-            cached_data = self.redis_client.get(cache_key)
+            # Batch extractions check the cache concurrently; the lookups share MGETs
+            cached_data = await coalesced_get(redis_client, cache_key)
             
             if cached_data:
                 data = json.loads(cached_data)
@@ -234,7 +243,10 @@ class RobustContentExtractor:
                 'source_url': result.source_url
             })
             
-            self.redis_client.setex(cache_key, self.cache_ttl, cache_data)
+            redis_client = await available_redis()
+            if not redis_client:
+                return
+            await redis_client.setex(cache_key, self.cache_ttl, cache_data)
             logger.debug(f"Cached result for {url}")
             
         except Exception as e:
@@ -476,11 +488,15 @@ class RobustContentExtractor:
                         'error': str(e)
                     }
             
-            # DLQ statistics
-            failed_count = self.redis_client.xlen(self.dlq.dlq_stream)
-            
-            # Cache statistics
-            cache_info = self.redis_client.info('memory')
+            redis_client = await available_redis()
+            if redis_client:
+                # DLQ statistics
+                failed_count = await redis_client.xlen(self.dlq.dlq_stream)
+                
+                # Cache statistics
+                cache_info = await redis_client.info('memory')
+            else:
+                failed_count, cache_info = 0, {}
             
             return {
                 'circuit_breakers': breaker_states,
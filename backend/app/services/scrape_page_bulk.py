@@ -0,0 +1,370 @@
+"""
+Set-based execution of scrape page bulk operations
+
+A bulk action is translated into one ``UPDATE ... WHERE`` (or ``DELETE``)
+per chunk instead of loading ScrapePage objects and changing them one by one.
+The selection is walked in ascending id order; each chunk is bounded by the
+id of its last selected row, so every statement touches a narrow id range and
+commits on its own, keeping transactions short. The statement repeats the
+action's eligibility rules in its WHERE clause and returns the ids it
+actually changed, so selected pages that were not eligible are counted as
+skipped without ever being read.
+
+Progress is written to Redis after every chunk (readable from any API
+process, including while a Celery worker runs the job) and broadcast to the
+project's WebSocket subscribers.
+"""
+import json
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import cast, delete, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.scrape_page_api import (
+    BulkManualProcessingRequest,
+    BulkOperationProgress,
+    BulkOperationResult,
+    BulkScrapePageAction,
+    BulkScrapePageOperationStatus,
+)
+from app.models.scraping import ScrapePage, ScrapePageStatus
+from app.services.scrape_page_rollups import refresh_rollup_buckets
+from app.services.domain_timeline_cubes import refresh_timeline_days
+from app.services.websocket_service import websocket_manager
+from app.tasks.celery_app import celery_app
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - redis is a hard dependency in deployments
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MARKABLE_STATUSES = [
+    ScrapePageStatus.FILTERED_LIST_PAGE,
+    ScrapePageStatus.FILTERED_ALREADY_PROCESSED,
+    ScrapePageStatus.FILTERED_LOW_PRIORITY,
+]
+SKIPPABLE_STATUSES = [ScrapePageStatus.PENDING, ScrapePageStatus.AWAITING_MANUAL_REVIEW]
+RETRYABLE_STATUSES = [ScrapePageStatus.FAILED, ScrapePageStatus.RETRY]
+
+# Actions whose changed pages are queued for processing afterwards
+QUEUEING_ACTIONS = {BulkScrapePageAction.MARK_FOR_PROCESSING, BulkScrapePageAction.RETRY}
+
+
+def _merge_filter_details(dialect_name: str, details: Dict[str, Any]):
+    """SQL expression merging ``details`` into the existing filter_details JSON"""
+    payload = json.dumps(details)
+    if dialect_name == "postgresql":
+        return func.coalesce(ScrapePage.filter_details, cast("{}", JSONB)).op("||")(cast(payload, JSONB))
+    return func.json_patch(func.coalesce(ScrapePage.filter_details, "{}"), payload)
+
+
+def _status_values(statuses) -> List[str]:
+    return [status.value for status in statuses]
+
+
+def action_update_plan(
+    action: BulkScrapePageAction,
+    request: BulkManualProcessingRequest,
+    dialect_name: str,
+) -> Optional[Tuple[List[Any], Dict[str, Any]]]:
+    """
+    Eligibility criteria and column values for an updating action
+
+    Mirrors what the per-page implementation did to each page. Returns None
+    when the action changes nothing (e.g. a priority update without a
+    priority), so every selected page is skipped.
+    """
+    now = datetime.utcnow()
+    reset_errors = {
+        "retry_count": 0,
+        "error_message": None,
+        "error_type": None,
+        "last_attempt_at": None,
+    }
+
+    if action == BulkScrapePageAction.MARK_FOR_PROCESSING:
+        values = {
+            "status": ScrapePageStatus.AWAITING_MANUAL_REVIEW.value,
+            "is_manually_overridden": True,
+            "updated_at": now,
+        }
+        if request.reason:
+            values["filter_details"] = _merge_filter_details(
+                dialect_name, {"manual_review_reason": request.reason}
+            )
+        if request.priority_override is not None:
+            values["priority_score"] = request.priority_override
+        return [ScrapePage.status.in_(_status_values(MARKABLE_STATUSES))], values
+
+    if action == BulkScrapePageAction.APPROVE_ALL:
+        values = {
+            "status": ScrapePageStatus.PENDING.value,
+            "is_manually_overridden": True,
+            "updated_at": now,
+            **reset_errors,
+        }
+        return [ScrapePage.status == ScrapePageStatus.AWAITING_MANUAL_REVIEW.value], values
+
+    if action == BulkScrapePageAction.SKIP_ALL:
+        values = {
+            "status": ScrapePageStatus.MANUALLY_SKIPPED.value,
+            "filter_details": _merge_filter_details(
+                dialect_name, {"skip_reason": request.reason or "Bulk skip operation"}
+            ),
+            "updated_at": now,
+        }
+        return [ScrapePage.status.in_(_status_values(SKIPPABLE_STATUSES))], values
+
+    if action == BulkScrapePageAction.RETRY:
+        values = {"status": ScrapePageStatus.PENDING.value, "updated_at": now, **reset_errors}
+        return [ScrapePage.status.in_(_status_values(RETRYABLE_STATUSES))], values
+
+    if action == BulkScrapePageAction.RESET_STATUS:
+        new_status = request.new_status or ScrapePageStatus.PENDING
+        values = {"status": new_status.value, "updated_at": now, **reset_errors}
+        return [], values
+
+    if action == BulkScrapePageAction.UPDATE_PRIORITY:
+        if request.priority_override is None:
+            return None
+        return [], {"priority_score": request.priority_override, "updated_at": now}
+
+    raise ValueError(f"Unsupported bulk action: {action}")
+
+
+class BulkProgressStore:
+    """Latest BulkOperationProgress per operation, kept in Redis"""
+
+    KEY_PREFIX = "scrape_page_bulk"
+
+    def __init__(self, redis_url: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.ttl_seconds = ttl_seconds or settings.SCRAPE_PAGE_BULK_PROGRESS_TTL_SECONDS
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(self.redis_url, socket_timeout=5, socket_connect_timeout=2)
+        return self._client
+
+    def _key(self, project_id: int, operation_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{project_id}:{operation_id}"
+
+    async def save(self, project_id: int, progress: BulkOperationProgress) -> None:
+        try:
+            await self.client.set(
+                self._key(project_id, progress.operation_id), progress.model_dump_json(), ex=self.ttl_seconds
+            )
+        except Exception as e:
+            # Progress is informational; the operation itself carries on
+            logger.warning(f"Could not save progress for bulk operation {progress.operation_id}: {e}")
+
+    async def load(self, project_id: int, operation_id: str) -> Optional[BulkOperationProgress]:
+        try:
+            data = await self.client.get(self._key(project_id, operation_id))
+        except Exception as e:
+            logger.warning(f"Could not read progress for bulk operation {operation_id}: {e}")
+            return None
+        return BulkOperationProgress.model_validate_json(data) if data else None
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class SetBasedBulkExecutor:
+    """Runs one bulk operation as chunked set-based statements"""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        project_id: int,
+        operation_id: str,
+        request: BulkManualProcessingRequest,
+        selection: List[Any],
+        progress_store: Optional[BulkProgressStore] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        self.db = db
+        self.project_id = project_id
+        self.operation_id = operation_id
+        self.request = request
+        # WHERE criteria selecting the operation's pages (project scope and filters)
+        self.selection = selection
+        self.progress_store = progress_store
+        self.chunk_size = chunk_size or request.batch_size or settings.SCRAPE_PAGE_BULK_CHUNK_SIZE
+
+    async def count_selection(self) -> int:
+        """Number of pages the operation covers, capped at ``max_pages``"""
+        selected = select(ScrapePage.id).where(*self.selection).limit(self.request.max_pages).subquery()
+        return (await self.db.execute(select(func.count()).select_from(selected))).scalar() or 0
+
+    async def _next_chunk(self, after_id: int, size: int) -> Tuple[Optional[int], int]:
+        """Upper id bound and row count of the next ``size`` selected pages"""
+        chunk = (
+            select(ScrapePage.id)
+            .where(*self.selection, ScrapePage.id > after_id)
+            .order_by(ScrapePage.id)
+            .limit(size)
+            .subquery()
+        )
+        upper, count = (await self.db.execute(select(func.max(chunk.c.id), func.count()).select_from(chunk))).one()
+        return upper, count or 0
+
+    def _statement(self, after_id: int, upper_id: int, dialect_name: str):
+        window = [*self.selection, ScrapePage.id > after_id, ScrapePage.id <= upper_id]
+        if self.request.action == BulkScrapePageAction.DELETE:
+            # domain_id and created_at name the rollup buckets to recompute afterwards
+            return delete(ScrapePage).where(*window).returning(
+                ScrapePage.id, ScrapePage.domain_id, ScrapePage.created_at
+            )
+        plan = action_update_plan(self.request.action, self.request, dialect_name)
+        if plan is None:
+            return None
+        criteria, values = plan
+        return (
+            update(ScrapePage)
+            .where(*window, *criteria)
+            .values(**values)
+            .returning(ScrapePage.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def run(self, started_at: Optional[datetime] = None, total: Optional[int] = None) -> BulkOperationResult:
+        request = self.request
+        started_at = started_at or datetime.utcnow()
+        if total is None:
+            total = await self.count_selection()
+        dialect_name = self.db.bind.dialect.name
+
+        result = BulkOperationResult(
+            operation_id=self.operation_id,
+            action=request.action,
+            status=BulkScrapePageOperationStatus.RUNNING,
+            total_requested=total,
+            total_processed=0,
+            successful_count=0,
+            failed_count=0,
+            skipped_count=0,
+            started_at=started_at,
+            dry_run=False,
+            reason=request.reason,
+            filters_used=request.filters.dict(),
+        )
+        progress = BulkOperationProgress(
+            operation_id=self.operation_id,
+            status=BulkScrapePageOperationStatus.RUNNING,
+            current_step="updating",
+            total_steps=max(1, math.ceil(total / self.chunk_size)),
+            completed_steps=0,
+            total_batches=math.ceil(total / self.chunk_size),
+            items_total=total,
+            started_at=started_at,
+            updated_at=datetime.utcnow(),
+        )
+        await self._publish(progress)
+
+        last_id = 0
+        remaining = total
+        deleted_buckets = set()
+        while remaining > 0:
+            upper_id, selected = await self._next_chunk(last_id, min(self.chunk_size, remaining))
+            if not selected:
+                break
+            try:
+                statement = self._statement(last_id, upper_id, dialect_name)
+                rows = [] if statement is None else (await self.db.execute(statement)).all()
+                await self.db.commit()
+                changed = [row[0] for row in rows]
+                if request.action == BulkScrapePageAction.DELETE:
+                    deleted_buckets.update((row[1], row[2].date()) for row in rows)
+            except Exception as e:
+                await self.db.rollback()
+                logger.error(f"Bulk operation {self.operation_id} failed on ids {last_id + 1}-{upper_id}: {e}")
+                result.failed_count += selected
+                progress.errors_count += 1
+                progress.last_error = str(e)
+                changed = None
+
+            if changed is not None:
+                result.successful_page_ids.extend(changed)
+                result.successful_count += len(changed)
+                result.skipped_count += selected - len(changed)
+                if request.action in QUEUEING_ACTIONS:
+                    for page_id in changed:
+                        task_result = celery_app.send_task(
+                            'app.tasks.firecrawl_scraping.process_single_scrape_page',
+                            args=[page_id],
+                            kwargs={'manual_processing': True}
+                        )
+                        result.task_ids.append(task_result.id)
+
+            last_id = upper_id
+            remaining -= selected
+            progress.current_batch += 1
+            progress.completed_steps = progress.current_batch
+            progress.items_processed = total - remaining
+            progress.successful_count = result.successful_count
+            progress.failed_count = result.failed_count
+            progress.skipped_count = result.skipped_count
+            progress.progress_percentage = min(100.0, 100.0 * progress.items_processed / max(total, 1))
+            progress.updated_at = datetime.utcnow()
+            await self._publish(progress)
+
+        if deleted_buckets:
+            try:
+                await refresh_rollup_buckets(self.db, self.project_id, deleted_buckets)
+                await refresh_timeline_days(self.db, self.project_id, deleted_buckets)
+            except Exception as e:
+                await self.db.rollback()
+                logger.warning(f"Could not refresh rollups after bulk operation {self.operation_id}: {e}")
+
+        result.total_processed = result.successful_count + result.failed_count + result.skipped_count
+        if result.failed_count == 0:
+            result.status = BulkScrapePageOperationStatus.COMPLETED
+        elif result.successful_count or result.skipped_count:
+            result.status = BulkScrapePageOperationStatus.PARTIALLY_COMPLETED
+        else:
+            result.status = BulkScrapePageOperationStatus.FAILED
+        result.completed_at = datetime.utcnow()
+        result.duration_seconds = (result.completed_at - started_at).total_seconds()
+
+        progress.status = result.status
+        progress.current_step = "completed"
+        progress.progress_percentage = 100.0
+        progress.completed_at = result.completed_at
+        progress.updated_at = result.completed_at
+        result.progress = progress
+        await self._publish(progress, event="bulk_operation_completed")
+        return result
+
+    async def _publish(self, progress: BulkOperationProgress, event: str = "bulk_operation_progress") -> None:
+        if self.progress_store is not None:
+            await self.progress_store.save(self.project_id, progress)
+
+        try:
+            await websocket_manager.broadcast_to_project(
+                project_id=self.project_id,
+                message={
+                    "type": event,
+                    "operation_id": self.operation_id,
+                    "action": self.request.action.value,
+                    "progress": progress.model_dump(mode="json"),
+                    "successful_count": progress.successful_count,
+                    "failed_count": progress.failed_count,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to send WebSocket notification: {e}")
@@ -0,0 +1,195 @@
+"""
+Bulk ScrapePage ingestion via COPY
+
+Filtering decisions for a domain are streamed into a session-local staging
+table with PostgreSQL ``COPY`` and moved into ``scrape_pages`` with
+``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` against the
+``(domain_id, md5(original_url), unix_timestamp)`` unique index. The database does
+the deduplication, so no ORM objects or client-side sets of existing captures
+are built, and memory stays bounded by the chunk size.
+"""
+import io
+import json
+import logging
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "scrape_pages_ingest_staging"
+
+# Must match the expressions of uq_scrape_pages_domain_url_timestamp for the
+# conflict target to be inferred
+CAPTURE_CONFLICT_TARGET = "(domain_id, md5(original_url), unix_timestamp)"
+
+# Staging column name -> Postgres type. Order matches decision_to_row().
+STAGING_COLUMNS: Sequence[Tuple[str, str]] = (
+    ("original_url", "text"),
+    ("content_url", "text"),
+    ("unix_timestamp", "varchar(14)"),
+    ("mime_type", "varchar(100)"),
+    ("status_code", "integer"),
+    ("content_length", "bigint"),
+    ("digest_hash", "varchar(32)"),
+    ("status", "varchar(30)"),
+    ("filter_reason", "varchar(100)"),
+    ("filter_category", "varchar(50)"),
+    ("filter_details", "jsonb"),
+    ("matched_pattern", "varchar(200)"),
+    ("filter_confidence", "double precision"),
+    ("related_page_id", "integer"),
+    ("is_pdf", "boolean"),
+    ("priority_score", "integer"),
+    ("can_be_manually_processed", "boolean"),
+)
+
+
+@dataclass
+class IngestionResult:
+    """Outcome of a bulk ingestion run"""
+    inserted: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.skipped + self.failed
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+def decision_to_row(decision: Any) -> Tuple:
+    """Flatten a filtering decision into a staging row (same mapping as the ORM path)"""
+    cdx_record = decision.cdx_record
+    reason = _enum_value(decision.reason)
+    reason = str(reason) if reason is not None else None
+    mime_type = cdx_record.mime_type or "text/html"
+    filter_details = decision.filter_details
+    return (
+        cdx_record.original_url,
+        cdx_record.content_url,
+        str(cdx_record.timestamp),
+        mime_type,
+        int(cdx_record.status_code) if cdx_record.status_code else 200,
+        cdx_record.content_length_bytes,
+        getattr(cdx_record, "digest", None),
+        _enum_value(decision.status),
+        reason,
+        reason,
+        json.dumps(filter_details, default=str) if filter_details is not None else None,
+        decision.matched_pattern,
+        decision.confidence,
+        getattr(decision, "related_page_id", None),
+        cdx_record.mime_type == "application/pdf" if cdx_record.mime_type else False,
+        getattr(decision, "priority_score", None),
+        decision.can_be_manually_processed,
+    )
+
+
+def _csv_field(value: Any) -> str:
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def rows_to_csv(rows: Iterable[Tuple]) -> io.StringIO:
+    """
+    Encode rows for ``COPY ... (FORMAT csv)``
+
+    Every value is quoted and ``None`` is written as an empty unquoted field,
+    so NULL and empty strings stay distinct (the csv module quotes both).
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_field(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+class ScrapePageBulkIngestor:
+    """Stream filtering decisions into scrape_pages with database-side dedup"""
+
+    def __init__(self, db: Session, domain_id: int, scrape_session_id: Optional[int], chunk_size: int = 50000):
+        self.db = db
+        self.domain_id = domain_id
+        self.scrape_session_id = scrape_session_id
+        self.chunk_size = chunk_size
+
+    def _ensure_staging_table(self, cursor) -> None:
+        columns = ", ".join(f"{name} {pg_type}" for name, pg_type in STAGING_COLUMNS)
+        # Rows vanish on every commit; the table itself lives for the connection
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ({columns}) ON COMMIT DELETE ROWS"
+        )
+
+    def _insert_sql(self) -> str:
+        names = [name for name, _ in STAGING_COLUMNS]
+        column_list = ", ".join(names)
+        return f"""
+            INSERT INTO scrape_pages (
+                domain_id, scrape_session_id, {column_list},
+                is_duplicate, is_list_page, is_manually_overridden,
+                retry_count, max_retries, first_seen_at, created_at, updated_at
+            )
+            SELECT
+                %(domain_id)s, %(scrape_session_id)s, {column_list},
+                false, false, false,
+                0, 3, now(), now(), now()
+            FROM {STAGING_TABLE}
+            ON CONFLICT {CAPTURE_CONFLICT_TARGET} DO NOTHING
+        """
+
+    def _chunks(self, decisions: Iterable[Any], result: IngestionResult) -> Iterator[List[Tuple]]:
+        iterator = iter(decisions)
+        while True:
+            rows = []
+            for decision in islice(iterator, self.chunk_size):
+                try:
+                    rows.append(decision_to_row(decision))
+                except Exception as e:
+                    result.failed += 1
+                    logger.error(f"Failed to prepare ScrapePage row: {e}")
+            if not rows:
+                return
+            yield rows
+
+    def ingest(self, decisions: Iterable[Any]) -> IngestionResult:
+        """
+        COPY decisions into staging and insert the new ones, one transaction per chunk
+
+        Returns inserted/skipped counts; skipped rows already existed (or were
+        repeated within the input).
+        """
+        result = IngestionResult()
+        copy_sql = (
+            f"COPY {STAGING_TABLE} ({', '.join(name for name, _ in STAGING_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+        insert_sql = self._insert_sql()
+        params = {"domain_id": self.domain_id, "scrape_session_id": self.scrape_session_id}
+
+        for rows in self._chunks(decisions, result):
+            cursor = self.db.connection().connection.cursor()
+            try:
+                self._ensure_staging_table(cursor)
+                cursor.copy_expert(copy_sql, rows_to_csv(rows))
+                cursor.execute(insert_sql, params)
+                inserted = max(cursor.rowcount, 0)
+            finally:
+                cursor.close()
+            self.db.commit()
+
+            result.inserted += inserted
+            result.skipped += len(rows) - inserted
+            logger.info(
+                f"Bulk ingested {inserted} ScrapePage records for domain {self.domain_id} "
+                f"({len(rows) - inserted} already present, {result.total} processed)"
+            )
+
+        return result
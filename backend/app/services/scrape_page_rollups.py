@@ -0,0 +1,211 @@
+"""
+Materialized per-project, per-day analytics for ScrapePages
+
+The statistics and analytics endpoints read ``scrape_page_daily_rollups``
+instead of grouping the project's ScrapePages on every request, so their cost
+depends on the number of (domain, day, dimension) combinations rather than on
+the number of pages.
+
+Rollups are refreshed incrementally from a per-project watermark. Every
+insert and status change bumps ``scrape_pages.updated_at``, so the pages
+updated since the last refresh name the (domain, creation day) buckets that
+may have changed; only those buckets are recomputed, each one completely from
+``scrape_pages`` (via the (domain_id, created_at) index), which makes a
+refresh idempotent. The scan starts ``SCRAPE_PAGE_ROLLUP_OVERLAP_SECONDS``
+before the watermark to pick up rows from transactions that committed after
+the previous refresh but carry an earlier ``updated_at``. The watermark and
+lock handling is shared with the domain timelines, see
+app.services.project_refresh.
+
+Deleted pages leave no ``updated_at`` behind; code that deletes pages passes
+the affected buckets to ``refresh_rollup_buckets``.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.scraping import ScrapePage, ScrapePageDailyRollup, ScrapePageRollupWatermark
+from app.services.project_refresh import CREATED_DAY, Bucket, ProjectRefresh, project_domain_ids
+
+logger = logging.getLogger(__name__)
+
+# Namespace for the per-project advisory lock serialising refreshes
+ROLLUP_LOCK_NAMESPACE = 7040
+
+CONFIDENCE_BUCKET = case(
+    (ScrapePage.filter_confidence.is_(None), None),
+    (ScrapePage.filter_confidence < 0.2, '0.0-0.2'),
+    (ScrapePage.filter_confidence < 0.4, '0.2-0.4'),
+    (ScrapePage.filter_confidence < 0.6, '0.4-0.6'),
+    (ScrapePage.filter_confidence < 0.8, '0.6-0.8'),
+    else_='0.8-1.0'
+)
+
+# Rollup dimensions and the scrape_pages expressions they are grouped by
+DIMENSIONS = {
+    "status": ScrapePage.status,
+    "filter_category": ScrapePage.filter_category,
+    "filter_reason": ScrapePage.filter_reason,
+    "priority_score": ScrapePage.priority_score,
+    "confidence_bucket": CONFIDENCE_BUCKET,
+    "is_manually_overridden": ScrapePage.is_manually_overridden,
+    "can_be_manually_processed": ScrapePage.can_be_manually_processed,
+}
+
+
+def _bucket_rows(project_id: int, domain_id: int, criteria):
+    """INSERT ... SELECT aggregating one domain's pages matching ``criteria``"""
+    dimensions = list(DIMENSIONS.values())
+    aggregated = (
+        select(
+            literal(project_id),
+            ScrapePage.domain_id,
+            CREATED_DAY,
+            *dimensions,
+            func.count(),
+            func.coalesce(func.sum(ScrapePage.total_processing_time), 0.0),
+            func.count(ScrapePage.total_processing_time),
+            func.coalesce(func.sum(ScrapePage.content_length), 0),
+            func.count(ScrapePage.content_length),
+        )
+        .where(ScrapePage.domain_id == domain_id, *criteria)
+        .group_by(ScrapePage.domain_id, CREATED_DAY, *dimensions)
+    )
+    columns = [
+        "project_id", "domain_id", "day", *DIMENSIONS,
+        "page_count", "processing_time_sum", "processing_time_count",
+        "content_length_sum", "content_length_count",
+    ]
+    return insert(ScrapePageDailyRollup).from_select(columns, aggregated)
+
+
+async def _rebuild_buckets(db: AsyncSession, project_id: int, buckets: Iterable[Bucket]) -> int:
+    by_domain: Dict[int, Set[date]] = defaultdict(set)
+    for domain_id, day in buckets:
+        by_domain[domain_id].add(day)
+
+    for domain_id, days in by_domain.items():
+        days = sorted(days)
+        await db.execute(
+            delete(ScrapePageDailyRollup).where(
+                ScrapePageDailyRollup.domain_id == domain_id,
+                ScrapePageDailyRollup.day.in_(days),
+            )
+        )
+        # The created_at range keeps the scan on the (domain_id, created_at) index
+        start = datetime.combine(days[0], datetime.min.time())
+        end = datetime.combine(days[-1], datetime.min.time()) + timedelta(days=1)
+        await db.execute(_bucket_rows(project_id, domain_id, [
+            ScrapePage.created_at >= start,
+            ScrapePage.created_at < end,
+            CREATED_DAY.in_(days),
+        ]))
+    return sum(len(days) for days in by_domain.values())
+
+
+async def _rebuild_all(db: AsyncSession, project_id: int) -> None:
+    await db.execute(delete(ScrapePageDailyRollup).where(ScrapePageDailyRollup.project_id == project_id))
+    for domain_id in await project_domain_ids(db, project_id):
+        await db.execute(_bucket_rows(project_id, domain_id, []))
+
+
+ROLLUP_REFRESH = ProjectRefresh(
+    watermark_model=ScrapePageRollupWatermark,
+    lock_namespace=ROLLUP_LOCK_NAMESPACE,
+    overlap_setting="SCRAPE_PAGE_ROLLUP_OVERLAP_SECONDS",
+    rebuild_all=_rebuild_all,
+    rebuild_buckets=_rebuild_buckets,
+)
+
+
+async def rebuild_project_rollups(db: AsyncSession, project_id: int) -> None:
+    """Recompute all of a project's rollups from scratch"""
+    await ROLLUP_REFRESH.rebuild(db, project_id)
+
+
+async def refresh_project_rollups(db: AsyncSession, project_id: int) -> Optional[int]:
+    """
+    Fold changes since the project's watermark into its rollups
+
+    Returns the number of (domain, day) buckets recomputed, or None when the
+    project had no rollups yet and they were built from scratch.
+    """
+    return await ROLLUP_REFRESH.refresh(db, project_id)
+
+
+async def refresh_rollup_buckets(db: AsyncSession, project_id: int, buckets: Iterable[Bucket]) -> int:
+    """Recompute specific (domain_id, day) buckets, e.g. after pages were deleted"""
+    return await ROLLUP_REFRESH.refresh_buckets(db, project_id, buckets)
+
+
+async def ensure_fresh_rollups(db: AsyncSession, project_id: int) -> None:
+    """Refresh the project's rollups when they are older than the allowed staleness"""
+    watermark = await db.get(ScrapePageRollupWatermark, project_id)
+    if watermark is not None:
+        age = datetime.utcnow() - watermark.refreshed_at.replace(tzinfo=None)
+        if age.total_seconds() < settings.SCRAPE_PAGE_ROLLUP_MAX_STALENESS_SECONDS:
+            return
+    await refresh_project_rollups(db, project_id)
+
+
+def rollup_query(project_id: int, domain_ids: List[int], *columns, where=()):
+    """Sum page counts from the project's rollups grouped by ``columns``"""
+    return (
+        select(*columns, func.coalesce(func.sum(ScrapePageDailyRollup.page_count), 0))
+        .where(
+            ScrapePageDailyRollup.project_id == project_id,
+            # Domains moved or deleted since their rollups were built drop out here
+            ScrapePageDailyRollup.domain_id.in_(domain_ids),
+            *where,
+        )
+        .group_by(*columns)
+    )
+
+
+async def rollup_counts(db: AsyncSession, project_id: int, domain_ids: List[int], column, where=()) -> Dict:
+    """``{value: page count}`` for one rollup dimension"""
+    result = await db.execute(rollup_query(project_id, domain_ids, column, where=(column.isnot(None), *where)))
+    return {value: int(count) for value, count in result.all()}
+
+
+async def rollup_total(db: AsyncSession, project_id: int, domain_ids: List[int], *where) -> int:
+    result = await db.execute(rollup_query(project_id, domain_ids, where=where))
+    return int(result.scalar() or 0)
+
+
+async def rollup_averages(db: AsyncSession, project_id: int, domain_ids: List[int]) -> Tuple[float, float]:
+    """Average total_processing_time and content_length over pages that have them"""
+    r = ScrapePageDailyRollup
+    row = (await db.execute(
+        select(
+            func.sum(r.processing_time_sum), func.sum(r.processing_time_count),
+            func.sum(r.content_length_sum), func.sum(r.content_length_count),
+        ).where(r.project_id == project_id, r.domain_id.in_(domain_ids))
+    )).one()
+    time_sum, time_count, length_sum, length_count = row
+    return (
+        float(time_sum or 0) / time_count if time_count else 0.0,
+        float(length_sum or 0) / length_count if length_count else 0.0,
+    )
+
+
+async def refresh_all_project_rollups(
+    db: AsyncSession, project_ids: Optional[List[int]] = None
+) -> Dict[int, Optional[int]]:
+    """Incrementally refresh every project that already has rollups (or the given ones)"""
+    if project_ids is None:
+        project_ids = list((await db.execute(select(ScrapePageRollupWatermark.project_id))).scalars().all())
+    refreshed = {}
+    for project_id in project_ids:
+        try:
+            refreshed[project_id] = await refresh_project_rollups(db, project_id)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to refresh scrape page rollups for project {project_id}: {e}")
+    return refreshed
+
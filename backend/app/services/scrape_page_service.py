@@ -1,14 +1,18 @@
 """
 Service layer for scrape page operations
 """
+import base64
+import json
 import logging
+import math
 import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from sqlmodel import select, and_, or_, func, desc, asc, case, text
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.scraping import ScrapePage, ScrapePageStatus
+from app.models.scraping import ScrapePage, ScrapePageDailyRollup, ScrapePageStatus
 from app.models.project import Domain, Project
 from app.models.scrape_page_api import (
     ScrapePageQueryParams,
@@ -26,14 +30,68 @@ from app.models.scrape_page_api import (
     BulkManualProcessingRequest,
     BulkOperationResult,
     BulkOperationPreview,
+    BulkOperationProgress,
     BulkScrapePageAction,
     BulkScrapePageOperationStatus
 )
+from app.core.config import settings
+from app.services.scrape_page_bulk import BulkProgressStore, SetBasedBulkExecutor
+from app.services.scrape_page_rollups import (
+    ensure_fresh_rollups,
+    rollup_averages,
+    rollup_counts,
+    rollup_total,
+)
 from app.services.websocket_service import websocket_manager
 from app.tasks.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
+SORT_COLUMNS = {
+    ScrapePageSortBy.CREATED_AT: ScrapePage.created_at,
+    ScrapePageSortBy.UPDATED_AT: ScrapePage.updated_at,
+    ScrapePageSortBy.PRIORITY_SCORE: ScrapePage.priority_score,
+    ScrapePageSortBy.CONTENT_LENGTH: ScrapePage.content_length,
+    ScrapePageSortBy.RETRY_COUNT: ScrapePage.retry_count,
+    ScrapePageSortBy.STATUS: ScrapePage.status,
+    ScrapePageSortBy.FILTER_CONFIDENCE: ScrapePage.filter_confidence,
+}
+
+DATETIME_SORTS = {ScrapePageSortBy.CREATED_AT, ScrapePageSortBy.UPDATED_AT}
+
+# Planner estimates at or below this are replaced by an exact count
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def encode_scrape_page_cursor(params: ScrapePageQueryParams, page: ScrapePage) -> str:
+    """Opaque token holding the sort key and id of the last row of a page"""
+    value = getattr(page, SORT_COLUMNS.get(params.sort_by, ScrapePage.created_at).key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, ScrapePageStatus):
+        value = value.value
+    payload = {"s": params.sort_by.value, "o": params.order.value, "v": value, "id": page.id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_scrape_page_cursor(params: ScrapePageQueryParams):
+    """Sort value and id from a cursor; the cursor must match the listing's sort"""
+    try:
+        raw = params.cursor + "=" * (-len(params.cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(raw.encode()))
+        value, last_id = payload["v"], int(payload["id"])
+        sort_by, order = payload["s"], payload["o"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    if sort_by != params.sort_by.value or order != params.order.value:
+        raise ValueError("Pagination cursor does not match the requested sort")
+    if value is not None and params.sort_by in DATETIME_SORTS:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid pagination cursor")
+    return value, last_id
+
 
 class ScrapePageService:
     """Service for scrape page operations"""
@@ -47,6 +105,11 @@ class ScrapePageService:
     ) -> ScrapePageListResponse:
         """
         Get paginated list of scrape pages for a project with advanced filtering
+
+        With ``query_params.cursor`` the page is located by keyset (sort value
+        and id of the last row seen) instead of OFFSET, so deep pages cost the
+        same as the first. With ``exact_total`` off, large totals come from
+        the planner's row estimate instead of a COUNT.
         """
         
         # Verify project ownership
@@ -59,31 +122,42 @@ class ScrapePageService:
         if not project:
             raise ValueError("Project not found or access denied")
         
-        # Build base query
-        base_query = select(ScrapePage).join(Domain).where(
-            Domain.project_id == project_id
-        )
+        # Build base query. Resolving the project's domains first turns the
+        # usual single-domain project into a domain_id equality, which the
+        # (domain_id, sort column, id) indexes answer in order without sorting
+        domain_ids = (await db.execute(
+            select(Domain.id).where(Domain.project_id == project_id)
+        )).scalars().all()
+        if len(domain_ids) == 1:
+            base_query = select(ScrapePage).where(ScrapePage.domain_id == domain_ids[0])
+        else:
+            base_query = select(ScrapePage).where(ScrapePage.domain_id.in_(domain_ids))
         
         # Apply filters
         base_query = ScrapePageService._apply_filters(base_query, query_params)
         
         # Get total count
-        count_query = select(func.count()).select_from(
-            base_query.subquery()
+        total, total_is_estimate = await ScrapePageService._count_total(
+            db, base_query, query_params.exact_total
         )
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
         
         # Apply sorting
         base_query = ScrapePageService._apply_sorting(base_query, query_params)
         
         # Apply pagination
-        offset = (query_params.page - 1) * query_params.limit
-        base_query = base_query.offset(offset).limit(query_params.limit)
+        if query_params.cursor:
+            base_query = ScrapePageService._apply_cursor(base_query, query_params)
+        else:
+            offset = (query_params.page - 1) * query_params.limit
+            base_query = base_query.offset(offset)
+        # One extra row tells whether another page follows
+        base_query = base_query.limit(query_params.limit + 1)
         
         # Execute query
         result = await db.execute(base_query)
         scrape_pages = result.scalars().all()
+        has_next = len(scrape_pages) > query_params.limit
+        scrape_pages = scrape_pages[:query_params.limit]
         
         # Convert to summary models
         page_summaries = [
@@ -92,19 +166,75 @@ class ScrapePageService:
         
         # Calculate pagination info
         total_pages = (total + query_params.limit - 1) // query_params.limit
-        has_next = query_params.page < total_pages
-        has_previous = query_params.page > 1
+        has_previous = query_params.page > 1 or bool(query_params.cursor)
+        next_cursor = None
+        if has_next and scrape_pages:
+            next_cursor = encode_scrape_page_cursor(query_params, scrape_pages[-1])
         
         return ScrapePageListResponse(
             pages=page_summaries,
             total=total,
-            page=query_params.page,
+            page=None if query_params.cursor else query_params.page,
             limit=query_params.limit,
             total_pages=total_pages,
             has_next=has_next,
-            has_previous=has_previous
+            has_previous=has_previous,
+            next_cursor=next_cursor,
+            total_is_estimate=total_is_estimate
         )
     
+    @staticmethod
+    async def _count_total(db: AsyncSession, base_query, exact: bool):
+        """
+        Total for a filtered listing query as ``(total, is_estimate)``
+
+        Estimates come from EXPLAIN on PostgreSQL; small estimates are
+        confirmed with an exact count since that is cheap.
+        """
+        count_query = select(func.count()).select_from(base_query.subquery())
+        if not exact and db.bind.dialect.name == "postgresql":
+            try:
+                # Explaining the listing itself rather than the COUNT: the root
+                # estimates the rows returned, while an aggregate's input may be
+                # a Gather whose estimate is per worker
+                compiled = base_query.compile(
+                    dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}
+                )
+                plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = int(plan[0]["Plan"]["Plan Rows"])
+                if estimate > EXACT_COUNT_THRESHOLD:
+                    return estimate, True
+            except Exception as e:
+                logger.debug(f"Falling back to exact scrape page count: {e}")
+        
+        total_result = await db.execute(count_query)
+        return total_result.scalar(), False
+    
+    @staticmethod
+    def _apply_cursor(query, params: ScrapePageQueryParams):
+        """Restrict the sorted query to rows after the cursor position"""
+        value, last_id = decode_scrape_page_cursor(params)
+        sort_column = ScrapePageService._sort_column(params)
+        
+        # Follows PostgreSQL's default NULL placement (last when ascending,
+        # first when descending) so the (sort column, id) indexes serve both orders
+        if params.order == SortOrder.DESC:
+            if value is None:
+                return query.where(or_(
+                    and_(sort_column.is_(None), ScrapePage.id < last_id),
+                    sort_column.isnot(None)
+                ))
+            return query.where(tuple_(sort_column, ScrapePage.id) < tuple_(value, last_id))
+        
+        if value is None:
+            return query.where(and_(sort_column.is_(None), ScrapePage.id > last_id))
+        return query.where(or_(
+            tuple_(sort_column, ScrapePage.id) > tuple_(value, last_id),
+            sort_column.is_(None)
+        ))
+    
     @staticmethod
     def _apply_filters(query, params: ScrapePageQueryParams):
         """Apply filters to the scrape page query"""
@@ -206,36 +336,25 @@ class ScrapePageService:
         
         return query
     
+    @staticmethod
+    def _sort_column(params: ScrapePageQueryParams):
+        """Column a listing is sorted by"""
+        return SORT_COLUMNS.get(params.sort_by, ScrapePage.created_at)
+    
     @staticmethod
     def _apply_sorting(query, params: ScrapePageQueryParams):
         """Apply sorting to the scrape page query"""
         
-        # Determine sort column
-        if params.sort_by == ScrapePageSortBy.CREATED_AT:
-            sort_column = ScrapePage.created_at
-        elif params.sort_by == ScrapePageSortBy.UPDATED_AT:
-            sort_column = ScrapePage.updated_at
-        elif params.sort_by == ScrapePageSortBy.PRIORITY_SCORE:
-            sort_column = ScrapePage.priority_score
-        elif params.sort_by == ScrapePageSortBy.CONTENT_LENGTH:
-            sort_column = ScrapePage.content_length
-        elif params.sort_by == ScrapePageSortBy.RETRY_COUNT:
-            sort_column = ScrapePage.retry_count
-        elif params.sort_by == ScrapePageSortBy.STATUS:
-            sort_column = ScrapePage.status
-        elif params.sort_by == ScrapePageSortBy.FILTER_CONFIDENCE:
-            sort_column = ScrapePage.filter_confidence
-        else:
-            sort_column = ScrapePage.created_at
+        sort_column = ScrapePageService._sort_column(params)
         
-        # Apply sort direction
+        # Secondary sort by ID in the same direction for consistent pagination;
+        # matching directions let one (column, id) index serve the whole order.
+        # NULL placement is PostgreSQL's default, spelled out so that every
+        # dialect agrees with _apply_cursor
         if params.order == SortOrder.DESC:
-            query = query.order_by(desc(sort_column))
+            query = query.order_by(desc(sort_column).nulls_first(), desc(ScrapePage.id))
         else:
-            query = query.order_by(asc(sort_column))
-        
-        # Add secondary sort by ID for consistent pagination
-        query = query.order_by(desc(ScrapePage.id))
+            query = query.order_by(asc(sort_column).nulls_last(), asc(ScrapePage.id))
         
         return query
     
@@ -462,6 +581,10 @@ class ScrapePageService:
     ) -> ScrapePageStatistics:
         """
         Get comprehensive statistics for scrape pages in a project
+
+        Read from the project's daily rollups (see
+        app.services.scrape_page_rollups); the time windows are aligned to
+        UTC days.
         """
         
         # Verify project ownership
@@ -474,56 +597,26 @@ class ScrapePageService:
         if not project:
             raise ValueError("Project not found or access denied")
         
-        # Base query for project pages
-        base_query = select(ScrapePage).join(Domain).where(Domain.project_id == project_id)
-        
-        # Total count
-        total_result = await db.execute(select(func.count()).select_from(base_query.subquery()))
-        total_pages = total_result.scalar()
+        domain_ids = await ScrapePageService._fresh_rollup_domains(db, project_id)
         
         # Status counts
-        status_query = select(
-            ScrapePage.status,
-            func.count().label('count')
-        ).join(Domain).where(Domain.project_id == project_id).group_by(ScrapePage.status)
-        
-        status_result = await db.execute(status_query)
-        status_counts = {str(status): count for status, count in status_result.all()}
+        status_counts = await rollup_counts(db, project_id, domain_ids, ScrapePageDailyRollup.status)
+        total_pages = sum(status_counts.values())
         
         # Filter category counts
-        filter_category_query = select(
-            ScrapePage.filter_category,
-            func.count().label('count')
-        ).join(Domain).where(
-            and_(Domain.project_id == project_id, ScrapePage.filter_category.isnot(None))
-        ).group_by(ScrapePage.filter_category)
-        
-        filter_result = await db.execute(filter_category_query)
-        filter_category_counts = {category or 'unknown': count for category, count in filter_result.all()}
+        filter_category_counts = await rollup_counts(
+            db, project_id, domain_ids, ScrapePageDailyRollup.filter_category
+        )
         
         # Priority distribution
-        priority_query = select(
-            ScrapePage.priority_score,
-            func.count().label('count')
-        ).join(Domain).where(
-            and_(Domain.project_id == project_id, ScrapePage.priority_score.isnot(None))
-        ).group_by(ScrapePage.priority_score)
-        
-        priority_result = await db.execute(priority_query)
-        priority_distribution = {int(priority or 0): count for priority, count in priority_result.all()}
+        priority_counts = await rollup_counts(db, project_id, domain_ids, ScrapePageDailyRollup.priority_score)
+        priority_distribution = {int(priority): count for priority, count in priority_counts.items()}
         
         # Performance metrics
-        perf_query = select(
-            func.avg(ScrapePage.total_processing_time).label('avg_processing_time'),
-            func.avg(ScrapePage.content_length).label('avg_content_length')
-        ).join(Domain).where(Domain.project_id == project_id)
-        
-        perf_result = await db.execute(perf_query)
-        perf_data = perf_result.first()
+        avg_processing_time, avg_content_length = await rollup_averages(db, project_id, domain_ids)
         
         # Calculate quality metrics
         completed_count = status_counts.get('completed', 0)
-        status_counts.get('failed', 0)
         retry_count = status_counts.get('retry', 0)
         
         # Count filtered statuses
@@ -541,50 +634,32 @@ class ScrapePageService:
         
         # Manual processing stats
         manual_review_count = status_counts.get('awaiting_manual_review', 0)
-        
-        manual_override_query = select(func.count()).join(Domain).where(
-            and_(Domain.project_id == project_id, ScrapePage.is_manually_overridden is True)
+        manually_overridden = await rollup_total(
+            db, project_id, domain_ids, ScrapePageDailyRollup.is_manually_overridden.is_(True)
         )
-        manual_override_result = await db.execute(manual_override_query)
-        manually_overridden = manual_override_result.scalar()
-        
-        can_process_query = select(func.count()).join(Domain).where(
-            and_(Domain.project_id == project_id, ScrapePage.can_be_manually_processed is True)
+        can_be_manually_processed = await rollup_total(
+            db, project_id, domain_ids, ScrapePageDailyRollup.can_be_manually_processed.is_(True)
         )
-        can_process_result = await db.execute(can_process_query)
-        can_be_manually_processed = can_process_result.scalar()
         
         # Time-based stats
-        now = datetime.utcnow()
-        day_ago = now - timedelta(days=1)
-        week_ago = now - timedelta(weeks=1)
-        month_ago = now - timedelta(days=30)
-        
-        pages_24h_query = select(func.count()).join(Domain).where(
-            and_(Domain.project_id == project_id, ScrapePage.created_at >= day_ago)
+        today = datetime.utcnow().date()
+        pages_last_24h = await rollup_total(
+            db, project_id, domain_ids, ScrapePageDailyRollup.day >= today - timedelta(days=1)
         )
-        pages_24h_result = await db.execute(pages_24h_query)
-        pages_last_24h = pages_24h_result.scalar()
-        
-        pages_week_query = select(func.count()).join(Domain).where(
-            and_(Domain.project_id == project_id, ScrapePage.created_at >= week_ago)
+        pages_last_week = await rollup_total(
+            db, project_id, domain_ids, ScrapePageDailyRollup.day >= today - timedelta(weeks=1)
         )
-        pages_week_result = await db.execute(pages_week_query)
-        pages_last_week = pages_week_result.scalar()
-        
-        pages_month_query = select(func.count()).join(Domain).where(
-            and_(Domain.project_id == project_id, ScrapePage.created_at >= month_ago)
+        pages_last_month = await rollup_total(
+            db, project_id, domain_ids, ScrapePageDailyRollup.day >= today - timedelta(days=30)
         )
-        pages_month_result = await db.execute(pages_month_query)
-        pages_last_month = pages_month_result.scalar()
         
         return ScrapePageStatistics(
             total_pages=total_pages,
             status_counts=status_counts,
             filter_category_counts=filter_category_counts,
             priority_distribution=priority_distribution,
-            average_processing_time=float(perf_data.avg_processing_time or 0),
-            average_content_length=float(perf_data.avg_content_length or 0),
+            average_processing_time=avg_processing_time,
+            average_content_length=avg_content_length,
             success_rate=success_rate,
             retry_rate=retry_rate,
             filter_rate=filter_rate,
@@ -596,6 +671,14 @@ class ScrapePageService:
             pages_last_month=pages_last_month
         )
     
+    @staticmethod
+    async def _fresh_rollup_domains(db: AsyncSession, project_id: int) -> List[int]:
+        """Bring the project's rollups up to date and return its domain ids"""
+        await ensure_fresh_rollups(db, project_id)
+        return list((await db.execute(
+            select(Domain.id).where(Domain.project_id == project_id)
+        )).scalars().all())
+    
     @staticmethod
     async def get_scrape_page_analytics(
         db: AsyncSession,
@@ -640,86 +723,33 @@ class ScrapePageService:
     ) -> FilterAnalysis:
         """Get detailed filter analysis"""
         
-        # Base filtered pages query
-        filtered_query = select(ScrapePage).join(Domain).where(
-            and_(
-                Domain.project_id == project_id,
-                ScrapePage.filter_reason.isnot(None)
-            )
-        )
+        domain_ids = await ScrapePageService._fresh_rollup_domains(db, project_id)
         
         # Total filtered count
-        total_filtered_result = await db.execute(select(func.count()).select_from(filtered_query.subquery()))
-        total_filtered = total_filtered_result.scalar()
-        
-        # Filter categories
-        category_query = select(
-            ScrapePage.filter_category,
-            func.count().label('count')
-        ).join(Domain).where(
-            and_(
-                Domain.project_id == project_id,
-                ScrapePage.filter_category.isnot(None)
-            )
-        ).group_by(ScrapePage.filter_category)
-        
-        category_result = await db.execute(category_query)
-        filter_categories = {category: count for category, count in category_result.all()}
-        
-        # Filter reasons
-        reason_query = select(
-            ScrapePage.filter_reason,
-            func.count().label('count')
-        ).join(Domain).where(
-            and_(
-                Domain.project_id == project_id,
-                ScrapePage.filter_reason.isnot(None)
-            )
-        ).group_by(ScrapePage.filter_reason)
+        total_filtered = await rollup_total(
+            db, project_id, domain_ids, ScrapePageDailyRollup.filter_reason.isnot(None)
+        )
         
-        reason_result = await db.execute(reason_query)
-        filter_reasons = {reason: count for reason, count in reason_result.all()}
+        # Filter categories and reasons
+        filter_categories = await rollup_counts(db, project_id, domain_ids, ScrapePageDailyRollup.filter_category)
+        filter_reasons = await rollup_counts(db, project_id, domain_ids, ScrapePageDailyRollup.filter_reason)
         
         # Confidence distribution
-        confidence_query = select(
-            case(
-                (ScrapePage.filter_confidence < 0.2, '0.0-0.2'),
-                (ScrapePage.filter_confidence < 0.4, '0.2-0.4'),
-                (ScrapePage.filter_confidence < 0.6, '0.4-0.6'),
-                (ScrapePage.filter_confidence < 0.8, '0.6-0.8'),
-                else_='0.8-1.0'
-            ).label('confidence_range'),
-            func.count().label('count')
-        ).join(Domain).where(
-            and_(
-                Domain.project_id == project_id,
-                ScrapePage.filter_confidence.isnot(None)
-            )
-        ).group_by(text('confidence_range'))
-        
-        confidence_result = await db.execute(confidence_query)
-        confidence_distribution = {range_name: count for range_name, count in confidence_result.all()}
+        confidence_distribution = await rollup_counts(
+            db, project_id, domain_ids, ScrapePageDailyRollup.confidence_bucket
+        )
         
         # Manual overrides
-        override_query = select(func.count()).join(Domain).where(
-            and_(
-                Domain.project_id == project_id,
-                ScrapePage.is_manually_overridden is True
-            )
+        manual_overrides = await rollup_total(
+            db, project_id, domain_ids, ScrapePageDailyRollup.is_manually_overridden.is_(True)
         )
-        override_result = await db.execute(override_query)
-        manual_overrides = override_result.scalar()
         
         # Override success rate
-        override_success_query = select(func.count()).join(Domain).where(
-            and_(
-                Domain.project_id == project_id,
-                ScrapePage.is_manually_overridden is True,
-                ScrapePage.status == ScrapePageStatus.COMPLETED
-            )
+        override_successes = await rollup_total(
+            db, project_id, domain_ids,
+            ScrapePageDailyRollup.is_manually_overridden.is_(True),
+            ScrapePageDailyRollup.status == ScrapePageStatus.COMPLETED.value
         )
-        override_success_result = await db.execute(override_success_query)
-        override_successes = override_success_result.scalar()
         
         override_success_rate = (override_successes / max(manual_overrides, 1)) * 100
         
@@ -739,22 +769,22 @@ class ScrapePageService:
     ) -> List[Dict[str, Any]]:
         """Get daily statistics for the last 30 days"""
         
+        domain_ids = await ScrapePageService._fresh_rollup_domains(db, project_id)
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=30)
         
-        # Daily stats query
+        rollup = ScrapePageDailyRollup
         daily_query = select(
-            func.date(ScrapePage.created_at).label('date'),
-            func.count(case((ScrapePage.status == ScrapePageStatus.COMPLETED, 1))).label('completed'),
-            func.count(case((ScrapePage.status == ScrapePageStatus.FAILED, 1))).label('failed'),
-            func.count(case((ScrapePage.filter_reason.isnot(None), 1))).label('filtered')
-        ).join(Domain).where(
-            and_(
-                Domain.project_id == project_id,
-                func.date(ScrapePage.created_at) >= start_date,
-                func.date(ScrapePage.created_at) <= end_date
-            )
-        ).group_by(func.date(ScrapePage.created_at))
+            rollup.day,
+            func.sum(case((rollup.status == ScrapePageStatus.COMPLETED.value, rollup.page_count), else_=0)),
+            func.sum(case((rollup.status == ScrapePageStatus.FAILED.value, rollup.page_count), else_=0)),
+            func.sum(case((rollup.filter_reason.isnot(None), rollup.page_count), else_=0))
+        ).where(
+            rollup.project_id == project_id,
+            rollup.domain_id.in_(domain_ids),
+            rollup.day >= start_date,
+            rollup.day <= end_date
+        ).group_by(rollup.day).order_by(rollup.day)
         
         daily_result = await db.execute(daily_query)
         
@@ -762,9 +792,9 @@ class ScrapePageService:
         for date, completed, failed, filtered in daily_result.all():
             daily_stats.append({
                 "date": date.isoformat(),
-                "completed": completed,
-                "failed": failed,
-                "filtered": filtered
+                "completed": int(completed),
+                "failed": int(failed),
+                "filtered": int(filtered)
             })
         
         return daily_stats
@@ -776,25 +806,30 @@ class ScrapePageService:
     ) -> Dict[int, Dict[str, Any]]:
         """Get performance statistics by domain"""
         
+        domain_ids = await ScrapePageService._fresh_rollup_domains(db, project_id)
+        
+        rollup = ScrapePageDailyRollup
         domain_query = select(
-            Domain.id,
-            func.count(ScrapePage.id).label('total_pages'),
-            func.count(case((ScrapePage.status == ScrapePageStatus.COMPLETED, 1))).label('completed'),
-            func.avg(ScrapePage.total_processing_time).label('avg_processing_time')
-        ).join(ScrapePage).where(
-            Domain.project_id == project_id
-        ).group_by(Domain.id)
+            rollup.domain_id,
+            func.sum(rollup.page_count),
+            func.sum(case((rollup.status == ScrapePageStatus.COMPLETED.value, rollup.page_count), else_=0)),
+            func.sum(rollup.processing_time_sum),
+            func.sum(rollup.processing_time_count)
+        ).where(
+            rollup.project_id == project_id,
+            rollup.domain_id.in_(domain_ids)
+        ).group_by(rollup.domain_id)
         
         domain_result = await db.execute(domain_query)
         
         domain_performance = {}
-        for domain_id, total, completed, avg_time in domain_result.all():
+        for domain_id, total, completed, time_sum, time_count in domain_result.all():
             success_rate = (completed / max(total, 1)) * 100
             domain_performance[domain_id] = {
-                "total_pages": total,
-                "completed_pages": completed,
+                "total_pages": int(total),
+                "completed_pages": int(completed),
                 "success_rate": success_rate,
-                "avg_processing_time": float(avg_time or 0)
+                "avg_processing_time": float(time_sum or 0) / time_count if time_count else 0.0
             }
         
         return domain_performance
@@ -889,6 +924,18 @@ class ScrapePageService:
             blocked_reasons=blocked_reasons
         )
     
+    @staticmethod
+    async def _bulk_selection(db: AsyncSession, project_id: int, filters: ScrapePageQueryParams) -> List[Any]:
+        """WHERE criteria selecting a bulk operation's pages within the project"""
+        domain_ids = (await db.execute(
+            select(Domain.id).where(Domain.project_id == project_id)
+        )).scalars().all()
+        filtered = ScrapePageService._apply_filters(select(ScrapePage.id), filters)
+        criteria = [ScrapePage.domain_id.in_(domain_ids)]
+        if filtered.whereclause is not None:
+            criteria.append(filtered.whereclause)
+        return criteria
+    
     @staticmethod
     async def execute_bulk_operation(
         db: AsyncSession,
@@ -898,6 +945,12 @@ class ScrapePageService:
     ) -> BulkOperationResult:
         """
         Execute bulk operations on scrape pages with progress tracking
+
+        Pages are changed with chunked set-based statements (see
+        ``SetBasedBulkExecutor``). Selections larger than
+        SCRAPE_PAGE_BULK_ASYNC_THRESHOLD, or requests with ``run_async``, are
+        handed to a Celery job and return immediately with status pending;
+        their progress is available from ``get_bulk_operation_progress``.
         """
         # Verify project ownership
         project_stmt = select(Project).where(
@@ -913,223 +966,111 @@ class ScrapePageService:
         operation_id = str(uuid.uuid4())
         started_at = datetime.utcnow()
         
-        # Initialize result
-        result = BulkOperationResult(
-            operation_id=operation_id,
-            action=request.action,
-            status=BulkScrapePageOperationStatus.RUNNING,
-            total_requested=0,
-            total_processed=0,
-            successful_count=0,
-            failed_count=0,
-            skipped_count=0,
-            started_at=started_at,
-            dry_run=request.dry_run,
-            reason=request.reason,
-            filters_used=request.filters.dict()
-        )
+        selection = await ScrapePageService._bulk_selection(db, project_id, request.filters)
+        progress_store = BulkProgressStore()
+        executor = SetBasedBulkExecutor(db, project_id, operation_id, request, selection, progress_store)
         
         try:
-            # Build query to find affected pages
-            base_query = select(ScrapePage).join(Domain).where(Domain.project_id == project_id)
-            base_query = ScrapePageService._apply_filters(base_query, request.filters)
-            base_query = base_query.limit(request.max_pages)
-            
-            # Get all pages to process
-            pages_result = await db.execute(base_query)
-            pages = list(pages_result.scalars().all())
-            
-            result.total_requested = len(pages)
-            
-            if result.total_requested == 0:
-                result.status = BulkScrapePageOperationStatus.COMPLETED
-                result.completed_at = datetime.utcnow()
-                result.duration_seconds = 0.0
-                return result
-            
-            # If dry run, just return preview
-            if request.dry_run:
-                result.status = BulkScrapePageOperationStatus.COMPLETED
-                result.completed_at = datetime.utcnow()
-                result.duration_seconds = 0.0
-                result.successful_page_ids = [page.id for page in pages]
-                result.successful_count = len(pages)
-                return result
-            
-            # Process in batches
-            batch_size = min(request.batch_size, 500)
-            task_ids = []
+            total = await executor.count_selection()
             
-            for i in range(0, len(pages), batch_size):
-                batch_pages = pages[i:i + batch_size]
-                
-                for page in batch_pages:
-                    try:
-                        success = await ScrapePageService._execute_single_page_action(
-                            db, page, request.action, request
-                        )
-                        
-                        if success:
-                            result.successful_page_ids.append(page.id)
-                            result.successful_count += 1
-                            
-                            # Queue task if needed
-                            if request.action in [BulkScrapePageAction.MARK_FOR_PROCESSING, BulkScrapePageAction.RETRY]:
-                                task_result = celery_app.send_task(
-                                    'app.tasks.firecrawl_scraping.process_single_scrape_page',
-                                    args=[page.id],
-                                    kwargs={'manual_processing': True}
-                                )
-                                task_ids.append(task_result.id)
-                        else:
-                            result.failed_page_ids.append(page.id)
-                            result.failed_count += 1
-                            result.failed_reasons[page.id] = "Operation failed"
-                            
-                    except Exception as e:
-                        logger.error(f"Failed to process page {page.id}: {e}")
-                        result.failed_page_ids.append(page.id)
-                        result.failed_count += 1
-                        result.failed_reasons[page.id] = str(e)
-                
-                # Commit batch
-                await db.commit()
-            
-            result.total_processed = result.successful_count + result.failed_count
-            result.task_ids = task_ids
-            result.status = (
-                BulkScrapePageOperationStatus.COMPLETED if result.failed_count == 0
-                else BulkScrapePageOperationStatus.PARTIALLY_COMPLETED
-            )
-            result.completed_at = datetime.utcnow()
-            result.duration_seconds = (result.completed_at - started_at).total_seconds()
+            if total == 0 or request.dry_run:
+                # Dry runs list the selected ids without changing anything
+                page_ids = []
+                if total:
+                    page_ids = list((await db.execute(
+                        select(ScrapePage.id).where(*selection).order_by(ScrapePage.id).limit(request.max_pages)
+                    )).scalars().all())
+                return BulkOperationResult(
+                    operation_id=operation_id,
+                    action=request.action,
+                    status=BulkScrapePageOperationStatus.COMPLETED,
+                    total_requested=total,
+                    total_processed=0,
+                    successful_count=len(page_ids),
+                    failed_count=0,
+                    skipped_count=0,
+                    successful_page_ids=page_ids,
+                    started_at=started_at,
+                    completed_at=datetime.utcnow(),
+                    duration_seconds=0.0,
+                    dry_run=request.dry_run,
+                    reason=request.reason,
+                    filters_used=request.filters.dict()
+                )
             
-            # Send WebSocket notification
-            try:
-                await websocket_manager.broadcast_to_project(
-                    project_id=project_id,
-                    message={
-                        "type": "bulk_operation_completed",
-                        "operation_id": operation_id,
-                        "action": request.action.value,
-                        "successful_count": result.successful_count,
-                        "failed_count": result.failed_count,
-                        "task_ids": task_ids,
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
+            if request.run_async or total > settings.SCRAPE_PAGE_BULK_ASYNC_THRESHOLD:
+                progress = BulkOperationProgress(
+                    operation_id=operation_id,
+                    status=BulkScrapePageOperationStatus.PENDING,
+                    current_step="queued",
+                    total_steps=max(1, math.ceil(total / executor.chunk_size)),
+                    completed_steps=0,
+                    items_total=total,
+                    started_at=started_at,
+                    updated_at=started_at
+                )
+                await progress_store.save(project_id, progress)
+                task_result = celery_app.send_task(
+                    'app.tasks.project_tasks.execute_scrape_page_bulk_operation',
+                    args=[project_id, operation_id, request.model_dump(mode="json"), total]
+                )
+                return BulkOperationResult(
+                    operation_id=operation_id,
+                    action=request.action,
+                    status=BulkScrapePageOperationStatus.PENDING,
+                    total_requested=total,
+                    total_processed=0,
+                    successful_count=0,
+                    failed_count=0,
+                    skipped_count=0,
+                    task_ids=[task_result.id],
+                    started_at=started_at,
+                    reason=request.reason,
+                    filters_used=request.filters.dict(),
+                    progress=progress
                 )
-            except Exception as e:
-                logger.error(f"Failed to send WebSocket notification: {e}")
             
-            return result
+            return await executor.run(started_at=started_at, total=total)
             
         except Exception as e:
             logger.error(f"Bulk operation {operation_id} failed: {e}")
-            result.status = BulkScrapePageOperationStatus.FAILED
-            result.completed_at = datetime.utcnow()
-            result.duration_seconds = (result.completed_at - started_at).total_seconds() if result.completed_at else 0
             raise
+        finally:
+            await progress_store.close()
     
     @staticmethod
-    async def _execute_single_page_action(
+    async def run_bulk_operation_job(
         db: AsyncSession,
-        page: ScrapePage,
-        action: BulkScrapePageAction,
-        request: BulkManualProcessingRequest
-    ) -> bool:
-        """
-        Execute a single action on a scrape page
-        """
+        project_id: int,
+        operation_id: str,
+        request: BulkManualProcessingRequest,
+        total: Optional[int] = None
+    ) -> BulkOperationResult:
+        """Execute a queued bulk operation; ownership was checked when it was queued"""
+        selection = await ScrapePageService._bulk_selection(db, project_id, request.filters)
+        progress_store = BulkProgressStore()
         try:
-            if action == BulkScrapePageAction.MARK_FOR_PROCESSING:
-                # Mark for manual processing
-                if page.status in [ScrapePageStatus.FILTERED_LIST_PAGE, 
-                                 ScrapePageStatus.FILTERED_ALREADY_PROCESSED,
-                                 ScrapePageStatus.FILTERED_LOW_PRIORITY]:
-                    page.status = ScrapePageStatus.AWAITING_MANUAL_REVIEW
-                    page.is_manually_overridden = True
-                    # Store reason in filter_details if provided
-                    if request.reason:
-                        if not page.filter_details:
-                            page.filter_details = {}
-                        page.filter_details['manual_review_reason'] = request.reason
-                    if request.priority_override is not None:
-                        page.priority_score = request.priority_override
-                    page.updated_at = datetime.utcnow()
-                    return True
-                return False
-            
-            elif action == BulkScrapePageAction.APPROVE_ALL:
-                # Approve pages for processing
-                if page.status == ScrapePageStatus.AWAITING_MANUAL_REVIEW:
-                    page.status = ScrapePageStatus.PENDING
-                    page.is_manually_overridden = True
-                    page.retry_count = 0
-                    page.error_message = None
-                    page.error_type = None
-                    page.last_attempt_at = None
-                    page.updated_at = datetime.utcnow()
-                    return True
-                return False
-            
-            elif action == BulkScrapePageAction.SKIP_ALL:
-                # Skip pages
-                if page.status in [ScrapePageStatus.PENDING, ScrapePageStatus.AWAITING_MANUAL_REVIEW]:
-                    page.status = ScrapePageStatus.MANUALLY_SKIPPED
-                    # Store reason in filter_details if provided
-                    if request.reason:
-                        if not page.filter_details:
-                            page.filter_details = {}
-                        page.filter_details['skip_reason'] = request.reason
-                    else:
-                        if not page.filter_details:
-                            page.filter_details = {}
-                        page.filter_details['skip_reason'] = "Bulk skip operation"
-                    page.updated_at = datetime.utcnow()
-                    return True
-                return False
-            
-            elif action == BulkScrapePageAction.RETRY:
-                # Retry failed pages
-                if page.status in [ScrapePageStatus.FAILED, ScrapePageStatus.RETRY]:
-                    page.status = ScrapePageStatus.PENDING
-                    page.retry_count = 0
-                    page.error_message = None
-                    page.error_type = None
-                    page.last_attempt_at = None
-                    page.updated_at = datetime.utcnow()
-                    return True
-                return False
-            
-            elif action == BulkScrapePageAction.RESET_STATUS:
-                # Reset to pending
-                if request.new_status:
-                    page.status = request.new_status
-                else:
-                    page.status = ScrapePageStatus.PENDING
-                page.retry_count = 0
-                page.error_message = None
-                page.error_type = None
-                page.last_attempt_at = None
-                page.updated_at = datetime.utcnow()
-                return True
-            
-            elif action == BulkScrapePageAction.UPDATE_PRIORITY:
-                # Update priority
-                if request.priority_override is not None:
-                    page.priority_score = request.priority_override
-                    page.updated_at = datetime.utcnow()
-                    return True
-                return False
-            
-            elif action == BulkScrapePageAction.DELETE:
-                # Delete pages (this would need special handling)
-                # Note: We might want to soft-delete or move to archive table
-                await db.delete(page)
-                return True
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Failed to execute action {action} on page {page.id}: {e}")
-            return False
\ No newline at end of file
+            executor = SetBasedBulkExecutor(db, project_id, operation_id, request, selection, progress_store)
+            return await executor.run(total=total)
+        finally:
+            await progress_store.close()
+    
+    @staticmethod
+    async def get_bulk_operation_progress(
+        db: AsyncSession,
+        project_id: int,
+        user_id: int,
+        operation_id: str
+    ) -> Optional[BulkOperationProgress]:
+        """Latest progress of a bulk operation on the project"""
+        project_stmt = select(Project).where(
+            and_(Project.id == project_id, Project.user_id == user_id)
+        )
+        if (await db.execute(project_stmt)).scalar_one_or_none() is None:
+            raise ValueError("Project not found or access denied")
+        
+        progress_store = BulkProgressStore()
+        try:
+            return await progress_store.load(project_id, operation_id)
+        finally:
+            await progress_store.close()
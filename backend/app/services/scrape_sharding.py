@@ -0,0 +1,184 @@
+"""
+Shard planning and checkpoints for domain scrapes
+
+After discovery, the pending ScrapePages of a session are split into
+contiguous id ranges that separate Celery tasks process in parallel. Each
+shard records the last ScrapePage id it finished in Redis so that a shard
+redelivered after its worker died (``task_acks_late`` plus
+``task_reject_on_worker_lost``) skips the batches it already committed.
+
+Session totals are always recomputed from ``scrape_pages`` rather than summed
+from shard return values, so retried or resumed shards never double count.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text, update
+
+from ..core.config import settings
+from ..models.scraping import ScrapePage, ScrapePageStatus
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - redis is a hard dependency in deployments
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def plan_shards(db, domain_id: int, scrape_session_id: int, shard_size: int) -> List[Tuple[int, int]]:
+    """
+    Split the session's pending ScrapePages into inclusive id ranges
+
+    Bucketing happens in the database, so only one row per shard is returned
+    regardless of domain size.
+    """
+    rows = db.execute(
+        text("""
+            SELECT min(id), max(id)
+            FROM (
+                SELECT id, (row_number() OVER (ORDER BY id) - 1) / :shard_size AS shard
+                FROM scrape_pages
+                WHERE domain_id = :domain_id
+                  AND scrape_session_id = :scrape_session_id
+                  AND status = :status
+            ) numbered
+            GROUP BY shard
+            ORDER BY shard
+        """),
+        {
+            "shard_size": shard_size,
+            "domain_id": domain_id,
+            "scrape_session_id": scrape_session_id,
+            "status": ScrapePageStatus.PENDING.value,
+        },
+    ).fetchall()
+    return [(int(low), int(high)) for low, high in rows]
+
+
+def session_page_counts(db, scrape_session_id: int) -> Dict[str, int]:
+    """ScrapePage counts per status for a session"""
+    rows = db.execute(
+        select(ScrapePage.status, func.count())
+        .where(ScrapePage.scrape_session_id == scrape_session_id)
+        .group_by(ScrapePage.status)
+    ).all()
+    return {getattr(status, "value", status): count for status, count in rows}
+
+
+def fail_unfinished_shards(db, scrape_session_id: int, shard_ranges: List[Tuple[int, int]],
+                           reason: str) -> List[int]:
+    """
+    Mark pages a shard never finished as failed; returns the indexes of those shards
+
+    Used when a shard was killed (hard time limit, lost worker) and the chord
+    callback will not run. Pages left pending or in progress inside a shard's
+    id range are failed so the session can be finalized and they can be retried.
+    ``updated_at`` moves with the status so the statistics rollups and domain
+    timelines pick the pages up on their next refresh.
+    """
+    failed_shards = []
+    now = datetime.utcnow()
+    for shard_index, (low_id, high_id) in enumerate(shard_ranges):
+        result = db.execute(
+            update(ScrapePage)
+            .where(
+                ScrapePage.scrape_session_id == scrape_session_id,
+                ScrapePage.id.between(low_id, high_id),
+                ScrapePage.status.in_([ScrapePageStatus.PENDING.value, ScrapePageStatus.IN_PROGRESS.value]),
+            )
+            .values(
+                status=ScrapePageStatus.FAILED.value,
+                error_type="shard_failed",
+                error_message=reason,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            failed_shards.append(shard_index)
+    db.commit()
+    return failed_shards
+
+
+@dataclass
+class ShardCheckpoint:
+    last_id: int = 0
+    batches: int = 0
+
+    @property
+    def resumed(self) -> bool:
+        return self.last_id > 0
+
+
+class ShardCheckpointStore:
+    """Redis hash per shard holding its progress"""
+
+    KEY_PREFIX = "scrape_shard"
+
+    def __init__(self, redis_url: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.ttl_seconds = ttl_seconds or settings.SCRAPE_SHARD_CHECKPOINT_TTL_SECONDS
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url, socket_timeout=5, socket_connect_timeout=2)
+        return self._client
+
+    def _key(self, scrape_session_id: int, shard_index: int) -> str:
+        return f"{self.KEY_PREFIX}:{scrape_session_id}:{shard_index}"
+
+    def load(self, scrape_session_id: int, shard_index: int) -> ShardCheckpoint:
+        try:
+            data = self.client.hgetall(self._key(scrape_session_id, shard_index))
+        except Exception as e:
+            logger.warning(f"Could not read checkpoint for shard {shard_index} of session {scrape_session_id}: {e}")
+            return ShardCheckpoint()
+        data = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in (data or {}).items()}
+        return ShardCheckpoint(last_id=data.get("last_id", 0), batches=data.get("batches", 0))
+
+    def save(self, scrape_session_id: int, shard_index: int, last_id: int) -> None:
+        key = self._key(scrape_session_id, shard_index)
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hset(key, "last_id", last_id)
+            pipe.hincrby(key, "batches", 1)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            # Losing a checkpoint only means redoing batches on resume
+            logger.warning(f"Could not save checkpoint for shard {shard_index} of session {scrape_session_id}: {e}")
+
+    def clear(self, scrape_session_id: int, shard_count: int) -> None:
+        try:
+            self.client.delete(*(self._key(scrape_session_id, i) for i in range(shard_count)))
+        except Exception as e:
+            logger.warning(f"Could not clear shard checkpoints for session {scrape_session_id}: {e}")
+
+
+class ShardProgress:
+    """Checkpoint handle passed into page processing for one shard"""
+
+    def __init__(self, store: ShardCheckpointStore, scrape_session_id: int, shard_index: int,
+                 id_range: Tuple[int, int]):
+        self.store = store
+        self.scrape_session_id = scrape_session_id
+        self.shard_index = shard_index
+        self.id_range = id_range
+        self.checkpoint = store.load(scrape_session_id, shard_index)
+
+    @property
+    def start_after(self) -> int:
+        """Lowest id still to process is greater than this"""
+        return max(self.checkpoint.last_id, self.id_range[0] - 1)
+
+    def batch_committed(self, last_id: int) -> None:
+        self.checkpoint.last_id = last_id
+        self.checkpoint.batches += 1
+        self.store.save(self.scrape_session_id, self.shard_index, last_id)
@@ -0,0 +1,451 @@
+"""
+Streaming export of search results as JSONL, CSV or Parquet
+
+Rows are read through a server-side cursor in fixed-size batches and encoded
+incrementally, so memory stays constant regardless of export size. Exports
+are ordered by project_page id which makes them resumable: a client that was
+cut off passes the last ``project_page_id`` it received (or the equivalent
+cursor token) and the export continues after that row.
+"""
+import csv
+import io
+import json
+import logging
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.lazy_imports import module_available, require_module
+from app.models.project import Domain, Project
+from app.models.shared_pages import PageV2, ProjectPage
+from app.services.project_page_search import (
+    PageListCursor,
+    search_config,
+    search_vector,
+)
+
+# Optional dependency - Parquet export is unavailable without pyarrow, which
+# is only imported once a Parquet export actually starts
+PARQUET_AVAILABLE = module_available("pyarrow")
+
+logger = logging.getLogger(__name__)
+
+
+class SearchExportFormat(str, Enum):
+    """Supported streaming export formats"""
+    JSONL = "jsonl"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+EXPORT_MEDIA_TYPES = {
+    SearchExportFormat.JSONL: "application/x-ndjson",
+    SearchExportFormat.CSV: "text/csv",
+    SearchExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+# Ordered export columns; ``project_page_id`` doubles as the resume key
+EXPORT_COLUMNS = (
+    ProjectPage.id.label("project_page_id"),
+    ProjectPage.project_id,
+    PageV2.id.label("page_id"),
+    PageV2.url,
+    PageV2.unix_timestamp,
+    PageV2.capture_date,
+    PageV2.title,
+    PageV2.extracted_title,
+    PageV2.meta_description,
+    PageV2.author,
+    PageV2.language,
+    PageV2.content_type,
+    PageV2.status_code,
+    PageV2.word_count,
+    PageV2.quality_score,
+    PageV2.content_url,
+    ProjectPage.review_status,
+    ProjectPage.page_category,
+    ProjectPage.priority_level,
+    ProjectPage.tags,
+    ProjectPage.is_starred,
+    ProjectPage.notes,
+    PageV2.extracted_text,
+)
+EXPORT_FIELD_NAMES = [col.key for col in EXPORT_COLUMNS]
+
+
+class InvalidExportCursorError(ValueError):
+    """Raised when an export resume cursor cannot be parsed"""
+
+
+@dataclass
+class SearchExportFilters:
+    """Filters accepted by the search export"""
+    query: Optional[str] = None
+    projects: List[int] = field(default_factory=list)
+    domains: List[str] = field(default_factory=list)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    include_text: bool = True
+
+
+def parse_export_cursor(cursor: Optional[str]) -> Optional[uuid.UUID]:
+    """Accept either a raw project_page_id or an opaque cursor token"""
+    if not cursor:
+        return None
+    try:
+        return uuid.UUID(cursor)
+    except ValueError:
+        pass
+    try:
+        return PageListCursor.decode(cursor).project_page_id
+    except ValueError as e:
+        raise InvalidExportCursorError(f"Invalid export cursor: {cursor!r}") from e
+
+
+def _to_plain(value: Any) -> Any:
+    """Convert DB values into JSON/CSV friendly scalars"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    return str(value)
+
+
+class _GzipStream:
+    """Incremental gzip compressor for byte chunks"""
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BufferSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the caller"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class _RowEncoder:
+    """Base class: turns batches of row dicts into output bytes"""
+
+    def __init__(self, field_names: List[str]):
+        self.field_names = field_names
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _JsonlEncoder(_RowEncoder):
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        lines = [
+            json.dumps({k: _to_plain(row.get(k)) for k in self.field_names}, ensure_ascii=False)
+            for row in rows
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+class _CsvEncoder(_RowEncoder):
+    def _write(self, rows: Iterable[List[Any]]) -> bytes:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerows(rows)
+        return out.getvalue().encode("utf-8")
+
+    def header(self) -> bytes:
+        return self._write([self.field_names])
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        def cell(value: Any) -> Any:
+            value = _to_plain(value)
+            return "|".join(map(str, value)) if isinstance(value, list) else value
+        return self._write([[cell(row.get(k)) for k in self.field_names] for row in rows])
+
+
+class _ParquetEncoder(_RowEncoder):
+    """Writes one row group per batch into an in-memory sink that is drained"""
+
+    def __init__(self, field_names: List[str]):
+        super().__init__(field_names)
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export requires the pyarrow package")
+        pa = self._pa = require_module("pyarrow", "Parquet export")
+        self._pq = require_module("pyarrow.parquet", "Parquet export")
+        self._sink = _BufferSink()
+        self._writer = None
+        types = {
+            "project_id": pa.int64(),
+            "unix_timestamp": pa.int64(),
+            "status_code": pa.int64(),
+            "word_count": pa.int64(),
+            "quality_score": pa.float64(),
+            "is_starred": pa.bool_(),
+            "tags": pa.list_(pa.string()),
+        }
+        self._schema = pa.schema([(name, types.get(name, pa.string())) for name in field_names])
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        if not rows:
+            return b""
+        columns = {name: [_to_plain(row.get(name)) for row in rows] for name in self.field_names}
+        table = self._pa.Table.from_pydict(columns, schema=self._schema)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(
+                self._sink, self._schema,
+                compression=settings.PARQUET_COMPRESSION,
+                compression_level=settings.PARQUET_COMPRESSION_LEVEL,
+            )
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        if self._writer is None:
+            # Still emit a valid (empty) file
+            self._writer = self._pq.ParquetWriter(self._sink, self._schema)
+        self._writer.close()
+        return self._sink.drain()
+
+
+_ENCODERS = {
+    SearchExportFormat.JSONL: _JsonlEncoder,
+    SearchExportFormat.CSV: _CsvEncoder,
+    SearchExportFormat.PARQUET: _ParquetEncoder,
+}
+
+
+class SearchExportService:
+    """Builds and streams search result exports"""
+
+    @staticmethod
+    def field_names(filters: SearchExportFilters) -> List[str]:
+        if filters.include_text:
+            return list(EXPORT_FIELD_NAMES)
+        return [name for name in EXPORT_FIELD_NAMES if name != "extracted_text"]
+
+    @staticmethod
+    def build_query(
+        user_id: int,
+        filters: SearchExportFilters,
+        after: Optional[uuid.UUID] = None,
+        is_postgres: bool = True,
+    ):
+        columns = [c for c in EXPORT_COLUMNS if filters.include_text or c.key != "extracted_text"]
+        query = (
+            select(*columns)
+            .select_from(ProjectPage)
+            .join(PageV2, PageV2.id == ProjectPage.page_id)
+            .join(Project, Project.id == ProjectPage.project_id)
+            .where(Project.user_id == user_id)
+        )
+        if filters.projects:
+            query = query.where(ProjectPage.project_id.in_(filters.projects))
+        if filters.domains:
+            query = query.join(Domain, Domain.id == ProjectPage.domain_id).where(
+                Domain.domain_name.in_(filters.domains)
+            )
+        if filters.date_from:
+            query = query.where(PageV2.capture_date >= datetime.combine(filters.date_from, time.min))
+        if filters.date_to:
+            query = query.where(PageV2.capture_date <= datetime.combine(filters.date_to, time.max))
+        search = (filters.query or "").strip()
+        if search:
+            pattern = f"%{search}%"
+            if is_postgres:
+                text_match = search_vector.op("@@")(func.websearch_to_tsquery(search_config, search))
+            else:
+                text_match = PageV2.extracted_text.ilike(pattern)
+            query = query.where(
+                or_(text_match, PageV2.title.ilike(pattern), PageV2.url.ilike(pattern))
+            )
+        if after is not None:
+            query = query.where(ProjectPage.id > after)
+        return query.order_by(ProjectPage.id.asc())
+
+    @staticmethod
+    async def iter_batches(
+        db: AsyncSession,
+        user_id: int,
+        filters: SearchExportFilters,
+        after: Optional[uuid.UUID] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield row batches from a server-side cursor"""
+        batch_size = batch_size or settings.SEARCH_EXPORT_BATCH_SIZE
+        is_postgres = db.get_bind().dialect.name == "postgresql"
+        query = SearchExportService.build_query(user_id, filters, after, is_postgres)
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions(batch_size):
+            yield [dict(row._mapping) for row in partition]
+
+    @staticmethod
+    async def stream_export(
+        db: AsyncSession,
+        user_id: int,
+        filters: SearchExportFilters,
+        export_format: SearchExportFormat,
+        after: Optional[uuid.UUID] = None,
+        compress: bool = False,
+        batch_size: Optional[int] = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield encoded export bytes batch by batch.
+
+        ``compress`` gzips JSONL/CSV output on the fly; Parquet is always
+        compressed internally and ignores it. When resuming (``after`` set)
+        the CSV header is omitted so the output can be appended. If ``stats``
+        is given it is updated with the row count and last exported id.
+        """
+        encoder = _ENCODERS[export_format](SearchExportService.field_names(filters))
+        gzip_stream = _GzipStream() if compress and export_format != SearchExportFormat.PARQUET else None
+
+        def emit(chunk: bytes) -> bytes:
+            return gzip_stream.compress(chunk) if gzip_stream and chunk else chunk
+
+        if after is None:
+            chunk = emit(encoder.header())
+            if chunk:
+                yield chunk
+        async for rows in SearchExportService.iter_batches(db, user_id, filters, after, batch_size):
+            if stats is not None and rows:
+                stats["rows"] = stats.get("rows", 0) + len(rows)
+                stats["last_project_page_id"] = str(rows[-1]["project_page_id"])
+            chunk = emit(encoder.encode(rows))
+            if chunk:
+                yield chunk
+        tail = emit(encoder.finish())
+        if gzip_stream:
+            tail += gzip_stream.flush()
+        if tail:
+            yield tail
+
+    @staticmethod
+    async def stream_export_in_session(
+        user_id: int,
+        filters: SearchExportFilters,
+        export_format: SearchExportFormat,
+        after: Optional[uuid.UUID] = None,
+        compress: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """
+        ``stream_export`` on a session of its own.
+
+        Response bodies are sent after request-scoped dependencies have been
+        torn down, so a streamed HTTP export must not use the request's session.
+        """
+        async with AsyncSessionLocal() as db:
+            async for chunk in SearchExportService.stream_export(
+                db, user_id, filters, export_format, after=after, compress=compress
+            ):
+                yield chunk
+
+    @staticmethod
+    def file_suffix(export_format: SearchExportFormat, compress: bool) -> str:
+        suffix = f".{export_format.value}"
+        if compress and export_format != SearchExportFormat.PARQUET:
+            suffix += ".gz"
+        return suffix
+
+    @staticmethod
+    def export_path(user_id: int, job_id: str, export_format: SearchExportFormat, compress: bool) -> Path:
+        return (
+            Path(settings.SEARCH_EXPORT_DIR)
+            / str(user_id)
+            / f"{job_id}{SearchExportService.file_suffix(export_format, compress)}"
+        )
+
+    @staticmethod
+    async def write_export_file(
+        db: AsyncSession,
+        user_id: int,
+        filters: SearchExportFilters,
+        export_format: SearchExportFormat,
+        path: Path,
+        compress: bool = False,
+        progress_callback=None,
+    ) -> Dict[str, Any]:
+        """Write a full export to local storage (used by the background job)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".partial")
+        stats: Dict[str, Any] = {"rows": 0}
+        bytes_written = 0
+        with open(tmp_path, "wb") as fh:
+            async for chunk in SearchExportService.stream_export(
+                db, user_id, filters, export_format, compress=compress, stats=stats
+            ):
+                fh.write(chunk)
+                bytes_written += len(chunk)
+                if progress_callback:
+                    progress_callback(stats["rows"], bytes_written)
+        tmp_path.replace(path)
+        return {"path": str(path), "rows": stats["rows"], "bytes": bytes_written}
+
+    @staticmethod
+    def purge_expired_exports(ttl_hours: Optional[int] = None) -> int:
+        """Delete stored export files older than ``SEARCH_EXPORT_TTL_HOURS``; returns the number removed"""
+        ttl_hours = settings.SEARCH_EXPORT_TTL_HOURS if ttl_hours is None else ttl_hours
+        root = Path(settings.SEARCH_EXPORT_DIR)
+        if not root.is_dir():
+            return 0
+        cutoff = datetime.now().timestamp() - ttl_hours * 3600
+        removed = 0
+        # Includes .partial files left by jobs that died mid-write
+        for path in root.glob("*/*"):
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        for user_dir in root.iterdir():
+            if user_dir.is_dir() and not any(user_dir.iterdir()):
+                user_dir.rmdir()
+        if removed:
+            logger.info(f"Removed {removed} expired search export files")
+        return removed
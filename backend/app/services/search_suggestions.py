@@ -0,0 +1,378 @@
+"""
+Search history recording and prefix-indexed search suggestions
+
+Recording a search no longer touches the database on the request path:
+events are buffered in-process and written in batches, one multi-row INSERT
+into ``search_history`` plus one upsert into ``search_suggestions`` per
+batch. Repeated queries within a batch are folded into a single row.
+
+Suggestion scores use forward decay: a search at time ``t`` adds
+``2 ** ((t - DECAY_EPOCH) / half_life)`` to the score, so the upsert is a
+plain addition, yet ranking by score equals ranking by exponentially decayed
+frequency. ``decayed_frequency`` converts a stored score back to "searches,
+decayed to now".
+
+Typeahead is served from a per-user in-memory index (a sorted list of
+suggestion texts, searched with ``bisect`` for the prefix range) loaded from
+the user's top suggestions and kept current by events recorded in this
+process. Indexes expire after ``SEARCH_SUGGESTION_INDEX_TTL_SECONDS`` so
+events recorded by other workers show up; users with more suggestions than
+fit in memory fall back to a prefix query on the
+``(user_id, suggestion_text text_pattern_ops)`` index.
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.library import SearchHistory, SearchSuggestion
+
+logger = logging.getLogger(__name__)
+
+# Changing the epoch or SEARCH_SUGGESTION_HALF_LIFE_DAYS rescales stored scores;
+# the add_search_suggestion_prefix_index migration rewrote old scores with the same values
+DECAY_EPOCH = datetime(2024, 1, 1)
+MIN_QUERY_LENGTH = 3
+_WHITESPACE = re.compile(r"\s+")
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize_query(query_text: str) -> Optional[str]:
+    """Suggestion key for a query, or None for queries too short to suggest"""
+    text = _WHITESPACE.sub(" ", (query_text or "").strip().lower())
+    return text if len(text) >= MIN_QUERY_LENGTH else None
+
+
+def decay_weight(at: datetime) -> float:
+    half_life_seconds = settings.SEARCH_SUGGESTION_HALF_LIFE_DAYS * 86400
+    return 2.0 ** ((at - DECAY_EPOCH).total_seconds() / half_life_seconds)
+
+
+def decayed_frequency(score: float, now: Optional[datetime] = None) -> float:
+    """A forward-decayed score expressed as searches, decayed to ``now``"""
+    return score / decay_weight(now or datetime.utcnow())
+
+
+@dataclass
+class SearchEvent:
+    """One search, waiting to be written to history"""
+    user_id: int
+    query_text: str
+    filters: Dict[str, Any] = field(default_factory=dict)
+    result_count: int = 0
+    project_id: Optional[int] = None
+    saved_search_id: Optional[int] = None
+    execution_time_ms: Optional[int] = None
+    session_id: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def history_row(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "project_id": self.project_id,
+            "saved_search_id": self.saved_search_id,
+            "query_text": self.query_text,
+            "filters": self.filters,
+            "search_type": "content",
+            "result_count": self.result_count,
+            "top_results": [],
+            "execution_time_ms": self.execution_time_ms,
+            "clicked_results": [],
+            "session_id": self.session_id,
+            "created_at": self.created_at,
+        }
+
+
+@dataclass
+class SuggestionEntry:
+    """A suggestion as served to typeahead; ``score`` is the decayed frequency"""
+    suggestion_text: str
+    display_text: str
+    weight: float  # forward-decayed score, comparable across entries
+    frequency: int
+    last_used: Optional[datetime]
+    suggestion_type: str = "query"
+    id: Optional[int] = None
+    score: float = 0.0
+
+    @classmethod
+    def from_model(cls, suggestion: SearchSuggestion) -> "SuggestionEntry":
+        return cls(
+            id=suggestion.id,
+            suggestion_text=suggestion.suggestion_text,
+            display_text=suggestion.display_text,
+            suggestion_type=suggestion.suggestion_type,
+            weight=suggestion.score or 0.0,
+            frequency=suggestion.frequency or 0,
+            last_used=suggestion.last_used,
+        )
+
+
+class _UserIndex:
+    """Sorted suggestion texts of one user, for prefix range lookups"""
+
+    __slots__ = ("texts", "entries", "loaded_at", "truncated")
+
+    def __init__(self, entries: List[SuggestionEntry], truncated: bool):
+        self.entries = {entry.suggestion_text: entry for entry in entries}
+        self.texts = sorted(self.entries)
+        self.loaded_at = time.monotonic()
+        self.truncated = truncated
+
+    def observe(self, text: str, weight: float, at: datetime) -> None:
+        entry = self.entries.get(text)
+        if entry is None:
+            self.entries[text] = SuggestionEntry(
+                suggestion_text=text, display_text=text.title(), weight=weight, frequency=1, last_used=at
+            )
+            bisect.insort(self.texts, text)
+            self._prune()
+        else:
+            entry.weight += weight
+            entry.frequency += 1
+            entry.last_used = max(entry.last_used or at, at)
+
+    def _prune(self) -> None:
+        limit = settings.SEARCH_SUGGESTION_INDEX_MAX_PER_USER
+        if len(self.entries) <= limit * 1.1:
+            return
+        keep = heapq.nlargest(limit, self.entries.values(), key=lambda entry: entry.weight)
+        self.entries = {entry.suggestion_text: entry for entry in keep}
+        self.texts = sorted(self.entries)
+        self.truncated = True
+
+    def top(self, prefix: str, limit: int) -> List[SuggestionEntry]:
+        start = bisect.bisect_left(self.texts, prefix)
+        end = bisect.bisect_left(self.texts, prefix + _PREFIX_END, start) if prefix else len(self.texts)
+        candidates = (self.entries[text] for text in self.texts[start:end])
+        return heapq.nlargest(limit, candidates, key=lambda entry: (entry.weight, entry.frequency))
+
+
+class SearchSuggestionService:
+    """Batched search history writer and in-memory suggestion prefix index"""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._pending: List[SearchEvent] = []
+        self._indexes: "OrderedDict[int, _UserIndex]" = OrderedDict()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    # Recording -------------------------------------------------------------
+
+    def _ensure_flusher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._flusher = None
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush_loop(), name="search-history-writer")
+
+    def record(self, event: SearchEvent) -> bool:
+        """Queue a search without waiting; returns False if it was dropped"""
+        if len(self._pending) >= settings.SEARCH_HISTORY_MAX_PENDING:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Search history backlog full; dropped {self.dropped} events so far")
+            return False
+        try:
+            self._ensure_flusher()
+        except RuntimeError:
+            # No running loop (e.g. called from sync code)
+            self.dropped += 1
+            return False
+
+        self._pending.append(event)
+        self.recorded += 1
+        text = normalize_query(event.query_text)
+        index = self._indexes.get(event.user_id)
+        if text and index is not None:
+            index.observe(text, decay_weight(event.created_at), event.created_at)
+        if len(self._pending) >= settings.SEARCH_HISTORY_BATCH_SIZE:
+            self._wakeup.set()
+        return True
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.SEARCH_HISTORY_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write queued events; returns how many were written"""
+        async with self._flush_lock:
+            written = 0
+            while self._pending:
+                batch = self._pending[:settings.SEARCH_HISTORY_BATCH_SIZE]
+                del self._pending[:len(batch)]
+                try:
+                    async with self._session_factory() as db:
+                        await self._write_batch(db, batch)
+                        await db.commit()
+                except Exception as e:
+                    self.failed += len(batch)
+                    logger.error(f"Failed to write {len(batch)} search history events: {e}")
+                    continue
+                written += len(batch)
+            self.written += written
+            return written
+
+    async def _write_batch(self, db: AsyncSession, batch: List[SearchEvent]) -> None:
+        await db.execute(insert(SearchHistory), [event.history_row() for event in batch])
+
+        now = datetime.utcnow()
+        folded: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for event in batch:
+            text = normalize_query(event.query_text)
+            if not text:
+                continue
+            row = folded.get((event.user_id, text))
+            if row is None:
+                row = folded[(event.user_id, text)] = {
+                    "user_id": event.user_id,
+                    "suggestion_text": text,
+                    "suggestion_type": "query",
+                    "display_text": text.title(),
+                    "score": 0.0,
+                    "frequency": 0,
+                    "last_used": event.created_at,
+                    "related_projects": [],
+                    "related_entities": [],
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            row["score"] += decay_weight(event.created_at)
+            row["frequency"] += 1
+            row["last_used"] = max(row["last_used"], event.created_at)
+            if event.project_id and event.project_id not in row["related_projects"]:
+                row["related_projects"].append(event.project_id)
+        if folded:
+            await db.execute(self._upsert_suggestions(db, list(folded.values())))
+
+    @staticmethod
+    def _upsert_suggestions(db: AsyncSession, rows: List[Dict[str, Any]]):
+        if db.bind.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        table = SearchSuggestion.__table__
+        statement = dialect_insert(table).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.suggestion_text],
+            set_={
+                "score": table.c.score + statement.excluded.score,
+                "frequency": table.c.frequency + statement.excluded.frequency,
+                "last_used": statement.excluded.last_used,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+
+    async def shutdown(self) -> None:
+        """Stop the background writer and write what is still queued"""
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        self._flusher = None
+        if self._loop is asyncio.get_running_loop():
+            await self.flush()
+
+    # Serving ---------------------------------------------------------------
+
+    async def _user_index(self, db: AsyncSession, user_id: int) -> _UserIndex:
+        index = self._indexes.get(user_id)
+        if index is not None and time.monotonic() - index.loaded_at < settings.SEARCH_SUGGESTION_INDEX_TTL_SECONDS:
+            self._indexes.move_to_end(user_id)
+            return index
+
+        limit = settings.SEARCH_SUGGESTION_INDEX_MAX_PER_USER
+        result = await db.execute(
+            select(SearchSuggestion)
+            .where(SearchSuggestion.user_id == user_id)
+            .order_by(SearchSuggestion.score.desc())
+            .limit(limit + 1)
+        )
+        suggestions = result.scalars().all()
+        index = _UserIndex([SuggestionEntry.from_model(s) for s in suggestions[:limit]], len(suggestions) > limit)
+        # Events recorded here but not yet written are not in the database
+        for event in self._pending:
+            text = normalize_query(event.query_text)
+            if event.user_id == user_id and text:
+                index.observe(text, decay_weight(event.created_at), event.created_at)
+
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        while len(self._indexes) > settings.SEARCH_SUGGESTION_INDEX_MAX_USERS:
+            self._indexes.popitem(last=False)
+        return index
+
+    async def suggest(self, db: AsyncSession, user_id: int, prefix: str = "", limit: int = 10) -> List[SuggestionEntry]:
+        """The user's top suggestions starting with ``prefix``, by decayed frequency"""
+        prefix = _WHITESPACE.sub(" ", (prefix or "").lstrip().lower())
+        index = await self._user_index(db, user_id)
+        entries = index.top(prefix, limit)
+
+        if len(entries) < limit and index.truncated and prefix:
+            # Suggestions outside the in-memory top N: prefix scan on the text_pattern_ops index
+            seen = {entry.suggestion_text for entry in entries}
+            result = await db.execute(
+                select(SearchSuggestion)
+                .where(
+                    SearchSuggestion.user_id == user_id,
+                    SearchSuggestion.suggestion_text.startswith(prefix, autoescape=True),
+                )
+                .order_by(SearchSuggestion.score.desc())
+                .limit(limit)
+            )
+            entries.extend(
+                SuggestionEntry.from_model(s) for s in result.scalars().all() if s.suggestion_text not in seen
+            )
+            entries = entries[:limit]
+
+        now_weight = decay_weight(datetime.utcnow())
+        for entry in entries:
+            entry.score = round(entry.weight / now_weight, 4)
+        return entries
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        if user_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "indexed_users": len(self._indexes),
+        }
+
+
+search_suggestion_service = SearchSuggestionService()
@@ -1,12 +1,10 @@
 """
 Semantic search service using vector embeddings
 """
-import numpy as np
 import logging
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
 from sqlmodel import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sentence_transformers import SentenceTransformer
 import asyncio
 import json
 from datetime import datetime
@@ -14,6 +12,10 @@ from datetime import datetime
 from app.models.project import Domain, Project
 from app.models.shared_pages import PageV2 as Page
 
+if TYPE_CHECKING:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,13 +24,15 @@ class EmbeddingModel:
     
     def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
         self.model_name = model_name
-        self.model: Optional[SentenceTransformer] = None
+        self.model: Optional["SentenceTransformer"] = None
         self.dimension = 384  # Default for all-MiniLM-L6-v2
     
     def load_model(self):
         """Load the embedding model"""
         if self.model is None:
             try:
+                # Deferred: sentence-transformers pulls in torch
+                from sentence_transformers import SentenceTransformer
                 self.model = SentenceTransformer(self.model_name)
                 self.dimension = self.model.get_sentence_embedding_dimension()
                 logger.info(f"Loaded embedding model: {self.model_name} (dimension: {self.dimension})")
@@ -36,7 +40,7 @@ class EmbeddingModel:
                 logger.error(f"Failed to load embedding model: {e}")
                 raise
     
-    def encode(self, texts: List[str]) -> np.ndarray:
+    def encode(self, texts: List[str]) -> "np.ndarray":
         """Encode texts to embeddings"""
         if self.model is None:
             self.load_model()
@@ -48,7 +52,7 @@ class EmbeddingModel:
             logger.error(f"Failed to encode texts: {e}")
             raise
     
-    def encode_single(self, text: str) -> np.ndarray:
+    def encode_single(self, text: str) -> "np.ndarray":
         """Encode single text to embedding"""
         return self.encode([text])[0]
 
@@ -92,6 +96,7 @@ class SemanticSearchService:
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
         try:
+            import numpy as np
             a = np.array(vec1)
             b = np.array(vec2)
             
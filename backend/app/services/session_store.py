@@ -8,6 +8,7 @@ import redis.asyncio as redis
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.core.redis_pool import coalesced_get, shared_redis
 
 
 class SessionData(BaseModel):
@@ -28,22 +29,17 @@ class SessionStore:
     """Redis-based session storage service"""
     
     def __init__(self):
+        # Overrides the shared pool client when set (tests inject an in-memory client)
         self.redis: Optional[redis.Redis] = None
         self.session_prefix = "session:"
         self.default_ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60  # Convert to seconds
     
     async def get_redis(self) -> redis.Redis:
         """Get Redis connection"""
-        if self.redis is None:
-            self.redis = redis.from_url(
-                settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True
-            )
-        return self.redis
+        return self.redis or shared_redis()
     
     async def close(self):
-        """Close Redis connection"""
+        """Close an injected Redis connection; the shared pool is closed at shutdown"""
         if self.redis:
             await self.redis.close()
     
@@ -98,7 +94,8 @@ class SessionStore:
         redis_client = await self.get_redis()
         key = f"{self.session_prefix}{session_id}"
         
-        session_json = await redis_client.get(key)
+        # Every authenticated request reads its session; concurrent reads share MGETs
+        session_json = await coalesced_get(redis_client, key)
         if not session_json:
             return None
         
@@ -191,17 +188,20 @@ class SessionStore:
         redis_client = await self.get_redis()
         pattern = f"{self.session_prefix}*"
         
+        keys = [key async for key in redis_client.scan_iter(match=pattern)]
+        
         session_ids = []
-        async for key in redis_client.scan_iter(match=pattern):
-            session_json = await redis_client.get(key)
-            if session_json:
-                try:
-                    session_data = SessionData.model_validate_json(session_json)
-                    if session_data.user_id == user_id:
-                        session_id = key.replace(self.session_prefix, "")
-                        session_ids.append(session_id)
-                except Exception:
-                    continue
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            for key, session_json in zip(batch, await redis_client.mget(batch)):
+                if session_json:
+                    try:
+                        session_data = SessionData.model_validate_json(session_json)
+                        if session_data.user_id == user_id:
+                            session_id = key.replace(self.session_prefix, "")
+                            session_ids.append(session_id)
+                    except Exception:
+                        continue
         
         return session_ids
     
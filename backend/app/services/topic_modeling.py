@@ -8,11 +8,6 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 from sqlmodel import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation, NMF
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.metrics.pairwise import cosine_similarity
 import re
 
 from app.models.project import Domain, Project
@@ -142,6 +137,10 @@ class TopicModelingService:
     ) -> TopicModel:
         """Run LDA modeling in thread"""
         try:
+            # scikit-learn is imported here, in the worker thread, not when the service loads
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.decomposition import LatentDirichletAllocation
+            
             # Create TF-IDF vectors
             vectorizer = TfidfVectorizer(
                 max_features=self.max_features,
@@ -262,6 +261,9 @@ class TopicModelingService:
     ) -> TopicModel:
         """Run NMF modeling in thread"""
         try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.decomposition import NMF
+            
             # Create TF-IDF vectors
             vectorizer = TfidfVectorizer(
                 max_features=self.max_features,
@@ -382,6 +384,11 @@ class TopicModelingService:
     ) -> ContentCluster:
         """Run clustering in thread"""
         try:
+            import numpy as np
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.cluster import KMeans, DBSCAN
+            from sklearn.metrics.pairwise import cosine_similarity
+            
             # Create TF-IDF vectors
             vectorizer = TfidfVectorizer(
                 max_features=self.max_features,
@@ -18,6 +18,7 @@ from tenacity import (
 )
 
 from ..core.config import settings
+from .archive_governor import archive_governor
 from ..models.project import ArchiveSource
 
 logger = logging.getLogger(__name__)
@@ -162,7 +163,7 @@ class CDXRecord:
     def wayback_url(self) -> str:
         """Generate Wayback Machine URL (legacy property for backward compatibility)"""
         if self.source == ArchiveSource.WAYBACK_MACHINE:
-            return f"https://web.archive.org/web/{self.timestamp}/{self.original_url}"
+            return f"{settings.WAYBACK_MACHINE_BASE_URL}/web/{self.timestamp}/{self.original_url}"
         else:
             # For non-Wayback sources, return the original URL with timestamp info
             logger.warning(f"wayback_url property called for {self.source.value} record")
@@ -172,7 +173,7 @@ class CDXRecord:
     def content_url(self) -> str:
         """Generate raw content URL (legacy property for backward compatibility)"""
         if self.source == ArchiveSource.WAYBACK_MACHINE:
-            return f"https://web.archive.org/web/{self.timestamp}if_/{self.original_url}"
+            return f"{settings.WAYBACK_MACHINE_BASE_URL}/web/{self.timestamp}if_/{self.original_url}"
         elif self.source == ArchiveSource.COMMON_CRAWL and self.warc_filename:
             # Generate Common Crawl WARC URL when possible
             return self._generate_common_crawl_warc_url()
@@ -185,7 +186,7 @@ class CDXRecord:
     def archive_url(self) -> str:
         """Generate appropriate archive URL based on source"""
         if self.source == ArchiveSource.WAYBACK_MACHINE:
-            return f"https://web.archive.org/web/{self.timestamp}/{self.original_url}"
+            return f"{settings.WAYBACK_MACHINE_BASE_URL}/web/{self.timestamp}/{self.original_url}"
         elif self.source == ArchiveSource.COMMON_CRAWL and self.warc_filename:
             return self._generate_common_crawl_warc_url()
         else:
@@ -210,7 +211,7 @@ class CDXRecord:
             
         # Common Crawl WARC files are stored on S3
         # Format: https://data.commoncrawl.org/{warc_filename}
-        base_url = "https://data.commoncrawl.org"
+        base_url = settings.COMMON_CRAWL_DATA_URL
         
         # Handle different filename formats
         if self.warc_filename.startswith('crawl-data/'):
@@ -649,9 +650,11 @@ class CDXAPIClient:
     def __init__(self):
         self.timeout = settings.WAYBACK_MACHINE_TIMEOUT or self.DEFAULT_TIMEOUT
         self.max_retries = settings.WAYBACK_MACHINE_MAX_RETRIES or self.DEFAULT_MAX_RETRIES
+        self.BASE_URL = f"{settings.WAYBACK_MACHINE_BASE_URL}/cdx/search/cdx"
         
         # Configure proxy settings if available
         proxy_settings = {}
+        self.proxy_url = None
         proxy_server = getattr(settings, 'PROXY_SERVER', None)
         proxy_username = getattr(settings, 'PROXY_USERNAME', None)
         proxy_password = getattr(settings, 'PROXY_PASSWORD', None)
@@ -683,6 +686,7 @@ class CDXAPIClient:
             # httpx uses a single proxy string, not a dict like requests
             proxy_url = proxy_settings.get("http://") or proxy_settings.get("https://")
             client_kwargs["proxy"] = proxy_url
+            self.proxy_url = proxy_url
         
         self.client = httpx.AsyncClient(**client_kwargs)
         
@@ -703,13 +707,21 @@ class CDXAPIClient:
     async def _make_request(self, url: str) -> str:
         """Make HTTP request with retry logic"""
         try:
+            await archive_governor.acquire(url, self.proxy_url)
             response = await self.client.get(url)
+            await archive_governor.record_response(
+                url, self.proxy_url, response.status_code, response.headers.get('Retry-After')
+            )
             
             # Handle rate limiting
             if response.status_code == 429:
-                retry_after = int(response.headers.get('Retry-After', 60))
-                logger.warning(f"Rate limited by CDX API, waiting {retry_after}s")
-                await asyncio.sleep(retry_after)
+                if archive_governor.enabled:
+                    # The governor pauses every worker for the Retry-After period
+                    logger.warning("Rate limited by CDX API, governor paused requests")
+                else:
+                    retry_after = int(response.headers.get('Retry-After', 60))
+                    logger.warning(f"Rate limited by CDX API, waiting {retry_after}s")
+                    await asyncio.sleep(retry_after)
                 raise CDXAPIException(f"Rate limited: {response.status_code}")
             
             # Handle server errors with specific handling for 522 timeouts
@@ -733,9 +745,11 @@ class CDXAPIClient:
             
         except httpx.TimeoutException:
             logger.error(f"Timeout requesting CDX API: {url}")
+            await archive_governor.record_error(url, self.proxy_url)
             raise
         except httpx.ConnectError:
             logger.error(f"Connection error requesting CDX API: {url}")
+            await archive_governor.record_error(url, self.proxy_url)
             raise
     
     def _build_cdx_url_simple(self, domain_name: str, from_date: str, to_date: str,
@@ -1071,8 +1085,8 @@ class CDXAPIClient:
                 else:
                     logger.warning(f"Page {page_num + 1}: No records returned")
                 
-                # Be respectful to the CDX API
-                if pages_to_fetch > 1:
+                # Be respectful to the CDX API; the governor paces requests when enabled
+                if pages_to_fetch > 1 and not archive_governor.enabled:
                     await asyncio.sleep(0.5)
                     
             except Exception as e:
@@ -1151,8 +1165,8 @@ class CDXAPIClient:
                 logger.debug(f"Fetched page {page_num + 1}/{pages_to_fetch}: {len(page_records)} records "
                            f"({page_static_assets_filtered} static assets pre-filtered)")
                 
-                # For large domains, add delay to be respectful
-                if total_pages > 100:
+                # For large domains, add delay to be respectful unless the governor paces requests
+                if total_pages > 100 and not archive_governor.enabled:
                     await asyncio.sleep(0.5)
                 
             except Exception as e:
@@ -1,26 +1,174 @@
 """
 Wikidata integration service for entity disambiguation and enrichment
+
+Entity details come from the ``wbgetentities`` API in batches of up to
+``WIKIDATA_BATCH_SIZE`` ids, together with the labels of the items they
+reference (instance-of types, country). Search hits (label -> QIDs), entity
+records and labels are kept in a persistent SQLite cache with a TTL, so
+enriching a project's entities again, or from another worker on the same
+host, mostly avoids the network. ``resolve_entities`` and ``enrich_entities``
+disambiguate many entities at once: distinct names are searched concurrently
+and all candidates are then fetched in shared batches. HTTP requests are
+bounded by ``ENTITY_LINKING_MAX_CONCURRENT``.
 """
+import asyncio
+import json
 import logging
+import sqlite3
+import threading
+import time
 import aiohttp
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import quote
 
+from ..core.config import settings
 from ..models.entities import CanonicalEntity, EntityType
 
 logger = logging.getLogger(__name__)
 
+TYPE_MAPPING = {
+    EntityType.PERSON: 'person',
+    EntityType.ORGANIZATION: 'organization',
+    EntityType.LOCATION: 'location',
+    EntityType.EVENT: 'event'
+}
+
+# Claims kept from wbgetentities responses: property -> record field
+TIME_CLAIMS = {
+    'P569': 'birth_date',
+    'P570': 'death_date',
+    'P571': 'inception_date',
+    'P576': 'dissolved_date',
+}
+
+
+class WikidataCache:
+    """Persistent TTL cache of Wikidata lookups in a local SQLite file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.WIKIDATA_CACHE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            try:
+                if self.path != ":memory:":
+                    Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Wikidata cache at {self.path} unavailable, caching in memory: {e}")
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wikidata_cache ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (kind, key))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, kind: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """Unexpired values for the given keys"""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM wikidata_cache WHERE kind = ? AND expires_at > ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})",
+                    [kind, time.time(), *chunk],
+                )
+                found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, kind: str, values: Dict[str, Any], ttl: float) -> None:
+        if not values:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO wikidata_cache (kind, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                [(kind, key, json.dumps(value), expires_at) for key, value in values.items()],
+            )
+            conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute("DELETE FROM wikidata_cache WHERE expires_at <= ?", [time.time()]).rowcount
+            conn.commit()
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _claim_values(claims: Dict[str, Any], prop: str) -> List[Any]:
+    values = []
+    for claim in claims.get(prop, []):
+        snak = claim.get('mainsnak', {})
+        if snak.get('snaktype', 'value') == 'value' and 'datavalue' in snak:
+            values.append(snak['datavalue'].get('value'))
+    return values
+
+
+def _text(entity: Dict[str, Any], field: str, language: str) -> str:
+    values = entity.get(field, {})
+    value = values.get(language) or values.get('en') or {}
+    return value.get('value', '')
+
+
+def _parse_entity(entity: Dict[str, Any], language: str) -> Dict[str, Any]:
+    """The parts of a wbgetentities item used for details, with referenced items as QIDs"""
+    claims = entity.get('claims', {})
+    record = {
+        'label': _text(entity, 'labels', language),
+        'description': _text(entity, 'descriptions', language),
+        'type_ids': [value['id'] for value in _claim_values(claims, 'P31') if isinstance(value, dict) and 'id' in value],
+        'country_id': next((value['id'] for value in _claim_values(claims, 'P17') if isinstance(value, dict)), None),
+        'coordinates': None,
+        'website': next(iter(_claim_values(claims, 'P856')), None),
+        'image': None,
+    }
+    for prop, name in TIME_CLAIMS.items():
+        times = [value['time'] for value in _claim_values(claims, prop) if isinstance(value, dict) and 'time' in value]
+        # Same form as the SPARQL endpoint returns: no leading '+'
+        record[name] = times[0].lstrip('+') if times else None
+    coordinates = next(iter(_claim_values(claims, 'P625')), None)
+    if isinstance(coordinates, dict):
+        record['coordinates'] = f"Point({coordinates.get('longitude')} {coordinates.get('latitude')})"
+    image = next(iter(_claim_values(claims, 'P18')), None)
+    if image:
+        record['image'] = f"http://commons.wikimedia.org/wiki/Special:FilePath/{quote(image)}"
+    return record
+
+
+def _normalize_query(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+
+def _parse_label(entity: Dict[str, Any], language: str) -> str:
+    return _text(entity, 'labels', language)
+
 
 class WikidataService:
     """Service for Wikidata entity resolution and disambiguation"""
     
-    def __init__(self):
+    def __init__(self, api_url: Optional[str] = None, cache: Optional[WikidataCache] = None):
         self.base_url = "https://www.wikidata.org"
-        self.sparql_endpoint = "https://query.wikidata.org/sparql"
-        self.entity_search_url = "https://www.wikidata.org/w/api.php"
+        self.entity_search_url = api_url or settings.WIKIDATA_API_URL
         self.session: Optional[aiohttp.ClientSession] = None
-        self.cache = {}  # Simple in-memory cache
-        self.cache_ttl = 3600  # 1 hour
+        self.cache = cache or WikidataCache()
+        self._request_slots: Optional[asyncio.Semaphore] = None
+        self.requests_made = 0
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -30,6 +178,7 @@ class WikidataService:
                 'User-Agent': 'Chrono-Scraper/1.0 (https://github.com/your-repo) Research Tool'
             }
         )
+        self._request_slots = asyncio.Semaphore(settings.ENTITY_LINKING_MAX_CONCURRENT)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -37,6 +186,162 @@ class WikidataService:
         if self.session:
             await self.session.close()
     
+    async def _get_json(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """GET the Wikidata API; None on any failure so callers can skip caching"""
+        if not self.session:
+            logger.error("WikidataService session not initialized. Use async context manager.")
+            return None
+        async with self._request_slots:
+            self.requests_made += 1
+            try:
+                async with self.session.get(self.entity_search_url, params={**params, 'format': 'json'}) as response:
+                    if response.status != 200:
+                        logger.error(f"Wikidata {params.get('action')} request failed: {response.status}")
+                        return None
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Wikidata {params.get('action')} request failed: {e}")
+                return None
+    
+    async def _search_hits(self, query: str, language: str = 'en', limit: int = 10) -> List[Dict[str, Any]]:
+        """Search results for a label, from the cache or wbsearchentities"""
+        key = f"{language}:{limit}:{_normalize_query(query)}"
+        cached = await asyncio.to_thread(self.cache.get_many, "search", [key])
+        if key in cached:
+            logger.debug(f"Cache hit for Wikidata search: {query}")
+            return cached[key]
+        
+        data = await self._get_json({
+            'action': 'wbsearchentities',
+            'language': language,
+            'type': 'item',
+            'search': query,
+            'limit': limit
+        })
+        if data is None:
+            return []
+        
+        hits = [
+            {
+                'id': result['id'],
+                'label': result.get('label', ''),
+                'description': result.get('description', ''),
+                'concepturi': result.get('concepturi', '')
+            }
+            for result in data.get('search', []) if result.get('id')
+        ]
+        ttl = settings.WIKIDATA_CACHE_TTL_SECONDS if hits else settings.WIKIDATA_NEGATIVE_CACHE_TTL_SECONDS
+        await asyncio.to_thread(self.cache.put_many, "search", {key: hits}, ttl)
+        return hits
+    
+    async def _fetch_batched(self, kind: str, ids: List[str], language: str, props: str, parse) -> Dict[str, Any]:
+        """Parsed wbgetentities items by QID, fetching uncached ids in batches"""
+        keys = {qid: f"{qid}:{language}" for qid in dict.fromkeys(ids)}
+        cached = await asyncio.to_thread(self.cache.get_many, kind, keys.values())
+        found = {qid: cached[key] for qid, key in keys.items() if key in cached}
+        missing = [qid for qid in keys if qid not in found]
+        if not missing:
+            return found
+        
+        size = settings.WIKIDATA_BATCH_SIZE
+        batches = [missing[i:i + size] for i in range(0, len(missing), size)]
+        responses = await asyncio.gather(*(
+            self._get_json({
+                'action': 'wbgetentities',
+                'ids': '|'.join(batch),
+                'props': props,
+                'languages': language if language == 'en' else f"{language}|en"
+            })
+            for batch in batches
+        ))
+        
+        fetched, absent = {}, {}
+        for batch, data in zip(batches, responses):
+            if data is None:
+                # Left uncached so the next lookup retries
+                continue
+            entities = {}
+            for qid, entity in data.get('entities', {}).items():
+                entities[qid] = entity
+                redirect = entity.get('redirects')
+                if redirect:
+                    entities[redirect.get('from')] = entity
+            for qid in batch:
+                entity = entities.get(qid)
+                if entity is None or 'missing' in entity:
+                    absent[qid] = None
+                else:
+                    fetched[qid] = parse(entity, language)
+        
+        await asyncio.to_thread(
+            self.cache.put_many, kind, {keys[qid]: value for qid, value in fetched.items()},
+            settings.WIKIDATA_CACHE_TTL_SECONDS
+        )
+        await asyncio.to_thread(
+            self.cache.put_many, kind, {keys[qid]: value for qid, value in absent.items()},
+            settings.WIKIDATA_NEGATIVE_CACHE_TTL_SECONDS
+        )
+        found.update(fetched)
+        found.update(absent)
+        return found
+    
+    async def get_entities(self, entity_ids: List[str], language: str = 'en') -> Dict[str, Dict[str, Any]]:
+        """
+        Details for many Wikidata entities
+        
+        Returns a dict keyed by QID in the shape of ``_get_entity_details``;
+        unknown entities map to an empty dict, failed lookups are left out.
+        """
+        records = await self._fetch_batched("entity", entity_ids, language, "labels|descriptions|claims", _parse_entity)
+        referenced = []
+        for record in records.values():
+            if record:
+                referenced.extend(record['type_ids'])
+                if record['country_id']:
+                    referenced.append(record['country_id'])
+        labels = await self._fetch_batched("label", referenced, language, "labels", _parse_label) if referenced else {}
+        
+        details = {}
+        for qid, record in records.items():
+            if not record:
+                details[qid] = {}
+                continue
+            types = []
+            for type_id in record['type_ids']:
+                label = labels.get(type_id)
+                if label and label not in types:
+                    types.append(label)
+            details[qid] = {
+                'types': types,
+                'birth_date': record['birth_date'],
+                'death_date': record['death_date'],
+                'inception_date': record['inception_date'],
+                'dissolved_date': record['dissolved_date'],
+                'country': labels.get(record['country_id']) if record['country_id'] else None,
+                'coordinates': record['coordinates'],
+                'website': record['website'],
+                'image': record['image']
+            }
+        return details
+    
+    def _candidates(self, query: str, hits: List[Dict[str, Any]], details: Dict[str, Dict[str, Any]],
+                    entity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search hits with their details and match scores, filtered by entity type"""
+        candidates = []
+        for hit in hits:
+            entity_details = details.get(hit['id'], {})
+            if entity_type and not self._matches_entity_type(entity_details, entity_type):
+                continue
+            candidates.append({
+                'wikidata_id': hit['id'],
+                'label': hit['label'],
+                'description': hit['description'],
+                'url': hit['concepturi'],
+                'match_score': self._calculate_match_score(query, hit),
+                'details': entity_details
+            })
+        return candidates
+    
     async def search_entities(self, query: str, entity_type: str = None, language: str = 'en', limit: int = 10) -> List[Dict[str, Any]]:
         """
         Search for entities in Wikidata
@@ -54,139 +359,20 @@ class WikidataService:
             logger.error("WikidataService session not initialized. Use async context manager.")
             return []
         
-        cache_key = f"search:{query}:{entity_type}:{language}:{limit}"
-        if cache_key in self.cache:
-            cached_result, timestamp = self.cache[cache_key]
-            if datetime.utcnow().timestamp() - timestamp < self.cache_ttl:
-                logger.debug(f"Cache hit for Wikidata search: {query}")
-                return cached_result
-        
         try:
-            # Use Wikidata search API
-            params = {
-                'action': 'wbsearchentities',
-                'format': 'json',
-                'language': language,
-                'type': 'item',
-                'search': query,
-                'limit': limit
-            }
-            
-            async with self.session.get(self.entity_search_url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Wikidata search failed: {response.status}")
-                    return []
-                
-                data = await response.json()
-                search_results = data.get('search', [])
-                
-                # Enrich results with additional metadata
-                enriched_results = []
-                for result in search_results:
-                    entity_id = result.get('id')
-                    if entity_id:
-                        # Get additional details for each entity
-                        details = await self._get_entity_details(entity_id, language)
-                        
-                        enriched_result = {
-                            'wikidata_id': entity_id,
-                            'label': result.get('label', ''),
-                            'description': result.get('description', ''),
-                            'url': result.get('concepturi', ''),
-                            'match_score': self._calculate_match_score(query, result),
-                            'details': details
-                        }
-                        
-                        # Filter by entity type if specified
-                        if entity_type:
-                            if self._matches_entity_type(details, entity_type):
-                                enriched_results.append(enriched_result)
-                        else:
-                            enriched_results.append(enriched_result)
-                
-                # Cache results
-                self.cache[cache_key] = (enriched_results, datetime.utcnow().timestamp())
-                
-                logger.debug(f"Found {len(enriched_results)} Wikidata entities for '{query}'")
-                return enriched_results
-                
+            hits = await self._search_hits(query, language, limit)
+            details = await self.get_entities([hit['id'] for hit in hits], language)
+            candidates = self._candidates(query, hits, details, entity_type)
+            logger.debug(f"Found {len(candidates)} Wikidata entities for '{query}'")
+            return candidates
         except Exception as e:
             logger.error(f"Wikidata search failed for '{query}': {e}")
             return []
     
     async def _get_entity_details(self, entity_id: str, language: str = 'en') -> Dict[str, Any]:
         """Get detailed information about a Wikidata entity"""
-        cache_key = f"details:{entity_id}:{language}"
-        if cache_key in self.cache:
-            cached_result, timestamp = self.cache[cache_key]
-            if datetime.utcnow().timestamp() - timestamp < self.cache_ttl:
-                return cached_result
-        
         try:
-            # SPARQL query to get entity details
-            sparql_query = f"""
-            SELECT ?item ?itemLabel ?itemDescription ?instanceOf ?instanceOfLabel 
-                   ?birthDate ?deathDate ?inception ?dissolved ?country ?countryLabel
-                   ?coordinates ?website ?image
-            WHERE {{
-                BIND(wd:{entity_id} AS ?item)
-                OPTIONAL {{ ?item wdt:P31 ?instanceOf . }}
-                OPTIONAL {{ ?item wdt:P569 ?birthDate . }}
-                OPTIONAL {{ ?item wdt:P570 ?deathDate . }}
-                OPTIONAL {{ ?item wdt:P571 ?inception . }}
-                OPTIONAL {{ ?item wdt:P576 ?dissolved . }}
-                OPTIONAL {{ ?item wdt:P17 ?country . }}
-                OPTIONAL {{ ?item wdt:P625 ?coordinates . }}
-                OPTIONAL {{ ?item wdt:P856 ?website . }}
-                OPTIONAL {{ ?item wdt:P18 ?image . }}
-                
-                SERVICE wikibase:label {{ 
-                    bd:serviceParam wikibase:language "{language},en" . 
-                }}
-            }}
-            """
-            
-            params = {
-                'query': sparql_query,
-                'format': 'json'
-            }
-            
-            async with self.session.get(self.sparql_endpoint, params=params) as response:
-                if response.status != 200:
-                    logger.warning(f"SPARQL query failed for {entity_id}: {response.status}")
-                    return {}
-                
-                data = await response.json()
-                bindings = data.get('results', {}).get('bindings', [])
-                
-                if not bindings:
-                    return {}
-                
-                # Process SPARQL results
-                binding = bindings[0]  # Take first result
-                details = {
-                    'types': [],
-                    'birth_date': binding.get('birthDate', {}).get('value'),
-                    'death_date': binding.get('deathDate', {}).get('value'),
-                    'inception_date': binding.get('inception', {}).get('value'),
-                    'dissolved_date': binding.get('dissolved', {}).get('value'),
-                    'country': binding.get('countryLabel', {}).get('value'),
-                    'coordinates': binding.get('coordinates', {}).get('value'),
-                    'website': binding.get('website', {}).get('value'),
-                    'image': binding.get('image', {}).get('value')
-                }
-                
-                # Collect all instance types
-                for binding in bindings:
-                    instance_of = binding.get('instanceOfLabel', {}).get('value')
-                    if instance_of and instance_of not in details['types']:
-                        details['types'].append(instance_of)
-                
-                # Cache results
-                self.cache[cache_key] = (details, datetime.utcnow().timestamp())
-                
-                return details
-                
+            return (await self.get_entities([entity_id], language)).get(entity_id, {})
         except Exception as e:
             logger.error(f"Failed to get details for entity {entity_id}: {e}")
             return {}
@@ -268,16 +454,12 @@ class WikidataService:
         Returns:
             Best matching Wikidata entity or None
         """
-        type_mapping = {
-            EntityType.PERSON: 'person',
-            EntityType.ORGANIZATION: 'organization',
-            EntityType.LOCATION: 'location',
-            EntityType.EVENT: 'event'
-        }
-        
-        search_type = type_mapping.get(entity_type)
-        candidates = await self.search_entities(entity_text, search_type, language, limit=5)
-        
+        candidates = await self.search_entities(entity_text, TYPE_MAPPING.get(entity_type), language, limit=5)
+        return self._select_candidate(entity_text, candidates, context)
+    
+    def _select_candidate(self, entity_text: str, candidates: List[Dict[str, Any]],
+                          context: str = "") -> Optional[Dict[str, Any]]:
+        """Pick the best candidate for an entity, or None below the confidence threshold"""
         if not candidates:
             logger.debug(f"No Wikidata candidates found for '{entity_text}'")
             return None
@@ -333,6 +515,68 @@ class WikidataService:
         
         return best_candidate if best_score > 0.5 else None
     
+    async def resolve_entities(self, entities: List[Tuple[str, EntityType, str]],
+                               language: str = 'en') -> List[Optional[Dict[str, Any]]]:
+        """
+        Disambiguate many entities at once
+        
+        Args:
+            entities: (entity text, entity type, context) tuples
+            language: Language code
+            
+        Returns:
+            The best Wikidata match (as ``disambiguate_entity``) or None for
+            each entity, in order
+        """
+        if not self.session:
+            logger.error("WikidataService session not initialized. Use async context manager.")
+            return [None] * len(entities)
+        
+        # Each distinct name is searched once; all candidates are then fetched in shared batches
+        queries = {}
+        for text, _, _ in entities:
+            queries.setdefault(_normalize_query(text), text)
+        hits = dict(zip(queries, await asyncio.gather(*(
+            self._search_hits(query, language, limit=5) for query in queries.values()
+        ))))
+        candidate_ids = [hit['id'] for query_hits in hits.values() for hit in query_hits]
+        details = await self.get_entities(candidate_ids, language)
+        
+        return [
+            self._select_candidate(
+                text,
+                self._candidates(text, hits[_normalize_query(text)], details, TYPE_MAPPING.get(entity_type)),
+                context
+            )
+            for text, entity_type, context in entities
+        ]
+    
+    async def enrich_entities(self, canonical_entities: List[CanonicalEntity],
+                              language: str = 'en') -> List[Dict[str, Any]]:
+        """
+        Enrich many canonical entities with Wikidata information
+        
+        Args:
+            canonical_entities: The entities to enrich
+            language: Language for Wikidata content
+            
+        Returns:
+            Enrichment data for each entity, in order (empty when unmatched)
+        """
+        matches = await self.resolve_entities(
+            [(entity.primary_name, entity.entity_type, entity.description or "") for entity in canonical_entities],
+            language
+        )
+        enrichments = [
+            self._enrichment(entity, match) if match else {}
+            for entity, match in zip(canonical_entities, matches)
+        ]
+        logger.info(
+            f"Enriched {sum(1 for enrichment in enrichments if enrichment)} of "
+            f"{len(canonical_entities)} entities with Wikidata"
+        )
+        return enrichments
+    
     async def enrich_canonical_entity(self, canonical_entity: CanonicalEntity, 
                                     language: str = 'en') -> Dict[str, Any]:
         """
@@ -355,6 +599,12 @@ class WikidataService:
         if not wikidata_match:
             return {}
         
+        enrichment = self._enrichment(canonical_entity, wikidata_match)
+        logger.info(f"Enriched entity '{canonical_entity.primary_name}' with Wikidata ID: {wikidata_match['wikidata_id']}")
+        return enrichment
+    
+    def _enrichment(self, canonical_entity: CanonicalEntity, wikidata_match: Dict[str, Any]) -> Dict[str, Any]:
+        """Enrichment data to merge into a canonical entity from its Wikidata match"""
         # Prepare enrichment data
         enrichment = {
             'wikidata_id': wikidata_match['wikidata_id'],
@@ -409,7 +659,6 @@ class WikidataService:
                 if wikidata_match['description']:
                     enrichment['description'] = wikidata_match['description']
         
-        logger.info(f"Enriched entity '{canonical_entity.primary_name}' with Wikidata ID: {wikidata_match['wikidata_id']}")
         return enrichment
 
 
@@ -1,22 +1,58 @@
 """
 Celery application configuration
 """
+from typing import Dict, Iterable, List
+
 from celery import Celery
 from app.core.config import settings
 
+# Task modules behind each queue (see task_routes below). A worker started with
+# CELERY_WORKER_QUEUES imports only the modules, and so the services, its queues need
+TASK_MODULES_BY_QUEUE: Dict[str, List[str]] = {
+    "quick": ["app.tasks.project_tasks", "app.tasks.index_tasks"],
+    "scraping": ["app.tasks.firecrawl_scraping", "app.tasks.scraping_simple"],
+    "indexing": ["app.tasks.index_tasks", "app.tasks.meilisearch_sync"],
+    "celery": [
+        "app.tasks.firecrawl_scraping",
+        "app.tasks.project_tasks",
+        "app.tasks.meilisearch_sync",
+        "app.tasks.parquet_tasks",
+        "app.tasks.export_tasks",
+    ],
+    "backup": [],  # "app.tasks.backup_tasks" - Backup and recovery tasks - Disabled
+}
+
+ALL_TASK_MODULES: List[str] = [
+    "app.tasks.firecrawl_scraping",  # Firecrawl-only tasks
+    "app.tasks.scraping_simple",  # Simple tasks for retries
+    "app.tasks.project_tasks",  # Project management tasks
+    "app.tasks.index_tasks",  # Meilisearch index tasks
+    "app.tasks.meilisearch_sync",  # Batch synchronization tasks
+    "app.tasks.parquet_tasks",  # Parquet pipeline processing tasks
+    "app.tasks.export_tasks",  # Background search result exports
+    # "app.tasks.backup_tasks"  # Backup and recovery tasks - Disabled
+]
+
+
+def worker_queues() -> List[str]:
+    """Queues named in CELERY_WORKER_QUEUES; empty when the worker consumes all of them"""
+    return [queue.strip() for queue in settings.CELERY_WORKER_QUEUES.split(",") if queue.strip()]
+
+
+def task_modules_for_queues(queues: Iterable[str]) -> List[str]:
+    """Task modules a worker consuming ``queues`` must import; all of them for no or unknown queues"""
+    queues = list(queues)
+    if not queues or any(queue not in TASK_MODULES_BY_QUEUE for queue in queues):
+        return list(ALL_TASK_MODULES)
+    needed = {module for queue in queues for module in TASK_MODULES_BY_QUEUE[queue]}
+    return [module for module in ALL_TASK_MODULES if module in needed]
+
+
 celery_app = Celery(
     "chrono_scraper",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=[
-        "app.tasks.firecrawl_scraping",  # Firecrawl-only tasks
-        "app.tasks.scraping_simple",  # Simple tasks for retries
-        "app.tasks.project_tasks",  # Project management tasks
-        "app.tasks.index_tasks",  # Meilisearch index tasks
-        "app.tasks.meilisearch_sync",  # Batch synchronization tasks
-        "app.tasks.parquet_tasks",  # Parquet pipeline processing tasks
-        # "app.tasks.backup_tasks"  # Backup and recovery tasks - Disabled
-    ]
+    include=task_modules_for_queues(worker_queues()),
 )
 
 # Optimized Celery configuration for intelligent content extraction system
@@ -38,8 +74,10 @@ celery_app.conf.update(
     
     # Worker settings - optimized for intelligent extraction memory management
     worker_prefetch_multiplier=1,  # Conservative prefetch for memory efficiency
-    worker_max_tasks_per_child=30,  # Reduced for aggressive memory recycling
-    worker_max_memory_per_child=350000,  # 350MB limit per worker process
+    # Children are recycled on private memory growth rather than task count, so
+    # preloaded models (see worker_bootstrap) survive across tasks
+    worker_max_tasks_per_child=settings.CELERY_WORKER_MAX_TASKS_PER_CHILD,
+    worker_max_memory_per_child=settings.CELERY_WORKER_MAX_MEMORY_PER_CHILD_KB,
     worker_hijack_root_logger=False,
     result_extended=True,
     worker_concurrency=8,  # Optimized for 2.5 CPU cores with intelligent extraction
@@ -78,10 +116,7 @@ celery_app.conf.update(
     worker_enable_remote_control=True,
     worker_pool_restarts=True,
     worker_autoscaler='celery.worker.autoscale:Autoscaler',
-    
-    # Memory management for extraction libraries
-    celeryd_force_execv=True,  # Force process replacement for memory cleanup
-    celeryd_max_tasks_per_child=30,  # Aggressive recycling
+
 )
 
 # Priority-based task routing for optimal resource allocation
@@ -95,6 +130,8 @@ celery_app.conf.task_routes = {
     "app.tasks.firecrawl_scraping.scrape_domain_with_intelligent_extraction": {"queue": "scraping", "priority": 5},
     "app.tasks.firecrawl_scraping.scrape_domain_incremental": {"queue": "scraping", "priority": 6},
     "app.tasks.firecrawl_scraping.fill_coverage_gaps": {"queue": "scraping", "priority": 4},
+    "app.tasks.firecrawl_scraping.process_scrape_shard": {"queue": "scraping", "priority": 5},
+    "app.tasks.firecrawl_scraping.finalize_sharded_scrape": {"queue": "celery", "priority": 6},
     "app.tasks.scraping_simple.*": {"queue": "scraping", "priority": 5},
     "app.tasks.backup_tasks.execute_*_backup": {"queue": "backup", "priority": 6},
     
@@ -102,6 +139,7 @@ celery_app.conf.task_routes = {
     "app.tasks.index_tasks.*": {"queue": "indexing", "priority": 3},
     "app.tasks.meilisearch_sync.*": {"queue": "indexing", "priority": 3},
     "app.tasks.backup_tasks.*": {"queue": "backup", "priority": 4},
+    "app.tasks.export_tasks.*": {"queue": "celery", "priority": 3},
     
     # Periodic incremental tasks
     "app.tasks.firecrawl_scraping.check_domains_for_incremental": {"queue": "celery", "priority": 3},
@@ -148,4 +186,35 @@ celery_app.conf.beat_schedule = {
         "options": {"queue": "celery"},
         "kwargs": {"force_check": True}
     },
-}
\ No newline at end of file
+    
+    # Scrape page statistics rollups
+    "refresh-scrape-page-rollups": {
+        "task": "app.tasks.project_tasks.refresh_scrape_page_rollups",
+        "schedule": 5 * 60.0,  # Every 5 minutes
+        "options": {"queue": "celery"}
+    },
+    
+    # Pre-aggregated domain timelines for analytics
+    "refresh-domain-timelines": {
+        "task": "app.tasks.project_tasks.refresh_domain_timelines",
+        "schedule": float(settings.DOMAIN_TIMELINE_REFRESH_INTERVAL_SECONDS),
+        "options": {"queue": "celery"}
+    },
+    
+    # Expire stored search export files
+    "purge-expired-search-exports": {
+        "task": "app.tasks.export_tasks.purge_expired_search_exports",
+        "schedule": 60 * 60.0,  # Hourly
+        "options": {"queue": "celery"}
+    },
+    
+    # Merge small files in the Hive-partitioned analytics datasets
+    "compact-analytics-datasets": {
+        "task": "parquet.compact_analytics_datasets",
+        "schedule": settings.ANALYTICS_COMPACTION_INTERVAL_MINUTES * 60.0,
+        "options": {"queue": "celery"}
+    },
+}
+
+# Register worker bootstrap signal handlers (preloading, per-child setup)
+from app.tasks import worker_bootstrap  # noqa: E402,F401
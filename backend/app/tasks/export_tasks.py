@@ -0,0 +1,81 @@
+"""
+Background export Celery tasks
+"""
+import asyncio
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from celery import current_task
+
+from app.tasks.celery_app import celery_app
+from app.core.database import AsyncSessionLocal
+from app.services.search_export import (
+    SearchExportFilters,
+    SearchExportFormat,
+    SearchExportService,
+)
+
+
+@celery_app.task(bind=True, name="app.tasks.export_tasks.export_search_results_to_file")
+def export_search_results_to_file(
+    self,
+    user_id: int,
+    export_format: str,
+    query: Optional[str] = None,
+    projects: Optional[List[int]] = None,
+    domains: Optional[List[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    include_text: bool = True,
+    compress: bool = False,
+) -> Dict[str, Any]:
+    """
+    Write a complete search export to local storage for later download
+    """
+    fmt = SearchExportFormat(export_format)
+    filters = SearchExportFilters(
+        query=query,
+        projects=projects or [],
+        domains=domains or [],
+        date_from=date.fromisoformat(date_from) if date_from else None,
+        date_to=date.fromisoformat(date_to) if date_to else None,
+        include_text=include_text,
+    )
+    path = SearchExportService.export_path(user_id, self.request.id, fmt, compress)
+
+    def _report(rows: int, bytes_written: int) -> None:
+        current_task.update_state(
+            state="PROGRESS",
+            meta={"user_id": user_id, "rows": rows, "bytes": bytes_written}
+        )
+
+    async def _export():
+        async with AsyncSessionLocal() as db:
+            return await SearchExportService.write_export_file(
+                db, user_id, filters, fmt, path,
+                compress=compress, progress_callback=_report
+            )
+
+    try:
+        result = asyncio.run(_export())
+        return {
+            "user_id": user_id,
+            "format": fmt.value,
+            "compressed": compress and fmt != SearchExportFormat.PARQUET,
+            "status": "completed",
+            **result,
+        }
+    except Exception as exc:
+        current_task.update_state(
+            state="FAILURE",
+            meta={"user_id": user_id, "error": str(exc)}
+        )
+        raise exc
+
+
+@celery_app.task(name="app.tasks.export_tasks.purge_expired_search_exports")
+def purge_expired_search_exports() -> Dict[str, Any]:
+    """
+    Delete background export files older than SEARCH_EXPORT_TTL_HOURS
+    """
+    return {"removed": SearchExportService.purge_expired_exports()}
@@ -8,38 +8,42 @@ This module provides a streamlined scraping system that:
 """
 import asyncio
 import logging
+from contextlib import aclosing
 from datetime import datetime
 from typing import Dict, Any, List, Optional
+from celery import chord
 from sqlmodel import select, Session
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
 
 from app.tasks.celery_app import celery_app
+from app.tasks.worker_bootstrap import get_task_engine
 from app.core.config import settings
 from app.models.project import Domain, Project, ScrapeSession, ScrapeSessionStatus, DomainStatus
-from app.models.scraping import ScrapePage, ScrapePageStatus, IncrementalRunType, IncrementalRunStatus
+from app.models.scraping import ScrapePageStatus, IncrementalRunType, IncrementalRunStatus
 from app.models.shared_pages import PageV2
 from app.services.content_extraction_service import get_content_extraction_service
-from app.services.firecrawl_v2_client import FirecrawlV2Client, FirecrawlV2Error
+from app.services.firecrawl_v2_client import FirecrawlV2Client
 from app.services.enhanced_intelligent_filter import get_enhanced_intelligent_filter
 from app.services.meilisearch_service import meilisearch_service
 from app.models.extraction_data import ExtractedContent
 from app.services.incremental_scraping import IncrementalScrapingService
+from app.services.scrape_page_ingestion import ScrapePageBulkIngestor
+from app.services.digest_index import record_completed_digests
+from app.services.scrape_sharding import (
+    ShardCheckpointStore, ShardProgress, fail_unfinished_shards, plan_shards, session_page_counts
+)
 from app.services.enhanced_archive_router import EnhancedArchiveServiceRouter, create_enhanced_routing_config_from_project
 
 logger = logging.getLogger(__name__)
 
+# Pending pages resolved per query once all V2 batch results are consumed
+V2_RESULT_MISS_CHUNK_SIZE = 500
+
 
 def get_sync_session():
     """Create a synchronous database session for Celery tasks"""
-    engine = create_engine(
-        settings.DATABASE_URL,
-        poolclass=NullPool,  # Disable connection pooling for Celery
-        echo=False,
-    )
     SessionLocal = sessionmaker(
-        engine,
+        get_task_engine(),
         class_=Session,
         expire_on_commit=False,
     )
@@ -451,83 +455,24 @@ def scrape_domain_with_intelligent_extraction(self, domain_id: int, scrape_sessi
         # Create ScrapePage records for ALL discovered URLs with individual filtering reasons using batch operations
         logger.info(f"Creating ScrapePage records for ALL {len(all_filtering_decisions)} discovered URLs with individual filtering reasons")
         
-        # BATCH PROCESSING FOR PERFORMANCE: Instead of individual queries, use bulk operations
-        # Step 1: Find existing ScrapePage records to avoid duplicates
-        existing_combinations = set()
-        if all_filtering_decisions:
-            # Get all existing records for this domain in a single query (much simpler and faster)
-            existing_pages_query = db.execute(
-                select(ScrapePage.original_url, ScrapePage.unix_timestamp)
-                .where(ScrapePage.domain_id == domain.id)
-            ).fetchall()
-            
-            existing_combinations = {(row[0], row[1]) for row in existing_pages_query}
-            logger.info(f"Found {len(existing_combinations)} existing ScrapePage records, will skip duplicates")
-        
-        # Step 2: Prepare ScrapePage objects for bulk insert
-        scrape_pages_to_create = []
-        batch_progress_data = []
-        current_time = datetime.utcnow()
+        # COPY the decisions into a staging table and let the unique
+        # (domain_id, original_url, unix_timestamp) index skip captures that
+        # already exist, instead of loading every existing key into memory
+        ingest_result = ScrapePageBulkIngestor(
+            db,
+            domain_id=domain.id,
+            scrape_session_id=scrape_session_id,
+            chunk_size=settings.SCRAPE_PAGE_INGEST_CHUNK_SIZE,
+        ).ingest(all_filtering_decisions)
+        scrape_pages_created = ingest_result.inserted
+        
+        logger.info(
+            f"Created {scrape_pages_created} ScrapePage records with individual filtering reasons "
+            f"(skipped {ingest_result.skipped} duplicates, {ingest_result.failed} failed)"
+        )
         
-        for decision in all_filtering_decisions:
-            try:
-                cdx_record = decision.cdx_record
-                url_timestamp_key = (cdx_record.original_url, str(cdx_record.timestamp))
-                
-                # Skip if this combination already exists
-                if url_timestamp_key not in existing_combinations:
-                    # Create ScrapePage with filtering decision data
-                    scrape_page = ScrapePage(
-                        domain_id=domain.id,
-                        scrape_session_id=scrape_session_id,
-                        original_url=cdx_record.original_url,
-                        content_url=cdx_record.content_url,
-                        unix_timestamp=str(cdx_record.timestamp),
-                        mime_type=cdx_record.mime_type or "text/html",
-                        status_code=int(cdx_record.status_code) if cdx_record.status_code else 200,
-                        content_length=cdx_record.content_length_bytes,
-                        digest_hash=getattr(cdx_record, 'digest', None),
-                        status=decision.status,
-                        filter_reason=decision.reason.value if hasattr(decision.reason, 'value') else str(decision.reason),
-                        filter_category=decision.reason.value if hasattr(decision.reason, 'value') else str(decision.reason),
-                        filter_details=decision.filter_details,
-                        matched_pattern=decision.matched_pattern,
-                        filter_confidence=decision.confidence,
-                        related_page_id=getattr(decision, 'related_page_id', None),
-                        is_pdf=cdx_record.mime_type == "application/pdf" if cdx_record.mime_type else False,
-                        priority_score=getattr(decision, 'priority_score', None),
-                        can_be_manually_processed=decision.can_be_manually_processed,
-                        first_seen_at=current_time,
-                        created_at=current_time
-                    )
-                    scrape_pages_to_create.append(scrape_page)
-                    
-                    # Collect data for batch WebSocket broadcast (without individual broadcasts)
-                    batch_progress_data.append({
-                        "page_url": cdx_record.original_url,
-                        "content_url": cdx_record.content_url,
-                        "status": decision.status,
-                        "filter_reason": getattr(decision, 'specific_reason', str(decision.reason))
-                    })
-                        
-            except Exception as e:
-                logger.error(f"Failed to prepare ScrapePage for {decision.cdx_record.original_url}: {str(e)}")
-        
-        # Step 3: Bulk insert ScrapePage records (much faster than individual inserts)
-        scrape_pages_created = len(scrape_pages_to_create)
-        if scrape_pages_to_create:
-            # Process in batches to avoid memory issues with very large domains
-            batch_size = 5000
-            for i in range(0, len(scrape_pages_to_create), batch_size):
-                batch = scrape_pages_to_create[i:i + batch_size]
-                db.add_all(batch)
-                db.commit()  # Commit each batch to avoid long transactions
-                logger.info(f"Batch inserted {len(batch)} ScrapePage records ({i + len(batch)}/{scrape_pages_created} total)")
-        
-        logger.info(f"Created {scrape_pages_created} ScrapePage records with individual filtering reasons (skipped {len(existing_combinations)} duplicates)")
-        
-        # Step 4: Broadcast session-level statistics instead of page-level progress
-        if batch_progress_data:
+        # Broadcast session-level statistics instead of page-level progress
+        if scrape_pages_created:
             try:
                 from app.services.websocket_service import broadcast_session_stats_sync
                 # Use session-level stats broadcast instead of page progress
@@ -539,7 +484,7 @@ def scrape_domain_with_intelligent_extraction(self, domain_id: int, scrape_sessi
                     "pages_completed": 0,
                     "pages_failed": 0,
                     "pages_filtered": len(all_filtering_decisions) - scrape_pages_created,
-                    "pages_duplicates": len(existing_combinations)
+                    "pages_duplicates": ingest_result.skipped
                 })
             except Exception as e:
                 logger.warning(f"Failed to broadcast batch progress: {e}")
@@ -672,6 +617,47 @@ def scrape_domain_with_intelligent_extraction(self, domain_id: int, scrape_sessi
                 "message": "Cancelled before processing batches"
             }
 
+        # Large sessions are split into page id ranges processed by parallel
+        # shard tasks; a chord callback finalizes the session once all finish
+        if settings.SCRAPE_SHARDING_ENABLED and (use_intelligent_only or not v2_batch_only):
+            shard_ranges = plan_shards(db, domain_id, scrape_session_id, settings.SCRAPE_SHARD_SIZE)
+            if len(shard_ranges) > 1:
+                shard_tasks = [
+                    process_scrape_shard.s(domain_id, scrape_session_id, shard_index, low_id, high_id)
+                    for shard_index, (low_id, high_id) in enumerate(shard_ranges)
+                ]
+                callback = finalize_sharded_scrape.s(
+                    domain_id, scrape_session_id,
+                    pages_found=len(cdx_records),
+                    history_id=history_id,
+                    incremental_mode=incremental_mode,
+                ).on_error(
+                    # A shard killed at its hard time limit fails the chord and the
+                    # callback above never runs
+                    fail_sharded_scrape.s(
+                        domain_id, scrape_session_id,
+                        pages_found=len(cdx_records),
+                        shard_ranges=shard_ranges,
+                        history_id=history_id,
+                        incremental_mode=incremental_mode,
+                    )
+                )
+                chord_result = chord(shard_tasks)(callback)
+                logger.info(f"Session {scrape_session_id}: dispatched {len(shard_ranges)} shards of up to {settings.SCRAPE_SHARD_SIZE} pages")
+                return {
+                    "status": "sharded",
+                    "domain_name": domain.domain_name,
+                    "domain_id": domain_id,
+                    "session_id": scrape_session_id,
+                    "history_id": history_id,
+                    "pages_found": len(cdx_records),
+                    "shards": len(shard_ranges),
+                    "finalize_task_id": chord_result.id,
+                    "filter_stats": filter_stats,
+                    "incremental_mode": incremental_mode,
+                    "message": f"Extracting {domain.domain_name} in {len(shard_ranges)} parallel shards"
+                }
+
         # Step 2: Extract content using intelligent extraction
         self.update_state(
             state="PROGRESS",
@@ -733,92 +719,15 @@ def scrape_domain_with_intelligent_extraction(self, domain_id: int, scrape_sessi
             }
         )
         
-        # Update domain and session statistics
-        domain.total_pages = len(cdx_records)
-        domain.scraped_pages = pages_created
-        domain.last_scraped = datetime.utcnow()
-        
-        # Check if session was cancelled during processing
-        current_status = db.get(ScrapeSession, scrape_session_id).status
-        if current_status == ScrapeSessionStatus.CANCELLED:
-            scrape_session.status = ScrapeSessionStatus.CANCELLED
-            scrape_session.completed_at = datetime.utcnow()
-            logger.info(f"Session {scrape_session_id} was cancelled during processing")
-        else:
-            scrape_session.completed_urls = pages_created
-            scrape_session.failed_urls = pages_failed
-            scrape_session.status = ScrapeSessionStatus.COMPLETED
-            scrape_session.completed_at = datetime.utcnow()
-        
-        db.commit()
-        
-        logger.info(f"Intelligent extraction scraping completed: {pages_created} pages created, {pages_failed} failed")
-        
-        # Update incremental history on completion
-        if incremental_mode and history_id:
-            try:
-                from app.core.database import get_async_session
-                
-                async def update_completion_stats():
-                    async_db = anext(get_async_session())
-                    async_db_session = await async_db
-                    try:
-                        # Calculate runtime and statistics
-                        end_time = datetime.utcnow()
-                        runtime_seconds = (end_time - start_time).total_seconds()
-                        
-                        completion_stats = {
-                            "status": "completed",
-                            "completed_at": end_time,
-                            "runtime_seconds": runtime_seconds,
-                            "pages_processed": pages_created + pages_failed,
-                            "pages_created": pages_created,
-                            "pages_failed": pages_failed,
-                            "new_content_found": pages_created,
-                            "success_rate": (pages_created / (pages_created + pages_failed) * 100) if (pages_created + pages_failed) > 0 else 0
-                        }
-                        
-                        # Update incremental statistics
-                        await IncrementalScrapingService.update_incremental_statistics(
-                            async_db_session, domain_id, history_id, completion_stats
-                        )
-                        
-                        # Update domain coverage
-                        await IncrementalScrapingService.update_domain_coverage(
-                            async_db_session, domain_id, 
-                            {"new_content": pages_created, "gaps_filled": 0}
-                        )
-                    finally:
-                        await async_db_session.close()
-                
-                # Use the helper function to run async code
-                run_async_in_sync(update_completion_stats)
-                logger.info(f"Updated incremental history {history_id} with completion stats")
-            except Exception as e:
-                logger.warning(f"Failed to update incremental completion stats: {e}")
-        
-        # Broadcast final session stats
-        try:
-            from app.services.websocket_service import broadcast_session_stats_sync
-            total = scrape_session.total_urls or 0
-            completed = scrape_session.completed_urls or 0
-            failed = scrape_session.failed_urls or 0
-            progress_pct = (completed / total * 100) if total else 0.0
-            broadcast_session_stats_sync({
-                "scrape_session_id": scrape_session_id,
-                "total_urls": total,
-                "pending_urls": 0,
-                "in_progress_urls": 0,
-                "completed_urls": completed,
-                "failed_urls": failed,
-                "skipped_urls": 0,
-                "progress_percentage": progress_pct,
-                "active_domains": 0,
-                "completed_domains": 1,
-                "failed_domains": 0,
-            })
-        except Exception:
-            pass
+        _finalize_scrape_session(
+            db, domain, scrape_session,
+            pages_found=len(cdx_records),
+            pages_created=pages_created,
+            pages_failed=pages_failed,
+            incremental_mode=incremental_mode,
+            history_id=history_id,
+            start_time=start_time,
+        )
         
         return {
             "status": "completed",
@@ -893,6 +802,227 @@ def scrape_domain_with_intelligent_extraction(self, domain_id: int, scrape_sessi
             db.close()
 
 
+def _finalize_scrape_session(db, domain, scrape_session, pages_found: int, pages_created: int, pages_failed: int,
+                             incremental_mode: bool = False, history_id: Optional[int] = None,
+                             start_time: Optional[datetime] = None) -> None:
+    """
+    Record final domain/session statistics, incremental history and broadcast them
+
+    Shared by the single-task scrape and the chord callback of a sharded scrape.
+    """
+    start_time = start_time or scrape_session.started_at or datetime.utcnow()
+    
+    # Update domain and session statistics
+    domain.total_pages = pages_found
+    domain.scraped_pages = pages_created
+    domain.last_scraped = datetime.utcnow()
+    
+    # Check if session was cancelled during processing
+    current_status = db.get(ScrapeSession, scrape_session.id).status
+    if current_status == ScrapeSessionStatus.CANCELLED:
+        scrape_session.status = ScrapeSessionStatus.CANCELLED
+        scrape_session.completed_at = datetime.utcnow()
+        logger.info(f"Session {scrape_session.id} was cancelled during processing")
+    else:
+        scrape_session.completed_urls = pages_created
+        scrape_session.failed_urls = pages_failed
+        scrape_session.status = ScrapeSessionStatus.COMPLETED
+        scrape_session.completed_at = datetime.utcnow()
+    
+    db.commit()
+    
+    logger.info(f"Intelligent extraction scraping completed: {pages_created} pages created, {pages_failed} failed")
+    
+    # Update incremental history on completion
+    if incremental_mode and history_id:
+        try:
+            from app.core.database import get_async_session
+            
+            async def update_completion_stats():
+                async_db = anext(get_async_session())
+                async_db_session = await async_db
+                try:
+                    # Calculate runtime and statistics
+                    end_time = datetime.utcnow()
+                    runtime_seconds = (end_time - start_time).total_seconds()
+                    
+                    completion_stats = {
+                        "status": "completed",
+                        "completed_at": end_time,
+                        "runtime_seconds": runtime_seconds,
+                        "pages_processed": pages_created + pages_failed,
+                        "pages_created": pages_created,
+                        "pages_failed": pages_failed,
+                        "new_content_found": pages_created,
+                        "success_rate": (pages_created / (pages_created + pages_failed) * 100) if (pages_created + pages_failed) > 0 else 0
+                    }
+                    
+                    # Update incremental statistics
+                    await IncrementalScrapingService.update_incremental_statistics(
+                        async_db_session, domain.id, history_id, completion_stats
+                    )
+                    
+                    # Update domain coverage
+                    await IncrementalScrapingService.update_domain_coverage(
+                        async_db_session, domain.id, 
+                        {"new_content": pages_created, "gaps_filled": 0}
+                    )
+                finally:
+                    await async_db_session.close()
+            
+            # Use the helper function to run async code
+            run_async_in_sync(update_completion_stats)
+            logger.info(f"Updated incremental history {history_id} with completion stats")
+        except Exception as e:
+            logger.warning(f"Failed to update incremental completion stats: {e}")
+    
+    # Broadcast final session stats
+    try:
+        from app.services.websocket_service import broadcast_session_stats_sync
+        total = scrape_session.total_urls or 0
+        completed = scrape_session.completed_urls or 0
+        failed = scrape_session.failed_urls or 0
+        progress_pct = (completed / total * 100) if total else 0.0
+        broadcast_session_stats_sync({
+            "scrape_session_id": scrape_session.id,
+            "total_urls": total,
+            "pending_urls": 0,
+            "in_progress_urls": 0,
+            "completed_urls": completed,
+            "failed_urls": failed,
+            "skipped_urls": 0,
+            "progress_percentage": progress_pct,
+            "active_domains": 0,
+            "completed_domains": 1,
+            "failed_domains": 0,
+        })
+    except Exception:
+        pass
+
+
+@celery_app.task(bind=True)
+def process_scrape_shard(self, domain_id: int, scrape_session_id: int, shard_index: int, low_id: int, high_id: int) -> Dict[str, Any]:
+    """
+    Extract content for one id range of a session's ScrapePages
+    
+    Progress is checkpointed after every committed batch. A redelivered shard
+    (the worker was killed; tasks are acked late) resumes after the last
+    checkpointed page. Failures are returned rather than raised so the chord
+    callback still finalizes the session.
+    """
+    db = None
+    try:
+        db = get_sync_session()
+        domain = db.get(Domain, domain_id)
+        scrape_session = db.get(ScrapeSession, scrape_session_id)
+        if not domain or not scrape_session:
+            return {"shard": shard_index, "status": "skipped", "pages_created": 0, "pages_failed": 0}
+        
+        shard = ShardProgress(ShardCheckpointStore(), scrape_session_id, shard_index, (low_id, high_id))
+        if shard.checkpoint.resumed:
+            logger.info(f"Shard {shard_index} of session {scrape_session_id} resuming after page {shard.checkpoint.last_id}")
+        
+        pages_created, pages_failed = run_async_in_sync(
+            _process_individual_firecrawl(db, scrape_session, domain, [], self, scrape_session_id, shard=shard)
+        )
+        return {
+            "shard": shard_index,
+            "status": "completed",
+            "pages_created": pages_created,
+            "pages_failed": pages_failed,
+            "resumed": shard.checkpoint.resumed,
+        }
+    except Exception as e:
+        logger.error(f"Shard {shard_index} ({low_id}-{high_id}) of session {scrape_session_id} failed: {e}")
+        return {"shard": shard_index, "status": "failed", "error": str(e), "pages_created": 0, "pages_failed": 0}
+    finally:
+        if db:
+            db.close()
+
+
+@celery_app.task(bind=True)
+def finalize_sharded_scrape(self, shard_results: List[Dict[str, Any]], domain_id: int, scrape_session_id: int,
+                            pages_found: int, history_id: Optional[int] = None,
+                            incremental_mode: bool = False) -> Dict[str, Any]:
+    """
+    Chord callback: aggregate shard outcomes into the session statistics
+    
+    Totals come from the ScrapePage statuses in the database, so shards that
+    were retried or resumed are not double counted.
+    """
+    failed_shards = [r["shard"] for r in shard_results if r and r.get("status") == "failed"]
+    if failed_shards:
+        logger.warning(f"Session {scrape_session_id}: shards {failed_shards} failed; their remaining pages stay pending")
+    return _finalize_shards(domain_id, scrape_session_id, pages_found, len(shard_results), failed_shards,
+                            history_id=history_id, incremental_mode=incremental_mode)
+
+
+@celery_app.task
+def fail_sharded_scrape(request, exc, traceback, domain_id: int, scrape_session_id: int, pages_found: int,
+                        shard_ranges: List[List[int]], history_id: Optional[int] = None,
+                        incremental_mode: bool = False) -> Dict[str, Any]:
+    """
+    Chord error callback: finalize a sharded scrape whose chord failed
+    
+    Runs instead of finalize_sharded_scrape when a shard task itself failed,
+    e.g. it was killed at its hard time limit. Pages the shard left unfinished
+    are marked failed before the session totals are recorded.
+    """
+    db = get_sync_session()
+    try:
+        failed_shards = fail_unfinished_shards(
+            db, scrape_session_id, [tuple(r) for r in shard_ranges], f"Shard did not finish: {exc}"
+        )
+    finally:
+        db.close()
+    logger.error(f"Session {scrape_session_id}: shard chord failed ({exc}); shards {failed_shards} marked failed")
+    return _finalize_shards(domain_id, scrape_session_id, pages_found, len(shard_ranges), failed_shards,
+                            history_id=history_id, incremental_mode=incremental_mode)
+
+
+def _finalize_shards(domain_id: int, scrape_session_id: int, pages_found: int, shard_count: int,
+                     failed_shards: List[int], history_id: Optional[int] = None,
+                     incremental_mode: bool = False) -> Dict[str, Any]:
+    """Record session totals from ScrapePage statuses once every shard has ended"""
+    db = get_sync_session()
+    try:
+        domain = db.get(Domain, domain_id)
+        scrape_session = db.get(ScrapeSession, scrape_session_id)
+        if not domain or not scrape_session:
+            return {"status": "failed", "session_id": scrape_session_id, "message": "Domain or session no longer exists"}
+        
+        counts = session_page_counts(db, scrape_session_id)
+        pages_created = counts.get(ScrapePageStatus.COMPLETED.value, 0)
+        pages_failed = counts.get(ScrapePageStatus.FAILED.value, 0)
+        
+        _finalize_scrape_session(
+            db, domain, scrape_session,
+            pages_found=pages_found,
+            pages_created=pages_created,
+            pages_failed=pages_failed,
+            incremental_mode=incremental_mode,
+            history_id=history_id,
+        )
+        ShardCheckpointStore().clear(scrape_session_id, shard_count)
+        
+        return {
+            "status": "completed",
+            "domain_name": domain.domain_name,
+            "domain_id": domain_id,
+            "session_id": scrape_session_id,
+            "history_id": history_id,
+            "pages_found": pages_found,
+            "pages_created": pages_created,
+            "pages_failed": pages_failed,
+            "shards": shard_count,
+            "failed_shards": failed_shards,
+            "incremental_mode": incremental_mode,
+            "message": f"Successfully extracted {pages_created} pages in {shard_count} shards for {domain.domain_name}"
+        }
+    finally:
+        db.close()
+
+
 async def _discover_and_filter_pages(domain: Domain, include_attachments: bool = True) -> tuple[List, List, Dict[str, Any]]:
     """
     Discover pages using archive service router with enhanced intelligent filtering that captures individual reasons
@@ -1209,107 +1339,48 @@ def start_domain_scrape_simple(domain_id: int) -> str:
         db.close()
 
 
-async def _process_v2_batch_results(db, scrape_session, domain, cdx_records, task_self):
+def _v2_doc_source_url(doc) -> Optional[str]:
+    """Wayback URL a Firecrawl batch document was scraped from"""
+    meta = (doc or {}).get("metadata") or {}
+    return meta.get("sourceURL") or meta.get("url") or (doc or {}).get("url")
+
+
+def _apply_v2_documents(db, scrape_session, domain, scrape_pages, url_to_doc):
     """
-    Process results from a Firecrawl V2 batch operation
-    
-    Args:
-        db: Database session
-        scrape_session: ScrapeSession object
-        domain: Domain object
-        cdx_records: List of CDX records
-        task_self: Celery task instance for state updates
-        
+    Persist Firecrawl documents for a chunk of pending ScrapePages and commit
+
+    Pages that already have a PageV2 are completed without a new row, pages
+    without a document in ``url_to_doc`` are failed as batch misses.
+
     Returns:
-        Tuple of (pages_created, pages_failed)
+        Tuple of (pages_created, pages_failed, created Page records)
     """
-    from app.services.firecrawl_v2_client import FirecrawlV2Client
-    from app.models.scraping import ScrapePage, ScrapePageStatus
+    from app.models.scraping import ScrapePageStatus
     from app.models.shared_pages import PageV2 as Page
-    
+
     pages_created = 0
     pages_failed = 0
-    
-    if not scrape_session.external_batch_id:
-        logger.error(f"No external batch ID found for session {scrape_session.id}")
-        return pages_created, pages_failed
-    
-    # Handle multiple batch IDs (comma-separated)
-    batch_ids = [bid.strip() for bid in scrape_session.external_batch_id.split(",") if bid.strip()]
-    logger.info(f"Processing V2 batch results for {len(batch_ids)} batch(es): {', '.join(batch_ids[:3])}{'...' if len(batch_ids) > 3 else ''}")
+    created_pages = []
+    if not scrape_pages:
+        return pages_created, pages_failed, created_pages
 
-    # Retrieve real V2 batch results with pagination (per docs) for all batches
-    fc_client = FirecrawlV2Client()
-    all_documents = []
-    
-    for batch_idx, batch_id in enumerate(batch_ids):
-        logger.info(f"Processing batch {batch_idx + 1}/{len(batch_ids)}: {batch_id}")
-        
-        next_token = None
-        try:
-            while True:
-                status_resp = fc_client.get_batch_status(batch_id, next_token)
-                documents = status_resp.get("data") or []
-                if documents:
-                    all_documents.extend(documents)
-                    logger.info(f"Retrieved {len(documents)} documents from batch {batch_idx + 1}, total: {len(all_documents)}")
-                next_token = status_resp.get("next")
-                if not next_token:
-                    break
-        except FirecrawlV2Error as e:
-            logger.error(f"Error retrieving V2 batch results for batch {batch_id}: {e}")
-            # Continue with next batch
-            continue
-    
-    # Get pending scrape pages
-    pending_scrape_pages = db.execute(
-        select(ScrapePage)
-        .where(
-            ScrapePage.domain_id == domain.id,
-            ScrapePage.scrape_session_id == scrape_session.id,
-            ScrapePage.status == ScrapePageStatus.PENDING
-        )
-        .order_by(ScrapePage.id)
-    ).scalars().all()
-    
-    # Filter out pages that already have final Page records
-    scrape_pages_to_process = []
-    for scrape_page in pending_scrape_pages:
-        existing_page = db.execute(
-            select(Page.id)
-            .where(
-                Page.domain_id == domain.id,
-                Page.original_url == scrape_page.original_url,
-                Page.unix_timestamp == scrape_page.unix_timestamp
-            )
-            .limit(1)
-        ).scalars().first()
-        
-        if not existing_page:
-            scrape_pages_to_process.append(scrape_page)
-        else:
-            scrape_page.status = ScrapePageStatus.COMPLETED
-            scrape_page.completed_at = datetime.utcnow()
-    
-    db.commit()
-    logger.info(f"Processing {len(scrape_pages_to_process)} pages from V2 batch")
-
-    # Build a lookup from Firecrawl doc -> by source URL (we sent wayback URLs in the batch)
-    url_to_doc = {}
-    for doc in all_documents:
-        meta = (doc or {}).get("metadata") or {}
-        source_url = meta.get("sourceURL") or meta.get("url") or doc.get("url")
-        if source_url:
-            url_to_doc[source_url] = doc
-
-    # Map results to ScrapePage and create Page records
-    for scrape_page in scrape_pages_to_process:
+    # One existence query per chunk instead of one per page
+    existing = set(
+        db.execute(
+            select(Page.url, Page.unix_timestamp)
+            .where(Page.url.in_({sp.original_url for sp in scrape_pages}))
+        ).all()
+    )
+
+    for scrape_page in scrape_pages:
         try:
-            # Mark as in progress
-            scrape_page.status = ScrapePageStatus.IN_PROGRESS
+            if (scrape_page.original_url, int(scrape_page.unix_timestamp)) in existing:
+                scrape_page.status = ScrapePageStatus.COMPLETED
+                scrape_page.completed_at = datetime.utcnow()
+                continue
+
             scrape_page.last_attempt_at = datetime.utcnow()
-            db.flush()
-            
+
             # Find matching Firecrawl document by wayback URL
             doc = url_to_doc.get(scrape_page.content_url)
             if not doc:
@@ -1337,15 +1408,14 @@ async def _process_v2_batch_results(db, scrape_session, domain, cdx_records, tas
             scrape_page.extracted_content = html or ""
             scrape_page.markdown_content = markdown or ""
             scrape_page.extraction_method = "firecrawl_v2_batch"
-            
+
             # Create final Page record
             page = Page(
-                domain_id=domain.id,
-                original_url=scrape_page.original_url,
+                url=scrape_page.original_url,
                 content_url=scrape_page.content_url,
                 title=title,
                 extracted_text=markdown or html or "",
-                unix_timestamp=scrape_page.unix_timestamp,
+                unix_timestamp=int(scrape_page.unix_timestamp),
                 mime_type=scrape_page.mime_type,
                 status_code=status_code or scrape_page.status_code,
                 meta_description=description,
@@ -1354,16 +1424,13 @@ async def _process_v2_batch_results(db, scrape_session, domain, cdx_records, tas
                 character_count=len(markdown or html or ""),
                 content_length=scrape_page.content_length,
                 capture_date=scrape_page.first_seen_at,
-                scraped_at=datetime.utcnow(),
                 processed=True,
                 indexed=False
             )
-            
             db.add(page)
-            db.flush()
-            
+            created_pages.append(page)
             pages_created += 1
-            
+
             # Broadcast progress
             try:
                 from app.services.websocket_service import broadcast_page_progress_sync
@@ -1379,7 +1446,7 @@ async def _process_v2_batch_results(db, scrape_session, domain, cdx_records, tas
                 })
             except Exception:
                 pass
-                
+
         except Exception as e:
             scrape_page.status = ScrapePageStatus.FAILED
             scrape_page.error_message = f"V2 batch processing failed: {str(e)}"
@@ -1387,61 +1454,124 @@ async def _process_v2_batch_results(db, scrape_session, domain, cdx_records, tas
             scrape_page.retry_count += 1
             pages_failed += 1
             logger.error(f"Failed to process page in V2 batch: {scrape_page.original_url}: {str(e)}")
-    
-    # Commit all changes
+
     db.commit()
-    
-    # Index pages to Meilisearch
+    record_completed_digests(domain.id, (
+        p.digest_hash for p in scrape_pages if p.status == ScrapePageStatus.COMPLETED
+    ))
+    return pages_created, pages_failed, created_pages
+
+
+async def _index_v2_pages(db, domain, pages):
+    """Index freshly created V2 batch pages to Meilisearch"""
+    if not pages:
+        return
     try:
         index_name = f"project_{domain.project_id}"
         async with meilisearch_service as ms:
-            for scrape_page in scrape_pages_to_process:
-                if scrape_page.status == ScrapePageStatus.COMPLETED:
-                    # Find the corresponding page
-                    page = db.execute(
-                        select(Page)
-                        .where(
-                            Page.domain_id == domain.id,
-                            Page.original_url == scrape_page.original_url,
-                            Page.unix_timestamp == scrape_page.unix_timestamp
-                        )
-                        .limit(1)
-                    ).scalars().first()
-                    
-                    if page:
-                        # Create ExtractedContent object
-                        extracted_content = ExtractedContent(
-                            title=page.title or "No Title",
-                            text=page.extracted_text or "",
-                            markdown=page.extracted_text or "",
-                            html="",
-                            word_count=page.word_count or 0,
-                            character_count=page.character_count or 0,
-                            extraction_method="firecrawl_v2_batch"
-                        )
-                        
-                        # Index the document
-                        await ms.index_document_with_entities(
-                            index_name,
-                            page,
-                            extracted_content,
-                            None  # No entities for now
-                        )
-                        
-                        # Mark as indexed
-                        page.indexed = True
-        
+            for page in pages:
+                extracted_content = ExtractedContent(
+                    title=page.title or "No Title",
+                    text=page.extracted_text or "",
+                    markdown=page.extracted_text or "",
+                    html="",
+                    word_count=page.word_count or 0,
+                    character_count=page.character_count or 0,
+                    extraction_method="firecrawl_v2_batch"
+                )
+                await ms.index_document_with_entities(index_name, page, extracted_content, None)
+                page.indexed = True
         db.commit()
-        logger.info(f"V2 batch indexing completed: {pages_created} pages indexed")
-        
     except Exception as e:
         logger.error(f"Meilisearch indexing failed for V2 batch: {e}")
+
+
+async def _process_v2_batch_results(db, scrape_session, domain, cdx_records, task_self):
+    """
+    Process results from a Firecrawl V2 batch operation
+
+    Result pages of all batches are fetched concurrently and each page of
+    documents is matched to its pending ScrapePages, persisted and indexed as
+    soon as it arrives, so memory stays bounded by one result page. Pages
+    left pending once every batch is drained are resolved as misses.
+    
+    Args:
+        db: Database session
+        scrape_session: ScrapeSession object
+        domain: Domain object
+        cdx_records: List of CDX records
+        task_self: Celery task instance for state updates
+        
+    Returns:
+        Tuple of (pages_created, pages_failed)
+    """
+    from app.services.firecrawl_v2_client import AsyncFirecrawlV2Client
+    from app.models.scraping import ScrapePage, ScrapePageStatus
+    
+    pages_created = 0
+    pages_failed = 0
+    
+    if not scrape_session.external_batch_id:
+        logger.error(f"No external batch ID found for session {scrape_session.id}")
+        return pages_created, pages_failed
+    
+    # Handle multiple batch IDs (comma-separated)
+    batch_ids = [bid.strip() for bid in scrape_session.external_batch_id.split(",") if bid.strip()]
+    logger.info(f"Processing V2 batch results for {len(batch_ids)} batch(es): {', '.join(batch_ids[:3])}{'...' if len(batch_ids) > 3 else ''}")
+
+    pending = (
+        select(ScrapePage)
+        .where(
+            ScrapePage.domain_id == domain.id,
+            ScrapePage.scrape_session_id == scrape_session.id,
+            ScrapePage.status == ScrapePageStatus.PENDING
+        )
+        .order_by(ScrapePage.id)
+    )
+
+    documents_seen = 0
+    async with AsyncFirecrawlV2Client(max_connections=settings.FIRECRAWL_V2_MAX_CONNECTIONS) as fc_client, \
+            aclosing(fc_client.stream_batches(batch_ids, concurrency=settings.FIRECRAWL_V2_RESULT_CONCURRENCY)) as stream:
+        async for batch_id, documents in stream:
+            documents_seen += len(documents)
+            url_to_doc = {}
+            for doc in documents:
+                source_url = _v2_doc_source_url(doc)
+                if source_url:
+                    url_to_doc[source_url] = doc
+            if not url_to_doc:
+                continue
+
+            scrape_pages = db.execute(
+                pending.where(ScrapePage.content_url.in_(list(url_to_doc)))
+            ).scalars().all()
+            created, failed, new_pages = _apply_v2_documents(db, scrape_session, domain, scrape_pages, url_to_doc)
+            pages_created += created
+            pages_failed += failed
+            await _index_v2_pages(db, domain, new_pages)
+            logger.info(
+                f"Persisted {created} pages from a page of {len(documents)} documents of batch {batch_id}, "
+                f"total documents: {documents_seen}"
+            )
+
+    # Whatever is still pending got no document from any batch
+    last_id = 0
+    while True:
+        scrape_pages = db.execute(
+            pending.where(ScrapePage.id > last_id).limit(V2_RESULT_MISS_CHUNK_SIZE)
+        ).scalars().all()
+        if not scrape_pages:
+            break
+        last_id = scrape_pages[-1].id
+        _, failed, _ = _apply_v2_documents(db, scrape_session, domain, scrape_pages, {})
+        pages_failed += failed
     
     logger.info(f"V2 batch processing completed: {pages_created} pages created, {pages_failed} failed")
     return pages_created, pages_failed
 
 
-async def _process_individual_firecrawl(db, scrape_session, domain, cdx_records, task_self, scrape_session_id):
+async def _process_individual_firecrawl(db, scrape_session, domain, cdx_records, task_self, scrape_session_id,
+                                        shard: Optional[ShardProgress] = None):
     """
     Process pages using individual Firecrawl calls (fallback mode when V2_BATCH_ONLY is False)
     
@@ -1452,6 +1582,7 @@ async def _process_individual_firecrawl(db, scrape_session, domain, cdx_records,
         cdx_records: List of CDX records
         task_self: Celery task instance for state updates
         scrape_session_id: ID of the scrape session
+        shard: Restricts processing to one shard's id range and checkpoints after each batch
         
     Returns:
         Tuple of (pages_created, pages_failed)
@@ -1464,15 +1595,25 @@ async def _process_individual_firecrawl(db, scrape_session, domain, cdx_records,
     batch_size = 10  # Process 10 pages in parallel for better performance
     
     # Get ScrapePage records that need processing (PENDING status and no existing final Page)
-    pending_scrape_pages = db.execute(
+    pending_query = (
         select(ScrapePage)
         .where(
             ScrapePage.domain_id == domain.id,
-            ScrapePage.scrape_session_id == scrape_session_id,
-            ScrapePage.status == ScrapePageStatus.PENDING
+            ScrapePage.scrape_session_id == scrape_session_id
         )
         .order_by(ScrapePage.id)
-    ).scalars().all()
+    )
+    if shard:
+        # Only this shard touches its id range, so IN_PROGRESS pages were left
+        # behind by a killed attempt and are picked up again
+        pending_query = pending_query.where(
+            ScrapePage.id > shard.start_after,
+            ScrapePage.id <= shard.id_range[1],
+            ScrapePage.status.in_([ScrapePageStatus.PENDING, ScrapePageStatus.IN_PROGRESS])
+        )
+    else:
+        pending_query = pending_query.where(ScrapePage.status == ScrapePageStatus.PENDING)
+    pending_scrape_pages = db.execute(pending_query).scalars().all()
     
     # Filter out pages that already have PageV2 records
     scrape_pages_to_process = []
@@ -1649,6 +1790,11 @@ async def _process_individual_firecrawl(db, scrape_session, domain, cdx_records,
         
         # Commit pages to database first
         db.commit()
+        record_completed_digests(domain.id, (
+            p.digest_hash for p in batch_scrape_pages if p.status == ScrapePageStatus.COMPLETED
+        ))
+        if shard:
+            shard.batch_committed(batch_scrape_pages[-1].id)
         
         # Index pages to Meilisearch
         try:
@@ -626,6 +626,56 @@ def cleanup_old_files_task(
         }
 
 
+@celery_app.task(
+    name="parquet.compact_analytics_datasets",
+    max_retries=1,
+    priority=2
+)
+def compact_analytics_datasets_task(
+    min_age_minutes: Optional[int] = None,
+    import_legacy: bool = False
+) -> Dict[str, Any]:
+    """
+    Merge small files in the Hive-partitioned analytics datasets.
+    
+    Args:
+        min_age_minutes: Only compact partitions untouched for this long
+        import_legacy: Move files from the old per-batch layout into the datasets first
+        
+    Returns:
+        Per-dataset compaction counts
+    """
+    try:
+        from app.services.analytics_dataset import DATASETS, import_legacy_files
+        
+        pipeline = ParquetPipeline(settings)
+        imported = {}
+        if import_legacy:
+            for name in DATASETS:
+                imported[name] = import_legacy_files(
+                    pipeline.storage_path, name, pipeline._dataset_writer(name)
+                )
+        
+        compacted = pipeline.compact_datasets(min_age_minutes)
+        logger.info(f"Analytics dataset compaction completed: {compacted}")
+        return {
+            "success": True,
+            "datasets": compacted,
+            "legacy_files_imported": imported,
+            "completed_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as exc:
+        error_msg = f"Analytics dataset compaction failed: {str(exc)}"
+        logger.error(f"{error_msg}\n{traceback.format_exc()}")
+        
+        return {
+            "success": False,
+            "error": error_msg,
+            "failed_at": datetime.utcnow().isoformat()
+        }
+
+
 @celery_app.task(
     name="parquet.get_pipeline_health",
     priority=9
@@ -3,14 +3,18 @@ Project-related Celery tasks
 """
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from celery import current_task
 
 from app.tasks.celery_app import celery_app
 from app.core.database import AsyncSessionLocal
 from app.models.project import ProjectStatus
+from app.models.scrape_page_api import BulkManualProcessingRequest
 from app.services.projects import ProjectService
+from app.services.scrape_page_rollups import refresh_all_project_rollups
+from app.services.domain_timeline_cubes import refresh_all_domain_timelines
+from app.services.scrape_page_service import ScrapePageService
 from app.services.meilisearch_service import MeilisearchService
 
 
@@ -306,4 +310,67 @@ def generate_project_report(self, project_id: int, user_id: int) -> Dict[str, An
             state="FAILURE",
             meta={"error": str(exc)}
         )
-        raise exc
\ No newline at end of file
+        raise exc
+
+@celery_app.task(bind=True, name="app.tasks.project_tasks.execute_scrape_page_bulk_operation")
+def execute_scrape_page_bulk_operation(
+    self, project_id: int, operation_id: str, request_data: Dict[str, Any], total: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run a large scrape page bulk operation queued by ScrapePageService
+
+    Per-chunk progress is published by the executor; the task result only
+    carries the summary counts.
+    """
+    request = BulkManualProcessingRequest.model_validate(request_data)
+
+    async def _execute():
+        async with AsyncSessionLocal() as db:
+            result = await ScrapePageService.run_bulk_operation_job(
+                db, project_id, operation_id, request, total=total
+            )
+        return {
+            "operation_id": operation_id,
+            "status": result.status.value,
+            "total_requested": result.total_requested,
+            "successful_count": result.successful_count,
+            "failed_count": result.failed_count,
+            "skipped_count": result.skipped_count,
+            "duration_seconds": result.duration_seconds
+        }
+
+    return asyncio.run(_execute())
+
+
+@celery_app.task(name="app.tasks.project_tasks.refresh_scrape_page_rollups")
+def refresh_scrape_page_rollups() -> Dict[str, Any]:
+    """
+    Fold recent ScrapePage changes into the statistics rollups of every
+    project that has them, so dashboard reads rarely refresh inline
+    """
+    async def _refresh():
+        async with AsyncSessionLocal() as db:
+            refreshed = await refresh_all_project_rollups(db)
+        return {
+            "projects_refreshed": len(refreshed),
+            "buckets_recomputed": sum(count or 0 for count in refreshed.values())
+        }
+
+    return asyncio.run(_refresh())
+
+
+@celery_app.task(name="app.tasks.project_tasks.refresh_domain_timelines")
+def refresh_domain_timelines() -> Dict[str, Any]:
+    """
+    Fold recent ScrapePage changes into the domain timeline buckets that
+    answer domain and project analytics
+    """
+    async def _refresh():
+        async with AsyncSessionLocal() as db:
+            refreshed = await refresh_all_domain_timelines(db)
+        return {
+            "projects_refreshed": len(refreshed),
+            "days_recomputed": sum(count or 0 for count in refreshed.values())
+        }
+
+    return asyncio.run(_refresh())
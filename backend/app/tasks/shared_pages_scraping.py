@@ -8,12 +8,10 @@ from typing import Dict, Any
 from uuid import UUID
 from app.core.uuid_utils import uuid_v7
 from sqlmodel import Session, select
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
 
 from app.tasks.celery_app import celery_app
-from app.core.config import settings
+from app.tasks.worker_bootstrap import get_task_engine
 from app.models.shared_pages import (
     PageV2, ProjectPage, CDXPageRegistry, ScrapeStatus,
     PageReviewStatus, PagePriority
@@ -29,13 +27,8 @@ logger = logging.getLogger(__name__)
 
 def get_sync_session():
     """Create a synchronous database session for Celery tasks"""
-    engine = create_engine(
-        settings.DATABASE_URL,
-        poolclass=NullPool,
-        echo=False,
-    )
     SessionLocal = sessionmaker(
-        engine,
+        get_task_engine(),
         class_=Session,
         expire_on_commit=False,
     )
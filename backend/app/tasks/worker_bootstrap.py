@@ -0,0 +1,225 @@
+"""
+Warm bootstrap for Celery worker processes
+
+Heavy, read-mostly resources (spaCy pipelines, the sentence-transformers
+model, the trafilatura based extractor) are loaded once in the parent worker
+process on ``worker_init``, before the prefork pool starts. Children are
+forked from that warm parent and share those pages copy-on-write, and
+``gc.freeze()`` keeps the collector from touching (and so copying) them.
+
+Each child then runs ``worker_process_init``: connections inherited from the
+parent are dropped and a per-process task engine is created and connected so
+the first task does not pay for dialect initialisation.
+
+Because preloaded pages are shared, a child's RSS no longer says how much
+memory it owns. Recycling is therefore driven by private (unshared) memory:
+billiard's per-task ``mem_rss`` check is pointed at the child's private
+resident size, so ``worker_max_memory_per_child`` measures what a child has
+accumulated rather than what it inherited.
+
+A worker started with ``CELERY_WORKER_QUEUES`` only imports the task modules
+of those queues (see ``celery_app.task_modules_for_queues``) and only preloads
+the resources their tasks use, so e.g. an indexing worker never loads spaCy.
+"""
+import asyncio
+import gc
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from celery.signals import import_modules, worker_init, worker_process_init, worker_process_shutdown, worker_ready
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.import_profile import log_import_timings, timed_import
+from app.core.metrics import mark_process_dead
+
+logger = logging.getLogger(__name__)
+
+WORKER_BOOTSTRAP_SECONDS = Histogram(
+    "celery_worker_bootstrap_seconds",
+    "Time spent bootstrapping Celery worker processes",
+    ["phase"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+WORKER_PRELOAD_SECONDS = Gauge(
+    "celery_worker_preload_seconds",
+    "Time spent preloading each shared resource in the parent worker",
+    ["resource"],
+)
+
+_bootstrap_started: Optional[float] = None
+_task_engine = None
+_task_engine_pid: Optional[int] = None
+
+
+def _preload_spacy() -> None:
+    from app.services.entity_extraction import entity_extraction_service
+    asyncio.run(entity_extraction_service.preload())
+
+
+def _preload_embeddings() -> None:
+    from app.services.semantic_search import semantic_search_service
+    semantic_search_service.embedding_model.load_model()
+
+
+def _preload_trafilatura() -> None:
+    from app.services.intelligent_content_extractor import get_intelligent_extractor
+    # One extraction initialises trafilatura's and lxml's lazily built state
+    get_intelligent_extractor().extract(
+        "<html><head><title>warmup</title></head><body><article><p>warmup</p></article></body></html>",
+        "https://example.com/warmup",
+    )
+
+
+PRELOADERS: Dict[str, Callable[[], None]] = {
+    "spacy": _preload_spacy,
+    "embeddings": _preload_embeddings,
+    "trafilatura": _preload_trafilatura,
+}
+
+# Preloaded resources the tasks of each queue use; queues not listed use none
+PRELOADS_BY_QUEUE: Dict[str, List[str]] = {
+    "scraping": ["spacy", "trafilatura", "embeddings"],
+    "celery": ["spacy", "trafilatura", "embeddings"],
+}
+
+
+def preloads_for_queues(queues) -> List[str]:
+    """Configured preloads that the given queues need; all of them when no queues are given"""
+    queues = list(queues)
+    if not queues:
+        return list(settings.CELERY_WORKER_PRELOAD)
+    needed = {name for queue in queues for name in PRELOADS_BY_QUEUE.get(queue, ())}
+    return [name for name in settings.CELERY_WORKER_PRELOAD if name in needed]
+
+
+def preload_shared_resources(names=None) -> Dict[str, float]:
+    """Load the configured resources into their module singletons; returns seconds per resource"""
+    timings = {}
+    for name in names if names is not None else settings.CELERY_WORKER_PRELOAD:
+        loader = PRELOADERS.get(name)
+        if loader is None:
+            logger.warning(f"Unknown worker preload resource: {name}")
+            continue
+        started = time.perf_counter()
+        try:
+            loader()
+        except Exception as e:
+            # A missing optional model only means that child loads it lazily
+            logger.warning(f"Could not preload {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - started
+        WORKER_PRELOAD_SECONDS.labels(resource=name).set(timings[name])
+    return timings
+
+
+def private_memory_kb() -> int:
+    """Resident memory of this process that is not shared with other processes"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            return sum(
+                int(line.split()[1]) for line in f
+                if line.startswith(("Private_Clean:", "Private_Dirty:"))
+            )
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return int(psutil.Process().memory_full_info().uss / 1024)
+    except Exception:
+        from billiard.compat import mem_rss
+        return int(mem_rss())
+
+
+def get_task_engine():
+    """Engine for Celery task sessions, created once per worker process"""
+    global _task_engine, _task_engine_pid
+    if _task_engine is None or _task_engine_pid != os.getpid():
+        _task_engine = create_engine(
+            settings.DATABASE_URL,
+            poolclass=NullPool,  # Disable connection pooling for Celery
+            echo=False,
+        )
+        _task_engine_pid = os.getpid()
+    return _task_engine
+
+
+def _reset_inherited_engines() -> None:
+    from app.core import database
+    # Never use connections opened by the parent; close=False leaves them to the parent
+    database.sync_engine.dispose(close=False)
+    database.engine.sync_engine.dispose(close=False)
+
+
+@import_modules.connect
+def on_import_modules(sender=None, **kwargs):
+    """Import the worker's task modules through the import profiler before Celery does"""
+    if not settings.STARTUP_IMPORT_PROFILE or sender is None:
+        return
+    modules = list(sender.conf.include or ())
+    for module in modules:
+        timed_import(module)
+    log_import_timings("Celery task modules", modules)
+
+
+@worker_init.connect
+def on_worker_init(**kwargs):
+    """Preload shared resources in the parent before the pool forks"""
+    global _bootstrap_started
+    _bootstrap_started = time.perf_counter()
+    if not settings.CELERY_WORKER_PRELOAD_ENABLED:
+        return
+    from app.tasks.celery_app import worker_queues
+    timings = preload_shared_resources(preloads_for_queues(worker_queues()))
+    # Move everything loaded so far out of the collector's reach so children keep sharing it
+    gc.freeze()
+    elapsed = time.perf_counter() - _bootstrap_started
+    WORKER_BOOTSTRAP_SECONDS.labels(phase="preload").observe(elapsed)
+    logger.info(
+        f"Worker preload finished in {elapsed:.2f}s: "
+        + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items())
+    )
+
+
+@worker_ready.connect
+def on_worker_ready(**kwargs):
+    if _bootstrap_started is not None:
+        elapsed = time.perf_counter() - _bootstrap_started
+        WORKER_BOOTSTRAP_SECONDS.labels(phase="worker_ready").observe(elapsed)
+        logger.info(f"Worker ready {elapsed:.2f}s after bootstrap started")
+
+
+@worker_process_init.connect
+def on_worker_process_init(**kwargs):
+    """Per-child setup after fork"""
+    started = time.perf_counter()
+    try:
+        _reset_inherited_engines()
+    except Exception as e:
+        logger.warning(f"Could not reset inherited database engines: {e}")
+
+    try:
+        with get_task_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning(f"Could not warm task database engine: {e}")
+
+    if settings.CELERY_WORKER_PRELOAD_ENABLED:
+        # billiard checks this after every task against worker_max_memory_per_child
+        import billiard.pool
+        billiard.pool.mem_rss = private_memory_kb
+
+    elapsed = time.perf_counter() - started
+    WORKER_BOOTSTRAP_SECONDS.labels(phase="process_init").observe(elapsed)
+    logger.info(f"Worker process {os.getpid()} initialised in {elapsed:.2f}s "
+                f"({private_memory_kb()} KB private memory)")
+
+
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(pid=None, **kwargs):
+    """Release a recycled child's live gauge files when metrics are multiprocess"""
+    mark_process_dead(pid or os.getpid())
@@ -2,6 +2,7 @@
 Tests for DuckDB analytics service
 """
 import asyncio
+import gc
 import os
 import tempfile
 import pytest
@@ -527,4 +528,121 @@ class TestIntegrationScenarios:
         assert all(r.data is not None for r in results)
         
         # Count should be 1000
-        assert results[0].data == [(1000,)]
\ No newline at end of file
+        assert results[0].data == [(1000,)]
+
+
+class TestPreparedExecution:
+    """Test cached prepared statements and Arrow results"""
+    
+    @pytest.mark.asyncio
+    async def test_prepared_statement_cache_hits(self, duckdb_service):
+        """Repeated query shapes reuse the connection's prepared statement"""
+        await duckdb_service.execute_query(
+            "CREATE TABLE prepared_test AS SELECT i, i % 3 AS g, 'name ' || i AS name FROM range(30) t(i)"
+        )
+        query = "SELECT count(*) FROM prepared_test WHERE g = ? AND i >= ?"
+        
+        first = await duckdb_service.execute_prepared(query, [1, 10], result_format="rows")
+        second = await duckdb_service.execute_prepared(query, [2, 0], result_format="rows")
+        
+        assert first.data == [(7,)]
+        assert second.data == [(10,)]
+        assert duckdb_service.metrics.prepared_cache_hits >= 1
+    
+    @pytest.mark.asyncio
+    async def test_named_parameters_and_quoting(self, duckdb_service):
+        """String parameters are bound safely, named parameters supported"""
+        result = await duckdb_service.execute_prepared(
+            "SELECT $a || $b AS s, $n + 1 AS n", {"a": "it's", "b": "'; DROP TABLE x; --", "n": 41},
+            result_format="rows"
+        )
+        assert result.data == [("it's'; DROP TABLE x; --", 42)]
+        
+        with pytest.raises(DuckDBQueryError):
+            await duckdb_service.execute_prepared("SELECT $a", {"a) ; --": 1}, result_format="rows")
+    
+    @pytest.mark.asyncio
+    async def test_arrow_results(self, duckdb_service):
+        """Arrow tables and record batch readers are returned without row conversion"""
+        pa = pytest.importorskip("pyarrow")
+        
+        table_result = await duckdb_service.execute_prepared(
+            "SELECT i, i * 2 AS doubled FROM range(10) t(i) WHERE i < ?", [5]
+        )
+        assert isinstance(table_result.data, pa.Table)
+        assert table_result.row_count == 5
+        assert table_result.columns == ["i", "doubled"]
+        
+        reader_result = await duckdb_service.execute_prepared(
+            "SELECT i FROM range(100) t(i)", result_format="reader", batch_size=30
+        )
+        assert reader_result.row_count is None
+        batches = list(reader_result.data)
+        assert sum(batch.num_rows for batch in batches) == 100
+        assert max(batch.num_rows for batch in batches) <= 30
+    
+    @pytest.mark.asyncio
+    async def test_reader_streams_and_holds_its_connection(self, duckdb_service):
+        """A reader pulls batches lazily and returns its connection once drained or discarded"""
+        pytest.importorskip("pyarrow")
+        pool = duckdb_service._connection_pool
+        available = len(pool._available_connections)
+        
+        result = await duckdb_service.execute_prepared(
+            "SELECT i FROM range(1000000) t(i)", result_format="reader", batch_size=1000
+        )
+        first = result.data.read_next_batch()
+        assert first.num_rows <= 1000
+        # Still reading, so the connection is not back in the pool
+        assert len(pool._available_connections) < pool._connection_count
+        assert sum(batch.num_rows for batch in result.data) + first.num_rows == 1000000
+        assert len(pool._available_connections) >= available
+        
+        abandoned = await duckdb_service.execute_prepared(
+            "SELECT i FROM range(1000000) t(i)", result_format="reader", batch_size=1000
+        )
+        abandoned.data.read_next_batch()
+        checked_out = len(pool._available_connections)
+        del abandoned
+        # The executor future holding the result is released on the next loop turn
+        await asyncio.sleep(0)
+        gc.collect()
+        assert len(pool._available_connections) == checked_out + 1
+    
+    @pytest.mark.asyncio
+    async def test_dataset_view_registered_when_first_queried(self, duckdb_service, mock_settings, tmp_path):
+        """A dataset written after initialize() gets its view on first use"""
+        import pandas as pd
+        from app.services.analytics_dataset import DATASETS, HivePartitionedWriter, dataset_root
+        
+        mock_settings.PARQUET_STORAGE_PATH = str(tmp_path)
+        query = "SELECT count(*) FROM cdx_records WHERE source = ?"
+        with pytest.raises(DuckDBQueryError):
+            await duckdb_service.execute_prepared(query, ["wayback_machine"], result_format="rows")
+        
+        batch = pd.DataFrame({
+            "id": [1, 2], "original_url": ["https://example.com/a", "https://example.com/b"],
+            "content_url": ["https://web.archive.org/web/1/a", "https://web.archive.org/web/2/b"],
+            "created_at": ["2024-01-01T12:00:00", "2024-01-02T12:00:00"],
+        })
+        with HivePartitionedWriter(dataset_root(tmp_path, "cdx_records"), DATASETS["cdx_records"]) as writer:
+            writer.write(batch)
+        
+        result = await duckdb_service.execute_prepared(query, ["wayback_machine"], result_format="rows")
+        assert result.data == [(2,)]
+        # The statement is prepared now instead of staying cached as unpreparable
+        hits = duckdb_service.metrics.prepared_cache_hits
+        await duckdb_service.execute_prepared(query, ["wayback_machine"], result_format="rows")
+        assert duckdb_service.metrics.prepared_cache_hits == hits + 1
+        result = await duckdb_service.execute_query("SELECT count(*) FROM cdx_records")
+        assert result.data == [(2,)]
+    
+    @pytest.mark.asyncio
+    async def test_memory_sampled_outside_queries(self, duckdb_service):
+        """Memory metrics come from the periodic sampler"""
+        assert duckdb_service.metrics.memory_sampled_at is not None
+        assert duckdb_service.metrics.peak_memory_mb >= duckdb_service.metrics.memory_usage_mb > 0
+        
+        with patch('app.services.duckdb_service.psutil.Process') as process:
+            await duckdb_service.execute_query("SELECT 1")
+            process.assert_not_called()
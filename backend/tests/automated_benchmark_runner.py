@@ -36,8 +36,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 import sqlite3
 import smtplib
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
 import hashlib
 import logging
 import sys
@@ -51,6 +51,8 @@ from tests.stress.test_phase2_stress import Phase2StressTests
 from tests.regression.test_phase2_regression import Phase2RegressionTests
 from tests.comparison.test_phase2_vs_baseline import Phase2BaselineComparison
 from tests.simulation.test_real_world_scenarios import RealWorldScenarios
+from tests.performance.offline_archive_benchmarks import OfflineArchiveBenchmarks
+from tests.benchmark_results import init_results_database
 
 
 @dataclass
@@ -122,7 +124,8 @@ class TestSuiteOrchestrator:
             'stress_tests': Phase2StressTests(),
             'regression_tests': Phase2RegressionTests(),
             'ab_comparison': Phase2BaselineComparison(),
-            'simulation_tests': RealWorldScenarios()
+            'simulation_tests': RealWorldScenarios(),
+            'offline_archive_benchmarks': OfflineArchiveBenchmarks()
         }
         
         # Test suite configurations
@@ -189,6 +192,15 @@ class TestSuiteOrchestrator:
                 critical=False,
                 environment_requirements=['full_stack', 'realistic_data'],
                 resource_requirements={'cpu_cores': 8, 'memory_gb': 16, 'disk_gb': 40}
+            ),
+            'offline_archive_benchmarks': TestSuiteConfig(
+                name="Offline Archive Pipeline Benchmarks",
+                enabled=True,
+                timeout_minutes=15,
+                retry_count=0,
+                critical=True,
+                environment_requirements=[],  # Hermetic: recorded fixtures on a local server
+                resource_requirements={'cpu_cores': 2, 'memory_gb': 2, 'disk_gb': 1}
             )
         }
     
@@ -220,55 +232,7 @@ class TestSuiteOrchestrator:
     
     def _init_results_database(self):
         """Initialize results database"""
-        with sqlite3.connect(self.results_db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Benchmark runs table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS benchmark_runs (
-                    id TEXT PRIMARY KEY,
-                    timestamp TEXT NOT NULL,
-                    environment TEXT,
-                    git_commit TEXT,
-                    duration_seconds REAL,
-                    overall_status TEXT,
-                    results_json TEXT,
-                    resource_usage_json TEXT,
-                    alerts_json TEXT
-                )
-            """)
-            
-            # Performance metrics table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS performance_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    run_id TEXT NOT NULL,
-                    test_suite TEXT NOT NULL,
-                    metric_name TEXT NOT NULL,
-                    metric_value REAL NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    FOREIGN KEY (run_id) REFERENCES benchmark_runs (id)
-                )
-            """)
-            
-            # Alerts table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS performance_alerts (
-                    id TEXT PRIMARY KEY,
-                    run_id TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    test_suite TEXT NOT NULL,
-                    metric_name TEXT NOT NULL,
-                    current_value REAL NOT NULL,
-                    threshold_value REAL NOT NULL,
-                    deviation_percent REAL NOT NULL,
-                    description TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    FOREIGN KEY (run_id) REFERENCES benchmark_runs (id)
-                )
-            """)
-            
-            conn.commit()
+        init_results_database(self.results_db_path)
     
     def _load_configuration(self) -> Dict[str, Any]:
         """Load test configuration"""
@@ -721,6 +685,9 @@ class TestSuiteOrchestrator:
                     }
                 }
                 
+            elif suite_name == 'offline_archive_benchmarks':
+                return await suite.run_all()
+                
             else:
                 raise ValueError(f"Unknown test suite: {suite_name}")
                 
@@ -1026,13 +993,13 @@ class TestSuiteOrchestrator:
         try:
             email_config = self.config['email_notifications']
             
-            msg = MimeMultipart()
+            msg = MIMEMultipart()
             msg['From'] = email_config['username']
             msg['To'] = ', '.join(email_config['recipients'])
             msg['Subject'] = f"Phase 2 Benchmark Report - {report.overall_status}"
             
             # Attach report
-            msg.attach(MimeText(report_content, 'plain'))
+            msg.attach(MIMEText(report_content, 'plain'))
             
             # Send email
             server = smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port'])
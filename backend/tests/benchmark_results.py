@@ -0,0 +1,112 @@
+"""
+Benchmark results database shared by the TestSuiteOrchestrator and standalone benchmark runs
+
+Kept free of test suite imports so benchmarks can record results without
+loading every suite the orchestrator knows about.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+DEFAULT_RESULTS_DB_PATH = "benchmark_results.db"
+
+RESULTS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS benchmark_runs (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        environment TEXT,
+        git_commit TEXT,
+        duration_seconds REAL,
+        overall_status TEXT,
+        results_json TEXT,
+        resource_usage_json TEXT,
+        alerts_json TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS performance_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT NOT NULL,
+        test_suite TEXT NOT NULL,
+        metric_name TEXT NOT NULL,
+        metric_value REAL NOT NULL,
+        timestamp TEXT NOT NULL,
+        FOREIGN KEY (run_id) REFERENCES benchmark_runs (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS performance_alerts (
+        id TEXT PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        test_suite TEXT NOT NULL,
+        metric_name TEXT NOT NULL,
+        current_value REAL NOT NULL,
+        threshold_value REAL NOT NULL,
+        deviation_percent REAL NOT NULL,
+        description TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        FOREIGN KEY (run_id) REFERENCES benchmark_runs (id)
+    )
+    """,
+]
+
+
+def init_results_database(db_path: str = DEFAULT_RESULTS_DB_PATH) -> None:
+    """Create the results tables if they do not exist"""
+    with sqlite3.connect(db_path) as conn:
+        for statement in RESULTS_SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+
+
+def record_suite_run(
+    run_id: str,
+    suite_name: str,
+    suite_result: Dict[str, Any],
+    db_path: str = DEFAULT_RESULTS_DB_PATH,
+    git_commit: str = "unknown",
+    environment: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Store one suite's result as its own benchmark run
+
+    Rows have the shape the orchestrator writes, so regression queries over
+    ``performance_metrics`` see standalone runs next to orchestrated ones.
+    """
+    init_results_database(db_path)
+    timestamp = datetime.utcnow().isoformat()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO benchmark_runs
+            (id, timestamp, environment, git_commit, duration_seconds, overall_status,
+             results_json, resource_usage_json, alerts_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                run_id,
+                timestamp,
+                json.dumps(environment or {}),
+                git_commit,
+                suite_result.get("duration_seconds", 0.0),
+                suite_result.get("status", "UNKNOWN"),
+                json.dumps({suite_name: suite_result}, default=str),
+                json.dumps({}),
+                json.dumps([]),
+            ),
+        )
+        for metric_name, metric_value in suite_result.get("metrics", {}).items():
+            if isinstance(metric_value, (int, float)):
+                conn.execute(
+                    """
+                    INSERT INTO performance_metrics
+                    (run_id, test_suite, metric_name, metric_value, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (run_id, suite_name, metric_name, float(metric_value), timestamp),
+                )
+        conn.commit()
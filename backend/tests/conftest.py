@@ -3,6 +3,7 @@ Test configuration and fixtures for backend tests
 """
 import asyncio
 import pytest
+import pytest_asyncio
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlmodel import SQLModel, create_engine, Session
@@ -10,7 +11,9 @@ from sqlmodel.pool import StaticPool
 import os
 import sys
 from typing import Tuple
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
 
 # Add the app directory to the path
@@ -42,6 +45,40 @@ AsyncSessionLocal = sessionmaker(
 )
 
 
+# PostgreSQL column types of the models, rendered for SQLite test databases
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(element, compiler, **kw):
+	return "JSON"
+
+
+@compiles(ARRAY, "sqlite")
+def _array_on_sqlite(element, compiler, **kw):
+	return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(element, compiler, **kw):
+	# Text affinity, so hex ids made only of digits are not read back as numbers
+	return "CHAR(32)"
+
+
+async def create_tables(engine, *models):
+	"""Create just the given models' tables, leaving out PostgreSQL-only ones"""
+	async with engine.begin() as conn:
+		for model in models:
+			await conn.run_sync(model.__table__.create)
+
+
+def seed_projects(session, *domains):
+	"""Add project 1 ("mine", user 1), project 2 ("other", user 2) and (id, project id, name) domains"""
+	from app.models.project import Domain, Project
+	session.add_all([Project(id=1, name="mine", user_id=1), Project(id=2, name="other", user_id=2)])
+	session.add_all([
+		Domain(id=domain_id, project_id=project_id, domain_name=name)
+		for domain_id, project_id, name in domains
+	])
+
+
 @pytest.fixture(scope="session")
 def event_loop():
 	"""Create an instance of the default event loop for the test session."""
@@ -50,6 +87,21 @@ def event_loop():
 	loop.close()
 
 
+@pytest_asyncio.fixture
+async def memory_engine():
+	"""Empty in-memory async SQLite database that every connection shares"""
+	engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+	yield engine
+	await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def memory_session(memory_engine):
+	"""Session on memory_engine; create its tables with create_tables first"""
+	async with AsyncSession(memory_engine, expire_on_commit=False) as session:
+		yield session
+
+
 @pytest.fixture(name="session")
 def session_fixture():
 	"""Create a test database session."""
@@ -0,0 +1,303 @@
+"""
+Hermetic benchmarks of the archive fetch and extraction pipeline
+
+Drives the production ``CDXAPIClient``, ``ContentExtractionService`` (Wayback
+and Common Crawl WARC paths) and the Firecrawl task batch processor against
+the recorded responses served by ``OfflineArchiveServer``, so results depend
+on the code under test and the configured latency/error profile only, not on
+archive.org's mood. Each benchmark reports pages/sec, p50/p99 latency and
+peak RSS; ``run_all`` returns them in the TestSuiteOrchestrator suite format.
+
+Run standalone to record a run into the orchestrator's results database:
+
+    python -m tests.performance.offline_archive_benchmarks --latency-ms 25 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import psutil
+
+from app.core.config import settings
+from app.services.wayback_machine import CDXAPIClient, CDXRecord
+from tests.benchmark_results import DEFAULT_RESULTS_DB_PATH, record_suite_run
+from tests.performance.offline_archive_server import OfflineArchiveServer
+
+BENCHMARK_DOMAIN = "example-gazette.org"
+
+
+@dataclass
+class OfflineBenchmarkResult:
+    """Outcome of one offline benchmark"""
+    name: str
+    pages: int
+    successes: int
+    failures: int
+    duration_seconds: float
+    pages_per_second: float
+    p50_latency_ms: float
+    p99_latency_ms: float
+    peak_rss_mb: float
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            f"{self.name}_pages_per_second": self.pages_per_second,
+            f"{self.name}_p50_latency_ms": self.p50_latency_ms,
+            f"{self.name}_p99_latency_ms": self.p99_latency_ms,
+            f"{self.name}_peak_rss_mb": self.peak_rss_mb,
+            f"{self.name}_success_rate": self.successes / self.pages if self.pages else 0.0,
+        }
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(percentile) - 1]
+
+
+class PeakRSSSampler:
+    """Samples this process's RSS on a background thread and keeps the maximum"""
+
+    def __init__(self, interval_seconds: float = 0.01):
+        self.interval_seconds = interval_seconds
+        self.peak_bytes = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+            self._stop.wait(self.interval_seconds)
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+
+
+@contextmanager
+def offline_archive_settings(server: OfflineArchiveServer) -> Iterator[None]:
+    """Point the archive clients, and the scraping proxy, at the stand-in server"""
+    overrides = {
+        "WAYBACK_MACHINE_BASE_URL": server.base_url,
+        "COMMON_CRAWL_DATA_URL": server.base_url,
+        "PROXY_SERVER": server.base_url,
+        "PROXY_USERNAME": "offline",
+        "PROXY_PASSWORD": "offline",
+    }
+    previous = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+class OfflineArchiveBenchmarks:
+    """Benchmarks of the archive pipeline against a local stand-in server"""
+
+    def __init__(
+        self,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 10.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        repeat: int = 10,
+        concurrency: int = 10,
+        cdx_page_size: int = 25,
+        seed: int = 0,
+    ):
+        self.server_options = dict(
+            latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate,
+            error_status=error_status, repeat=repeat, seed=seed,
+        )
+        self.concurrency = concurrency
+        self.cdx_page_size = cdx_page_size
+
+    async def _measure(
+        self,
+        name: str,
+        items: List[Any],
+        run_one: Callable[[Any], Awaitable[bool]],
+        pages_per_item: Callable[[Any], int] = lambda item: 1,
+    ) -> OfflineBenchmarkResult:
+        """Run ``run_one`` over ``items`` with bounded concurrency, timing every call"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies: List[float] = []
+        outcomes: List[bool] = []
+
+        async def timed(item):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    ok = await run_one(item)
+                except Exception:
+                    ok = False
+                latencies.append((time.perf_counter() - started) * 1000)
+                outcomes.extend([ok] * pages_per_item(item))
+
+        with PeakRSSSampler() as rss:
+            started = time.perf_counter()
+            await asyncio.gather(*(timed(item) for item in items))
+            duration = time.perf_counter() - started
+
+        return self._result(name, len(outcomes), sum(outcomes), duration, latencies, rss)
+
+    @staticmethod
+    def _result(name: str, pages: int, successes: int, duration: float,
+                latencies: List[float], rss: PeakRSSSampler) -> OfflineBenchmarkResult:
+        return OfflineBenchmarkResult(
+            name=name,
+            pages=pages,
+            successes=successes,
+            failures=pages - successes,
+            duration_seconds=duration,
+            pages_per_second=successes / duration if duration else 0.0,
+            p50_latency_ms=_percentile(latencies, 50),
+            p99_latency_ms=_percentile(latencies, 99),
+            peak_rss_mb=rss.peak_bytes / 1024 / 1024,
+        )
+
+    @staticmethod
+    def _wayback_records(server: OfflineArchiveServer) -> List[CDXRecord]:
+        rows = server.recordings.cdx_rows[BENCHMARK_DOMAIN][1:]
+        return [CDXRecord.from_wayback_response(row) for row in rows if row[2] == "text/html"]
+
+    @staticmethod
+    def _common_crawl_records(server: OfflineArchiveServer) -> List[CDXRecord]:
+        return [CDXRecord.from_common_crawl_response(data) for data in server.recordings.warc_records]
+
+    async def benchmark_cdx_client(self, server: OfflineArchiveServer) -> OfflineBenchmarkResult:
+        """Paginated CDX discovery; pages are CDX records, latency is per CDX request"""
+        latencies: List[float] = []
+        async with CDXAPIClient() as client:
+            make_request = client._make_request
+
+            async def timed_request(url: str) -> str:
+                started = time.perf_counter()
+                try:
+                    return await make_request(url)
+                finally:
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            client._make_request = timed_request
+            with PeakRSSSampler() as rss:
+                started = time.perf_counter()
+                records, _ = await client.fetch_cdx_records_simple(
+                    BENCHMARK_DOMAIN, "20190101", "20221231", page_size=self.cdx_page_size,
+                )
+                duration = time.perf_counter() - started
+
+        expected = len(self._wayback_records(server))
+        return self._result("cdx_client", expected, min(len(records), expected), duration, latencies, rss)
+
+    async def benchmark_wayback_extraction(self, server: OfflineArchiveServer) -> OfflineBenchmarkResult:
+        from app.services.content_extraction_service import ContentExtractionService
+        service = ContentExtractionService()
+
+        async def extract(record: CDXRecord) -> bool:
+            result = await service.extract_content(record)
+            return not result.error
+
+        return await self._measure("wayback_extraction", self._wayback_records(server), extract)
+
+    async def benchmark_common_crawl_extraction(self, server: OfflineArchiveServer) -> OfflineBenchmarkResult:
+        from app.services.content_extraction_service import ContentExtractionService
+        service = ContentExtractionService()
+
+        async def extract(record: CDXRecord) -> bool:
+            result = await service.extract_content(record)
+            return not result.error
+
+        return await self._measure("common_crawl_extraction", self._common_crawl_records(server), extract)
+
+    async def benchmark_firecrawl_pipeline(self, server: OfflineArchiveServer,
+                                           batch_size: int = 10) -> OfflineBenchmarkResult:
+        """The scraping task's batch processor; latency is per batch"""
+        from app.tasks.firecrawl_scraping import _process_batch_with_firecrawl
+        records = self._wayback_records(server)
+        batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+        outcomes: Dict[int, List[Optional[Dict[str, Any]]]] = {}
+
+        async def process(batch) -> bool:
+            outcomes[id(batch)] = await _process_batch_with_firecrawl(batch)
+            return True
+
+        result = await self._measure("firecrawl_pipeline", batches, process, pages_per_item=len)
+        # Count pages, not batches, as successes
+        result.successes = sum(1 for batch in outcomes.values() for page in batch if page is not None)
+        result.failures = result.pages - result.successes
+        result.pages_per_second = result.successes / result.duration_seconds if result.duration_seconds else 0.0
+        return result
+
+    async def run_benchmarks(self, names: Optional[List[str]] = None) -> List[OfflineBenchmarkResult]:
+        benchmarks = {
+            "cdx_client": self.benchmark_cdx_client,
+            "wayback_extraction": self.benchmark_wayback_extraction,
+            "common_crawl_extraction": self.benchmark_common_crawl_extraction,
+            "firecrawl_pipeline": self.benchmark_firecrawl_pipeline,
+        }
+        results = []
+        with OfflineArchiveServer(**self.server_options) as server, offline_archive_settings(server):
+            for name in names or benchmarks:
+                results.append(await benchmarks[name](server))
+        return results
+
+    async def run_all(self) -> Dict[str, Any]:
+        """Run every benchmark and return a TestSuiteOrchestrator suite result"""
+        started = time.time()
+        results = await self.run_benchmarks()
+        metrics: Dict[str, float] = {}
+        for result in results:
+            metrics.update(result.metrics())
+        return {
+            "status": "SUCCESS" if all(r.successes for r in results) else "FAILURE",
+            "results": [asdict(r) for r in results],
+            "duration_seconds": time.time() - started,
+            "server": self.server_options,
+            "metrics": metrics,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the offline archive benchmarks")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--db", default=os.environ.get("BENCHMARK_RESULTS_DB", DEFAULT_RESULTS_DB_PATH))
+    args = parser.parse_args()
+
+    suite = OfflineArchiveBenchmarks(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_status=args.error_status, repeat=args.repeat, concurrency=args.concurrency,
+    )
+    result = asyncio.run(suite.run_all())
+    run_id = f"offline_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    record_suite_run(run_id, "offline_archive_benchmarks", result, db_path=args.db)
+    print(json.dumps(result["metrics"], indent=2))
+    print(f"Recorded run {run_id} in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
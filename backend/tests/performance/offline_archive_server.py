@@ -0,0 +1,297 @@
+"""
+Local stand-in for archive.org and Common Crawl, serving recorded responses
+
+Serves the recordings in ``tests/fixtures/archive_recordings`` over plain
+HTTP so the archive clients can be benchmarked without network access:
+
+- ``/cdx/search/cdx``: recorded CDX JSON, paginated with ``pageSize``/``page``
+  and answering ``showNumPages`` like the Wayback CDX server
+- ``/web/<timestamp>if_/<url>``: recorded Wayback HTML bodies
+- ``/<warc filename>``: a gzipped WARC file built from the recorded bodies,
+  answering HTTP ``Range`` requests the way data.commoncrawl.org does
+
+Requests also arrive in absolute form when the server is configured as the
+HTTP proxy, so it doubles as the stand-in for the scraping proxy.
+
+Latency (fixed plus uniform jitter) and error injection (a status code
+returned for a seeded random fraction of requests) make slow or flaky
+upstreams reproducible. ``repeat`` replays every recorded capture under
+``?capture=N`` variants of its URL to produce larger workloads from the same
+recordings.
+"""
+
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+RECORDINGS_DIR = Path(__file__).resolve().parents[1] / "fixtures" / "archive_recordings"
+
+_WAYBACK_PATH = re.compile(r"^/web/(?P<timestamp>\d{1,14})(?:[a-z]{2}_)?/(?P<url>.+)$")
+_CAPTURE_SUFFIX = re.compile(r"[?&]capture=\d+$")
+_RANGE = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+def _warc_record(url: str, timestamp: str, body: bytes) -> bytes:
+    """One gzip member holding a WARC response record, as Common Crawl stores them"""
+    http_block = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/html; charset=utf-8\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    warc_date = f"{timestamp[0:4]}-{timestamp[4:6]}-{timestamp[6:8]}T{timestamp[8:10]}:{timestamp[10:12]}:{timestamp[12:14]}Z"
+    headers = (
+        "WARC/1.0\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Date: {warc_date}\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, url + timestamp)}>\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(http_block)}\r\n\r\n"
+    ).encode()
+    return gzip.compress(headers + http_block + b"\r\n\r\n", mtime=0)
+
+
+class ArchiveRecordings:
+    """Recorded CDX pages, Wayback bodies and the WARC file built from them"""
+
+    def __init__(self, directory: Path = RECORDINGS_DIR, repeat: int = 1):
+        self.directory = Path(directory)
+        self.repeat = max(1, repeat)
+        manifest = json.loads((self.directory / "manifest.json").read_text())
+
+        self.cdx_rows: Dict[str, List[List[str]]] = {}
+        for domain, path in manifest["domains"].items():
+            rows = json.loads((self.directory / path).read_text())
+            self.cdx_rows[domain] = [rows[0]] + self._replay(rows[1:])
+
+        self._bodies: Dict[str, bytes] = {}
+        self.wayback_bodies = {
+            url: self._body(path) for url, path in manifest["wayback_bodies"].items()
+        }
+
+        common_crawl = manifest["common_crawl"]
+        self.warc_filename = common_crawl["warc_filename"]
+        self.warc_records: List[Dict[str, Any]] = []
+        chunks = []
+        offset = 0
+        for capture in range(self.repeat):
+            for record in common_crawl["records"]:
+                url = self._variant(record["url"], capture)
+                chunk = _warc_record(url, record["timestamp"], self._body(record["body"]))
+                self.warc_records.append({
+                    "timestamp": record["timestamp"],
+                    "url": url,
+                    "mimetype": "text/html",
+                    "statuscode": "200",
+                    "digest": uuid.uuid5(uuid.NAMESPACE_URL, url).hex[:32].upper(),
+                    "length": str(len(chunk)),
+                    "filename": self.warc_filename,
+                    "offset": offset,
+                    "warc_length": len(chunk),
+                })
+                chunks.append(chunk)
+                offset += len(chunk)
+        self.warc_bytes = b"".join(chunks)
+
+    def _body(self, path: str) -> bytes:
+        if path not in self._bodies:
+            self._bodies[path] = (self.directory / path).read_bytes()
+        return self._bodies[path]
+
+    @staticmethod
+    def _variant(url: str, capture: int) -> str:
+        if capture == 0:
+            return url
+        return f"{url}{'&' if '?' in url else '?'}capture={capture}"
+
+    def _replay(self, rows: List[List[str]]) -> List[List[str]]:
+        replayed = []
+        for capture in range(self.repeat):
+            for row in rows:
+                row = list(row)
+                row[1] = self._variant(row[1], capture)
+                if capture:
+                    row[4] = f"{row[4][:24]}{capture:08d}"
+                replayed.append(row)
+        return replayed
+
+    def wayback_body(self, url: str) -> Optional[bytes]:
+        return self.wayback_bodies.get(_CAPTURE_SUFFIX.sub("", url))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format, *args):  # noqa: A002 - signature fixed by BaseHTTPRequestHandler
+        pass
+
+    def do_GET(self):
+        stand_in: OfflineArchiveServer = self.server.stand_in
+        # Absolute-form targets arrive when clients use this server as their proxy
+        target = urlsplit(self.path)
+        route = stand_in.route_for(target.path)
+        stand_in.delay()
+        if stand_in.should_fail(route):
+            self._send(stand_in.error_status, b"injected error", "text/plain", route, error=True)
+            return
+
+        if route == "cdx":
+            status, body = stand_in.cdx_response(parse_qs(target.query))
+            self._send(status, body, "application/json" if status == 200 else "text/plain", route)
+        elif route == "wayback":
+            match = _WAYBACK_PATH.match(target.path)
+            url = unquote(match.group("url"))
+            if target.query:
+                url = f"{url}?{target.query}"
+            body = stand_in.recordings.wayback_body(url)
+            if body is None:
+                self._send(404, b"not in recordings", "text/plain", route)
+            else:
+                self._send(200, body, "text/html; charset=utf-8", route)
+        elif route == "warc":
+            self._send_range(stand_in.recordings.warc_bytes, route)
+        else:
+            self._send(404, b"unknown route", "text/plain", route)
+
+    def _send_range(self, data: bytes, route: str):
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if not match:
+            self._send(200, data, "application/octet-stream", route)
+            return
+        start, end = int(match.group(1)), int(match.group(2))
+        if start >= len(data):
+            self._send(416, b"", "text/plain", route)
+            return
+        chunk = data[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Range", f"bytes {start}-{start + len(chunk) - 1}/{len(data)}")
+        self.send_header("Content-Length", str(len(chunk)))
+        self.end_headers()
+        self.wfile.write(chunk)
+        self.server.stand_in.count(route, 206)
+
+    def _send(self, status: int, body: bytes, content_type: str, route: str, error: bool = False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stand_in.count(route, status, injected=error)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    stand_in: "OfflineArchiveServer"
+
+
+class OfflineArchiveServer:
+    """
+    Threaded HTTP server answering like the archives, from recordings
+
+    Use as a context manager; ``base_url`` is valid while it runs.
+    """
+
+    def __init__(
+        self,
+        recordings_dir: Path = RECORDINGS_DIR,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        error_routes: Tuple[str, ...] = ("cdx", "wayback", "warc"),
+        repeat: int = 1,
+        seed: int = 0,
+    ):
+        self.recordings = ArchiveRecordings(recordings_dir, repeat=repeat)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_routes = error_routes
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.injected_errors: Counter = Counter()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OfflineArchiveServer":
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="offline-archive", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(timeout=5)
+            self._server = None
+
+    def __enter__(self) -> "OfflineArchiveServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def route_for(self, path: str) -> str:
+        if path.startswith("/cdx/search/cdx"):
+            return "cdx"
+        if path.startswith("/web/"):
+            return "wayback"
+        if path.lstrip("/") == self.recordings.warc_filename:
+            return "warc"
+        return "unknown"
+
+    def delay(self) -> None:
+        if self.latency_ms or self.jitter_ms:
+            with self._lock:
+                jitter = self._random.uniform(0, self.jitter_ms)
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def should_fail(self, route: str) -> bool:
+        if not self.error_rate or route not in self.error_routes:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def count(self, route: str, status: int, injected: bool = False) -> None:
+        with self._lock:
+            self.requests[(route, status)] += 1
+            if injected:
+                self.injected_errors[route] += 1
+
+    def cdx_response(self, params: Dict[str, List[str]]) -> Tuple[int, bytes]:
+        query = params.get("url", [""])[0]
+        domain = urlsplit(query if "://" in query else f"http://{query}").hostname or ""
+        rows = self.recordings.cdx_rows.get(domain.removeprefix("www."))
+        if rows is None:
+            return 200, b"0" if "showNumPages" in params else b"[]"
+
+        page_size = int(params.get("pageSize", ["5000"])[0])
+        captures = rows[1:]
+        if params.get("showNumPages", ["false"])[0] == "true":
+            return 200, str(-(-len(captures) // page_size)).encode()
+        page = int(params.get("page", ["0"])[0])
+        selected = captures[page * page_size:(page + 1) * page_size]
+        return 200, json.dumps([rows[0]] + selected).encode()
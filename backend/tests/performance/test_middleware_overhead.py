@@ -0,0 +1,125 @@
+"""
+Microbenchmark: per-request overhead of the API middleware stack
+
+Drives a bare Starlette app directly over ASGI (no sockets), once without
+middleware and once wrapped in the same stack main.py installs, and reports
+the added latency per request. Redis is unavailable, so rate limiting and
+session lookups take their fail-open paths.
+
+Run standalone with ``python -m tests.performance.test_middleware_overhead``.
+"""
+import asyncio
+import statistics
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.csrf_protection import CSRFMiddleware
+from app.core.middleware import (
+    RequestSizeLimitMiddleware,
+    RequestTimeoutMiddleware,
+    ValidationErrorMiddleware,
+)
+from app.core.request_context import RequestContextMiddleware
+from app.core.security_middleware import (
+    RateLimitMiddleware,
+    RequestLoggingMiddleware,
+    SecurityHeadersMiddleware,
+    SessionSecurityMiddleware,
+)
+
+ITERATIONS = 2000
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+def build_app(with_middleware: bool) -> Starlette:
+    app = Starlette(routes=[Route("/api/v1/ping", _ok)])
+    if with_middleware:
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(SessionSecurityMiddleware)
+        app.add_middleware(RequestLoggingMiddleware, log_sensitive_endpoints=True)
+        app.add_middleware(CSRFMiddleware, secret_key="benchmark")
+        app.add_middleware(ValidationErrorMiddleware)
+        app.add_middleware(RequestTimeoutMiddleware, timeout=60)
+        app.add_middleware(RequestSizeLimitMiddleware, max_size=10 * 1024 * 1024)
+        app.add_middleware(RateLimitMiddleware)
+        app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def _call(app) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/ping",
+        "raw_path": b"/api/v1/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, iterations: int = ITERATIONS) -> float:
+    """Median per-request latency in microseconds"""
+    for _ in range(50):
+        await _call(app)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await _call(app)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+async def run_benchmark(iterations: int = ITERATIONS) -> dict:
+    bare = await measure(build_app(False), iterations)
+    stacked = await measure(build_app(True), iterations)
+    return {"bare_us": bare, "stack_us": stacked, "overhead_us": stacked - bare}
+
+
+@pytest.fixture
+def redis_unavailable(monkeypatch):
+    async def unavailable():
+        raise ConnectionError("redis unavailable in benchmark")
+    monkeypatch.setattr("app.core.security_middleware.get_session_store", unavailable)
+
+
+@pytest.mark.asyncio
+async def test_middleware_stack_overhead(redis_unavailable):
+    result = await run_benchmark(500)
+    print(
+        f"\nmiddleware overhead: {result['overhead_us']:.1f}us/request "
+        f"(bare {result['bare_us']:.1f}us, stack {result['stack_us']:.1f}us)"
+    )
+    # Generous bound: guards against regressions such as reintroducing a
+    # per-request task or Redis round trip, not against machine noise
+    assert result["overhead_us"] < 5000
+
+
+if __name__ == "__main__":
+    import app.core.security_middleware as security_middleware
+
+    async def _unavailable():
+        raise ConnectionError("redis unavailable in benchmark")
+
+    security_middleware.get_session_store = _unavailable
+    print(asyncio.run(run_benchmark()))
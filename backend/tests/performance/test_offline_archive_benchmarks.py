@@ -0,0 +1,88 @@
+"""
+Tests for the offline archive stand-in server and benchmark harness
+"""
+import gzip
+import json
+import sqlite3
+
+import httpx
+import pytest
+
+from tests.benchmark_results import record_suite_run
+from tests.performance.offline_archive_benchmarks import OfflineArchiveBenchmarks
+from tests.performance.offline_archive_server import OfflineArchiveServer
+
+
+def test_stand_in_serves_recorded_cdx_pages_bodies_and_warc_ranges():
+    with OfflineArchiveServer(repeat=2) as server:
+        base = server.base_url
+        cdx = f"{base}/cdx/search/cdx?url=example-gazette.org&output=json&pageSize=10"
+        assert httpx.get(cdx + "&showNumPages=true").text == "3"
+
+        page = httpx.get(cdx + "&page=2").json()
+        assert page[0][0] == "timestamp"
+        assert len(page) == 1 + 4  # 24 replayed captures, 10 per page
+        assert page[-1][1].endswith("?capture=1")
+
+        body = httpx.get(f"{base}/web/{page[1][0]}if_/{page[1][1]}")
+        assert body.status_code == 200
+        assert "Example Gazette" in body.text
+
+        record = server.recordings.warc_records[3]
+        start = record["offset"]
+        response = httpx.get(
+            f"{base}/{record['filename']}",
+            headers={"Range": f"bytes={start}-{start + record['warc_length'] - 1}"},
+        )
+        assert response.status_code == 206
+        warc = gzip.decompress(response.content).decode()
+        assert warc.startswith("WARC/1.0")
+        assert f"WARC-Target-URI: {record['url']}" in warc
+
+
+def test_stand_in_injects_errors_reproducibly():
+    def statuses():
+        with OfflineArchiveServer(error_rate=0.5, error_status=429, error_routes=("wayback",), seed=7) as server:
+            url = f"{server.base_url}/web/20210314093512if_/https://example-gazette.org/economy/port-jobs-outlook"
+            return [httpx.get(url).status_code for _ in range(20)]
+
+    first = statuses()
+    assert set(first) == {200, 429}
+    assert statuses() == first
+
+
+@pytest.mark.asyncio
+async def test_offline_benchmarks_drive_the_pipeline_and_record_results(tmp_path):
+    suite = OfflineArchiveBenchmarks(latency_ms=0, jitter_ms=0, repeat=1)
+    result = await suite.run_all()
+
+    assert result["status"] == "SUCCESS"
+    by_name = {r["name"]: r for r in result["results"]}
+    assert set(by_name) == {"cdx_client", "wayback_extraction", "common_crawl_extraction", "firecrawl_pipeline"}
+    for benchmark in by_name.values():
+        assert benchmark["failures"] == 0
+        assert benchmark["pages_per_second"] > 0
+        assert benchmark["p99_latency_ms"] >= benchmark["p50_latency_ms"] > 0
+        assert benchmark["peak_rss_mb"] > 0
+
+    db_path = str(tmp_path / "benchmark_results.db")
+    record_suite_run("offline_test", "offline_archive_benchmarks", result, db_path=db_path)
+    with sqlite3.connect(db_path) as conn:
+        metrics = dict(conn.execute(
+            "SELECT metric_name, metric_value FROM performance_metrics WHERE run_id = 'offline_test'"
+        ).fetchall())
+        stored = json.loads(conn.execute("SELECT results_json FROM benchmark_runs").fetchone()[0])
+    assert metrics["wayback_extraction_success_rate"] == 1.0
+    assert "common_crawl_extraction_p99_latency_ms" in metrics
+    assert stored["offline_archive_benchmarks"]["status"] == "SUCCESS"
+
+
+@pytest.mark.asyncio
+async def test_injected_upstream_errors_show_up_as_failures():
+    suite = OfflineArchiveBenchmarks(latency_ms=0, jitter_ms=0, error_rate=1.0, repeat=1)
+    suite.server_options["error_routes"] = ("wayback",)
+
+    [result] = await suite.run_benchmarks(["wayback_extraction"])
+
+    assert result.successes == 0
+    assert result.failures == result.pages == 10
@@ -0,0 +1,116 @@
+"""
+Tests for the Hive-partitioned analytics dataset writer and compaction
+"""
+import os
+import time
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.services.analytics_dataset import (
+    DATASETS,
+    HivePartitionedWriter,
+    compact_dataset,
+    dataset_glob,
+    dataset_root,
+    has_files,
+    import_legacy_files,
+    view_sql,
+)
+
+
+def _cdx_batch(start: int, days, n: int = 10) -> pd.DataFrame:
+    rows = []
+    for i in range(n):
+        day = days[(i // 2) % len(days)]
+        rows.append({
+            "id": start + i,
+            "original_url": f"https://example.com/{start + i}",
+            "content_url": (
+                f"https://data.commoncrawl.org/{start + i}" if i % 2
+                else f"https://web.archive.org/web/{start + i}"
+            ),
+            "created_at": f"2024-01-{day:02d}T12:00:00",
+            "content_length": 100 + i,
+        })
+    return pd.DataFrame(rows)
+
+
+def _write(tmp_path, batches, **kwargs):
+    writer = HivePartitionedWriter(dataset_root(tmp_path, "cdx_records"), DATASETS["cdx_records"], **kwargs)
+    with writer:
+        for batch in batches:
+            writer.write(batch)
+    return writer.files
+
+
+def test_writer_appends_batches_to_one_file_per_partition(tmp_path):
+    files = _write(tmp_path, [_cdx_batch(i * 10, [1, 2]) for i in range(5)])
+
+    # 2 days x 2 sources, regardless of the number of batches
+    assert len(files) == 4
+    relative = sorted(str(Path(f).parent.relative_to(dataset_root(tmp_path, "cdx_records"))) for f in files)
+    assert relative[0] == "year=2024/month=01/day=01/source=common_crawl"
+    assert not list(Path(tmp_path).rglob("*.inprogress"))
+    # Partition values are in the path, not repeated in the file
+    assert "source" not in pq.read_schema(files[0]).names
+
+
+def test_writer_rolls_files_at_target_size(tmp_path):
+    files = _write(tmp_path, [_cdx_batch(i * 200, [1], n=200) for i in range(10)], target_file_bytes=1)
+    # Every write overshoots the one byte target, so each batch lands in its own file per source
+    assert len(files) == 20
+
+
+def test_duckdb_view_prunes_partitions(tmp_path):
+    assert not has_files(tmp_path, "cdx_records")
+    _write(tmp_path, [_cdx_batch(0, [1, 2, 3], n=30)])
+    assert has_files(tmp_path, "cdx_records")
+
+    conn = duckdb.connect()
+    conn.execute(view_sql(tmp_path, "cdx_records"))
+    count = conn.execute(
+        "SELECT count(*) FROM cdx_records WHERE day = 2 AND source = 'wayback_machine'"
+    ).fetchone()[0]
+    assert count == 5
+
+    plan = conn.execute(
+        "EXPLAIN ANALYZE SELECT count(*) FROM cdx_records WHERE day = 2 AND source = 'wayback_machine'"
+    ).fetchone()[1]
+    assert "Scanning Files: 1/6" in plan
+
+
+def test_compaction_merges_small_files_in_settled_partitions(tmp_path):
+    for i in range(4):
+        _write(tmp_path, [_cdx_batch(i * 10, [1])])
+    root = dataset_root(tmp_path, "cdx_records")
+    assert len(list(root.rglob("*.parquet"))) == 8
+
+    # Recently written partitions are left alone
+    stats = compact_dataset(tmp_path, "cdx_records", min_age_seconds=3600)
+    assert stats["partitions_compacted"] == 0
+
+    old = time.time() - 7200
+    for path in root.rglob("*.parquet"):
+        os.utime(path, (old, old))
+    stats = compact_dataset(tmp_path, "cdx_records", min_age_seconds=3600)
+
+    assert stats == {"partitions_compacted": 2, "files_removed": 8, "files_written": 2}
+    ids = duckdb.connect().execute(
+        f"SELECT id FROM read_parquet('{dataset_glob(tmp_path, 'cdx_records')}') ORDER BY id"
+    ).fetchall()
+    assert [row[0] for row in ids] == list(range(40))
+
+
+def test_legacy_files_are_imported(tmp_path):
+    legacy_dir = Path(tmp_path) / "cdx_analytics" / "2024-01-01"
+    legacy_dir.mkdir(parents=True)
+    _cdx_batch(0, [1]).to_parquet(legacy_dir / "cdx_batch_000000_20240101_000000.parquet")
+
+    writer = HivePartitionedWriter(dataset_root(tmp_path, "cdx_records"), DATASETS["cdx_records"])
+    assert import_legacy_files(tmp_path, "cdx_records", writer) == 1
+
+    assert not list(legacy_dir.iterdir())
+    assert len(writer.files) == 2
@@ -0,0 +1,114 @@
+"""
+Tests for the archive.org request governor
+"""
+import pytest
+
+from app.core.config import settings
+from app.services.archive_governor import (
+    ArchiveRequestGovernor,
+    GovernorPolicy,
+    LocalGovernorBackend,
+    governor_scope,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _policy(**overrides):
+    values = dict(requests_per_minute=60, burst=2, decrease=0.5, increase=0.25, min_factor=0.1,
+                  cooldown_seconds=30, default_pause_seconds=60)
+    values.update(overrides)
+    return GovernorPolicy(**values)
+
+
+def test_scope_is_host_and_proxy_without_credentials():
+    assert governor_scope("https://web.archive.org/web/2020/x") == "web.archive.org|direct"
+    assert governor_scope("https://archive.org/x", "http://user:pw@proxy.local:8080") == "archive.org|proxy.local:8080"
+    assert governor_scope("https://example.com/") is None
+    assert governor_scope("https://notarchive.org/") is None
+
+
+def test_cdx_queries_have_their_own_scope_and_budget(monkeypatch):
+    assert governor_scope("https://web.archive.org/cdx/search/cdx?url=x") == "web.archive.org/cdx|direct"
+    monkeypatch.setattr(settings, "ARCHIVE_GOVERNOR_REQUESTS_PER_MINUTE", 15.0)
+    monkeypatch.setattr(settings, "ARCHIVE_GOVERNOR_CDX_REQUESTS_PER_MINUTE", 60.0)
+    monkeypatch.setattr(settings, "ARCHIVE_GOVERNOR_HOST_RATES", {})
+    assert GovernorPolicy.for_host("web.archive.org").requests_per_minute == 15.0
+    assert GovernorPolicy.for_host("web.archive.org/cdx").requests_per_minute == 60.0
+    monkeypatch.setattr(settings, "ARCHIVE_GOVERNOR_HOST_RATES", {"web.archive.org/cdx": 30})
+    assert GovernorPolicy.for_host("web.archive.org/cdx").requests_per_minute == 30.0
+
+
+@pytest.mark.asyncio
+async def test_gcra_allows_burst_then_paces_at_interval():
+    clock = FakeClock()
+    backend = LocalGovernorBackend(clock)
+    policy = _policy()
+    assert await backend.acquire("s", policy, True) == 0
+    assert await backend.acquire("s", policy, True) == 0
+    assert await backend.acquire("s", policy, True) == pytest.approx(1000)
+    assert await backend.acquire("s", policy, False) == pytest.approx(1000)
+    clock.now += 1.0
+    assert await backend.acquire("s", policy, False) == 0
+    stats = (await backend.snapshot())["s"]
+    # Retries of the same waiting request count as one throttle
+    assert stats["granted"] == 3 and stats["throttled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_cut_rate_once_per_cooldown_and_successes_restore_it():
+    clock = FakeClock()
+    backend = LocalGovernorBackend(clock)
+    policy = _policy()
+    assert await backend.record("s", policy, False, 0) == 0.5
+    assert await backend.record("s", policy, False, 0) == 0.5
+    clock.now += 30
+    assert await backend.record("s", policy, False, 0) == 0.25
+    # Halved rate doubles the interval between requests
+    await backend.acquire("s", policy, True)
+    await backend.acquire("s", policy, True)
+    assert await backend.acquire("s", policy, True) == pytest.approx(4000)
+    for _ in range(3):
+        await backend.record("s", policy, True, 0)
+    assert backend.scopes["s"].factor == 1.0
+
+
+@pytest.mark.asyncio
+async def test_governor_pauses_scope_on_429_and_falls_back_without_redis(monkeypatch):
+    clock = FakeClock()
+
+    class BrokenBackend:
+        async def acquire(self, *args):
+            raise ConnectionError("redis down")
+
+        record = snapshot = acquire
+
+    governor = ArchiveRequestGovernor(backend=BrokenBackend(), fallback=LocalGovernorBackend(clock), enabled=True)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr("app.services.archive_governor.asyncio.sleep", fake_sleep)
+    url = "https://web.archive.org/cdx/search/cdx?url=example.com"
+    assert await governor.acquire(url) == 0
+    await governor.record_response(url, None, 429, "12")
+    # A CDX pause leaves content fetches from the same host alone
+    assert await governor.acquire("https://web.archive.org/web/2020/https://example.com/") == 0
+    waited = await governor.acquire(url)
+    assert waited >= 12
+    assert all(delay <= governor.max_sleep_seconds + 0.05 for delay in sleeps)
+    # Other hosts are never governed
+    assert await governor.acquire("https://example.com/") == 0
+
+    rows = await governor.snapshot()
+    assert [(r["host"], r["route"]) for r in rows] == [("web.archive.org/cdx", "direct"), ("web.archive.org", "direct")]
+    assert rows[0]["errors"] == 1 and rows[0]["throttled"] == 1 and rows[0]["granted"] == 2
+    assert rows[1]["granted"] == 1 and rows[1]["throttled"] == 0
@@ -0,0 +1,135 @@
+"""
+Tests for the pure ASGI middleware stack and shared request context
+"""
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.event_queue import BackgroundEventQueue
+from app.core.middleware import (
+    RequestSizeLimitMiddleware,
+    RequestTimeoutMiddleware,
+    SecurityHeadersMiddleware,
+)
+from app.core.request_context import RequestContextMiddleware
+from app.core.security_middleware import RateLimitMiddleware, SessionSecurityMiddleware
+
+
+async def _echo(request: Request):
+    body = await request.body()
+    context = request.state.request_context
+    return JSONResponse({"size": len(body), "request_id": context.request_id, "ip": context.client_ip})
+
+
+async def _slow(request: Request):
+    await asyncio.sleep(1)
+    return PlainTextResponse("late")
+
+
+async def _stream(request: Request):
+    async def chunks():
+        for i in range(3):
+            await asyncio.sleep(0.05)
+            yield f"{i}".encode()
+    return StreamingResponse(chunks())
+
+
+async def _login(request: Request):
+    response = PlainTextResponse("ok")
+    response.set_cookie("session_id", "abc")
+    return response
+
+
+def _build(*middleware):
+    app = Starlette(routes=[
+        Route("/echo", _echo, methods=["GET", "POST"]),
+        Route("/slow", _slow),
+        Route("/stream", _stream),
+        Route("/login", _login),
+    ])
+    for cls, kwargs in middleware:
+        app.add_middleware(cls, **kwargs)
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_context_is_shared_and_request_id_echoed():
+    async with _client(_build((SecurityHeadersMiddleware, {}))) as client:
+        response = await client.get("/echo", headers={"x-request-id": "req-1", "x-forwarded-for": "1.2.3.4, 5.6.7.8"})
+    assert response.headers["x-request-id"] == "req-1"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.json()["request_id"] == "req-1"
+    assert response.json()["ip"] == "1.2.3.4"
+
+
+@pytest.mark.asyncio
+async def test_size_limit_rejects_declared_and_streamed_bodies():
+    app = _build((RequestSizeLimitMiddleware, {"max_size": 10}))
+    async with _client(app) as client:
+        assert (await client.post("/echo", content=b"x" * 5)).json()["size"] == 5
+        assert (await client.post("/echo", content=b"x" * 50)).status_code == 413
+
+        async def chunked():
+            for _ in range(5):
+                yield b"xxxx"
+        assert (await client.post("/echo", content=chunked())).status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_timeout_applies_only_until_response_start():
+    app = _build((RequestTimeoutMiddleware, {"timeout": 0.1}))
+    async with _client(app) as client:
+        assert (await client.get("/slow")).status_code == 408
+        streamed = await client.get("/stream")
+    assert streamed.status_code == 200
+    assert streamed.text == "012"
+
+
+@pytest.mark.asyncio
+async def test_session_cookies_are_hardened():
+    async with _client(_build((SessionSecurityMiddleware, {}))) as client:
+        response = await client.get("/login")
+    cookie = response.headers["set-cookie"]
+    assert "HttpOnly" in cookie
+    assert "SameSite" in cookie
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_passes_through_without_redis(monkeypatch):
+    async def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr("app.core.security_middleware.get_session_store", unavailable)
+    async with _client(_build((RateLimitMiddleware, {}))) as client:
+        response = await client.get("/echo")
+    assert response.status_code == 200
+    assert "x-ratelimit-limit" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_event_queue_drops_when_full():
+    queue = BackgroundEventQueue(maxsize=2, name="test")
+    done = []
+    gate = asyncio.Event()
+
+    async def job():
+        await gate.wait()
+        done.append(1)
+
+    results = [queue.submit(job) for _ in range(5)]
+    # The worker may already have taken the first job off the queue
+    assert results.count(False) >= 2
+    gate.set()
+    await queue.shutdown(timeout=1)
+    assert queue.stats()["dropped"] == results.count(False)
+    assert len(done) == results.count(True)
@@ -0,0 +1,89 @@
+"""
+Tests for the buffered audit event pipeline
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.audit_logging_service import (
+    AuditEvent,
+    AuditEventType,
+    AuditLoggingService,
+    AuditSeverity,
+)
+from app.services.audit_pipeline import AuditCopyWriter, AuditPipeline, AuditRingBuffer
+
+
+def test_ring_buffer_wraps_and_counts_drops():
+    buffer = AuditRingBuffer(3)
+    assert [buffer.push(i) for i in range(4)] == [True, True, True, False]
+    assert buffer.dropped == 1
+    assert buffer.drain(2) == [0, 1]
+    assert buffer.push(4) and buffer.push(5)
+    assert buffer.drain(10) == [2, 4, 5]
+    assert len(buffer) == 0
+
+
+def test_pipeline_sheds_low_severity_before_full():
+    pipeline = AuditPipeline(capacity=10, batch_size=100, sample_rate=0.0, shed_watermark=0.5)
+    for _ in range(8):
+        pipeline.submit(AuditEvent(severity=AuditSeverity.LOW))
+    # Routine events stop at the watermark, high severity still fits
+    assert len(pipeline.events) == 5
+    assert pipeline.submit(AuditEvent(severity=AuditSeverity.HIGH))
+    stats = pipeline.stats()
+    assert stats["shed_low_severity"] == 3
+    assert stats["dropped_by_severity"] == {"low": 3}
+
+
+def test_pipeline_samples_analysis_but_keeps_security_relevant_events():
+    pipeline = AuditPipeline(capacity=100, sample_rate=0.0)
+    pipeline.submit(AuditEvent(details={"status_code": 200}))
+    pipeline.submit(AuditEvent(details={"status_code": 429}))
+    pipeline.submit(AuditEvent(event_type=AuditEventType.USER_LOGIN_FAILED))
+    analyzed = pipeline.analysis.drain(10)
+    assert len(analyzed) == 2
+    assert len(pipeline.events) == 3
+
+
+def test_copy_record_matches_columns_and_partition_bounds():
+    writer = AuditCopyWriter()
+    event = AuditEvent(timestamp=datetime(2026, 12, 31, 23, 0), details={"a": 1})
+    record = writer.to_record(event)
+    assert len(record) == len(AuditCopyWriter.COLUMNS)
+    assert record[1].tzinfo == timezone.utc
+    assert record[-1] == '{"a": 1}'
+    name, start, end = writer.partition_for(record[1])
+    assert name == "audit_events_y2026m12"
+    assert end == datetime(2027, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_log_api_request_defers_writes_and_analysis(tmp_path, monkeypatch):
+    service = AuditLoggingService()
+    service._audit_log_path = tmp_path / "audit.jsonl"
+    written = []
+
+    async def fake_write(events):
+        written.extend(events)
+        return len(events)
+
+    analyzed = []
+
+    async def fake_analyze(event):
+        analyzed.append(event)
+
+    service._audit_store = AuditCopyWriter()
+    monkeypatch.setattr(service._audit_store, "write", fake_write)
+    monkeypatch.setattr(service, "_analyze_api_patterns", fake_analyze)
+
+    await service.log_api_request("GET", "/api/v1/x", 429, 5.0, ip_address="1.2.3.4")
+    await service.log_api_request("GET", "/api/v1/x", 200, 5.0, ip_address="1.2.3.4")
+    # Nothing is persisted or analyzed on the request path
+    assert written == [] and analyzed == []
+
+    await service._flush_buffers()
+    await service._run_sampled_analysis()
+    assert len(written) == 2
+    assert any(e.details["status_code"] == 429 for e in analyzed)
+    assert len(service._audit_log_path.read_text().splitlines()) == 2
@@ -0,0 +1,215 @@
+"""
+Tests for the one-pass streaming backup pipeline against LocalStorageBackend
+"""
+import os
+import random
+import tarfile
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.services.backup_service import (
+    BackupConfig,
+    BackupMetadata,
+    BackupService,
+    BackupStatus,
+    BackupType,
+    CompressionType,
+    LocalStorageBackend,
+    StorageBackend,
+)
+from app.services.backup_streaming import (
+    StreamingBackupPipeline,
+    composite_sha256,
+    decode_archive,
+    file_digest,
+    verify_parts,
+)
+
+PART_SIZE = 64 * 1024
+EXTENSIONS = {"zstd": ".zst", "gzip": ".gz", "lz4": ".lz4", "none": ""}
+
+
+def _payload(size=1536 * 1024):
+    """Half random, half repetitive, so every codec produces several parts"""
+    rng = random.Random(50)
+    noise = bytes(rng.getrandbits(8) for _ in range(size // 2))
+    return noise + b"chrono scraper backup " * (size // 2 // 22)
+
+
+class BytesSource:
+    def __init__(self, data, read_size=None):
+        self.data = data
+        self.position = 0
+        self.read_size = read_size
+
+    async def read(self, size):
+        size = min(size, self.read_size or size)
+        block = self.data[self.position:self.position + size]
+        self.position += len(block)
+        return block
+
+
+class FlakyBackend(LocalStorageBackend):
+    """Rejects one part number until told otherwise"""
+
+    def __init__(self, config, fail_part):
+        super().__init__(config)
+        self.fail_part = fail_part
+        self.uploaded = []
+
+    async def upload_part(self, remote_path, part, data):
+        if part.part_number == self.fail_part:
+            return False
+        self.uploaded.append(part.part_number)
+        return await super().upload_part(remote_path, part, data)
+
+
+class StagedBackend(LocalStorageBackend):
+    """A backend that only takes whole files, like GCS, Azure and SFTP"""
+    supports_multipart = False
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalStorageBackend({"base_path": str(tmp_path / "store")})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", ["zstd", "gzip", "lz4", "none"])
+@pytest.mark.parametrize("encrypted", [False, True])
+async def test_round_trip_through_parts(backend, tmp_path, compression, encrypted):
+    fernet = Fernet(Fernet.generate_key())
+    payload = _payload()
+    name = f"backup.tar{EXTENSIONS[compression]}" + (".enc" if encrypted else "")
+    pipeline = StreamingBackupPipeline(
+        backend, f"b1/{name}", compression, encrypt=fernet.encrypt if encrypted else None,
+        part_size=PART_SIZE, max_parallel_uploads=4, zstd_threads=2,
+    )
+    manifest = await pipeline.run(BytesSource(payload), {"backup_id": "b1"})
+
+    stored = backend.base_path / "b1" / name
+    assert manifest.source_size_bytes == len(payload)
+    assert manifest.size_bytes == stored.stat().st_size
+    assert len(manifest.parts) > 2
+    # Parts tile the archive in order; all but the last are full
+    assert [part.offset for part in manifest.parts] == [
+        sum(part.size for part in manifest.parts[:i]) for i in range(len(manifest.parts))
+    ]
+    if not encrypted:
+        assert {part.size for part in manifest.parts[:-1]} == {PART_SIZE}
+    assert manifest.sha256 == await file_digest(str(stored))
+    assert manifest.parts_sha256 == composite_sha256(manifest.parts)
+    assert await verify_parts(backend, f"b1/{name}", manifest) == []
+
+    # Only the finished archive and its sidecars are left
+    assert sorted(path.name for path in stored.parent.iterdir()) == [name, f"{name}.manifest", f"{name}.metadata"]
+    assert [f["name"] for f in await backend.list_files("b1")] == [f"b1/{name}"]
+
+    restored = tmp_path / "restored.tar"
+    await decode_archive(str(stored), str(restored), name, fernet.decrypt)
+    assert restored.read_bytes() == payload
+    assert manifest.source_sha256 == await file_digest(str(restored))
+
+
+@pytest.mark.asyncio
+async def test_verification_pinpoints_a_corrupted_part(backend):
+    manifest = await StreamingBackupPipeline(backend, "b2/backup.tar.zst", "zstd", part_size=PART_SIZE).run(
+        BytesSource(_payload())
+    )
+    corrupted = manifest.parts[2]
+    path = backend.base_path / "b2" / "backup.tar.zst"
+    with open(path, "r+b") as f:
+        f.seek(corrupted.offset + 100)
+        byte = f.read(1)
+        f.seek(corrupted.offset + 100)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    assert await verify_parts(backend, "b2/backup.tar.zst", manifest) == [corrupted.part_number]
+    # A sample that leaves out the damaged part passes
+    assert await verify_parts(backend, "b2/backup.tar.zst", manifest, [1, 2, len(manifest.parts)]) == []
+
+    os.truncate(path, manifest.size_bytes - 10)
+    assert await verify_parts(backend, "b2/backup.tar.zst", manifest, [len(manifest.parts)]) == [
+        len(manifest.parts)
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encrypted", [False, True])
+async def test_retry_resumes_after_a_failed_part(tmp_path, encrypted):
+    fernet = Fernet(Fernet.generate_key())
+    encrypt = fernet.encrypt if encrypted else None
+    name = "backup.tar.zst.enc" if encrypted else "backup.tar.zst"
+    payload = _payload()
+    backend = FlakyBackend({"base_path": str(tmp_path / "store")}, fail_part=4)
+
+    with pytest.raises(RuntimeError, match="part 4"):
+        await StreamingBackupPipeline(
+            backend, f"b3/{name}", "zstd", encrypt=encrypt, part_size=PART_SIZE, max_parallel_uploads=1
+        ).run(BytesSource(payload, read_size=PART_SIZE // 2))
+    assert not (backend.base_path / "b3" / name).exists()
+    stored_before = set(backend.uploaded)
+    assert {1, 2, 3} <= stored_before
+
+    backend.fail_part = None
+    backend.uploaded = []
+    manifest = await StreamingBackupPipeline(
+        backend, f"b3/{name}", "zstd", encrypt=encrypt, part_size=PART_SIZE
+    ).run(BytesSource(payload))
+
+    # Parts stored by the failed attempt are not sent again, even though their ciphertext would differ
+    assert manifest.resumed_parts == len(stored_before)
+    assert not stored_before & set(backend.uploaded)
+    assert await verify_parts(backend, f"b3/{name}", manifest) == []
+    # The archive digest covers the resumed parts' stored bytes, not the fresh ciphertext
+    assert manifest.sha256 == await file_digest(str(backend.base_path / "b3" / name))
+    restored = tmp_path / "restored.tar"
+    await decode_archive(str(backend.base_path / "b3" / name), str(restored), name, fernet.decrypt)
+    assert restored.read_bytes() == payload
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend_class", [LocalStorageBackend, StagedBackend])
+async def test_backup_service_streams_and_verifies_a_tar(tmp_path, backend_class):
+    source = tmp_path / "work" / "full_1"
+    (source / "database").mkdir(parents=True)
+    (source / "database" / "dump.sql").write_bytes(_payload(512 * 1024))
+    (source / "configuration.json").write_text('{"a": 1}')
+
+    service = BackupService()
+    backend = backend_class({"base_path": str(tmp_path / "store")})
+    service.storage_backends[StorageBackend.LOCAL] = backend
+    config = BackupConfig(
+        backup_type=BackupType.FULL, storage_backend=StorageBackend.LOCAL, compression=CompressionType.ZSTD
+    )
+    remote_path = f"full_1/{service._archive_name(source, config)}"
+    assert remote_path == "full_1/full_1.tar.zst.enc"
+
+    manifest = await service._stream_backup_archive(source, config, remote_path, {"backup_id": "full_1"})
+    assert manifest is not None and manifest.source_size_bytes > 512 * 1024
+
+    metadata = BackupMetadata(
+        backup_id="full_1", backup_type=BackupType.FULL, status=BackupStatus.COMPLETED,
+        created_at=datetime.utcnow(), checksum=manifest.sha256, storage_location=remote_path,
+        chunk_manifest=manifest.to_dict(),
+    )
+    assert await service._verify_backup_integrity(metadata, config)
+    stored = backend.base_path / remote_path
+    assert metadata.checksum == await file_digest(str(stored))
+    # Without a manifest the whole-file checksum is compared
+    whole_file = replace(metadata, chunk_manifest=None)
+    assert await service._verify_backup_integrity(whole_file, config)
+
+    restored = tmp_path / "restored.tar"
+    await decode_archive(str(stored), str(restored), stored.name, service.fernet.decrypt)
+    with tarfile.open(restored) as tar:
+        assert tar.extractfile("full_1/configuration.json").read() == b'{"a": 1}'
+
+    with open(stored, "r+b") as f:
+        f.seek(manifest.size_bytes // 2)
+        f.write(b"\0" * 8)
+    assert not await service._verify_backup_integrity(metadata, config)
+    assert not await service._verify_backup_integrity(whole_file, config)
@@ -0,0 +1,136 @@
+"""
+Tests for cluster.idx-guided lookups in CommonCrawlDirectService
+"""
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from app.services.common_crawl_direct_service import (
+    ClusterIndex,
+    CommonCrawlDirectService,
+    decompress_blocks,
+    surt_key_range,
+)
+
+HOSTS = ["com,alpha)", "com,example)", "com,example,blog)", "com,examples)", "com,zulu)"]
+
+
+def _cdx_line(surt_host, path, timestamp="20240601000000", mime="text/html"):
+    host = ".".join(reversed(surt_host.rstrip(")").split(",")))
+    fields = {
+        "url": f"https://{host}{path}", "mime": mime, "status": "200",
+        "digest": f"D{abs(hash((surt_host, path))) % 10**8}", "length": "100",
+        "offset": "5", "filename": "crawl-data/x.warc.gz",
+    }
+    return f"{surt_host}{path} {timestamp} {json.dumps(fields)}"
+
+
+@pytest.fixture
+def zipnum(tmp_path):
+    """Write a small ZipNum index: blocks of three lines plus cluster.idx"""
+    lines = sorted(_cdx_line(h, f"/page{i}") for h in HOSTS for i in range(4))
+    data = b""
+    cluster = []
+    for start in range(0, len(lines), 3):
+        block = lines[start:start + 3]
+        compressed = gzip.compress(("\n".join(block) + "\n").encode())
+        key = " ".join(block[0].split(" ")[:2])
+        cluster.append(f"{key}\tcdx-00000.gz\t{len(data)}\t{len(compressed)}\t{start // 3 + 1}")
+        data += compressed
+    (tmp_path / "CC-TEST-cluster.idx").write_text("\n".join(cluster) + "\n")
+    return tmp_path, data
+
+
+def test_surt_key_range_covers_domain_and_subdomains_only():
+    start, end = surt_key_range("www.Example.com", "domain")
+    assert (start, end) == ("com,example", "com,example-")
+    for key in ("com,example)/", "com,example,blog)/x"):
+        assert start <= key < end
+    assert not start <= "com,examples)/" < end
+    assert surt_key_range("*.example.com", "glob") == ("com,example", "com,example-")
+    assert surt_key_range("ex*mple.com", "glob") is None
+    assert surt_key_range("https://example.com/docs", "prefix")[0] == "com,example)/docs"
+
+
+def test_cluster_index_binary_search_returns_overlapping_blocks(zipnum):
+    cache_dir, _ = zipnum
+    index = ClusterIndex(cache_dir / "CC-TEST-cluster.idx")
+    blocks = index.lookup(*surt_key_range("example.com", "domain"))
+    # 20 lines in blocks of 3: example.com lines 4-11 live in blocks 2-4
+    assert [b.offset for b in blocks] == sorted(b.offset for b in blocks)
+    assert len(blocks) == 3
+    assert index.lookup("ca,", "ca,\x7f") == []
+    index.close()
+
+
+def test_decompress_blocks_handles_concatenated_members():
+    data = gzip.compress(b"a\n") + gzip.compress(b"b\n")
+    assert decompress_blocks(data) == b"a\nb\n"
+
+
+@pytest.mark.asyncio
+async def test_indexed_lookup_fetches_only_matching_blocks(zipnum, monkeypatch):
+    cache_dir, data = zipnum
+    monkeypatch.setattr(CommonCrawlDirectService, "_cluster_indexes", {})
+    service = CommonCrawlDirectService(cache_dir=str(cache_dir))
+    requests = []
+
+    async def fake_fetch_range(url, offset, length):
+        requests.append((url, offset, length))
+        return data[offset:offset + length]
+
+    monkeypatch.setattr(service, "_fetch_range", fake_fetch_range)
+    records, stats = await service.fetch_cdx_records_indexed(
+        "example.com", "20240101", "20241231", "domain", crawls=["CC-TEST"]
+    )
+    urls = sorted(r.original_url for r in records)
+    assert len(urls) == 8
+    assert all("examples.com" not in u for u in urls)
+    assert any("blog.example.com" in u for u in urls)
+    # Contiguous blocks are coalesced into a single range request
+    assert len(requests) == 1 and requests[0][0].endswith("/CC-TEST/indexes/cdx-00000.gz")
+    assert stats == {"crawls_searched": 1, "crawls_failed": 0, "blocks_fetched": 3}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_download_cluster_index_once(zipnum, monkeypatch):
+    cache_dir, _ = zipnum
+    index_text = (cache_dir / "CC-TEST-cluster.idx").read_text()
+    (cache_dir / "CC-TEST-cluster.idx").unlink()
+    monkeypatch.setattr(CommonCrawlDirectService, "_cluster_indexes", {})
+    service = CommonCrawlDirectService(cache_dir=str(cache_dir))
+    downloads = []
+
+    async def fake_download(url, local_path, verify_gzip=True):
+        downloads.append(url)
+        await asyncio.sleep(0.01)
+        local_path.write_text(index_text)
+        return True
+
+    monkeypatch.setattr(service, "_download_file", fake_download)
+    indexes = await asyncio.gather(*(service._load_cluster_index("CC-TEST") for _ in range(5)))
+    assert len(downloads) == 1
+    assert all(index is indexes[0] for index in indexes)
+
+
+@pytest.mark.asyncio
+async def test_simple_fetch_does_not_cap_indexed_results(zipnum, monkeypatch):
+    cache_dir, data = zipnum
+    monkeypatch.setattr(CommonCrawlDirectService, "_cluster_indexes", {})
+    service = CommonCrawlDirectService(cache_dir=str(cache_dir))
+
+    async def fake_fetch_range(url, offset, length):
+        return data[offset:offset + length]
+
+    async def fake_crawls():
+        return ["CC-TEST"]
+
+    monkeypatch.setattr(service, "_fetch_range", fake_fetch_range)
+    monkeypatch.setattr(service, "_get_available_crawls", fake_crawls)
+    records, stats = await service.fetch_cdx_records_simple(
+        "example.com", "20240101", "20241231", "domain", page_size=3
+    )
+    assert len(records) == 8
+    assert stats["total_records"] == 8
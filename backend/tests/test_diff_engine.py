@@ -0,0 +1,160 @@
+"""
+Tests for the structural diff engine and its use in page comparisons
+"""
+import difflib
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.change_detection import ChangeDetectionService
+from app.services.diff_engine import (
+    DiffEngine,
+    compute_diff,
+    diff_lines,
+    shingle_sketch,
+    sketch_similarity,
+    text_similarity,
+)
+from app.services.investigation_service import InvestigationService
+
+
+def _apply(a_lines, b_lines, opcodes):
+    """Rebuild the target from the baseline and the opcodes, checking they are contiguous"""
+    rebuilt, i, j = [], 0, 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a_lines[i1:i2] == b_lines[j1:j2]
+        rebuilt.extend(b_lines[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a_lines), len(b_lines))
+    return rebuilt
+
+
+def _article(rnd, paragraphs, vocabulary):
+    return "".join(
+        "\n".join(" ".join(rnd.choice(vocabulary) for _ in range(10)) for _ in range(3)) + "\n\n"
+        for _ in range(paragraphs)
+    )
+
+
+def test_opcodes_rebuild_the_target_for_random_edits():
+    rnd = random.Random(3)
+    for _ in range(500):
+        vocabulary = [f"line {k}\n" for k in range(rnd.randint(1, 5))] + ["\n"]
+        a = [rnd.choice(vocabulary) for _ in range(rnd.randint(0, 25))]
+        b = list(a)
+        for _ in range(rnd.randint(0, 5)):
+            position = rnd.randint(0, len(b))
+            if rnd.random() < 0.5 and b:
+                del b[min(position, len(b) - 1)]
+            else:
+                b.insert(position, rnd.choice(vocabulary))
+        opcodes, exact = diff_lines(a, b, time.monotonic() + 5)
+        assert exact
+        assert _apply(a, b, opcodes) == b
+
+
+def test_unified_diff_matches_difflib_format():
+    old = "title\n\nfirst paragraph\nstays\n\nsecond paragraph\nold line\n\nthird\n"
+    new = "title\n\nfirst paragraph\nstays\n\nsecond paragraph\nnew line\nadded\n\nthird\n"
+
+    result = compute_diff(old, new)
+
+    expected = list(difflib.unified_diff(old.splitlines(True), new.splitlines(True), "old", "new", n=3))
+    assert result.unified("old", "new") == expected
+    assert (result.lines_added, result.lines_removed) == (2, 1)
+    assert compute_diff(old, old).unified() == []
+
+
+def test_sketch_similarity_estimates_shingle_jaccard():
+    rnd = random.Random(5)
+    vocabulary = [f"w{i}" for i in range(3000)]
+    words = [rnd.choice(vocabulary) for _ in range(20000)]
+    edited = list(words)
+    for index in rnd.sample(range(len(edited)), 400):
+        edited[index] = rnd.choice(vocabulary)
+
+    def shingles(tokens):
+        return {tuple(tokens[i:i + 5]) for i in range(len(tokens) - 4)}
+
+    exact = len(shingles(words) & shingles(edited)) / len(shingles(words) | shingles(edited))
+    estimate = sketch_similarity(shingle_sketch(" ".join(words)), shingle_sketch(" ".join(edited)))
+    assert abs(estimate - exact) < 0.12
+    assert text_similarity("", "") == 1.0
+    assert text_similarity("text", "") == 0.0
+    # Short fields keep an exact ratio
+    assert text_similarity("Hello World", "Hello World!") == difflib.SequenceMatcher(None, "Hello World", "Hello World!").ratio()
+
+
+def test_time_budget_coarsens_instead_of_running_long():
+    rnd = random.Random(7)
+    vocabulary = [f"row {i}\n" for i in range(6)]
+    old = "".join(rnd.choice(vocabulary) for _ in range(20000))
+    new = "".join(rnd.choice(vocabulary) for _ in range(20000))
+
+    started = time.perf_counter()
+    result = compute_diff(old, new, budget_seconds=0.05)
+    assert time.perf_counter() - started < 2
+    assert not result.exact
+    assert _apply(old.splitlines(True), new.splitlines(True), result.opcodes) == new.splitlines(True)
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_by_content_digest(monkeypatch):
+    engine = DiffEngine(max_workers=0)
+    old, new = "a\nb\nc\n", "a\nB\nc\n"
+
+    first = await engine.compare(old, new)
+    calls = []
+    monkeypatch.setattr("app.services.diff_engine.compute_diff", lambda *args: calls.append(args))
+    second = await engine.compare(old, new)
+
+    assert not first.cached and second.cached
+    assert second.hunks == first.hunks
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_large_comparisons_run_in_the_worker_pool(monkeypatch):
+    monkeypatch.setattr(settings, "DIFF_ENGINE_INLINE_MAX_BYTES", 1_000)
+    rnd = random.Random(11)
+    vocabulary = [f"term{i}" for i in range(500)]
+    old = _article(rnd, 60, vocabulary)
+    new = old.replace(old.split("\n\n")[10], "a rewritten paragraph", 1)
+
+    engine = DiffEngine(max_workers=1)
+    try:
+        result = await engine.compare(old, new)
+    finally:
+        engine.shutdown()
+
+    assert result.exact
+    assert (result.lines_added, result.lines_removed) == (1, 3)
+    assert 0.5 < result.similarity < 1.0
+
+
+@pytest.mark.asyncio
+async def test_investigation_page_comparison_uses_engine_diffs():
+    baseline = SimpleNamespace(title="Port jobs outlook", extracted_text="one\ntwo\nthree\n", author="A. Writer")
+    target = SimpleNamespace(title="Port jobs outlook", extracted_text="one\n2\nthree\n", author="A. Writer")
+
+    result = await InvestigationService()._compare_pages(baseline, target, ["title", "extracted_text", "author"], [])
+
+    assert result["differences_found"]
+    assert list(result["detailed_diff"]) == ["extracted_text"]
+    change = result["detailed_diff"]["extracted_text"]
+    assert change["diff"][:2] == ["--- baseline_extracted_text\n", "+++ target_extracted_text\n"]
+    assert "-two\n" in change["diff"] and "+2\n" in change["diff"]
+    assert change["diff_complete"]
+    assert result["change_categories"] == ["content_change"]
+
+
+def test_change_detection_html_diff_marks_changed_lines():
+    html = ChangeDetectionService.generate_html_diff("keep\nold <b>\n", "keep\nnew\n")
+    assert "Previous Version" in html and "Current Version" in html
+    assert '<span class="diff_chg">old &lt;b&gt;</span>' in html
+    assert ChangeDetectionService.generate_content_diff("x\n", "y\n") == "--- old\n+++ new\n@@ -1 +1 @@\n-x\n+y\n"
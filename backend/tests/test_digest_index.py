@@ -0,0 +1,75 @@
+"""
+Tests for the per-domain digest Bloom filter
+"""
+from app.services.digest_index import BloomFilter, DigestMembership, ScalableBloomFilter
+from app.services.enhanced_intelligent_filter import EnhancedIntelligentContentFilter
+from app.services.wayback_machine import CDXRecord
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"DIGEST{i}")
+    assert all(f"DIGEST{i}" in bloom for i in range(5000))
+    false_positives = sum(f"OTHER{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_bloom_bits_follow_redis_setbit_order():
+    bloom = BloomFilter(capacity=10, error_rate=0.1)
+    position = bloom.positions("ABC")[0]
+    bloom.add("ABC")
+    # SETBIT offset 0 is the most significant bit of the first byte
+    assert bloom.bits[position // 8] & (1 << (7 - position % 8))
+    restored = BloomFilter(capacity=10, error_rate=0.1, bits=bytes(bloom.bits).rstrip(b"\x00"), count=1)
+    assert "ABC" in restored
+
+
+def test_scalable_filter_adds_slices_when_full():
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01)
+    for i in range(600):
+        bloom.add(f"D{i}")
+    assert len(bloom.slices) == 3
+    assert [s.capacity for s in bloom.slices] == [100, 400, 1600]
+    assert len(bloom) == 600
+    assert all(f"D{i}" in bloom for i in range(600))
+
+
+def test_membership_confirms_only_bloom_positives_in_batches():
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.001)
+    for digest in ("A", "B", "C"):
+        bloom.add(digest)
+    calls = []
+
+    def confirm(digests):
+        calls.append(sorted(digests))
+        # "C" was scraped before the cutoff, so the database rejects it
+        return {d for d in digests if d in ("A", "B")}
+
+    membership = DigestMembership(bloom, confirm, batch_size=2)
+    membership.prefetch(["A", "B", "C", "X", "Y", None])
+    assert sorted(d for batch in calls for d in batch) == ["A", "B", "C"]
+    assert "A" in membership and "B" in membership
+    assert "C" not in membership and "X" not in membership and None not in membership
+    assert len(calls) == 2
+    assert membership.false_positives == 1
+
+
+def test_enhanced_filter_prefetches_digests_once():
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.001)
+    bloom.add("SEEN")
+    calls = []
+
+    def confirm(digests):
+        calls.append(list(digests))
+        return set(digests)
+
+    membership = DigestMembership(bloom, confirm)
+    records = [
+        CDXRecord(timestamp="20200101000000", original_url=f"https://example.com/report/item-{i}",
+                  mime_type="text/html", status_code="200", digest=digest, length="5000")
+        for i, digest in enumerate(["SEEN", "NEW1", "NEW2"])
+    ]
+    results, stats = EnhancedIntelligentContentFilter().filter_records_with_individual_reasons(records, membership)
+    assert calls == [["SEEN"]]
+    assert stats["already_processed_filtered"] == 1
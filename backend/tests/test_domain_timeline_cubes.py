@@ -0,0 +1,257 @@
+"""
+Tests for the pre-aggregated domain timeline buckets
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.project import Domain, Project
+from app.models.scraping import DomainTimelineBucket, DomainTimelineWatermark, ScrapePage, ScrapePageStatus
+from app.schemas.analytics import TimeGranularity
+from app.services import analytics_service as analytics_module
+from app.services.analytics_service import AnalyticsQueryContext, AnalyticsService
+from app.services.domain_timeline_cubes import (
+    HyperLogLog,
+    cover,
+    domain_timeline,
+    domain_totals,
+    project_totals,
+    refresh_project_timelines,
+    refresh_timeline_days,
+    top_domains,
+    truncate,
+)
+from tests.conftest import create_tables, seed_projects
+
+
+LONG_AGO = datetime(2020, 1, 1)
+STATUSES = [ScrapePageStatus.COMPLETED] * 3 + [ScrapePageStatus.FAILED, ScrapePageStatus.PENDING]
+
+
+def _pages():
+    """(id, domain_id, created_at, status, content_length, processing_time, url) spread over three months"""
+    rng = random.Random(47)
+    start = datetime(2024, 1, 28)
+    pages = []
+    for i in range(1, 601):
+        created_at = start + timedelta(minutes=rng.randrange(0, 60 * 24 * 70))
+        domain_id = rng.choice([1, 1, 2, 3])
+        pages.append((
+            i, domain_id, created_at, rng.choice(STATUSES), rng.randrange(1000, 50000),
+            rng.choice([None, 1.5, 3.0]), f"https://d{domain_id}/page/{rng.randrange(150)}",
+        ))
+    return pages
+
+
+PAGES = _pages()
+DOMAIN_NAMES = {1: "a.com", 2: "b.com", 3: "a.com"}
+DOMAIN_PROJECTS = {1: 1, 2: 1, 3: 2}
+
+
+@pytest_asyncio.fixture
+async def engine(monkeypatch, memory_engine):
+    monkeypatch.setattr(settings, "DOMAIN_TIMELINE_OVERLAP_SECONDS", 0)
+    engine = memory_engine
+    await create_tables(engine, Project, Domain, ScrapePage, DomainTimelineBucket, DomainTimelineWatermark)
+    async with AsyncSession(engine) as session:
+        # a.com is tracked by both projects
+        seed_projects(session, (1, 1, "a.com"), (2, 1, "b.com"), (3, 2, "a.com"))
+        for page_id, domain_id, created_at, status, length, seconds, url in PAGES:
+            session.add(ScrapePage(
+                id=page_id, domain_id=domain_id, original_url=url, content_url=f"wb/{page_id}",
+                unix_timestamp=f"{page_id:014d}", mime_type="text/html", status=status,
+                content_length=length, total_processing_time=seconds,
+                created_at=created_at, updated_at=LONG_AGO,
+            ))
+        await session.commit()
+    return engine
+
+
+@pytest_asyncio.fixture
+async def db(engine, memory_session):
+    await refresh_project_timelines(memory_session, 1)
+    await refresh_project_timelines(memory_session, 2)
+    return memory_session
+
+
+def _expected(domain_ids, start=None, end=None):
+    selected = [
+        page for page in PAGES
+        if page[1] in domain_ids and (start is None or page[2] >= start) and (end is None or page[2] < end)
+    ]
+    return {
+        "pages": len(selected),
+        "successful": sum(1 for page in selected if page[3] == ScrapePageStatus.COMPLETED),
+        "failed": sum(1 for page in selected if page[3] == ScrapePageStatus.FAILED),
+        "bytes": sum(page[4] for page in selected),
+        "urls": len({page[6] for page in selected}),
+        "first": min((page[2] for page in selected), default=None),
+        "last": max((page[2] for page in selected), default=None),
+    }
+
+
+def test_hyperloglog_estimates_merges_and_round_trips():
+    small = HyperLogLog()
+    for i in range(200):
+        small.add(f"https://a/{i % 120}")
+    assert abs(small.count() - 120) <= 1
+
+    left, right = HyperLogLog(), HyperLogLog()
+    for i in range(30000):
+        left.add(f"https://a/{i}")
+        right.add(f"https://a/{i + 20000}")
+    left.merge(right)
+    assert left.count() == pytest.approx(50000, rel=0.05)
+
+    sparse = small.to_bytes()
+    assert len(sparse) < 1000
+    assert HyperLogLog.from_bytes(sparse).registers == small.registers
+    dense = left.to_bytes()
+    assert len(dense) == 2 + 4096
+    assert HyperLogLog.from_bytes(dense).count() == left.count()
+
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(precision=10))
+
+
+def test_ranges_are_covered_by_the_coarsest_buckets_that_fit():
+    assert cover(datetime(2024, 1, 30, 5), datetime(2024, 3, 2, 3), "month") == [
+        ("hour", datetime(2024, 1, 30, 5), datetime(2024, 1, 31)),
+        ("day", datetime(2024, 1, 31), datetime(2024, 2, 1)),
+        ("month", datetime(2024, 2, 1), datetime(2024, 3, 1)),
+        ("day", datetime(2024, 3, 1), datetime(2024, 3, 2)),
+        ("hour", datetime(2024, 3, 2), datetime(2024, 3, 2, 3)),
+    ]
+    # Ranges shorter than one bucket fall through to finer grains
+    assert cover(datetime(2024, 1, 30, 5), datetime(2024, 1, 30, 9), "month") == [
+        ("hour", datetime(2024, 1, 30, 5), datetime(2024, 1, 30, 9)),
+    ]
+    assert cover(None, datetime(2024, 2, 1), "month") == [("month", None, datetime(2024, 2, 1))]
+    assert truncate(datetime(2024, 5, 17, 8, 30), "week") == datetime(2024, 5, 13)
+    assert truncate(datetime(2024, 5, 17, 8, 30), "quarter") == datetime(2024, 4, 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("granularity", ["hour", "day", "week", "month", "quarter"])
+async def test_timelines_match_a_scan_of_scrape_pages(db, granularity):
+    start, end = datetime(2024, 2, 3, 7, 20), datetime(2024, 3, 29, 16, 5)
+    periods = await domain_timeline(db, "a.com", granularity, start, end)
+
+    window_start, window_end = start, end + timedelta(microseconds=1)
+    expected_periods = sorted({truncate(page[2], granularity) for page in PAGES
+                               if page[1] in (1, 3) and window_start <= page[2] < window_end})
+    assert [period for period, _ in periods] == expected_periods
+    for period, totals in periods:
+        period_end = {
+            "hour": period + timedelta(hours=1), "day": period + timedelta(days=1),
+            "week": period + timedelta(days=7), "month": truncate(period + timedelta(days=32), "month"),
+            "quarter": truncate(period + timedelta(days=95), "quarter"),
+        }[granularity]
+        expected = _expected((1, 3), max(period, window_start), min(period_end, window_end))
+        assert (totals.page_count, totals.successful_count, totals.failed_count, totals.content_length_sum) == (
+            expected["pages"], expected["successful"], expected["failed"], expected["bytes"]
+        )
+        assert abs(totals.unique_urls - expected["urls"]) <= 1
+        assert (totals.first_created_at, totals.last_created_at) == (expected["first"], expected["last"])
+
+
+@pytest.mark.asyncio
+async def test_totals_and_rankings_merge_domains_across_projects(db):
+    totals = await domain_totals(db, "a.com")
+    expected = _expected((1, 3))
+    assert totals.page_count == expected["pages"]
+    # The sketches of both projects' a.com domains merge into one distinct count
+    assert abs(totals.unique_urls - expected["urls"]) <= 2
+
+    ranked = await top_domains(db, "total_pages", 10)
+    assert [row[0] for row in ranked] == ["a.com", "b.com"]
+    name, pages, successful, content_bytes, last_activity, projects = ranked[0]
+    assert (pages, successful, content_bytes, last_activity, projects) == (
+        expected["pages"], expected["successful"], expected["bytes"], expected["last"], 2
+    )
+
+    overall, by_domain = await project_totals(db, 1, datetime(2024, 3, 1), datetime(2024, 3, 31, 23, 59, 59))
+    assert set(by_domain) == {"a.com", "b.com"}
+    assert overall.page_count == _expected((1, 2), datetime(2024, 3, 1), datetime(2024, 4, 1))["pages"]
+    assert by_domain["b.com"].page_count == _expected((2,), datetime(2024, 3, 1), datetime(2024, 4, 1))["pages"]
+
+
+@pytest.mark.asyncio
+async def test_partial_edge_hours_are_read_exactly(db):
+    # Pages either side of the bounds, inside hours the buckets also cover
+    for page_id, created_at in ((2001, datetime(2024, 6, 10, 8, 10)), (2002, datetime(2024, 6, 10, 8, 40)),
+                                (2003, datetime(2024, 6, 10, 9, 20)), (2004, datetime(2024, 6, 10, 10, 30)),
+                                (2005, datetime(2024, 6, 10, 10, 30, 1))):
+        db.add(ScrapePage(
+            id=page_id, domain_id=2, original_url=f"https://d2/edge/{page_id}", content_url=f"wb/{page_id}",
+            unix_timestamp=f"{page_id:014d}", mime_type="text/html", status=ScrapePageStatus.COMPLETED,
+            content_length=1, created_at=created_at, updated_at=datetime.utcnow(),
+        ))
+    await db.commit()
+    await refresh_project_timelines(db, 1)
+
+    # 08:40 through 10:30 inclusive, as a scan of scrape_pages would count
+    start, end = datetime(2024, 6, 10, 8, 30), datetime(2024, 6, 10, 10, 30)
+    assert (await domain_totals(db, "b.com", start, end)).page_count == 3
+    hours = await domain_timeline(db, "b.com", "hour", start, end)
+    assert [(period.hour, totals.page_count) for period, totals in hours] == [(8, 1), (9, 1), (10, 1)]
+    _, by_domain = await project_totals(db, 1, start, end)
+    assert by_domain["b.com"].page_count == 3
+    assert [(row[0], row[1]) for row in await top_domains(db, "total_pages", 10, start, end)] == [("b.com", 3)]
+    # A range inside one hour is read from scrape_pages alone
+    assert (await domain_totals(db, "b.com", datetime(2024, 6, 10, 8, 5), datetime(2024, 6, 10, 8, 15))).page_count == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_folds_changed_and_deleted_pages(db):
+    assert await refresh_project_timelines(db, 1) == 0
+
+    db.add(ScrapePage(
+        id=1000, domain_id=1, original_url="https://d1/new", content_url="wb/new", unix_timestamp="1",
+        mime_type="text/html", status=ScrapePageStatus.COMPLETED, content_length=10,
+        created_at=datetime(2024, 2, 14, 9, 30), updated_at=datetime.utcnow(),
+    ))
+    await db.commit()
+    before = (await domain_totals(db, "a.com")).page_count
+    assert await refresh_project_timelines(db, 1) == 1
+    assert (await domain_totals(db, "a.com")).page_count == before + 1
+    february = await domain_timeline(db, "a.com", "month", datetime(2024, 2, 1), datetime(2024, 2, 29, 23))
+    assert february[0][1].page_count == _expected((1, 3), datetime(2024, 2, 1), datetime(2024, 3, 1))["pages"] + 1
+
+    await db.execute(delete(ScrapePage).where(ScrapePage.domain_id == 2))
+    await db.commit()
+    days = {(2, page[2].date()) for page in PAGES if page[1] == 2}
+    assert await refresh_timeline_days(db, 1, days) == len(days)
+    assert (await domain_totals(db, "b.com")).page_count == 0
+    remaining = (await db.execute(
+        select(func.count()).select_from(DomainTimelineBucket).where(DomainTimelineBucket.domain_id == 2)
+    )).scalar()
+    assert remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_analytics_service_reads_the_buckets(db, engine, monkeypatch):
+    monkeypatch.setattr(analytics_module, "AsyncSessionLocal", lambda: AsyncSession(engine))
+    service = AnalyticsService()
+    context = AnalyticsQueryContext(start_date=datetime(2024, 2, 1), end_date=datetime(2024, 2, 29, 23))
+
+    timeline = await service.get_domain_timeline("a.com", TimeGranularity.WEEK, context)
+    assert sum(point.pages_scraped for point in timeline) == _expected(
+        (1, 3), datetime(2024, 2, 1), datetime(2024, 3, 1)
+    )["pages"]
+    assert all(point.timestamp.weekday() == 0 for point in timeline)
+
+    stats = await service.get_domain_statistics("b.com", AnalyticsQueryContext())
+    expected = _expected((2,))
+    assert (stats.total_pages, stats.failed_pages, stats.first_scraped) == (
+        expected["pages"], expected["failed"], expected["first"]
+    )
+    assert stats.success_rate == pytest.approx(expected["successful"] * 100.0 / expected["pages"])
+
+    top = await service.get_top_domains("success_rate", 1, AnalyticsQueryContext())
+    assert len(top) == 1 and top[0].rank == 1
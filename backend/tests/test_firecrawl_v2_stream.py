@@ -0,0 +1,172 @@
+"""
+Tests for streaming Firecrawl V2 batch results
+"""
+import asyncio
+from contextlib import aclosing
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.scraping import ScrapePage, ScrapePageStatus
+from app.models.shared_pages import PageV2
+from app.services import firecrawl_v2_client
+from app.services.firecrawl_v2_client import AsyncFirecrawlV2Client
+from app.tasks import firecrawl_scraping
+
+
+def _docs(batch_id, page):
+    return [{"markdown": f"{batch_id}-{page}-{i}", "metadata": {"sourceURL": f"https://web.archive.org/{batch_id}/{page}/{i}"}}
+            for i in range(2)]
+
+
+@pytest.fixture
+def live_env(monkeypatch):
+    monkeypatch.setattr(settings, "ENVIRONMENT", "development")
+
+
+def _transport(pages_per_batch, requests, delay=0.0):
+    async def handler(request):
+        requests.append(str(request.url))
+        batch_id = request.url.path.rsplit("/", 1)[-1]
+        if batch_id == "broken":
+            return httpx.Response(500, json={"error": "boom"})
+        page = int(request.url.params.get("next", "0"))
+        await asyncio.sleep(delay)
+        body = {"status": "completed", "data": _docs(batch_id, page)}
+        if page + 1 < pages_per_batch:
+            body["next"] = str(page + 1)
+        return httpx.Response(200, json=body)
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_iter_batch_pages_follows_next_tokens_and_urls(live_env):
+    requests = []
+    transport = _transport(3, requests)
+    async with AsyncFirecrawlV2Client(transport=transport) as client:
+        pages = [docs async for docs in client.iter_batch_pages("b1")]
+    assert len(pages) == 3
+    assert [r.split("?")[-1] for r in requests[1:]] == ["next=1", "next=2"]
+
+    async def url_handler(request):
+        if "cursor" in request.url.path:
+            return httpx.Response(200, json={"data": _docs("b1", 1)})
+        return httpx.Response(200, json={"data": _docs("b1", 0), "next": "http://firecrawl.test/v2/batch/scrape/b1/cursor"})
+
+    async with AsyncFirecrawlV2Client(transport=httpx.MockTransport(url_handler)) as client:
+        pages = [docs async for docs in client.iter_batch_pages("b1")]
+    assert len(pages) == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_batches_interleaves_batches_and_skips_failures(live_env):
+    requests = []
+    transport = _transport(2, requests, delay=0.01)
+    async with AsyncFirecrawlV2Client(transport=transport) as client:
+        received = [(batch_id, len(docs)) async for batch_id, docs in
+                    client.stream_batches(["a", "broken", "b", "c"], concurrency=3, max_pending_pages=1)]
+    assert sorted(received) == [("a", 2), ("a", 2), ("b", 2), ("b", 2), ("c", 2), ("c", 2)]
+    # Batches are read concurrently rather than one after another
+    assert [batch_id for batch_id, _ in received[:3]] != ["a", "a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_stream_batches_stops_readers_when_consumer_exits(live_env):
+    requests = []
+    transport = _transport(50, requests)
+    async with AsyncFirecrawlV2Client(transport=transport) as client:
+        async with aclosing(client.stream_batches(["a", "b"], max_pending_pages=1)) as stream:
+            async for _ in stream:
+                break
+    # Bounded queue keeps readers from running ahead of the consumer
+    assert len(requests) < 6
+
+
+class FakeStreamClient:
+    """Yields canned result pages in place of AsyncFirecrawlV2Client"""
+
+    pages = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def stream_batches(self, batch_ids, concurrency=None):
+        for batch_id, documents in self.pages:
+            yield batch_id, documents
+
+
+@pytest.fixture
+def scrape_db():
+    engine = create_engine("sqlite://")
+    ScrapePage.__table__.create(engine)
+    PageV2.__table__.create(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+def _scrape_page(db, i, status=ScrapePageStatus.PENDING):
+    page = ScrapePage(
+        domain_id=1, scrape_session_id=7, original_url=f"https://example.com/{i}",
+        content_url=f"https://web.archive.org/web/20240101000000/https://example.com/{i}",
+        unix_timestamp="20240101000000", status=status, digest_hash=f"d{i}",
+    )
+    db.add(page)
+    return page
+
+
+@pytest.mark.asyncio
+async def test_process_v2_batch_results_persists_pages_as_they_stream(scrape_db, monkeypatch):
+    db = scrape_db
+    pages = [_scrape_page(db, i) for i in range(5)]
+    # Page 0 was already scraped by another project
+    db.add(PageV2(url="https://example.com/0", unix_timestamp=20240101000000))
+    db.commit()
+
+    def doc(i):
+        return {"markdown": f"content {i}", "metadata": {"sourceURL": pages[i].content_url, "title": f"T{i}"}}
+
+    FakeStreamClient.pages = [("a", [doc(0), doc(1)]), ("b", [doc(2)]), ("a", [doc(3)])]
+    monkeypatch.setattr(firecrawl_v2_client, "AsyncFirecrawlV2Client", FakeStreamClient)
+    indexed = []
+
+    async def fake_index(db, domain, new_pages):
+        indexed.append([page.url for page in new_pages])
+
+    monkeypatch.setattr(firecrawl_scraping, "_index_v2_pages", fake_index)
+    monkeypatch.setattr(firecrawl_scraping, "record_completed_digests", lambda *args: None)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, sql, *args: statements.append(sql))
+
+    session = SimpleNamespace(id=7, external_batch_id="a, b")
+    domain = SimpleNamespace(id=1, project_id=3, domain_name="example.com")
+    created, failed = await firecrawl_scraping._process_v2_batch_results(db, session, domain, [], None)
+
+    assert (created, failed) == (3, 1)
+    # Each result page is persisted and indexed before the next one arrives
+    assert indexed == [["https://example.com/1"], ["https://example.com/2"], ["https://example.com/3"]]
+    # One existence query per chunk: three result pages and one chunk of misses, not one per ScrapePage
+    assert sum("WHERE pages_v2.url IN" in sql for sql in statements) == 4
+
+    db.expire_all()
+    statuses = {p.original_url: p.status for p in db.execute(select(ScrapePage)).scalars()}
+    assert statuses == {
+        **{f"https://example.com/{i}": ScrapePageStatus.COMPLETED for i in range(4)},
+        "https://example.com/4": ScrapePageStatus.FAILED,
+    }
+    missed = db.execute(select(ScrapePage).where(ScrapePage.original_url == "https://example.com/4")).scalar_one()
+    assert missed.error_type == "v2_batch_miss"
+    assert db.execute(select(ScrapePage.page_id)).scalars().all() == [None] * 5
+    stored = db.execute(select(PageV2.url, PageV2.title).order_by(PageV2.url)).all()
+    assert stored == [("https://example.com/0", None)] + [(f"https://example.com/{i}", f"T{i}") for i in range(1, 4)]
@@ -0,0 +1,143 @@
+"""
+Tests for project page listing cursors and the non-Postgres listing path
+"""
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql
+
+from app.models.shared_pages import PageV2, ProjectPage
+from app.services.project_page_search import (
+    InvalidCursorError,
+    PageListCursor,
+    ProjectPageFilters,
+    ProjectPageSearchService,
+)
+from tests.conftest import create_tables
+
+
+class TestPageListCursor:
+    """Keyset cursor encoding"""
+
+    def test_roundtrip_without_rank(self):
+        cursor = PageListCursor(project_page_id=uuid.uuid4())
+        decoded = PageListCursor.decode(cursor.encode())
+        assert decoded == cursor
+
+    def test_roundtrip_preserves_float_rank_exactly(self):
+        cursor = PageListCursor(project_page_id=uuid.uuid4(), rank=0.06079271)
+        decoded = PageListCursor.decode(cursor.encode())
+        assert decoded.rank == cursor.rank
+        assert decoded.project_page_id == cursor.project_page_id
+
+    def test_token_is_url_safe(self):
+        token = PageListCursor(project_page_id=uuid.uuid4(), rank=1.5).encode()
+        assert "=" not in token
+        assert "+" not in token and "/" not in token
+
+    @pytest.mark.parametrize("token", ["", "not-base64!", "eyJmb28iOjF9"])
+    def test_invalid_tokens_raise(self, token):
+        with pytest.raises(InvalidCursorError):
+            PageListCursor.decode(token)
+
+
+class TestListingQuery:
+    """Column projection of the listing query"""
+
+    def test_projection_excludes_page_bodies(self):
+        names = {col.key for col in ProjectPageSearchService.LISTING_COLUMNS}
+        assert "extracted_text" not in names
+        assert "content" not in names
+        assert "markdown_content" not in names
+        assert {"page_id", "project_page_id", "url", "title"} <= names
+
+    def test_filters_default_to_empty(self):
+        filters = ProjectPageFilters()
+        assert filters.search is None
+        assert not filters.starred_only
+
+
+@pytest_asyncio.fixture
+async def db(memory_engine, memory_session):
+    await create_tables(memory_engine, PageV2, ProjectPage)
+    return memory_session
+
+
+async def _add_pages(db, ids, project_id=1):
+    for n in ids:
+        page_id = uuid.UUID(int=10_000 + n)
+        # Every title matches the search equally, so only the id orders them
+        await db.execute(insert(PageV2.__table__).values(
+            id=page_id, url=f"https://example.com/{n}", unix_timestamp=20240101000000 + n,
+            title="Annual report", extracted_text="annual report body", processed=False,
+            indexed=False, retry_count=0,
+        ))
+        await db.execute(insert(ProjectPage.__table__).values(
+            id=uuid.UUID(int=n), project_id=project_id, page_id=page_id, review_status="unreviewed",
+            is_starred=False, priority_level="medium", is_duplicate=False,
+        ))
+    await db.commit()
+
+
+async def _page_through(db, filters, limit):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = await ProjectPageSearchService.list_pages(db, 1, filters, limit=limit, cursor=cursor)
+        pages.append([row["project_page_id"].int for row in rows])
+        if cursor is None:
+            return pages
+
+
+class TestKeysetPagination:
+    """Cursor paging over tied sort keys"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("search", [None, "annual report"])
+    async def test_pages_cover_every_row_once_in_order(self, db, search):
+        await _add_pages(db, range(1, 11))
+        await _add_pages(db, [99], project_id=2)
+
+        pages = await _page_through(db, ProjectPageFilters(search=search), limit=3)
+
+        assert pages == [[10, 9, 8], [7, 6, 5], [4, 3, 2], [1]]
+
+    @pytest.mark.asyncio
+    async def test_boundaries_hold_when_rows_arrive_between_pages(self, db):
+        await _add_pages(db, range(2, 20, 2))
+        filters = ProjectPageFilters(search="annual report")
+        first, cursor = await ProjectPageSearchService.list_pages(db, 1, filters, limit=4)
+        assert [row["project_page_id"].int for row in first] == [18, 16, 14, 12]
+
+        # Rows landing on both sides of the cursor do not shift or repeat the next page
+        await _add_pages(db, [13, 15, 21, 3])
+        second, _ = await ProjectPageSearchService.list_pages(db, 1, filters, limit=4, cursor=cursor)
+        assert [row["project_page_id"].int for row in second] == [10, 8, 6, 4]
+
+    @pytest.mark.asyncio
+    async def test_ranked_search_breaks_rank_ties_on_id(self):
+        captured = {}
+
+        class Result:
+            def all(self):
+                return []
+
+        class RecordingSession:
+            def get_bind(self):
+                return type("Bind", (), {"dialect": postgresql.dialect()})()
+
+            async def execute(self, query):
+                captured["sql"] = str(query.compile(dialect=postgresql.dialect()))
+                return Result()
+
+        cursor = PageListCursor(project_page_id=uuid.UUID(int=5), rank=0.25).encode()
+        await ProjectPageSearchService.list_pages(
+            RecordingSession(), 1, ProjectPageFilters(search="report"), limit=3, cursor=cursor
+        )
+        sql = " ".join(captured["sql"].split())
+        # Row comparison on (rank, id) continues exactly after the last row, even among equal ranks
+        assert "(CAST(ts_rank_cd(pages_v2.search_vector" in sql
+        assert "AS REAL), project_pages.id) < (CAST(" in sql
+        assert "ORDER BY rank DESC, project_pages.id DESC" in sql
+        assert "ORDER BY anon_1.rank DESC, anon_1.pp_id DESC" in sql
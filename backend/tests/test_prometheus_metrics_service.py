@@ -0,0 +1,168 @@
+"""
+Tests for background-collected Prometheus metric groups and the hot-path registry
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUESTS_TOTAL
+from app.core.request_context import RequestContextMiddleware
+from app.services.prometheus_metrics_service import MetricGroup, PrometheusMetricsService
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def _gauge_group(name, value, interval=60, delay=0.0, uses_db=False, calls=None):
+    async def collect(*args):
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(delay)
+        return [f"# TYPE chrono_test_{name} gauge", f"chrono_test_{name} {value()}", ""]
+    return MetricGroup(name, collect, interval, uses_db=uses_db)
+
+
+def _service(*groups):
+    service = PrometheusMetricsService(session_factory=_Session)
+    service._groups = {group.name: group for group in groups}
+    return service
+
+
+def _samples(exposition):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(exposition)
+        for sample in family.samples
+    }
+
+
+@pytest.mark.asyncio
+async def test_exposition_serializes_snapshots_without_collecting():
+    calls = []
+    service = _service(
+        _gauge_group("cheap", lambda: 1, calls=calls),
+        _gauge_group("aggregate", lambda: 2, uses_db=True, calls=calls),
+    )
+
+    first = await service.generate_all_metrics()
+    assert sorted(calls) == ["aggregate", "cheap"]
+
+    service.start_background_collection()
+    try:
+        for _ in range(3):
+            exposition = await service.generate_all_metrics()
+    finally:
+        await service.stop_background_collection()
+
+    # Groups were not due again, so scrapes only serialized the snapshots
+    assert sorted(calls) == ["aggregate", "cheap"]
+    samples = _samples(exposition)
+    assert samples[("chrono_test_cheap", ())] == 1
+    assert samples[("chrono_test_aggregate", ())] == 2
+    assert samples[("chrono_metrics_group_refresh_error", (("group", "aggregate"),))] == 0
+    assert _samples(first)[("chrono_test_cheap", ())] == 1
+
+
+@pytest.mark.asyncio
+async def test_groups_refresh_concurrently_and_slow_groups_keep_last_values(monkeypatch):
+    monkeypatch.setattr(settings, "PROMETHEUS_GROUP_TIMEOUT_SECONDS", 0.2)
+    slow_delay = {"value": 0.0}
+    service = _service(
+        _gauge_group("a", lambda: 1, delay=0.1),
+        _gauge_group("b", lambda: 2, delay=0.1),
+        _gauge_group("slow", lambda: 3, delay=0.0),
+    )
+    slow = service._groups["slow"]
+    collect = slow.collect
+
+    async def slow_collect():
+        await asyncio.sleep(slow_delay["value"])
+        return await collect()
+    slow.collect = slow_collect
+
+    started = time.perf_counter()
+    assert sorted(await service.refresh_due_groups()) == ["a", "b", "slow"]
+    assert time.perf_counter() - started < 0.18
+
+    slow_delay["value"] = 1.0
+    await service.refresh_due_groups(force=True)
+
+    samples = _samples(service.render_metrics())
+    assert samples[("chrono_test_slow", ())] == 3
+    assert samples[("chrono_metrics_group_refresh_error", (("group", "slow"),))] == 1
+    assert samples[("chrono_metrics_group_refresh_error", (("group", "a"),))] == 0
+
+
+@pytest.mark.asyncio
+async def test_each_group_refreshes_on_its_own_interval():
+    counter = {"fast": 0, "slow": 0}
+
+    def bump(name):
+        counter[name] += 1
+        return counter[name]
+
+    service = _service(
+        _gauge_group("fast", lambda: bump("fast"), interval=0.05),
+        _gauge_group("slow", lambda: bump("slow"), interval=60),
+    )
+    await service.refresh_due_groups()
+    await asyncio.sleep(0.06)
+    assert await service.refresh_due_groups() == ["fast"]
+    assert counter == {"fast": 2, "slow": 1}
+
+
+@pytest.mark.asyncio
+async def test_request_middleware_records_hot_path_metrics_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"item_id": item_id}
+
+    app.add_middleware(RequestContextMiddleware)
+
+    counter = HTTP_REQUESTS_TOTAL.labels("GET", "/items/{item_id}", "200")
+    before = counter._value.get()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for item_id in ("1", "2", "3"):
+            assert (await client.get(f"/items/{item_id}")).status_code == 200
+    assert counter._value.get() == before + 3
+
+    exposition = _service().render_metrics()
+    samples = _samples(exposition)
+    key = ("chrono_http_requests_total", (("method", "GET"), ("route", "/items/{item_id}"), ("status", "200")))
+    assert samples[key] == before + 3
+
+
+@pytest.mark.asyncio
+async def test_scrape_endpoint_requires_token_when_configured(monkeypatch):
+    from app.api.v1.endpoints import monitoring
+    from app.services import prometheus_metrics_service as service_module
+
+    class _Service:
+        async def generate_all_metrics(self):
+            return "chrono_test 1\n"
+
+    monkeypatch.setattr(service_module, "prometheus_metrics_service", _Service())
+    app = FastAPI()
+    app.include_router(monitoring.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        monkeypatch.setattr(settings, "PROMETHEUS_SCRAPE_TOKEN", None)
+        assert (await client.get("/prometheus/metrics")).status_code == 200
+
+        monkeypatch.setattr(settings, "PROMETHEUS_SCRAPE_TOKEN", "s3cret")
+        assert (await client.get("/prometheus/metrics")).status_code == 401
+        wrong = await client.get("/prometheus/metrics", headers={"Authorization": "Bearer nope"})
+        assert wrong.status_code == 401
+        response = await client.get("/prometheus/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200 and response.text == "chrono_test 1\n"
@@ -0,0 +1,221 @@
+"""
+Tests for the shared Redis pools and GET coalescing against a local RESP stand-in
+"""
+import asyncio
+import socket
+import threading
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from uuid import uuid4
+
+import pytest
+
+from app.core import redis_pool
+from app.core.config import settings
+from app.core.redis_pool import (
+    GetCoalescer,
+    available_redis,
+    close_redis_pools,
+    coalesced_get,
+    connection_stats,
+    shared_redis,
+)
+from app.services.cache_service import PageCacheService
+from app.services.rate_limiter import RateLimiter
+from app.services.session_store import SessionStore
+
+
+class RedisStandIn(StreamRequestHandler):
+    """Just enough of the Redis protocol for strings, pipelines and sorted-set counting"""
+    data = {}
+    commands = []
+    lock = threading.Lock()
+
+    def _read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        value = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _execute(self, name, args):
+        data = type(self).data
+        if name in ("PING",):
+            return b"+PONG\r\n"
+        if name in ("CLIENT", "MULTI", "SELECT"):
+            return b"+OK\r\n"
+        if name == "GET":
+            return self._bulk(data.get(args[0]))
+        if name == "MGET":
+            return b"*%d\r\n" % len(args) + b"".join(self._bulk(data.get(key)) for key in args)
+        if name == "SETEX":
+            data[args[0]] = args[2]
+            return b"+OK\r\n"
+        if name == "DEL":
+            return b":%d\r\n" % sum(data.pop(key, None) is not None for key in args)
+        if name in ("ZREMRANGEBYSCORE", "ZCARD", "ZADD", "EXPIRE"):
+            return b":0\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+    def handle(self):
+        queued = None
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            with type(self).lock:
+                type(self).commands.append(name)
+                if name == "MULTI":
+                    queued = []
+                    reply = b"+OK\r\n"
+                elif name == "EXEC":
+                    replies = [self._execute(n, a) for n, a in queued]
+                    reply = b"*%d\r\n" % len(replies) + b"".join(replies)
+                    queued = None
+                elif queued is not None:
+                    queued.append((name, args[1:]))
+                    reply = b"+QUEUED\r\n"
+                else:
+                    reply = self._execute(name, args[1:])
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def redis_standin(monkeypatch):
+    RedisStandIn.data = {}
+    RedisStandIn.commands = []
+    server = ThreadingTCPServer(("127.0.0.1", 0), RedisStandIn)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "REDIS_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "REDIS_PORT", server.server_address[1])
+    yield RedisStandIn
+    server.shutdown()
+    server.server_close()
+
+
+def _data_commands():
+    return [name for name in RedisStandIn.commands if name not in ("CLIENT", "PING")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_in_one_tick_become_one_mget(redis_standin):
+    redis_standin.data.update({f"k{i}": f"v{i}" for i in range(10)})
+    client = shared_redis()
+    try:
+        keys = [f"k{i % 12}" for i in range(30)]
+        values = await asyncio.gather(*(coalesced_get(client, key) for key in keys))
+        assert values == [f"v{i % 12}" if i % 12 < 10 else None for i in range(30)]
+        # Duplicate keys are asked for once
+        assert _data_commands() == ["MGET"]
+
+        # A lone GET is sent as a plain GET
+        assert await coalesced_get(client, "k3") == "v3"
+        assert _data_commands() == ["MGET", "GET"]
+
+        stats = connection_stats()
+        assert stats["coalesced_gets"] == 31 and stats["coalesced_round_trips"] == 2
+    finally:
+        await close_redis_pools()
+
+
+@pytest.mark.asyncio
+async def test_failed_mget_reaches_every_waiter():
+    class BrokenClient:
+        async def mget(self, keys):
+            raise ConnectionError("gone")
+
+    client = BrokenClient()
+    coalescer = GetCoalescer(client)
+    results = await asyncio.gather(coalescer.get("a"), coalescer.get("b"), return_exceptions=True)
+    assert [type(result) for result in results] == [ConnectionError, ConnectionError]
+    assert coalescer.round_trips == 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_fetches_are_held_until_done():
+    release = asyncio.Event()
+
+    class SlowClient:
+        async def mget(self, keys):
+            await release.wait()
+            return [key.upper() for key in keys]
+
+    client = SlowClient()
+    coalescer = GetCoalescer(client)
+    waiters = asyncio.gather(coalescer.get("a"), coalescer.get("b"))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert len(coalescer._fetches) == 1
+    release.set()
+    assert await waiters == ["A", "B"]
+    await asyncio.sleep(0)
+    assert not coalescer._fetches
+
+
+@pytest.mark.asyncio
+async def test_services_share_one_pool(redis_standin):
+    cache = PageCacheService()
+    sessions = SessionStore()
+    limiter = RateLimiter()
+    try:
+        page_ids = [uuid4() for _ in range(20)]
+        await cache.bulk_set_pages([(f"https://a/{i}", 2020, page_id) for i, page_id in enumerate(page_ids)])
+        found = await asyncio.gather(*(cache.get_page_exists(f"https://a/{i}", 2020) for i in range(20)))
+        assert found == page_ids
+
+        session_id = await sessions.create_session({
+            "id": 1, "email": "a@example.com", "username": "a", "is_active": True, "is_verified": True,
+        })
+        assert (await sessions.get_session(session_id)).user_id == 1
+        assert await limiter.check_rate_limit("api:1", max_requests=5, window_seconds=60)
+
+        # The page lookups were one MGET and the bulk write one pipeline
+        assert _data_commands().count("MGET") == 1
+        assert "GET" not in _data_commands()[:_data_commands().index("MGET")]
+
+        stats = connection_stats()
+        assert stats["pools"] == 1
+        assert stats["details"][0]["url"] == f"redis://127.0.0.1:{settings.REDIS_PORT}/0"
+        # Every service drew from the same few connections
+        assert 1 <= stats["connections_created"] <= 3
+        assert stats["connections_in_use"] == 0
+    finally:
+        await close_redis_pools()
+    assert connection_stats()["pools"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unavailable_redis_is_checked_once_per_interval(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    monkeypatch.setattr(settings, "REDIS_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "REDIS_PORT", port)
+    pings = []
+    original = redis_pool.aioredis.Redis.ping
+
+    async def counting_ping(self, **kwargs):
+        pings.append(1)
+        return await original(self, **kwargs)
+
+    monkeypatch.setattr(redis_pool.aioredis.Redis, "ping", counting_ping)
+    try:
+        assert await available_redis() is None
+        # Callers fall back straight away until the next health check
+        assert await PageCacheService().get_page_exists("https://a/", 1) is None
+        assert await RateLimiter().check_rate_limit("api:1", max_requests=1, window_seconds=60)
+        assert len(pings) == 1
+        assert connection_stats()["details"][0]["healthy"] is False
+    finally:
+        await close_redis_pools()
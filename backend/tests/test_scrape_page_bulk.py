@@ -0,0 +1,123 @@
+"""
+Tests for set-based scrape page bulk operations
+"""
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.models.project import Domain, Project
+from app.models.scrape_page_api import (
+    BulkManualProcessingRequest,
+    BulkScrapePageAction,
+    BulkScrapePageOperationStatus,
+    ScrapePageFilterBy,
+    ScrapePageQueryParams,
+)
+from app.models.scraping import ScrapePage, ScrapePageStatus
+from app.services import scrape_page_bulk
+from app.services.scrape_page_bulk import SetBasedBulkExecutor
+from app.services.scrape_page_service import ScrapePageService
+from tests.conftest import create_tables, seed_projects
+
+
+class MemoryProgressStore:
+    def __init__(self):
+        self.saved = []
+
+    async def save(self, project_id, progress):
+        self.saved.append(progress.model_copy())
+
+
+@pytest_asyncio.fixture
+async def db(memory_engine, memory_session):
+    session = memory_session
+    await create_tables(memory_engine, Project, Domain, ScrapePage)
+    seed_projects(session, (1, 1, "example.com"), (2, 2, "other.com"))
+    statuses = [ScrapePageStatus.PENDING, ScrapePageStatus.FAILED, ScrapePageStatus.AWAITING_MANUAL_REVIEW]
+    for i in range(1, 19):
+        session.add(ScrapePage(
+            id=i, domain_id=1, original_url=f"https://example.com/{i}", content_url=f"wb/{i}",
+            unix_timestamp="20240101000000", mime_type="text/html",
+            status=statuses[i % 3], priority_score=1, retry_count=2, error_message="boom",
+            filter_details={"source": "cdx"} if i == 3 else None,
+        ))
+    session.add(ScrapePage(id=100, domain_id=2, original_url="https://other.com/", content_url="wb/x",
+                           unix_timestamp="20240101000000", mime_type="text/html",
+                           status=ScrapePageStatus.PENDING))
+    await session.commit()
+    return session
+
+
+async def _run(db, store=None, chunk_size=4, **request):
+    request = BulkManualProcessingRequest(filters=ScrapePageQueryParams(), **request)
+    selection = await ScrapePageService._bulk_selection(db, 1, request.filters)
+    executor = SetBasedBulkExecutor(db, 1, "op-1", request, selection, store, chunk_size=chunk_size)
+    return await executor.run()
+
+
+async def _pages(db):
+    db.expire_all()
+    return {p.id: p for p in (await db.execute(select(ScrapePage))).scalars().all()}
+
+
+@pytest.mark.asyncio
+async def test_skip_updates_only_eligible_pages_in_chunks(db):
+    store = MemoryProgressStore()
+    result = await _run(db, store, action=BulkScrapePageAction.SKIP_ALL, reason="not relevant")
+
+    eligible = [i for i in range(1, 19) if i % 3 != 1]
+    assert sorted(result.successful_page_ids) == eligible
+    assert (result.total_requested, result.skipped_count, result.failed_count) == (18, 6, 0)
+    assert result.status == BulkScrapePageOperationStatus.COMPLETED
+
+    pages = await _pages(db)
+    assert all(pages[i].status == ScrapePageStatus.MANUALLY_SKIPPED for i in eligible)
+    assert pages[1].status == ScrapePageStatus.FAILED
+    assert pages[3].filter_details == {"source": "cdx", "skip_reason": "not relevant"}
+    assert pages[100].status == ScrapePageStatus.PENDING
+
+    # Initial snapshot, one per chunk of four, then the completion
+    assert [p.items_processed for p in store.saved] == [0, 4, 8, 12, 16, 18, 18]
+    assert store.saved[-1].progress_percentage == 100.0
+
+
+@pytest.mark.asyncio
+async def test_max_pages_and_filters_bound_the_selection(db):
+    result = await _run(
+        db, action=BulkScrapePageAction.UPDATE_PRIORITY, priority_override=9, max_pages=5,
+    )
+    assert result.successful_page_ids == [1, 2, 3, 4, 5]
+    pages = await _pages(db)
+    assert [i for i, p in pages.items() if p.priority_score == 9] == [1, 2, 3, 4, 5]
+
+    no_priority = await _run(db, action=BulkScrapePageAction.UPDATE_PRIORITY)
+    assert no_priority.successful_count == 0 and no_priority.skipped_count == 18
+
+
+@pytest.mark.asyncio
+async def test_retry_resets_errors_and_queues_changed_pages(db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        scrape_page_bulk.celery_app, "send_task",
+        lambda name, args, kwargs: sent.append(args[0]) or SimpleNamespace(id=f"task-{args[0]}"),
+    )
+    result = await _run(db, action=BulkScrapePageAction.RETRY, chunk_size=100)
+
+    failed = [i for i in range(1, 19) if i % 3 == 1]
+    assert sent == failed and len(result.task_ids) == len(failed)
+    pages = await _pages(db)
+    assert all(pages[i].status == ScrapePageStatus.PENDING and pages[i].retry_count == 0
+               and pages[i].error_message is None for i in failed)
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_selected_pages_only(db):
+    request = BulkManualProcessingRequest(
+        filters=ScrapePageQueryParams(filter_by=ScrapePageFilterBy.FAILED), action=BulkScrapePageAction.DELETE
+    )
+    selection = await ScrapePageService._bulk_selection(db, 1, request.filters)
+    result = await SetBasedBulkExecutor(db, 1, "op-2", request, selection, chunk_size=2).run()
+    assert result.successful_count == 6
+    assert sorted(await _pages(db)) == [i for i in range(1, 19) if i % 3 != 1] + [100]
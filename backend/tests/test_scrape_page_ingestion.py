@@ -0,0 +1,116 @@
+"""
+Tests for COPY-based ScrapePage bulk ingestion
+"""
+import csv
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.models.scraping import ScrapePage, ScrapePageStatus
+from app.services.scrape_page_ingestion import (
+    CAPTURE_CONFLICT_TARGET,
+    STAGING_COLUMNS,
+    ScrapePageBulkIngestor,
+    decision_to_row,
+    rows_to_csv,
+)
+
+
+def _decision(url="https://example.com/a", timestamp="20200101000000", mime_type="application/pdf"):
+    cdx_record = SimpleNamespace(
+        original_url=url,
+        content_url=f"https://web.archive.org/web/{timestamp}id_/{url}",
+        timestamp=timestamp,
+        mime_type=mime_type,
+        status_code="200",
+        content_length_bytes=1234,
+        digest="ABC",
+    )
+    return SimpleNamespace(
+        cdx_record=cdx_record,
+        status=ScrapePageStatus.PENDING,
+        reason=SimpleNamespace(value="high_value"),
+        filter_details={"score": 1},
+        matched_pattern=None,
+        confidence=0.9,
+        can_be_manually_processed=True,
+    )
+
+
+class FakeCursor:
+    def __init__(self, log, inserted):
+        self.log = log
+        self.inserted = inserted
+        self.rowcount = -1
+
+    def execute(self, sql, params=None):
+        self.log.append(("execute", sql.strip().split()[0]))
+        self.log.append(("sql", sql))
+        if sql.strip().startswith("INSERT"):
+            self.rowcount = self.inserted.pop(0)
+
+    def copy_expert(self, sql, buffer):
+        self.log.append(("copy", len(buffer.read().splitlines())))
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, inserted):
+        self.log = []
+        self.inserted = list(inserted)
+        self.commits = 0
+
+    def connection(self):
+        return SimpleNamespace(connection=SimpleNamespace(cursor=lambda: FakeCursor(self.log, self.inserted)))
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_decision_row_matches_staging_columns():
+    row = decision_to_row(_decision())
+    assert len(row) == len(STAGING_COLUMNS)
+    values = dict(zip((name for name, _ in STAGING_COLUMNS), row))
+    assert values["status"] == "pending"
+    assert values["filter_reason"] == values["filter_category"] == "high_value"
+    assert values["status_code"] == 200
+    assert values["is_pdf"] is True
+    assert values["filter_details"] == '{"score": 1}'
+
+
+def test_csv_keeps_null_and_empty_string_distinct():
+    buffer = rows_to_csv([("", None, 'a,"b"', 3, True)])
+    line = buffer.read()
+    assert line == '"",,"a,""b""","3","True"\n'
+    assert next(csv.reader([line])) == ["", "", 'a,"b"', "3", "True"]
+
+
+def test_ingest_chunks_and_counts_conflicts_as_skipped():
+    db = FakeSession(inserted=[2, 1])
+    decisions = [_decision(url=f"https://example.com/{i}") for i in range(5)]
+    result = ScrapePageBulkIngestor(db, domain_id=1, scrape_session_id=2, chunk_size=3).ingest(decisions)
+    assert (result.inserted, result.skipped, result.failed) == (3, 2, 0)
+    assert [entry for entry in db.log if entry[0] == "copy"] == [("copy", 3), ("copy", 2)]
+    assert db.commits == 2
+
+
+def test_ingest_counts_unpreparable_decisions_as_failed():
+    db = FakeSession(inserted=[1])
+    broken = SimpleNamespace(cdx_record=None)
+    result = ScrapePageBulkIngestor(db, domain_id=1, scrape_session_id=None).ingest([broken, _decision()])
+    assert (result.inserted, result.skipped, result.failed) == (1, 0, 1)
+
+
+def test_conflict_target_matches_the_hashed_unique_index():
+    index = next(i for i in ScrapePage.__table__.indexes if i.name == "uq_scrape_pages_domain_url_timestamp")
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    # Long archive URLs would overflow a btree entry, so only their hash is indexed
+    assert ddl.endswith(f"ON scrape_pages {CAPTURE_CONFLICT_TARGET}")
+
+    db = FakeSession(inserted=[1])
+    ScrapePageBulkIngestor(db, domain_id=1, scrape_session_id=None).ingest([_decision(url="https://a/?" + "q" * 5000)])
+    insert_sql = next(entry[1] for entry in db.log if entry[0] == "sql" and "INSERT" in entry[1])
+    assert f"ON CONFLICT {CAPTURE_CONFLICT_TARGET} DO NOTHING" in insert_sql
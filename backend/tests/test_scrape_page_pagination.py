@@ -0,0 +1,133 @@
+"""
+Tests for keyset pagination of scrape page listings
+"""
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql
+
+from app.models.project import Domain, Project
+from app.models.scrape_page_api import ScrapePageQueryParams, ScrapePageSortBy, SortOrder
+from app.models.scraping import ScrapePage, ScrapePageStatus
+from app.services.scrape_page_service import EXACT_COUNT_THRESHOLD, ScrapePageService
+from tests.conftest import create_tables, seed_projects
+
+
+@pytest_asyncio.fixture
+async def db(memory_engine, memory_session):
+    session = memory_session
+    await create_tables(memory_engine, Project, Domain, ScrapePage)
+    seed_projects(session, (1, 1, "example.com"), (2, 2, "other.com"))
+    start = datetime(2024, 1, 1)
+    for i in range(1, 24):
+        session.add(ScrapePage(
+            id=i, domain_id=1, original_url=f"https://example.com/{i}", content_url=f"wb/{i}",
+            unix_timestamp="20240101000000", mime_type="text/html",
+            # Ties in the sort column must not lose or repeat rows
+            priority_score=i % 3,
+            created_at=start + timedelta(hours=i // 2),
+            status=ScrapePageStatus.PENDING,
+        ))
+    session.add(ScrapePage(id=100, domain_id=2, original_url="https://other.com/", content_url="wb/x",
+                           unix_timestamp="20240101000000", mime_type="text/html"))
+    # The model defaults priority_score, so NULLs have to be written explicitly
+    await session.execute(
+        update(ScrapePage).where(ScrapePage.id % 5 == 0).values(priority_score=None)
+    )
+    await session.commit()
+    return session
+
+
+async def _walk(db, limit=4, **params):
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = ScrapePageQueryParams(limit=limit, cursor=cursor, **params)
+        result = await ScrapePageService.get_project_scrape_pages(db, 1, 1, query)
+        assert result.page == (None if cursor else 1)
+        seen.extend(p.id for p in result.pages)
+        pages += 1
+        if not result.has_next:
+            assert result.next_cursor is None
+            return seen, result.total, pages
+        cursor = result.next_cursor
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", [ScrapePageSortBy.PRIORITY_SCORE, ScrapePageSortBy.CREATED_AT])
+@pytest.mark.parametrize("order", [SortOrder.ASC, SortOrder.DESC])
+async def test_cursor_walk_matches_offset_order(db, sort_by, order):
+    seen, total, pages = await _walk(db, sort_by=sort_by, order=order)
+    assert total == 23 and pages == 6
+    assert sorted(seen) == list(range(1, 24))
+
+    offset_ids = []
+    for page in range(1, 7):
+        result = await ScrapePageService.get_project_scrape_pages(
+            db, 1, 1, ScrapePageQueryParams(limit=4, page=page, sort_by=sort_by, order=order)
+        )
+        offset_ids.extend(p.id for p in result.pages)
+    assert seen == offset_ids
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order", [SortOrder.ASC, SortOrder.DESC])
+@pytest.mark.parametrize("limit", [1, 3, 4, 19])
+async def test_cursor_walk_crosses_null_sort_values(db, order, limit):
+    priorities = dict((await db.execute(
+        select(ScrapePage.id, ScrapePage.priority_score).where(ScrapePage.domain_id == 1)
+    )).all())
+    assert [i for i, p in priorities.items() if p is None] == [5, 10, 15, 20]
+
+    # NULLs sort last ascending and first descending, as on PostgreSQL
+    if order == SortOrder.ASC:
+        expected = sorted(priorities, key=lambda i: (priorities[i] is None, priorities[i] or 0, i))
+    else:
+        expected = sorted(priorities, key=lambda i: (priorities[i] is not None, -(priorities[i] or 0), -i))
+    seen, _, _ = await _walk(db, limit=limit, sort_by=ScrapePageSortBy.PRIORITY_SCORE, order=order)
+    assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_cursor_must_match_requested_sort(db):
+    first = await ScrapePageService.get_project_scrape_pages(db, 1, 1, ScrapePageQueryParams(limit=4))
+    with pytest.raises(ValueError):
+        await ScrapePageService.get_project_scrape_pages(
+            db, 1, 1, ScrapePageQueryParams(limit=4, cursor=first.next_cursor, order=SortOrder.ASC)
+        )
+    with pytest.raises(ValueError):
+        await ScrapePageService.get_project_scrape_pages(db, 1, 1, ScrapePageQueryParams(cursor="not-a-cursor"))
+
+
+@pytest.mark.asyncio
+async def test_estimated_total_falls_back_to_exact_count_off_postgres(db):
+    result = await ScrapePageService.get_project_scrape_pages(
+        db, 1, 1, ScrapePageQueryParams(limit=4, exact_total=False)
+    )
+    assert result.total == 23 and not result.total_is_estimate
+
+
+@pytest.mark.asyncio
+async def test_estimate_reads_the_root_of_a_parallel_plan():
+    """A parallel listing plan is rooted at Gather, whose estimate covers every worker"""
+    plan = [{"Plan": {
+        "Node Type": "Gather", "Plan Rows": 250000, "Workers Planned": 2,
+        "Plans": [{"Node Type": "Seq Scan", "Parallel Aware": True, "Plan Rows": 104167}],
+    }}]
+    explained = []
+
+    class ExplainOnlySession:
+        bind = SimpleNamespace(dialect=postgresql.dialect())
+
+        async def execute(self, statement):
+            explained.append(str(statement))
+            return SimpleNamespace(scalar=lambda: json.dumps(plan))
+
+    listing = select(ScrapePage).where(ScrapePage.domain_id == 1)
+    total, is_estimate = await ScrapePageService._count_total(ExplainOnlySession(), listing, exact=False)
+    assert (total, is_estimate) == (250000, True) and total > EXACT_COUNT_THRESHOLD
+    # The listing itself is explained, not a COUNT over it
+    assert len(explained) == 1 and "count(" not in explained[0].lower()
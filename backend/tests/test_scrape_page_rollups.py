@@ -0,0 +1,137 @@
+"""
+Tests for the materialized scrape page statistics rollups
+"""
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.models.project import Domain, Project
+from app.models.scrape_page_api import BulkManualProcessingRequest, BulkScrapePageAction, ScrapePageQueryParams
+from app.models.scraping import (
+    DomainTimelineBucket,
+    DomainTimelineWatermark,
+    ScrapePage,
+    ScrapePageDailyRollup,
+    ScrapePageRollupWatermark,
+    ScrapePageStatus,
+)
+from app.services.domain_timeline_cubes import project_totals, refresh_project_timelines
+from app.services.scrape_page_bulk import SetBasedBulkExecutor
+from app.services.scrape_page_rollups import refresh_project_rollups
+from app.services.scrape_page_service import ScrapePageService
+from app.services.scrape_sharding import fail_unfinished_shards
+from tests.conftest import create_tables, seed_projects
+
+
+TODAY = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+LONG_AGO = datetime(2024, 1, 1)
+
+
+@pytest_asyncio.fixture
+async def db(monkeypatch, memory_engine, memory_session):
+    monkeypatch.setattr(settings, "SCRAPE_PAGE_ROLLUP_MAX_STALENESS_SECONDS", 0)
+    monkeypatch.setattr(settings, "SCRAPE_PAGE_ROLLUP_OVERLAP_SECONDS", 0)
+    session = memory_session
+    await create_tables(memory_engine, Project, Domain, ScrapePage, ScrapePageDailyRollup, ScrapePageRollupWatermark)
+    seed_projects(session, (1, 1, "a.com"), (2, 1, "b.com"), (3, 2, "other.com"))
+    pages = [
+        # (domain, days ago, status, filter reason, priority, confidence, processing time)
+        (1, 0, ScrapePageStatus.COMPLETED, None, 5, None, 2.0),
+        (1, 0, ScrapePageStatus.COMPLETED, None, 5, None, 4.0),
+        (1, 3, ScrapePageStatus.FAILED, None, 3, None, None),
+        (1, 3, ScrapePageStatus.FILTERED_LIST_PAGE, "list_page", 2, 0.9, None),
+        (2, 10, ScrapePageStatus.FILTERED_LOW_PRIORITY, "low_priority", 1, 0.3, None),
+        (2, 40, ScrapePageStatus.PENDING, None, 4, None, None),
+        (3, 0, ScrapePageStatus.COMPLETED, None, 5, None, 1.0),
+    ]
+    for i, (domain_id, days_ago, status, reason, priority, confidence, seconds) in enumerate(pages, 1):
+        session.add(ScrapePage(
+            id=i, domain_id=domain_id, original_url=f"https://x/{i}", content_url=f"wb/{i}",
+            unix_timestamp="20240101000000", mime_type="text/html", status=status,
+            filter_reason=reason, filter_category="content" if reason else None,
+            priority_score=priority, filter_confidence=confidence, total_processing_time=seconds,
+            content_length=100 * i, created_at=TODAY - timedelta(days=days_ago), updated_at=LONG_AGO,
+        ))
+    await session.commit()
+    return session
+
+
+@pytest.mark.asyncio
+async def test_statistics_are_answered_from_rollups(db):
+    stats = await ScrapePageService.get_scrape_page_statistics(db, 1, 1)
+
+    assert stats.total_pages == 6
+    assert stats.status_counts == {
+        "completed": 2, "failed": 1, "filtered_list_page": 1, "filtered_low_priority": 1, "pending": 1,
+    }
+    assert stats.priority_distribution == {5: 2, 4: 1, 3: 1, 2: 1, 1: 1}
+    assert stats.average_processing_time == 3.0
+    assert stats.average_content_length == 350.0
+    assert (stats.pages_last_24h, stats.pages_last_week, stats.pages_last_month) == (2, 4, 5)
+    # The rollups were built on first read
+    assert (await db.execute(select(ScrapePageDailyRollup.project_id).distinct())).scalars().all() == [1]
+
+    analytics = await ScrapePageService.get_scrape_page_analytics(db, 1, 1)
+    assert analytics.filter_analysis.total_filtered == 2
+    assert analytics.filter_analysis.filter_reasons == {"list_page": 1, "low_priority": 1}
+    assert analytics.filter_analysis.confidence_distribution == {"0.8-1.0": 1, "0.2-0.4": 1}
+    assert [(d["completed"], d["failed"], d["filtered"]) for d in analytics.daily_stats] == [
+        (0, 0, 1), (0, 1, 1), (2, 0, 0),
+    ]
+    assert analytics.domain_performance[1]["total_pages"] == 4
+    assert analytics.domain_performance[1]["avg_processing_time"] == 3.0
+    assert 3 not in analytics.domain_performance
+
+
+@pytest.mark.asyncio
+async def test_refresh_recomputes_only_changed_buckets(db):
+    assert await refresh_project_rollups(db, 1) is None
+    assert await refresh_project_rollups(db, 1) == 0
+
+    await db.execute(
+        update(ScrapePage).where(ScrapePage.id == 3)
+        .values(status=ScrapePageStatus.COMPLETED.value, updated_at=datetime.utcnow() + timedelta(minutes=1))
+    )
+    await db.commit()
+    assert await refresh_project_rollups(db, 1) == 1
+
+    stats = await ScrapePageService.get_scrape_page_statistics(db, 1, 1)
+    assert stats.status_counts["completed"] == 3
+    assert "failed" not in stats.status_counts
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_refreshes_affected_buckets(db):
+    await refresh_project_rollups(db, 1)
+    request = BulkManualProcessingRequest(filters=ScrapePageQueryParams(domain_id=2), action=BulkScrapePageAction.DELETE)
+    selection = await ScrapePageService._bulk_selection(db, 1, request.filters)
+    await SetBasedBulkExecutor(db, 1, "op", request, selection).run()
+
+    stats = await ScrapePageService.get_scrape_page_statistics(db, 1, 1)
+    assert stats.total_pages == 4
+    assert "pending" not in stats.status_counts
+
+
+@pytest.mark.asyncio
+async def test_failed_shards_reach_rollups_and_timelines(db, memory_engine, monkeypatch):
+    monkeypatch.setattr(settings, "DOMAIN_TIMELINE_OVERLAP_SECONDS", 0)
+    await create_tables(memory_engine, DomainTimelineBucket, DomainTimelineWatermark)
+    # The pending page belongs to a sharded session
+    await db.execute(update(ScrapePage).where(ScrapePage.id == 6).values(scrape_session_id=7, updated_at=LONG_AGO))
+    await db.commit()
+    assert await refresh_project_rollups(db, 1) is None
+    assert await refresh_project_timelines(db, 1) is None
+    assert (await project_totals(db, 1))[0].failed_count == 1
+
+    failed = await db.run_sync(lambda session: fail_unfinished_shards(session, 7, [(1, 10)], "Shard did not finish"))
+    assert failed == [0]
+
+    assert await refresh_project_rollups(db, 1) == 1
+    assert await refresh_project_timelines(db, 1) == 1
+    stats = await ScrapePageService.get_scrape_page_statistics(db, 1, 1)
+    assert stats.status_counts["failed"] == 2
+    assert "pending" not in stats.status_counts
+    assert (await project_totals(db, 1))[0].failed_count == 2
@@ -0,0 +1,121 @@
+"""
+Tests for sharded domain scraping helpers
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.services.scrape_sharding import (
+    ShardCheckpoint,
+    ShardProgress,
+    fail_unfinished_shards,
+    plan_shards,
+    session_page_counts,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE scrape_pages (id INTEGER PRIMARY KEY, domain_id INTEGER, "
+            "scrape_session_id INTEGER, status VARCHAR(30), error_type VARCHAR(100), error_message TEXT, "
+            "updated_at DATETIME)"
+        ))
+        rows = [{"id": i, "status": "pending"} for i in range(1, 12)]
+        rows[3]["status"] = "completed"
+        rows[4]["status"] = "failed"
+        conn.execute(
+            text("INSERT INTO scrape_pages (id, domain_id, scrape_session_id, status) VALUES (:id, 1, 7, :status)"),
+            rows + [{"id": 100, "status": "pending"}],
+        )
+        # Another session's pages are never planned
+        conn.execute(text(
+            "INSERT INTO scrape_pages (id, domain_id, scrape_session_id, status) VALUES (200, 1, 8, 'pending')"
+        ))
+    with Session(engine) as session:
+        yield session
+
+
+def test_plan_shards_splits_pending_pages_into_id_ranges(db):
+    # Pending ids: 1-3, 6-11, 100 -> buckets of four
+    assert plan_shards(db, domain_id=1, scrape_session_id=7, shard_size=4) == [(1, 6), (7, 10), (11, 100)]
+    assert plan_shards(db, domain_id=1, scrape_session_id=7, shard_size=1000) == [(1, 100)]
+
+
+def test_session_page_counts_groups_by_status(db):
+    assert session_page_counts(db, 7) == {"pending": 10, "completed": 1, "failed": 1}
+
+
+class FakeStore:
+    def __init__(self, checkpoint=None):
+        self.checkpoint = checkpoint or ShardCheckpoint()
+        self.saved = []
+
+    def load(self, scrape_session_id, shard_index):
+        return self.checkpoint
+
+    def save(self, scrape_session_id, shard_index, last_id):
+        self.saved.append(last_id)
+
+
+def test_shard_progress_starts_at_range_and_resumes_after_checkpoint():
+    fresh = ShardProgress(FakeStore(), 7, 0, (50, 99))
+    assert not fresh.checkpoint.resumed
+    assert fresh.start_after == 49
+
+    store = FakeStore(ShardCheckpoint(last_id=72, batches=3))
+    resumed = ShardProgress(store, 7, 0, (50, 99))
+    assert resumed.checkpoint.resumed
+    assert resumed.start_after == 72
+    resumed.batch_committed(80)
+    assert store.saved == [80]
+    assert resumed.start_after == 80
+
+
+def test_killed_shards_leave_no_unfinished_pages(db):
+    db.execute(text("UPDATE scrape_pages SET status = 'completed' WHERE id BETWEEN 7 AND 10"))
+    db.execute(text("UPDATE scrape_pages SET status = 'in_progress' WHERE id = 11"))
+    # The first shard was killed mid-way; the second finished; the third died holding page 11
+    failed = fail_unfinished_shards(db, 7, [(1, 6), (7, 10), (11, 100)], "Shard did not finish: TimeLimitExceeded")
+    assert failed == [0, 2]
+    assert session_page_counts(db, 7) == {"completed": 5, "failed": 7}
+    assert db.execute(text("SELECT status FROM scrape_pages WHERE id = 200")).scalar() == "pending"
+    assert db.execute(text("SELECT error_type FROM scrape_pages WHERE id = 11")).scalar() == "shard_failed"
+
+
+def test_chord_error_callback_is_called_with_the_failure(monkeypatch):
+    from celery.app.task import Context
+
+    from app.tasks import firecrawl_scraping
+    from app.tasks.celery_app import celery_app
+
+    calls = {}
+
+    class FakeSession:
+        def close(self):
+            calls["closed"] = True
+
+    monkeypatch.setattr(firecrawl_scraping, "get_sync_session", FakeSession)
+    def fail_unfinished_shards(db, session_id, ranges, reason):
+        calls["failed"] = (session_id, ranges, reason)
+        return [1]
+
+    def finalize_shards(*args, **kwargs):
+        calls["finalized"] = (args, kwargs)
+
+    monkeypatch.setattr(firecrawl_scraping, "fail_unfinished_shards", fail_unfinished_shards)
+    monkeypatch.setattr(firecrawl_scraping, "_finalize_shards", finalize_shards)
+
+    errback = firecrawl_scraping.fail_sharded_scrape.s(
+        3, 7, pages_found=12, shard_ranges=[[1, 6], [7, 10]], history_id=None, incremental_mode=False
+    )
+    # The same call Celery makes when a chord header task fails
+    celery_app.backend._call_task_errbacks(
+        Context({"id": "cb", "errbacks": [errback], "delivery_info": {}}), RuntimeError("TimeLimitExceeded"), None
+    )
+
+    assert calls["failed"] == (7, [(1, 6), (7, 10)], "Shard did not finish: TimeLimitExceeded")
+    assert calls["finalized"] == ((3, 7, 12, 2, [1]), {"history_id": None, "incremental_mode": False})
+    assert calls["closed"]
@@ -0,0 +1,206 @@
+"""
+Tests for the streaming search result export encoders
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.services import search_export as search_export_module
+from app.services.project_page_search import PageListCursor
+from app.services.search_export import (
+    InvalidExportCursorError,
+    SearchExportFilters,
+    SearchExportFormat,
+    SearchExportService,
+    parse_export_cursor,
+)
+
+
+def _rows(count, start=0):
+    return [
+        {
+            "project_page_id": uuid.UUID(int=i + 1),
+            "project_id": 7,
+            "page_id": uuid.UUID(int=1000 + i),
+            "url": f"https://example.com/{i}",
+            "unix_timestamp": 20240101000000 + i,
+            "capture_date": datetime(2024, 1, 1, tzinfo=timezone.utc),
+            "title": f"Page, \"{i}\"",
+            "tags": ["a", "b"],
+            "is_starred": i % 2 == 0,
+            "quality_score": 0.5,
+            "extracted_text": "body\nwith newline",
+        }
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Replace the DB cursor with two in-memory batches"""
+    data = [_rows(3), _rows(2, start=3)]
+    seen = {}
+
+    async def fake_iter_batches(db, user_id, filters, after=None, batch_size=None):
+        seen["after"] = after
+        for batch in data:
+            yield batch
+
+    monkeypatch.setattr(SearchExportService, "iter_batches", staticmethod(fake_iter_batches))
+    return seen
+
+
+async def _collect(export_format, compress=False, after=None, stats=None):
+    chunks = []
+    async for chunk in SearchExportService.stream_export(
+        None, 1, SearchExportFilters(), export_format, after=after, compress=compress, stats=stats
+    ):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@pytest.mark.asyncio
+async def test_jsonl_export_streams_every_row(batches):
+    stats = {}
+    data = await _collect(SearchExportFormat.JSONL, stats=stats)
+    lines = data.decode().splitlines()
+    assert len(lines) == 5
+    first = json.loads(lines[0])
+    assert first["project_page_id"] == str(uuid.UUID(int=1))
+    assert first["tags"] == ["a", "b"]
+    assert first["capture_date"].startswith("2024-01-01")
+    assert stats == {"rows": 5, "last_project_page_id": str(uuid.UUID(int=5))}
+
+
+@pytest.mark.asyncio
+async def test_csv_export_has_single_header_and_escapes(batches):
+    data = await _collect(SearchExportFormat.CSV)
+    rows = list(csv.reader(io.StringIO(data.decode())))
+    assert rows[0][0] == "project_page_id"
+    assert len(rows) == 6
+    header = rows[0]
+    assert rows[1][header.index("title")] == 'Page, "0"'
+    assert rows[1][header.index("extracted_text")] == "body\nwith newline"
+
+
+@pytest.mark.asyncio
+async def test_resumed_csv_export_omits_header(batches):
+    after = uuid.UUID(int=2)
+    data = await _collect(SearchExportFormat.CSV, after=after)
+    rows = list(csv.reader(io.StringIO(data.decode())))
+    assert rows[0][0] != "project_page_id"
+    assert batches["after"] == after
+
+
+@pytest.mark.asyncio
+async def test_gzip_compression_roundtrip(batches):
+    data = await _collect(SearchExportFormat.JSONL, compress=True)
+    assert len(gzip.decompress(data).decode().splitlines()) == 5
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_is_readable(batches):
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = await _collect(SearchExportFormat.PARQUET, compress=True)
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 5
+    assert table.column("tags").to_pylist()[0] == ["a", "b"]
+
+
+def test_parse_export_cursor_accepts_uuid_and_token():
+    page_id = uuid.uuid4()
+    assert parse_export_cursor(str(page_id)) == page_id
+    assert parse_export_cursor(PageListCursor(project_page_id=page_id).encode()) == page_id
+    assert parse_export_cursor(None) is None
+    with pytest.raises(InvalidExportCursorError):
+        parse_export_cursor("garbage")
+
+
+def test_export_path_suffixes():
+    path = SearchExportService.export_path(3, "job", SearchExportFormat.CSV, compress=True)
+    assert path.name == "job.csv.gz"
+    path = SearchExportService.export_path(3, "job", SearchExportFormat.PARQUET, compress=True)
+    assert path.name == "job.parquet"
+
+
+@pytest.mark.asyncio
+async def test_http_stream_owns_its_session(batches, monkeypatch):
+    events = []
+
+    class TrackedSession:
+        async def __aenter__(self):
+            events.append("open")
+            return self
+
+        async def __aexit__(self, *exc):
+            events.append("close")
+
+    monkeypatch.setattr(search_export_module, "AsyncSessionLocal", TrackedSession)
+    stream = SearchExportService.stream_export_in_session(1, SearchExportFilters(), SearchExportFormat.JSONL)
+    assert events == []
+    chunks = []
+    async for chunk in stream:
+        # The session stays open until the last chunk has been sent
+        assert events == ["open"]
+        chunks.append(chunk)
+    assert events == ["open", "close"]
+    assert len(b"".join(chunks).decode().splitlines()) == 5
+
+
+def test_expired_export_files_are_purged(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_EXPORT_DIR", str(tmp_path))
+    fresh = SearchExportService.export_path(1, "fresh", SearchExportFormat.JSONL, compress=False)
+    old = SearchExportService.export_path(2, "old", SearchExportFormat.CSV, compress=True)
+    stale_partial = old.with_name("dead.jsonl.partial")
+    for path in (fresh, old, stale_partial):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    expired = time.time() - (settings.SEARCH_EXPORT_TTL_HOURS + 1) * 3600
+    os.utime(old, (expired, expired))
+    os.utime(stale_partial, (expired, expired))
+
+    assert SearchExportService.purge_expired_exports() == 2
+    assert fresh.exists()
+    # The emptied user directory goes too
+    assert not old.parent.exists()
+
+
+@pytest.mark.asyncio
+async def test_export_job_status_requires_a_recorded_owner(monkeypatch, tmp_path):
+    from fastapi import HTTPException
+    from app.api.v1.endpoints import search as search_endpoints
+
+    monkeypatch.setattr(settings, "SEARCH_EXPORT_DIR", str(tmp_path))
+    jobs = {
+        "queued": {"info": {"user_id": 1}, "kwargs": None},
+        "failed": {"info": RuntimeError("boom"), "kwargs": {"user_id": 1}},
+        "unknown": {"info": None, "kwargs": None},
+    }
+
+    class FakeAsyncResult:
+        def __init__(self, job_id, app=None):
+            self.info = jobs[job_id]["info"]
+            self.kwargs = jobs[job_id]["kwargs"]
+            self.status = "FAILURE" if isinstance(self.info, Exception) else "PENDING"
+            self.result = self.info
+
+        def failed(self):
+            return self.status == "FAILURE"
+
+    monkeypatch.setattr(search_endpoints, "AsyncResult", FakeAsyncResult)
+    owner, other = type("U", (), {"id": 1}), type("U", (), {"id": 2})
+
+    assert (await search_endpoints.get_export_job("queued", owner))["status"] == "PENDING"
+    assert (await search_endpoints.get_export_job("failed", owner))["error"] == "boom"
+    for job_id, user in (("queued", other), ("failed", other), ("unknown", owner)):
+        with pytest.raises(HTTPException) as exc:
+            await search_endpoints.get_export_job(job_id, user)
+        assert exc.value.status_code == 404
@@ -0,0 +1,178 @@
+"""
+Tests for batched search history recording and prefix-indexed suggestions
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.library import SearchHistory, SearchSuggestion
+from app.services.search_suggestions import (
+    SearchEvent,
+    SearchSuggestionService,
+    decay_weight,
+    decayed_frequency,
+)
+from tests.conftest import create_tables
+
+
+@pytest_asyncio.fixture
+async def engine(memory_engine):
+    await create_tables(memory_engine, SearchHistory, SearchSuggestion)
+    return memory_engine
+
+
+@pytest_asyncio.fixture
+async def service(engine):
+    service = SearchSuggestionService(session_factory=lambda: AsyncSession(engine, expire_on_commit=False))
+    yield service
+    await service.shutdown()
+
+
+async def _suggestions(engine, user_id):
+    async with AsyncSession(engine) as db:
+        rows = await db.execute(select(SearchSuggestion).where(SearchSuggestion.user_id == user_id))
+        return {s.suggestion_text: s for s in rows.scalars().all()}
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_batches_and_folded(engine, service):
+    for query in ["Climate Policy", "climate  policy", "climate policy", "ab", "harbour expansion"]:
+        assert service.record(SearchEvent(user_id=1, query_text=query, project_id=7))
+    service.record(SearchEvent(user_id=2, query_text="climate policy"))
+
+    async with AsyncSession(engine) as db:
+        assert (await db.execute(select(func.count()).select_from(SearchHistory))).scalar() == 0
+
+    assert await service.flush() == 6
+
+    async with AsyncSession(engine) as db:
+        assert (await db.execute(select(func.count()).select_from(SearchHistory))).scalar() == 6
+        rows = (await db.execute(
+            select(SearchSuggestion).where(SearchSuggestion.user_id == 1).order_by(SearchSuggestion.suggestion_text)
+        )).scalars().all()
+    assert [(s.suggestion_text, s.frequency, s.related_projects) for s in rows] == [
+        ("climate policy", 3, [7]),
+        ("harbour expansion", 1, [7]),
+    ]
+
+    # A later batch adds to the existing rows
+    service.record(SearchEvent(user_id=1, query_text="climate policy"))
+    await service.flush()
+    suggestion = (await _suggestions(engine, 1))["climate policy"]
+    assert suggestion.frequency == 4
+    assert decayed_frequency(suggestion.score) == pytest.approx(4, rel=0.01)
+
+
+@pytest.mark.asyncio
+async def test_older_searches_count_less(engine, service):
+    now = datetime.utcnow()
+    old = now - timedelta(days=settings.SEARCH_SUGGESTION_HALF_LIFE_DAYS * 3)
+    for _ in range(4):
+        service.record(SearchEvent(user_id=1, query_text="port strike", created_at=old))
+    service.record(SearchEvent(user_id=1, query_text="port authority", created_at=now))
+    service.record(SearchEvent(user_id=1, query_text="port authority", created_at=now))
+    await service.flush()
+
+    async with AsyncSession(engine) as db:
+        suggestions = await service.suggest(db, 1, "port", 10)
+    assert [s.suggestion_text for s in suggestions] == ["port authority", "port strike"]
+    assert suggestions[0].score == pytest.approx(2, rel=0.01)
+    assert suggestions[1].score == pytest.approx(4 / 8, rel=0.01)
+    assert suggestions[1].frequency == 4
+
+
+@pytest.mark.asyncio
+async def test_typeahead_is_served_from_the_prefix_index(engine, service):
+    async with AsyncSession(engine) as db:
+        db.add_all(
+            SearchSuggestion(
+                user_id=1, suggestion_text=f"topic {i:04d}", suggestion_type="query",
+                display_text=f"Topic {i:04d}", score=float(i), frequency=1,
+            )
+            for i in range(3000)
+        )
+        await db.commit()
+
+        first = await service.suggest(db, 1, "topic 12", 5)
+        assert [s.suggestion_text for s in first] == [f"topic 12{i}" for i in (99, 98, 97, 96, 95)]
+
+        # Unflushed searches from this process are visible immediately
+        service.record(SearchEvent(user_id=1, query_text="topic 1200"))
+        service.record(SearchEvent(user_id=1, query_text="Topical news"))
+        assert [s.suggestion_text for s in await service.suggest(db, 1, "topica", 5)] == ["topical news"]
+
+        started = time.perf_counter()
+        for i in range(1000):
+            await service.suggest(db, 1, f"topic {i % 30}", 10)
+        assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+@pytest.mark.asyncio
+async def test_truncated_indexes_fall_back_to_a_prefix_query(engine, service, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_SUGGESTION_INDEX_MAX_PER_USER", 10)
+    async with AsyncSession(engine) as db:
+        db.add_all(
+            SearchSuggestion(
+                user_id=1, suggestion_text=text, suggestion_type="query",
+                display_text=text.title(), score=score, frequency=1,
+            )
+            for text, score in [(f"popular {i}", 100.0 + i) for i in range(10)] + [("rare_100%", 1.0), ("rarely", 0.5)]
+        )
+        await db.commit()
+
+        suggestions = await service.suggest(db, 1, "rare_", 5)
+    # The LIKE wildcard characters in the prefix are escaped
+    assert [s.suggestion_text for s in suggestions] == ["rare_100%"]
+
+
+@pytest.mark.asyncio
+async def test_background_writer_flushes_on_interval(engine, service, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_HISTORY_FLUSH_INTERVAL_SECONDS", 0.05)
+    service.record(SearchEvent(user_id=3, query_text="flood defences"))
+    await asyncio.sleep(0.3)
+    assert service.stats()["written"] == 1
+    assert "flood defences" in await _suggestions(engine, 3)
+
+
+def test_decay_weight_halves_per_half_life():
+    now = datetime.utcnow()
+    earlier = now - timedelta(days=settings.SEARCH_SUGGESTION_HALF_LIFE_DAYS)
+    assert decay_weight(earlier) / decay_weight(now) == pytest.approx(0.5)
+
+
+def test_migration_rescales_with_the_service_half_life_and_epoch(monkeypatch):
+    import importlib.util
+    from pathlib import Path
+
+    from app.services.search_suggestions import DECAY_EPOCH
+
+    path = Path(__file__).parent.parent / "alembic" / "versions" / "add_search_suggestion_prefix_index.py"
+    spec = importlib.util.spec_from_file_location("add_search_suggestion_prefix_index", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    class _Op:
+        statements = []
+
+        def execute(self, sql):
+            self.statements.append(sql)
+
+        def get_context(self):
+            return self
+
+        def autocommit_block(self):
+            from contextlib import nullcontext
+            return nullcontext()
+
+    op = _Op()
+    monkeypatch.setattr(migration, "op", op)
+    monkeypatch.setattr(settings, "SEARCH_SUGGESTION_HALF_LIFE_DAYS", 7.0)
+    migration.upgrade()
+    assert f"/ {7.0 * 86400}" in op.statements[0]
+    assert migration.DECAY_EPOCH == DECAY_EPOCH.strftime("%Y-%m-%d %H:%M:%S")
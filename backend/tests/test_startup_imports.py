@@ -0,0 +1,106 @@
+"""
+Tests for deferred heavy imports, import profiling and per-queue worker imports
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.import_profile import first_party_costs, format_report, parse_importtime
+from app.core.lazy_imports import module_available, optional_import, require_module
+from app.tasks.celery_app import ALL_TASK_MODULES, task_modules_for_queues
+from app.tasks.worker_bootstrap import preloads_for_queues
+
+BACKEND = Path(__file__).resolve().parents[1]
+HEAVY = ("spacy", "pandas", "pyarrow", "trafilatura", "dateparser", "duckdb", "sklearn", "sentence_transformers")
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:      1000 |       1000 |     _heavy_core
+import time:      5000 |       6000 |   heavydep
+import time:        50 |         50 |     app.models.thing
+import time:       200 |        250 |   app.services.slow
+import time:        30 |         30 |   json
+import time:      1000 |       7280 | app.api.endpoint
+import time:        20 |         20 | os
+"""
+
+
+def _loaded_after_import(module: str):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return [name for name in result.stdout.strip().splitlines()[-1].split(",") if name] if result.stdout.strip() else []
+
+
+@pytest.mark.parametrize("module", [
+    "app.services.intelligent_content_extractor",
+    "app.services.extraction_service",
+    "app.services.parquet_pipeline",
+    "app.services.search_export",
+    "app.services.duckdb_service",
+    "app.services.semantic_search",
+    "app.services.topic_modeling",
+])
+def test_services_defer_heavy_dependencies(module):
+    assert _loaded_after_import(module) == []
+
+
+def test_optional_import_accessors():
+    assert module_available("json")
+    assert not module_available("chrono_no_such_module")
+    assert optional_import("chrono_no_such_module") is None
+    assert optional_import("json") is sys.modules["json"]
+    with pytest.raises(ImportError, match="Widget export requires the optional dependency 'chrono_no_such_module'"):
+        require_module("chrono_no_such_module", "Widget export")
+
+
+def test_importtime_tree_attributes_third_party_cost_to_first_party_importers():
+    roots = parse_importtime(IMPORTTIME)
+    assert [root.name for root in roots] == ["app.api.endpoint", "os"]
+    endpoint = roots[0]
+    assert [child.name for child in endpoint.children] == ["heavydep", "app.services.slow", "json"]
+    assert endpoint.children[0].children[0].name == "_heavy_core"
+
+    costs = {record.name: deps for record, deps in first_party_costs(roots)}
+    assert costs["app.api.endpoint"] == {"heavydep": 6000, "json": 30}
+    assert costs["app.services.slow"] == {}
+    assert "app.models.thing" in costs
+
+    report = format_report("app.api.endpoint", roots, top=2).splitlines()
+    # Sub-millisecond packages are left out
+    assert report[2].endswith("app.api.endpoint (heavydep 6ms)")
+    assert report[3].endswith("app.services.slow")
+
+
+def test_workers_import_only_their_queues_task_modules(monkeypatch):
+    assert task_modules_for_queues([]) == ALL_TASK_MODULES
+    assert task_modules_for_queues(["indexing"]) == ["app.tasks.index_tasks", "app.tasks.meilisearch_sync"]
+    assert task_modules_for_queues(["quick", "indexing"]) == [
+        "app.tasks.project_tasks", "app.tasks.index_tasks", "app.tasks.meilisearch_sync"
+    ]
+    assert task_modules_for_queues(["backup"]) == []
+    # An unknown queue keeps the worker safe by importing everything
+    assert task_modules_for_queues(["indexing", "custom"]) == ALL_TASK_MODULES
+
+    monkeypatch.setattr(settings, "CELERY_WORKER_PRELOAD", ["spacy", "trafilatura"])
+    assert preloads_for_queues([]) == ["spacy", "trafilatura"]
+    assert preloads_for_queues(["indexing", "quick"]) == []
+    assert preloads_for_queues(["indexing", "scraping"]) == ["spacy", "trafilatura"]
+
+
+def test_disabled_routers_are_not_imported():
+    code = (
+        "import sys; from app.api.v1 import api; "
+        "router = api.build_api_router([name for name, _, _ in api.ROUTERS if name != 'health']); "
+        "print(len(router.routes) > 0, 'app.api.v1.endpoints.parquet_pipeline' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, timeout=120,
+        env={**os.environ, "API_DISABLED_ROUTERS": '["parquet_pipeline", "analytics_export"]'},
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip().splitlines()[-1] == "True False"
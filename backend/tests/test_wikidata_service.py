@@ -0,0 +1,225 @@
+"""
+Tests for batched, cached Wikidata resolution against a local stand-in API
+"""
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import app.models  # noqa: F401 - configures the entity model relationships
+from app.core.config import settings
+from app.models.entities import CanonicalEntity, EntityType
+from app.services.wikidata_service import WikidataCache, WikidataService
+
+
+def _item(qid, label, description="", claims=None):
+    return {
+        "id": qid,
+        "labels": {"en": {"language": "en", "value": label}},
+        "descriptions": {"en": {"language": "en", "value": description}} if description else {},
+        "claims": claims or {},
+    }
+
+
+def _claim(value, kind):
+    return [{"mainsnak": {"snaktype": "value", "datavalue": {"value": value, "type": kind}}}]
+
+
+def _item_ref(qid):
+    return _claim({"entity-type": "item", "id": qid}, "wikibase-entityid")
+
+
+ENTITIES = {
+    "Q5": _item("Q5", "human"),
+    "Q43229": _item("Q43229", "organization"),
+    "Q515": _item("Q515", "city"),
+    "Q145": _item("Q145", "United Kingdom"),
+    "Q42": _item("Q42", "Douglas Adams", "English writer and humorist", {
+        "P31": _item_ref("Q5"),
+        "P27": _item_ref("Q145"),
+        "P17": _item_ref("Q145"),
+        "P569": _claim({"time": "+1952-03-11T00:00:00Z"}, "time"),
+        "P570": _claim({"time": "+2001-05-11T00:00:00Z"}, "time"),
+        "P18": _claim("Douglas adams portrait.jpg", "string"),
+    }),
+    "Q84": _item("Q84", "London", "capital of the United Kingdom", {
+        "P31": _item_ref("Q515"),
+        "P17": _item_ref("Q145"),
+        "P625": _claim({"latitude": 51.5, "longitude": -0.1275}, "globecoordinate"),
+    }),
+    "Q9531": _item("Q9531", "BBC", "British public service broadcaster", {
+        "P31": _item_ref("Q43229"),
+        "P17": _item_ref("Q145"),
+        "P571": _claim({"time": "+1922-10-18T00:00:00Z"}, "time"),
+        "P856": _claim("https://www.bbc.co.uk", "string"),
+    }),
+    # Searches for "London" also find this person
+    "Q1": _item("Q1", "Jack London", "American writer", {"P31": _item_ref("Q5")}),
+}
+for n in range(1000, 1120):
+    ENTITIES[f"Q{n}"] = _item(f"Q{n}", f"Thing {n}", claims={"P31": _item_ref("Q43229")})
+
+SEARCH = {
+    "douglas adams": ["Q42"],
+    "london": ["Q84", "Q1"],
+    "bbc": ["Q9531", "Q404"],
+}
+
+
+class WikidataStandIn(BaseHTTPRequestHandler):
+    calls = Counter()
+    batches = []
+    fail = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        action = params.get("action")
+        type(self).calls[action] += 1
+        if type(self).fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if action == "wbsearchentities":
+            ids = SEARCH.get(params["search"].lower(), [])[:int(params.get("limit", 10))]
+            body = {"search": [
+                {"id": qid, "label": ENTITIES.get(qid, {}).get("labels", {}).get("en", {}).get("value", qid),
+                 "description": ENTITIES.get(qid, {}).get("descriptions", {}).get("en", {}).get("value", ""),
+                 "concepturi": f"http://www.wikidata.org/entity/{qid}"}
+                for qid in ids
+            ]}
+        else:
+            ids = params["ids"].split("|")
+            type(self).batches.append(len(ids))
+            props = params.get("props", "").split("|")
+            body = {"entities": {}}
+            for qid in ids:
+                entity = ENTITIES.get(qid)
+                if entity is None:
+                    body["entities"][qid] = {"id": qid, "missing": ""}
+                else:
+                    body["entities"][qid] = {key: value for key, value in entity.items()
+                                             if key == "id" or key in props}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def api_url():
+    WikidataStandIn.calls = Counter()
+    WikidataStandIn.batches = []
+    WikidataStandIn.fail = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WikidataStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "wikidata.sqlite3")
+
+
+def _canonical(name, entity_type, description=""):
+    return CanonicalEntity(
+        entity_type=entity_type, primary_name=name, normalized_name=name.lower(), description=description
+    )
+
+
+@pytest.mark.asyncio
+async def test_entities_are_fetched_in_batches_and_cached_persistently(api_url, cache_path):
+    ids = [f"Q{n}" for n in range(1000, 1120)] + ["Q42", "Q404"]
+    async with WikidataService(api_url, WikidataCache(cache_path)) as wd:
+        details = await wd.get_entities(ids)
+
+    # 122 entities in batches of 50, then the three referenced items' labels in one more call
+    assert sorted(WikidataStandIn.batches[:3]) == [22, 50, 50]
+    assert WikidataStandIn.batches[3:] == [3]
+    assert details["Q1000"]["types"] == ["organization"]
+    assert details["Q404"] == {}
+    assert details["Q42"] == {
+        "types": ["human"],
+        "birth_date": "1952-03-11T00:00:00Z",
+        "death_date": "2001-05-11T00:00:00Z",
+        "inception_date": None,
+        "dissolved_date": None,
+        "country": "United Kingdom",
+        "coordinates": None,
+        "website": None,
+        "image": "http://commons.wikimedia.org/wiki/Special:FilePath/Douglas%20adams%20portrait.jpg",
+    }
+
+    # Another process on the same host reads the same cache file
+    async with WikidataService(api_url, WikidataCache(cache_path)) as wd:
+        assert await wd.get_entities(ids) == details
+        assert wd.requests_made == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_enrichment_shares_searches_and_lookups(api_url, cache_path, monkeypatch):
+    monkeypatch.setattr(settings, "ENTITY_LINKING_MAX_CONCURRENT", 2)
+    entities = [
+        _canonical("Douglas Adams", EntityType.PERSON),
+        _canonical("London", EntityType.LOCATION),
+        _canonical("BBC", EntityType.ORGANIZATION, "broadcaster"),
+        _canonical("london", EntityType.LOCATION),
+        _canonical("Nobody Known", EntityType.PERSON),
+    ]
+    async with WikidataService(api_url, WikidataCache(cache_path)) as wd:
+        enrichments = await wd.enrich_entities(entities)
+
+    assert WikidataStandIn.calls["wbsearchentities"] == 4
+    # Every candidate of every search is fetched in one batch, their referenced items in another
+    assert WikidataStandIn.batches == [5, 4]
+
+    adams, london, bbc, london_again, nobody = enrichments
+    assert adams["wikidata_id"] == "Q42"
+    assert adams["attributes"]["birth_date"] == "1952-03-11T00:00:00Z"
+    assert adams["attributes"]["nationality"] == "United Kingdom"
+    # The location type filter rules out Jack London
+    assert london["wikidata_id"] == "Q84"
+    assert london["attributes"]["coordinates"] == "Point(-0.1275 51.5)"
+    assert london_again["wikidata_id"] == "Q84"
+    assert bbc["attributes"]["founded"] == "1922-10-18T00:00:00Z"
+    assert bbc["attributes"]["website"] == "https://www.bbc.co.uk"
+    assert bbc["external_ids"] == {"wikidata": "Q9531"}
+    assert nobody == {}
+
+    # The single-entity path matches the bulk one and is served from the cache
+    async with WikidataService(api_url, WikidataCache(cache_path)) as wd:
+        assert await wd.enrich_canonical_entity(entities[0]) == adams
+        assert wd.requests_made == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_requests_are_not_cached(api_url, cache_path):
+    WikidataStandIn.fail = True
+    async with WikidataService(api_url, WikidataCache(cache_path)) as wd:
+        assert await wd.search_entities("Douglas Adams") == []
+        assert await wd.get_entities(["Q42"]) == {}
+
+    WikidataStandIn.fail = False
+    async with WikidataService(api_url, WikidataCache(cache_path)) as wd:
+        results = await wd.search_entities("Douglas Adams")
+    assert [result["wikidata_id"] for result in results] == ["Q42"]
+    assert results[0]["details"]["country"] == "United Kingdom"
+
+
+def test_cache_entries_expire(cache_path):
+    cache = WikidataCache(cache_path)
+    cache.put_many("entity", {"Q1:en": {"label": "a"}}, ttl=60)
+    cache.put_many("entity", {"Q2:en": None}, ttl=-1)
+    assert cache.get_many("entity", ["Q1:en", "Q2:en", "Q3:en"]) == {"Q1:en": {"label": "a"}}
+    assert cache.purge_expired() == 1
+    cache.close()
@@ -0,0 +1,36 @@
+"""
+Tests for the Celery worker bootstrap
+"""
+import billiard.pool
+
+from app.tasks import worker_bootstrap
+
+
+def test_preload_times_each_resource_and_tolerates_failures(monkeypatch):
+    loaded = []
+
+    def broken():
+        raise OSError("model missing")
+
+    monkeypatch.setattr(worker_bootstrap, "PRELOADERS", {"ok": lambda: loaded.append("ok"), "broken": broken})
+    timings = worker_bootstrap.preload_shared_resources(["ok", "broken", "unknown"])
+    assert loaded == ["ok"]
+    assert list(timings) == ["ok"]
+
+
+def test_task_engine_is_created_once_per_process(monkeypatch):
+    monkeypatch.setattr(worker_bootstrap, "_task_engine", None)
+    engine = worker_bootstrap.get_task_engine()
+    assert worker_bootstrap.get_task_engine() is engine
+    # A forked child gets its own engine
+    monkeypatch.setattr(worker_bootstrap, "_task_engine_pid", -1)
+    assert worker_bootstrap.get_task_engine() is not engine
+
+
+def test_process_init_switches_recycling_to_private_memory(monkeypatch):
+    monkeypatch.setattr(billiard.pool, "mem_rss", billiard.pool.mem_rss)
+    monkeypatch.setattr(worker_bootstrap, "_reset_inherited_engines", lambda: None)
+    monkeypatch.setattr(worker_bootstrap, "get_task_engine", lambda: None)  # connect fails and is logged
+    worker_bootstrap.on_worker_process_init()
+    assert billiard.pool.mem_rss is worker_bootstrap.private_memory_kb
+    assert 0 < worker_bootstrap.private_memory_kb()